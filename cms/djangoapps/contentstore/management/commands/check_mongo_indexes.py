@@ -0,0 +1,121 @@
+"""
+Script for checking that the indexes listed in mongo_indexes.md are applied
+"""
+import re
+
+import pymongo
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import load_function, loc_mapper
+from xmodule.modulestore.mongo import MongoModuleStore
+
+# A section of mongo_indexes.md: the name of a collection, underlined
+SECTION_RE = re.compile(r'^(?P<collection>\S+):\s*\n=+\s*$', re.MULTILINE)
+INDEX_RE = re.compile(r'ensureIndex\((?P<spec>\{[^}]*\})')
+KEY_RE = re.compile(r"'(?P<field>[^']+)'\s*:\s*(?P<direction>-?1)")
+
+
+def parse_index_doc(text):
+    """
+    Returns the indexes documented in `text`, the content of mongo_indexes.md,
+    as a list of (collection name, index key) pairs, where each index key is a
+    list of (field, direction) pairs.  Only the code blocks of each collection's
+    section are read.
+    """
+    indexes = []
+    sections = list(SECTION_RE.finditer(text))
+    for section, next_section in zip(sections, sections[1:] + [None]):
+        body = text[section.end():next_section.start() if next_section else len(text)]
+        for block in body.split('```')[1::2]:
+            for index in INDEX_RE.finditer(block):
+                key = [(match.group('field'), int(match.group('direction')))
+                       for match in KEY_RE.finditer(index.group('spec'))]
+                indexes.append((section.group('collection'), key))
+    return indexes
+
+
+def is_applied(collection, key):
+    """
+    Returns whether `collection` has an index on exactly `key`, in that order.
+    """
+    return any(
+        [(field, int(direction)) for field, direction in info['key']] == key
+        for info in collection.index_information().itervalues()
+    )
+
+
+def modulestore_doc_store_configs():
+    """
+    Returns the distinct DOC_STORE_CONFIGs of the Mongo modulestores of
+    settings.MODULESTORE, including those behind a MixedModuleStore.
+    """
+    store_settings = []
+    for store in settings.MODULESTORE.values():
+        if 'stores' in store['OPTIONS']:
+            store_settings.extend(store['OPTIONS']['stores'].values())
+        else:
+            store_settings.append(store)
+
+    configs = []
+    for store in store_settings:
+        # only the Mongo modulestores have a collection of Locations
+        if issubclass(load_function(store['ENGINE']), MongoModuleStore) and store['DOC_STORE_CONFIG'] not in configs:
+            configs.append(store['DOC_STORE_CONFIG'])
+    return configs
+
+
+def open_collection(doc_store_config):
+    """
+    Returns the collection of a Mongo modulestore's DOC_STORE_CONFIG.  It is
+    opened directly, since constructing the modulestore would ensure its indexes.
+    """
+    options = dict(doc_store_config)
+    db, collection = options.pop('db'), options.pop('collection')
+    user, password = options.pop('user', None), options.pop('password', None)
+    database = pymongo.database.Database(pymongo.MongoClient(**options), db)
+    if user is not None and password is not None:
+        database.authenticate(user, password)
+    return database[collection]
+
+
+def documented_collections():
+    """
+    Returns a dict mapping each collection name of mongo_indexes.md to the
+    collections it stands for in this deployment.
+    """
+    return {
+        'modulestore': [open_collection(config) for config in modulestore_doc_store_configs()],
+        'location_map': [loc_mapper().location_map],
+        'fs.files': [contentstore().fs_files],
+    }
+
+
+#
+# To run from command line: ./manage.py cms --settings dev check_mongo_indexes
+#
+class Command(BaseCommand):
+    """
+    Checks that the indexes listed in mongo_indexes.md are applied to the
+    collections of this deployment, and fails if any is missing
+    """
+    help = 'Check that the indexes listed in mongo_indexes.md are applied'
+
+    def handle(self, *args, **options):
+        with open(settings.REPO_ROOT / 'mongo_indexes.md') as index_doc:
+            indexes = parse_index_doc(index_doc.read())
+
+        collections = documented_collections()
+        missing = []
+        for collection_name, key in indexes:
+            for collection in collections.get(collection_name, []):
+                applied = is_applied(collection, key)
+                self.stdout.write(u'{0} {1}: {2}\n'.format(
+                    collection.full_name, key, 'ok' if applied else 'MISSING'
+                ))
+                if not applied:
+                    missing.append((collection.full_name, key))
+
+        if missing:
+            raise CommandError(u'{0} of the indexes of mongo_indexes.md are missing'.format(len(missing)))
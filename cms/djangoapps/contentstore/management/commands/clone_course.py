@@ -7,7 +7,7 @@ from xmodule.modulestore.django import modulestore
 from xmodule.contentstore.django import contentstore
 from xmodule.course_module import CourseDescriptor
 from student.roles import CourseInstructorRole, CourseStaffRole
-from xmodule.modulestore import Location
+from contentstore.models import CourseSummary
 
 
 #
@@ -28,18 +28,16 @@ class Command(BaseCommand):
         mstore = modulestore('direct')
         cstore = contentstore()
 
-        course_id_dict = Location.parse_course_id(dest_course_id)
-        mstore.ignore_write_events_on_courses.append('{org}/{course}'.format(**course_id_dict))
-
         print("Cloning course {0} to {1}".format(source_course_id, dest_course_id))
 
         source_location = CourseDescriptor.id_to_location(source_course_id)
         dest_location = CourseDescriptor.id_to_location(dest_course_id)
 
-        if clone_course(mstore, cstore, source_location, dest_location):
-            # be sure to recompute metadata inheritance after all those updates
-            mstore.refresh_cached_metadata_inheritance_tree(dest_location)
+        # recompute metadata inheritance, and signal the update, once after all those updates
+        with mstore.bulk_write_operations():
+            cloned = clone_course(mstore, cstore, source_location, dest_location)
 
+        if cloned:
             print("copying User permissions...")
             # purposely avoids auth.add_user b/c it doesn't have a caller to authorize
             CourseInstructorRole(dest_location).add_users(
@@ -48,3 +46,5 @@ class Command(BaseCommand):
             CourseStaffRole(dest_location).add_users(
                 *CourseStaffRole(source_location).users_with_role()
             )
+
+            CourseSummary.index_course(mstore.get_course(dest_course_id))
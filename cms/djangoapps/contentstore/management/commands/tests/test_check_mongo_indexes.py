@@ -0,0 +1,88 @@
+"""
+Tests for the check_mongo_indexes management command
+"""
+from django.conf import settings
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import Mock, patch
+
+from contentstore.management.commands.check_mongo_indexes import (
+    parse_index_doc, is_applied, modulestore_doc_store_configs, documented_collections
+)
+
+DOC_STORE_CONFIG = {'host': 'localhost', 'db': 'test_xmodule', 'collection': 'modulestore'}
+OTHER_DOC_STORE_CONFIG = {'host': 'localhost', 'db': 'test_xmodule', 'collection': 'other_modulestore'}
+
+
+class CheckMongoIndexesTestCase(TestCase):
+    """
+    Tests of reading mongo_indexes.md and of checking indexes against it
+    """
+    def test_parse_index_doc(self):
+        text = (
+            "Some prose with ```ensureIndex({'ignored': 1})```\n\n"
+            "modulestore:\n============\n\n"
+            "```\nensureIndex({'_id.org': 1, '_id.course': 1, '_id.category': 1})\n```\n\n"
+            "fs.files:\n=========\n\n"
+            "```\nensureIndex({'displayname': -1})\n```\n"
+        )
+        self.assertEqual(parse_index_doc(text), [
+            ('modulestore', [('_id.org', 1), ('_id.course', 1), ('_id.category', 1)]),
+            ('fs.files', [('displayname', -1)]),
+        ])
+
+    def test_repo_index_doc(self):
+        with open(settings.REPO_ROOT / 'mongo_indexes.md') as index_doc:
+            indexes = parse_index_doc(index_doc.read())
+        self.assertIn(('modulestore', [('_id.org', 1), ('_id.course', 1), ('_id.category', 1)]), indexes)
+
+    def test_is_applied(self):
+        collection = Mock()
+        collection.index_information.return_value = {
+            '_id_': {'key': [('_id', 1)]},
+            'org_course': {'key': [('_id.org', 1.0), ('_id.course', 1.0)]},
+        }
+        self.assertTrue(is_applied(collection, [('_id.org', 1), ('_id.course', 1)]))
+        self.assertFalse(is_applied(collection, [('_id.course', 1), ('_id.org', 1)]))
+        self.assertFalse(is_applied(collection, [('_id.org', 1)]))
+
+    @override_settings(MODULESTORE={
+        'default': {
+            'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
+            'OPTIONS': {
+                'mappings': {},
+                'stores': {
+                    'default': {
+                        'ENGINE': 'xmodule.modulestore.draft.DraftModuleStore',
+                        'DOC_STORE_CONFIG': DOC_STORE_CONFIG,
+                        'OPTIONS': {},
+                    },
+                    'xml': {
+                        'ENGINE': 'xmodule.modulestore.xml.XMLModuleStore',
+                        'OPTIONS': {},
+                    },
+                },
+            },
+        },
+        'direct': {
+            'ENGINE': 'xmodule.modulestore.mongo.MongoModuleStore',
+            'DOC_STORE_CONFIG': DOC_STORE_CONFIG,
+            'OPTIONS': {},
+        },
+        'other': {
+            'ENGINE': 'xmodule.modulestore.mongo.MongoModuleStore',
+            'DOC_STORE_CONFIG': OTHER_DOC_STORE_CONFIG,
+            'OPTIONS': {},
+        },
+    })
+    def test_modulestore_collections(self):
+        self.assertItemsEqual(modulestore_doc_store_configs(), [DOC_STORE_CONFIG, OTHER_DOC_STORE_CONFIG])
+
+        # the collections are opened without constructing the modulestores, which would ensure the indexes
+        with patch('xmodule.modulestore.mongo.base.MongoModuleStore.__init__') as modulestore_init:
+            collections = documented_collections()
+            self.assertFalse(modulestore_init.called)
+        self.assertItemsEqual(
+            [collection.full_name for collection in collections['modulestore']],
+            ['test_xmodule.modulestore', 'test_xmodule.other_modulestore']
+        )
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseSummary'
+        db.create_table('contentstore_coursesummary', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('course_id', self.gf('django.db.models.fields.CharField')(unique=True, max_length=255)),
+            ('lower_course_id', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('lower_package_id', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('org', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('course', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('run', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('display_name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('display_org', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('display_number', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('start', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('end', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('course_image_url', self.gf('django.db.models.fields.CharField')(max_length=255, blank=True)),
+            ('studio_url', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('updated', self.gf('django.db.models.fields.DateTimeField')(auto_now=True, blank=True)),
+        ))
+        db.send_create_signal('contentstore', ['CourseSummary'])
+
+
+    def backwards(self, orm):
+        # Deleting model 'CourseSummary'
+        db.delete_table('contentstore_coursesummary')
+
+
+    models = {
+        'contentstore.coursesummary': {
+            'Meta': {'object_name': 'CourseSummary'},
+            'course': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'course_id': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'}),
+            'course_image_url': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'}),
+            'display_name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'display_number': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'display_org': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'end': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lower_course_id': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'lower_package_id': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'org': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'run': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'start': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'studio_url': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'updated': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['contentstore']
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseImportStatus'
+        db.create_table('contentstore_courseimportstatus', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('package_id', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('filename', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('stage', self.gf('django.db.models.fields.IntegerField')(default=0)),
+            ('message', self.gf('django.db.models.fields.TextField')(null=True, blank=True)),
+            ('uploaded', self.gf('django.db.models.fields.BigIntegerField')(null=True, blank=True)),
+            ('updated', self.gf('django.db.models.fields.DateTimeField')(auto_now=True, db_index=True, blank=True)),
+        ))
+        db.send_create_signal('contentstore', ['CourseImportStatus'])
+
+        # Adding unique constraint on 'CourseImportStatus', fields ['package_id', 'filename']
+        db.create_unique('contentstore_courseimportstatus', ['package_id', 'filename'])
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'CourseImportStatus', fields ['package_id', 'filename']
+        db.delete_unique('contentstore_courseimportstatus', ['package_id', 'filename'])
+
+        # Deleting model 'CourseImportStatus'
+        db.delete_table('contentstore_courseimportstatus')
+
+
+    models = {
+        'contentstore.courseimportstatus': {
+            'Meta': {'unique_together': "(('package_id', 'filename'),)", 'object_name': 'CourseImportStatus'},
+            'filename': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'message': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            'package_id': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'stage': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'updated': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'db_index': 'True', 'blank': 'True'}),
+            'uploaded': ('django.db.models.fields.BigIntegerField', [], {'null': 'True', 'blank': 'True'})
+        },
+        'contentstore.coursesummary': {
+            'Meta': {'object_name': 'CourseSummary'},
+            'course': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'course_id': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'}),
+            'course_image_url': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'}),
+            'display_name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'display_number': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'display_org': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'end': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lower_course_id': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'lower_package_id': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'org': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'run': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'start': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'studio_url': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'updated': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['contentstore']
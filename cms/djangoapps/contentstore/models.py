@@ -0,0 +1,112 @@
+"""
+Models for contentstore
+"""
+from django.db import models
+
+from xmodule.contentstore.content import StaticContent
+from xmodule.modulestore import Location
+from xmodule.modulestore.django import loc_mapper
+
+
+class CourseSummary(models.Model):
+    """
+    The few attributes of a course which the Studio course listing shows.
+
+    Listing courses from these rows, rather than from the modulestore, saves
+    loading and instantiating every course the user can access each time the
+    home page is rendered.  The rows are refreshed whenever Studio creates a
+    course or saves its settings and are removed when it deletes a course.
+    """
+    # old style org/course/run id
+    course_id = models.CharField(max_length=255, unique=True)
+    # the ids under which the course roles' groups may have been named, in the
+    # lowercased dotted form in which the course listing reads them back
+    lower_course_id = models.CharField(max_length=255, db_index=True)
+    lower_package_id = models.CharField(max_length=255, db_index=True)
+
+    org = models.CharField(max_length=255)
+    course = models.CharField(max_length=255)
+    run = models.CharField(max_length=255)
+
+    display_name = models.CharField(max_length=255)
+    display_org = models.CharField(max_length=255)
+    display_number = models.CharField(max_length=255)
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    course_image_url = models.CharField(max_length=255, blank=True)
+    # url of the course outline in Studio
+    studio_url = models.CharField(max_length=255)
+
+    updated = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        return self.course_id
+
+    @property
+    def location(self):
+        """
+        The old style location of the course.
+        """
+        return Location('i4x', self.org, self.course, 'course', self.run)
+
+    @classmethod
+    def index_course(cls, course):
+        """
+        Creates or refreshes the summary of the `course` descriptor and returns it.
+        """
+        location = course.location
+        # published = false b/c studio manipulates draft versions not b/c the course isn't pub'd
+        locator = loc_mapper().translate_location(location.course_id, location, False, True)
+        try:
+            summary = cls.objects.get(course_id=location.course_id)
+        except cls.DoesNotExist:
+            summary = cls(course_id=location.course_id)
+
+        summary.lower_course_id = location.course_id.replace('/', '.').lower()
+        summary.lower_package_id = locator.package_id.lower()
+        summary.org = location.org
+        summary.course = location.course
+        summary.run = location.name
+        summary.display_name = course.display_name
+        summary.display_org = course.display_org_with_default
+        summary.display_number = course.display_number_with_default
+        summary.start = course.start
+        summary.end = course.end
+        summary.course_image_url = StaticContent.get_url_path_from_location(
+            StaticContent.compute_location(location.org, location.course, course.course_image)
+        )
+        summary.studio_url = locator.url_reverse('course/', '')
+        summary.save()
+        return summary
+
+    @classmethod
+    def remove_course(cls, course_id):
+        """
+        Drops the summary of the course with the old style `course_id`.
+        """
+        cls.objects.filter(course_id=course_id).delete()
+
+
+class CourseImportStatus(models.Model):
+    """
+    The status of the import of an uploaded course tarball into a course, as
+    reported to the import page, which polls it from any Studio instance
+    while the import task runs.  The row of a tarball is reused when it is
+    uploaded again.
+    """
+    class Meta:
+        unique_together = (('package_id', 'filename'),)
+
+    package_id = models.CharField(max_length=255, db_index=True)
+    filename = models.CharField(max_length=255)
+
+    # one of the stages of contentstore.tasks, negated if the import failed in it
+    stage = models.IntegerField(default=0)
+    message = models.TextField(null=True, blank=True)
+    # bytes of the tarball received so far, while uploading
+    uploaded = models.BigIntegerField(null=True, blank=True)
+
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return u'{0} into {1}: {2}'.format(self.filename, self.package_id, self.stage)
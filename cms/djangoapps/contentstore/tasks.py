@@ -0,0 +1,181 @@
+"""
+Celery tasks for long-running Studio operations.
+
+Course imports run here rather than in the upload request so that a large
+course does not tie up a web worker (or trip the load balancer timeout) while
+it is unpacked and written to the modulestore.  Progress is recorded in the
+database so that any Studio instance can answer the status polls.
+"""
+import datetime
+import logging
+import os
+import shutil
+import tarfile
+from path import path
+from pytz import UTC
+
+from celery import task
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import SuspiciousOperation
+from django.utils.translation import ugettext as _
+
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore import Location
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.xml_importer import import_from_xml
+
+from contentstore.models import CourseImportStatus, CourseSummary
+from extract_tar import safetar_extractall
+from student.roles import CourseInstructorRole, CourseStaffRole
+from student import auth
+
+
+log = logging.getLogger(__name__)
+
+# Import stages, as reported to the import page.  Failures are reported as the
+# negated stage at which they happened.
+IMPORT_UPLOADING = 0
+IMPORT_UNPACKING = 1
+IMPORT_VERIFYING = 2
+IMPORT_UPDATING = 3
+IMPORT_SUCCEEDED = 4
+
+# An import still unpacking, verifying or updating after this long is reported
+# as failed: the worker running it must have died.
+IMPORT_STATUS_TIMEOUT = 60 * 60 * 24
+
+
+def get_import_status(package_id, filename):
+    """
+    Returns the status dict of the import of `filename` into `package_id`:
+    `stage`, `message` and, while uploading, `uploaded` (bytes received so far).
+    Returns None if no import is known.
+    """
+    try:
+        status = CourseImportStatus.objects.get(package_id=package_id, filename=filename)
+    except CourseImportStatus.DoesNotExist:
+        return None
+
+    stage, message = status.stage, status.message
+    if IMPORT_UNPACKING <= stage < IMPORT_SUCCEEDED and \
+            datetime.datetime.now(UTC) - status.updated > datetime.timedelta(seconds=IMPORT_STATUS_TIMEOUT):
+        stage, message = -stage, _('The import did not finish. Please try again.')
+    return {'stage': stage, 'message': message, 'uploaded': status.uploaded}
+
+
+def set_import_status(package_id, filename, stage, message=None, uploaded=None):
+    """
+    Records the status of the import of `filename` into `package_id`.
+    """
+    status, __ = CourseImportStatus.objects.get_or_create(package_id=package_id, filename=filename)
+    status.stage = stage
+    status.message = message
+    status.uploaded = uploaded
+    status.save()
+
+
+def _find_course_xml(directory):
+    """
+    Returns the path of the first directory below `directory` that contains a
+    course.xml file, or None.
+    """
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        if 'course.xml' in filenames:
+            return path(dirpath)
+    return None
+
+
+def _schedule_thumbnails(locations):
+    """
+    Queues the generation of the thumbnails of the assets at `locations`.
+    """
+    generate_thumbnails.delay([location.url() for location in locations])
+
+
+@task()
+def generate_thumbnails(asset_urls):
+    """
+    Generates the thumbnails of the image assets at `asset_urls` (location
+    urls) and links each asset to its thumbnail.
+    """
+    store = contentstore()
+    for asset_url in asset_urls:
+        content = store.find(Location(asset_url), throw_on_not_found=False)
+        if content is None:
+            continue
+        thumbnail_content, thumbnail_location = store.generate_thumbnail(content)
+        if thumbnail_content is not None:
+            store.set_attr(content.location, 'thumbnail_location', list(thumbnail_location))
+
+
+@task()
+def import_olx(user_id, package_id, course_subdir, filename, target_location):
+    """
+    Imports the uploaded course tarball `filename`, found in `course_subdir`
+    of GITHUB_REPO_ROOT, into the course at `target_location` (a location
+    url), and gives the importing user staff and instructor access to it.
+
+    The upload directory is removed once the import is finished, whatever
+    its outcome.
+    """
+    course_dir = path(settings.GITHUB_REPO_ROOT) / course_subdir
+    stage = IMPORT_UNPACKING
+
+    def fail(message):
+        """ Reports the import as failed in the current stage. """
+        log.warning("Import of %s into %s failed: %s", filename, package_id, message)
+        set_import_status(package_id, filename, -stage, message)
+
+    try:
+        set_import_status(package_id, filename, stage)
+        with tarfile.open(course_dir / filename) as tar_file:
+            try:
+                safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
+            except SuspiciousOperation as exc:
+                fail(_('Unsafe tar file. Aborting import.') + u' SuspiciousFileOperation: ' + exc.args[0])
+                return
+
+        stage = IMPORT_VERIFYING
+        set_import_status(package_id, filename, stage)
+        dirpath = _find_course_xml(course_dir)
+        if not dirpath:
+            fail(_('Could not find the course.xml file in the package.'))
+            return
+
+        log.debug('found course.xml at %s', dirpath)
+        if dirpath != course_dir:
+            for fname in os.listdir(dirpath):
+                shutil.move(dirpath / fname, course_dir)
+
+        stage = IMPORT_UPDATING
+        set_import_status(package_id, filename, stage)
+        _module_store, course_items = import_from_xml(
+            modulestore('direct'),
+            settings.GITHUB_REPO_ROOT,
+            [course_subdir],
+            load_error_modules=False,
+            static_content_store=contentstore(),
+            target_location_namespace=Location(target_location),
+            draft_store=modulestore(),
+            schedule_thumbnails=_schedule_thumbnails
+        )
+
+        new_location = course_items[0].location
+        log.debug('new course at %s', new_location)
+
+        user = User.objects.get(id=user_id)
+        auth.add_users(user, CourseInstructorRole(new_location), user)
+        auth.add_users(user, CourseStaffRole(new_location), user)
+        log.debug('created all course groups at %s', new_location)
+
+        CourseSummary.index_course(modulestore('direct').get_course(new_location.course_id))
+
+        set_import_status(package_id, filename, IMPORT_SUCCEEDED)
+
+    except Exception as exception:  # pylint: disable=W0703
+        log.exception("Import of %s into %s failed", filename, package_id)
+        fail(unicode(exception))
+
+    finally:
+        shutil.rmtree(course_dir, ignore_errors=True)
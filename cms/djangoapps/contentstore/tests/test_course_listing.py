@@ -4,12 +4,18 @@ by reversing group name formats.
 """
 import random
 from chrono import Timer
+from mock import patch
 from unittest import skip
 
 from django.contrib.auth.models import Group
 from django.test import RequestFactory
 
-from contentstore.views.course import _accessible_courses_list, _accessible_courses_list_from_groups
+from contentstore.models import CourseSummary
+from contentstore.utils import delete_course_and_groups
+from contentstore.views.course import (
+    _accessible_courses_list, _accessible_courses_list_from_groups,
+    _accessible_course_summaries_from_groups, _all_course_summaries
+)
 from contentstore.tests.utils import AjaxEnabledTestClient
 from student.tests.factories import UserFactory
 from student.roles import CourseInstructorRole, CourseStaffRole
@@ -145,6 +151,45 @@ class TestCourseListing(ModuleStoreTestCase):
         with self.assertRaises(ItemNotFoundError):
             courses_list_by_groups = _accessible_courses_list_from_groups(request)
 
+    def test_course_summaries_from_groups(self):
+        """
+        Test that courses listed by reversing group names are indexed once and then read from the index
+        """
+        request = self.factory.get('/course')
+        request.user = self.user
+
+        course_location = Location(['i4x', 'Org1', 'Course1', 'course', 'Run1'])
+        course = self._create_course_with_access_groups(course_location, 'group_name_with_dots', self.user)
+
+        summaries = _accessible_course_summaries_from_groups(request)
+        self.assertEqual([summary.course_id for summary in summaries], [course.location.course_id])
+        self.assertEqual(summaries[0].display_name, course.display_name)
+        self.assertEqual(summaries[0].location, course.location)
+
+        with patch('contentstore.views.course._course_from_group_course_id') as mock_load_course:
+            summaries = _accessible_course_summaries_from_groups(request)
+        self.assertFalse(mock_load_course.called)
+        self.assertEqual([summary.course_id for summary in summaries], [course.location.course_id])
+
+    def test_all_course_summaries(self):
+        """
+        Test that the global staff listing indexes new courses and follows deleted ones
+        """
+        course_1 = CourseFactory.create(org='Org1', number='Course1', display_name='Run1')
+        course_2 = CourseFactory.create(org='Org2', number='Course2', display_name='Run2')
+
+        summaries = _all_course_summaries()
+        self.assertItemsEqual(
+            [summary.course_id for summary in summaries],
+            [course_1.location.course_id, course_2.location.course_id]
+        )
+        self.assertEqual(CourseSummary.objects.count(), 2)
+
+        delete_course_and_groups(course_2.location.course_id, commit=True)
+        self.assertEqual(CourseSummary.objects.count(), 1)
+        summaries = _all_course_summaries()
+        self.assertEqual([summary.course_id for summary in summaries], [course_1.location.course_id])
+
 
     # Temporarily disabling this test because it caused the following failure intermittently in Jenkins.
     # Perhaps due to a test ordering or cleanup issue?
@@ -17,6 +17,7 @@ from xmodule.modulestore.store_utilities import delete_course
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore.draft import DIRECT_ONLY_CATEGORIES
 from student.roles import CourseInstructorRole, CourseStaffRole
+from contentstore.models import CourseSummary
 
 
 log = logging.getLogger(__name__)
@@ -35,11 +36,13 @@ def delete_course_and_groups(course_id, commit=False):
     module_store = modulestore('direct')
     content_store = contentstore()
 
-    course_id_dict = Location.parse_course_id(course_id)
-    module_store.ignore_write_events_on_courses.append('{org}/{course}'.format(**course_id_dict))
-
     loc = CourseDescriptor.id_to_location(course_id)
-    if delete_course(module_store, content_store, loc, commit):
+    # refresh the inheritance of the course and signal its update once, rather than
+    # after each of the deleted blocks
+    with module_store.bulk_write_operations():
+        deleted = delete_course(module_store, content_store, loc, commit)
+
+    if deleted:
 
         print 'removing User permissions from course....'
         # in the django layer, we need to remove all the user permissions groups associated with this course
@@ -52,6 +55,8 @@ def delete_course_and_groups(course_id, commit=False):
             except Exception as err:
                 log.error("Error in deleting course groups for {0}: {1}".format(loc, err))
 
+            CourseSummary.remove_course(course_id)
+
 
 def get_modulestore(category_or_location):
     """
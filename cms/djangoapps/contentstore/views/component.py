@@ -22,7 +22,7 @@ from xblock.django.request import webob_to_django_response, django_to_webob_requ
 from xblock.exceptions import NoSuchHandlerError
 from xblock.fields import Scope
 from xblock.plugin import PluginMissingError
-from xblock.runtime import Mixologist
+from xmodule.block_registry import load_block_class, mixed_class
 from xmodule.x_module import prefer_xmodules
 
 from lms.lib.xblock.runtime import unquote_slashes
@@ -141,9 +141,8 @@ def _load_mixed_class(category):
     """
     Load an XBlock by category name, and apply all defined mixins
     """
-    component_class = XBlock.load_class(category, select=settings.XBLOCK_SELECT_FUNCTION)
-    mixologist = Mixologist(settings.XBLOCK_MIXINS)
-    return mixologist.mix(component_class)
+    component_class = load_block_class(category, select=settings.XBLOCK_SELECT_FUNCTION)
+    return mixed_class(component_class, settings.XBLOCK_MIXINS)
 
 
 @require_GET
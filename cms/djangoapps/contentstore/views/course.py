@@ -27,6 +27,7 @@ from xmodule.modulestore.exceptions import (
     ItemNotFoundError, InvalidLocationError)
 from xmodule.modulestore import Location
 
+from contentstore.models import CourseSummary
 from contentstore.course_info_model import get_course_updates, update_course_updates, delete_course_update
 from contentstore.utils import (
     get_lms_link_for_item, add_extra_panel_tab, remove_extra_panel_tab,
@@ -181,15 +182,15 @@ def _accessible_courses_list(request):
     return courses
 
 
-# pylint: disable=invalid-name
-def _accessible_courses_list_from_groups(request):
+def _course_ids_from_groups(user):
     """
-    List all courses available to the logged in user by reversing access group names
+    Returns the ids of the courses in which `user` has a staff or instructor
+    role, reversed from the names of the role groups: lowercased, with dots
+    e.g. "edx.course.run"
     """
-    courses_list = []
     course_ids = set()
 
-    user_staff_group_names = request.user.groups.filter(
+    user_staff_group_names = user.groups.filter(
         Q(name__startswith='instructor_') | Q(name__startswith='staff_')
     ).values_list('name', flat=True)
 
@@ -206,18 +207,87 @@ def _accessible_courses_list_from_groups(request):
 
         course_ids.add(course_id.replace('/', '.').lower())
 
-    for course_id in course_ids:
-        # get course_location with lowercase id
-        course_location = loc_mapper().translate_locator_to_location(
-            CourseLocator(package_id=course_id), get_course=True, lower_only=True
-        )
-        if course_location is None:
-            raise ItemNotFoundError(course_id)
+    return course_ids
+
+
+def _course_from_group_course_id(course_id):
+    """
+    Returns the course whose lowercased id `course_id` was reversed from a role group name.
+    Raises ItemNotFoundError if the id cannot be mapped to a course location.
+    """
+    # get course_location with lowercase id
+    course_location = loc_mapper().translate_locator_to_location(
+        CourseLocator(package_id=course_id), get_course=True, lower_only=True
+    )
+    if course_location is None:
+        raise ItemNotFoundError(course_id)
 
-        course = modulestore('direct').get_course(course_location.course_id)
-        courses_list.append(course)
+    return modulestore('direct').get_course(course_location.course_id)
 
-    return courses_list
+
+# pylint: disable=invalid-name
+def _accessible_courses_list_from_groups(request):
+    """
+    List all courses available to the logged in user by reversing access group names
+    """
+    return [
+        _course_from_group_course_id(course_id)
+        for course_id in _course_ids_from_groups(request.user)
+    ]
+
+
+def _index_courses(courses):
+    """
+    Refreshes the summaries of the given course descriptors and returns them,
+    leaving out the courses which failed to load.
+    """
+    return [
+        CourseSummary.index_course(course) for course in courses
+        if course is not None and not isinstance(course, ErrorDescriptor)
+    ]
+
+
+def _all_course_summaries():
+    """
+    List the summaries of all the courses in the modulestore.
+
+    Only the ids of the courses are read from the modulestore: courses which
+    have no summary yet (e.g. created by a management command) are loaded and
+    indexed, and the summaries of courses which are gone are dropped.
+    """
+    store = modulestore('direct')
+    course_ids = set(
+        Location(course['_id']).course_id
+        for course in store.collection.find({'_id.category': 'course'}, fields=['_id'])
+    )
+    summaries = []
+    for summary in CourseSummary.objects.all():
+        if summary.course_id in course_ids:
+            course_ids.remove(summary.course_id)
+            summaries.append(summary)
+        else:
+            summary.delete()
+
+    summaries.extend(_index_courses(store.get_course(course_id) for course_id in course_ids))
+    return summaries
+
+
+def _accessible_course_summaries_from_groups(request):
+    """
+    List the summaries of the courses available to the logged in user by
+    reversing access group names, in one query.  Courses without a summary
+    yet are loaded and indexed.
+    """
+    course_ids = _course_ids_from_groups(request.user)
+    summaries = list(CourseSummary.objects.filter(
+        Q(lower_package_id__in=course_ids) | Q(lower_course_id__in=course_ids)
+    ))
+
+    for summary in summaries:
+        course_ids.discard(summary.lower_package_id)
+        course_ids.discard(summary.lower_course_id)
+    summaries.extend(_index_courses(_course_from_group_course_id(course_id) for course_id in course_ids))
+    return summaries
 
 
 @login_required
@@ -230,10 +300,10 @@ def course_listing(request):
     """
     if GlobalStaff().has_user(request.user):
         # user has global access so no need to get courses from django groups
-        courses = _accessible_courses_list(request)
+        summaries = _all_course_summaries()
     else:
         try:
-            courses = _accessible_courses_list_from_groups(request)
+            summaries = _accessible_course_summaries_from_groups(request)
         except ItemNotFoundError:
             # user have some old groups or there was some error getting courses from django groups
             # so fallback to iterating through all courses
@@ -242,27 +312,23 @@ def course_listing(request):
             # update location entry in "loc_mapper" for user courses (add keys 'lower_id' and 'lower_course_id')
             for course in courses:
                 loc_mapper().create_map_entry(course.location)
+            summaries = _index_courses(courses)
 
-    def format_course_for_view(course):
+    def format_course_for_view(summary):
         """
         return tuple of the data which the view requires for each course
         """
-        # published = false b/c studio manipulates draft versions not b/c the course isn't pub'd
-        course_loc = loc_mapper().translate_location(
-            course.location.course_id, course.location, published=False, add_entry_if_missing=True
-        )
         return (
-            course.display_name,
-            # note, couldn't get django reverse to work; so, wrote workaround
-            course_loc.url_reverse('course/', ''),
-            get_lms_link_for_item(course.location),
-            course.display_org_with_default,
-            course.display_number_with_default,
-            course.location.name
+            summary.display_name,
+            summary.studio_url,
+            get_lms_link_for_item(summary.location),
+            summary.display_org,
+            summary.display_number,
+            summary.run
         )
 
     return render_to_response('index.html', {
-        'courses': [format_course_for_view(c) for c in courses if not isinstance(c, ErrorDescriptor)],
+        'courses': [format_course_for_view(summary) for summary in summaries if summary.course != 'templates'],
         'user': request.user,
         'request_course_creator_url': reverse('contentstore.views.request_course_creator'),
         'course_creator_status': _get_course_creator_status(request.user),
@@ -410,6 +476,8 @@ def create_new_course(request):
     CourseEnrollment.enroll(request.user, new_course.location.course_id)
     _users_assign_default_role(new_course.location)
 
+    CourseSummary.index_course(new_course)
+
     return JsonResponse({'url': new_location.url_reverse("course/", "")})
 
 
@@ -561,10 +629,9 @@ def settings_handler(request, tag=None, package_id=None, branch=None, version_gu
                 encoder=CourseSettingsEncoder
             )
         else:  # post or put, doesn't matter.
-            return JsonResponse(
-                CourseDetails.update_from_json(locator, request.json, request.user),
-                encoder=CourseSettingsEncoder
-            )
+            course_details = CourseDetails.update_from_json(locator, request.json, request.user)
+            CourseSummary.index_course(modulestore().get_item(course_module.location))
+            return JsonResponse(course_details, encoder=CourseSettingsEncoder)
 
 
 @login_required
@@ -705,12 +772,15 @@ def advanced_settings_handler(request, package_id=None, branch=None, version_gui
             # Whether or not to filter the tabs key out of the settings metadata
             filter_tabs = _config_course_advanced_components(request, course_module)
             try:
-                return JsonResponse(CourseMetadata.update_from_json(
+                course_metadata = CourseMetadata.update_from_json(
                     course_module,
                     request.json,
                     filter_tabs=filter_tabs,
                     user=request.user,
-                ))
+                )
+                # the descriptor is updated in place
+                CourseSummary.index_course(course_module)
+                return JsonResponse(course_metadata)
             except (TypeError, ValueError) as err:
                 return HttpResponseBadRequest(
                     "Incorrect setting format. {}".format(err),
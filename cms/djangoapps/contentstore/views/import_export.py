@@ -4,28 +4,22 @@ courses
 """
 import logging
 import os
-import tarfile
-import shutil
 import re
-from tempfile import mkdtemp
 from path import path
 
 from django.conf import settings
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django_future.csrf import ensure_csrf_cookie
-from django.core.servers.basehttp import FileWrapper
-from django.core.files.temp import NamedTemporaryFile
-from django.core.exceptions import SuspiciousOperation, PermissionDenied
+from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseNotFound
 from django.views.decorators.http import require_http_methods, require_GET
 from django.utils.translation import ugettext as _
 
 from edxmako.shortcuts import render_to_response
 
-from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.contentstore.django import contentstore
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import export_to_tar_stream
 from xmodule.modulestore.django import modulestore, loc_mapper
 from xmodule.exceptions import SerializationError
 
@@ -33,9 +27,9 @@ from xmodule.modulestore.locator import BlockUsageLocator
 from .access import has_course_access
 
 from util.json_request import JsonResponse
-from extract_tar import safetar_extractall
-from student.roles import CourseInstructorRole, CourseStaffRole
-from student import auth
+from ..tasks import (
+    import_olx, get_import_status, set_import_status, IMPORT_UPLOADING, IMPORT_UNPACKING
+)
 
 
 __all__ = ['import_handler', 'import_status_handler', 'export_handler']
@@ -102,6 +96,7 @@ def import_handler(request, tag=None, package_id=None, branch=None, version_guid
             # stream out the uploaded files in chunks to disk
             if int(content_range['start']) == 0:
                 mode = "wb+"
+                set_import_status(location.package_id, filename, IMPORT_UPLOADING)
             else:
                 mode = "ab+"
                 size = os.path.getsize(temp_filepath)
@@ -133,7 +128,9 @@ def import_handler(request, tag=None, package_id=None, branch=None, version_guid
             size = os.path.getsize(temp_filepath)
 
             if int(content_range['stop']) != int(content_range['end']) - 1:
-                # More chunks coming
+                # More chunks coming. Remember how far we got, so that an
+                # interrupted upload can be resumed from there.
+                set_import_status(location.package_id, filename, IMPORT_UPLOADING, uploaded=size)
                 return JsonResponse({
                     "files": [{
                                   "name": filename,
@@ -146,110 +143,11 @@ def import_handler(request, tag=None, package_id=None, branch=None, version_guid
                 })
 
             else:   # This was the last chunk.
-
-                # Use sessions to keep info about import progress
-                session_status = request.session.setdefault("import_status", {})
-                key = location.package_id + filename
-                session_status[key] = 1
-                request.session.modified = True
-
-                # Do everything from now on in a try-finally block to make sure
-                # everything is properly cleaned up.
-                try:
-
-                    tar_file = tarfile.open(temp_filepath)
-                    try:
-                        safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
-                    except SuspiciousOperation as exc:
-                        return JsonResponse(
-                            {
-                                'ErrMsg': 'Unsafe tar file. Aborting import.',
-                                'SuspiciousFileOperationMsg': exc.args[0],
-                                'Stage': 1
-                            },
-                            status=400
-                        )
-                    finally:
-                        tar_file.close()
-
-                    session_status[key] = 2
-                    request.session.modified = True
-
-                    # find the 'course.xml' file
-                    def get_all_files(directory):
-                        """
-                        For each file in the directory, yield a 2-tuple of (file-name,
-                        directory-path)
-                        """
-                        for dirpath, _dirnames, filenames in os.walk(directory):
-                            for filename in filenames:
-                                yield (filename, dirpath)
-
-                    def get_dir_for_fname(directory, filename):
-                        """
-                        Returns the dirpath for the first file found in the directory
-                        with the given name.  If there is no file in the directory with
-                        the specified name, return None.
-                        """
-                        for fname, dirpath in get_all_files(directory):
-                            if fname == filename:
-                                return dirpath
-                        return None
-
-                    fname = "course.xml"
-
-                    dirpath = get_dir_for_fname(course_dir, fname)
-
-                    if not dirpath:
-                        return JsonResponse(
-                            {
-
-                                'ErrMsg': _('Could not find the course.xml file in the package.'),
-                                'Stage': 2
-                            },
-                            status=415
-                        )
-
-                    logging.debug('found course.xml at {0}'.format(dirpath))
-
-                    if dirpath != course_dir:
-                        for fname in os.listdir(dirpath):
-                            shutil.move(dirpath / fname, course_dir)
-
-                    _module_store, course_items = import_from_xml(
-                        modulestore('direct'),
-                        settings.GITHUB_REPO_ROOT,
-                        [course_subdir],
-                        load_error_modules=False,
-                        static_content_store=contentstore(),
-                        target_location_namespace=old_location,
-                        draft_store=modulestore()
-                    )
-
-                    new_location = course_items[0].location
-                    logging.debug('new course at {0}'.format(new_location))
-
-                    session_status[key] = 3
-                    request.session.modified = True
-
-                    auth.add_users(request.user, CourseInstructorRole(new_location), request.user)
-                    auth.add_users(request.user, CourseStaffRole(new_location), request.user)
-                    logging.debug('created all course groups at {0}'.format(new_location))
-
-                # Send errors to client with stage at which error occurred.
-                except Exception as exception:   # pylint: disable=W0703
-                    return JsonResponse(
-                        {
-                            'ErrMsg': str(exception),
-                            'Stage': session_status[key]
-                        },
-                        status=400
-                    )
-
-                finally:
-                    shutil.rmtree(course_dir)
-
-                return JsonResponse({'Status': 'OK'})
+                # Unpacking and importing can take far longer than a request
+                # may, so hand them off; the page polls import_status_handler.
+                set_import_status(location.package_id, filename, IMPORT_UNPACKING)
+                import_olx.delay(request.user.id, location.package_id, course_subdir, filename, old_location.url())
+                return JsonResponse({'ImportStatus': IMPORT_UNPACKING})
     elif request.method == 'GET':  # assume html
         course_module = modulestore().get_item(old_location)
         return render_to_response('import.html', {
@@ -272,19 +170,24 @@ def import_status_handler(request, tag=None, package_id=None, branch=None, versi
         1 : Extracting file
         2 : Validating.
         3 : Importing to mongo
+        4 : Import successful
 
+    A negative status means the import failed at the corresponding stage; the
+    reason is given in "Message".  While uploading, "UploadedBytes" is the
+    number of bytes received so far, from which an interrupted upload resumes.
     """
     location = BlockUsageLocator(package_id=package_id, branch=branch, version_guid=version_guid, block_id=block)
     if not has_course_access(request.user, location):
         raise PermissionDenied()
 
-    try:
-        session_status = request.session["import_status"]
-        status = session_status[location.package_id + filename]
-    except KeyError:
-        status = 0
+    status = get_import_status(location.package_id, filename) or {'stage': IMPORT_UPLOADING}
+    response = {"ImportStatus": status['stage']}
+    if status.get('message'):
+        response["Message"] = status['message']
+    if status['stage'] == IMPORT_UPLOADING and status.get('uploaded'):
+        response["UploadedBytes"] = status['uploaded']
 
-    return JsonResponse({"ImportStatus": status})
+    return JsonResponse(response)
 
 
 @ensure_csrf_cookie
@@ -318,15 +221,13 @@ def export_handler(request, tag=None, package_id=None, branch=None, version_guid
     export_url = location.url_reverse('export') + '?_accept=application/x-tgz'
     if 'application/x-tgz' in requested_format:
         name = old_location.name
-        export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-        root_dir = path(mkdtemp())
 
         try:
-            export_to_xml(modulestore('direct'), contentstore(), old_location, root_dir, name, modulestore())
-
-            logging.debug('tar file being generated at {0}'.format(export_file.name))
-            with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-                tar_file.add(root_dir / name, arcname=name)
+            # The course xml is exported right away, so that failures can be
+            # reported; the tarball itself (and the assets) are streamed out.
+            tar_stream = export_to_tar_stream(
+                modulestore('direct'), contentstore(), old_location, name, modulestore()
+            )
         except SerializationError, e:
             logging.exception('There was an error exporting course {0}. {1}'.format(course_module.location, unicode(e)))
             unit = None
@@ -366,13 +267,9 @@ def export_handler(request, tag=None, package_id=None, branch=None, version_guid
                 'course_home_url': location.url_reverse("course"),
                 'export_url': export_url
             })
-        finally:
-            shutil.rmtree(root_dir / name)
 
-        wrapper = FileWrapper(export_file)
-        response = HttpResponse(wrapper, content_type='application/x-tgz')
-        response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(export_file.name)
-        response['Content-Length'] = os.path.getsize(export_file.name)
+        response = HttpResponse(tar_stream, content_type='application/x-tgz')
+        response['Content-Disposition'] = 'attachment; filename=%s.tar.gz' % name
         return response
 
     elif 'text/html' in requested_format:
@@ -147,12 +147,15 @@ def xblock_handler(request, tag=None, package_id=None, branch=None, version_guid
             # duplicating children.
             parent_location = loc_mapper().translate_locator_to_location(parent_locator)
             duplicate_source_location = loc_mapper().translate_locator_to_location(duplicate_source_locator)
-            dest_location = _duplicate_item(
-                parent_location,
-                duplicate_source_location,
-                request.json.get('display_name'),
-                request.user,
-            )
+            # refresh the inheritance of the course and signal its update once, rather
+            # than after each of the duplicated blocks
+            with modulestore().bulk_write_operations():
+                dest_location = _duplicate_item(
+                    parent_location,
+                    duplicate_source_location,
+                    request.json.get('display_name'),
+                    request.user,
+                )
             course_location = loc_mapper().translate_locator_to_location(BlockUsageLocator(parent_locator), get_course=True)
             dest_locator = loc_mapper().translate_location(course_location.course_id, dest_location, False, True)
             return JsonResponse({"locator": unicode(dest_locator)})
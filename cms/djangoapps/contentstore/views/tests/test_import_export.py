@@ -6,12 +6,17 @@ import shutil
 import tarfile
 import tempfile
 import copy
+import datetime
 from path import path
+from pytz import UTC
 import json
 import logging
+from StringIO import StringIO
 from uuid import uuid4
 from pymongo import MongoClient
 
+from contentstore.models import CourseImportStatus
+from contentstore.tasks import IMPORT_STATUS_TIMEOUT, IMPORT_VERIFYING, set_import_status
 from contentstore.tests.utils import CourseTestCase
 from django.test.utils import override_settings
 from django.conf import settings
@@ -72,6 +77,18 @@ class ImportTestCase(CourseTestCase):
         MongoClient().drop_database(TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'])
         _CONTENTSTORE.clear()
 
+    def _import_status(self, tarpath):
+        """
+        Returns the decoded `import_status` response for the tarball at `tarpath`.
+        """
+        resp_status = self.client.get(
+            self.new_location.url_reverse(
+                'import_status',
+                os.path.split(tarpath)[1]
+            )
+        )
+        return json.loads(resp_status.content)
+
     def test_no_coursexml(self):
         """
         Check that the response for a tar.gz import without a course.xml is
@@ -84,17 +101,13 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        # The import itself runs asynchronously, so the upload succeeds.
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
         # stage at which import failed).
-        resp_status = self.client.get(
-            self.new_location.url_reverse(
-                'import_status',
-                os.path.split(self.bad_tar)[1]
-            )
-        )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], 2)
+        status = self._import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertIn("course.xml", status["Message"])
 
     def test_with_coursexml(self):
         """
@@ -106,6 +119,28 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 4)
+
+    def test_chunked_upload_progress(self):
+        """
+        Check that `import_status` reports how much of a chunked upload has
+        been received, so that an interrupted upload can be resumed.
+        """
+        with open(self.good_tar) as gtar:
+            size = os.path.getsize(self.good_tar)
+            args = {"name": self.good_tar, "course-data": [gtar]}
+            resp = self.client.post(
+                self.url, args, HTTP_CONTENT_RANGE="bytes 0-{0}/{1}".format(size - 1, size + 10)
+            )
+
+        self.assertEquals(resp.status_code, 200)
+        course_location = self.course.location
+        self.addCleanup(shutil.rmtree, path(settings.GITHUB_REPO_ROOT) / "{0}-{1}-{2}".format(
+            course_location.org, course_location.course, course_location.name
+        ))
+        status = self._import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], 0)
+        self.assertEquals(status["UploadedBytes"], size)
 
     ## Unsafe tar methods #####################################################
     # Each of these methods creates a tarfile with a single type of unsafe
@@ -181,24 +216,34 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = {"name": tarpath, "course-data": [tar]}
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            status = self._import_status(tarpath)
+            self.assertEquals(status["ImportStatus"], -1)
+            self.assertIn("SuspiciousFileOperation", status["Message"])
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
         try_tar(self._outside_tar())
         try_tar(self._outside_tar2())
-        # Check that `import_status` returns the appropriate stage (i.e.,
-        # either 3, indicating all previous steps are completed, or 0,
-        # indicating no upload in progress)
-        resp_status = self.client.get(
-            self.new_location.url_reverse(
-                'import_status',
-                os.path.split(self.good_tar)[1]
-            )
+        # Check that `import_status` of a file that was never uploaded reports
+        # no import in progress.
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 0)
+
+    def test_interrupted_import(self):
+        """
+        Check that an import which stopped making progress, eg because its
+        worker died, is reported as failed, so that the import page stops polling.
+        """
+        filename = os.path.split(self.good_tar)[1]
+        set_import_status(self.new_location.package_id, filename, IMPORT_VERIFYING)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], IMPORT_VERIFYING)
+
+        CourseImportStatus.objects.filter(filename=filename).update(
+            updated=datetime.datetime.now(UTC) - datetime.timedelta(seconds=IMPORT_STATUS_TIMEOUT + 1)
         )
-        import_status = json.loads(resp_status.content)["ImportStatus"]
-        self.assertIn(import_status, (0, 3))
+        status = self._import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], -IMPORT_VERIFYING)
+        self.assertIn("did not finish", status["Message"])
 
 
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
@@ -243,6 +288,18 @@ class ExportTestCase(CourseTestCase):
         resp = self.client.get(self.url + '?_accept=application/x-tgz')
         self._verify_export_succeeded(resp)
 
+    def test_export_targz_contents(self):
+        """
+        The streamed tar.gz file holds the course xml below the course's directory.
+        """
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+        with tarfile.open(fileobj=StringIO(resp.content), mode='r:gz') as tar_file:
+            names = tar_file.getnames()
+        course_name = self.course.location.name
+        self.assertIn('{0}/course.xml'.format(course_name), names)
+        self.assertIn('{0}/policies/assets.json'.format(course_name), names)
+
     def _verify_export_succeeded(self, resp):
         """ Export success helper method. """
         self.assertEquals(resp.status_code, 200)
@@ -148,6 +148,16 @@ SERVER_EMAIL = ENV_TOKENS.get('SERVER_EMAIL', SERVER_EMAIL)
 MKTG_URLS = ENV_TOKENS.get('MKTG_URLS', MKTG_URLS)
 TECH_SUPPORT_EMAIL = ENV_TOKENS.get('TECH_SUPPORT_EMAIL', TECH_SUPPORT_EMAIL)
 
+# Mako templates
+MAKO_PRECOMPILE_TEMPLATES = ENV_TOKENS.get('MAKO_PRECOMPILE_TEMPLATES', MAKO_PRECOMPILE_TEMPLATES)
+
+# Startup
+DEFER_STARTUP_INITIALIZATION = ENV_TOKENS.get('DEFER_STARTUP_INITIALIZATION', DEFER_STARTUP_INITIALIZATION)
+
+# Deep heartbeat
+HEARTBEAT_CHECK_TIMEOUT = ENV_TOKENS.get('HEARTBEAT_CHECK_TIMEOUT', HEARTBEAT_CHECK_TIMEOUT)
+HEARTBEAT_DEEP_CACHE_SECONDS = ENV_TOKENS.get('HEARTBEAT_DEEP_CACHE_SECONDS', HEARTBEAT_DEEP_CACHE_SECONDS)
+
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
 
 # Theme overrides
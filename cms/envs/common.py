@@ -110,6 +110,12 @@ GEOIP_PATH = REPO_ROOT / "common/static/data/geoip/GeoIP.dat"
 # This is where we stick our compiled template files.
 from tempdir import mkdtemp_clean
 MAKO_MODULE_DIR = mkdtemp_clean('mako')
+# Compile all the mako templates at startup, rather than each on first use
+MAKO_PRECOMPILE_TEMPLATES = False
+
+# Leave the heaviest startup initializations (the modulestores, the mako
+# template lookups) to their first use, for a faster startup
+DEFER_STARTUP_INITIALIZATION = False
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -516,6 +522,11 @@ PASSWORD_DICTIONARY = []
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
 TRACKING_ENABLED = True
 
+# Seconds each service check of the deep heartbeat may take, and for which
+# the outcome of the checks is reused.
+HEARTBEAT_CHECK_TIMEOUT = 2
+HEARTBEAT_DEEP_CACHE_SECONDS = 10
+
 # Current youtube api for requesting transcripts.
 # for example: http://video.google.com/timedtext?lang=en&v=j_jEn79vS3g.
 YOUTUBE_API = {
@@ -150,6 +150,10 @@ CACHES = {
 
 }
 
+# Tests clear the configuration cache between tests to reset ConfigurationModels,
+# so don't let the in-process memo outlive it
+CONFIGURATION_MODEL_MEMO_TIMEOUT = 0
+
 # Add external_auth to Installed apps for testing
 INSTALLED_APPS += ('external_auth', )
 
@@ -1,16 +1,25 @@
 """
 Module with code executed during Studio startup
 """
+from lms.lib import startup_profiler
+startup_profiler.start_from_environ()
+
 from django.conf import settings
 
 # Force settings to run so that the python path is modified
-settings.INSTALLED_APPS  # pylint: disable=W0104
+with startup_profiler.time_hook('settings'):
+    settings.INSTALLED_APPS  # pylint: disable=W0104
 
 from django_startup import autostartup
+from xmodule.modulestore.django import warm_block_registry
 
 
 def run():
     """
     Executed during django startup
     """
-    autostartup()
+    autostartup(time_hook=startup_profiler.time_hook)
+
+    if not settings.DEFER_STARTUP_INITIALIZATION:
+        with startup_profiler.time_hook('block_registry'):
+            warm_block_registry()
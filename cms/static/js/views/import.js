@@ -41,22 +41,32 @@ define(
 
         /**
          * Check for import status updates every `timeout` milliseconds, and update
-         * the page accordingly.
+         * the page accordingly. Polling stops once the import has succeeded
+         * (stage 4) or failed (a negative stage, with the reason in `message`).
          * @param {string} url Url to call for status updates.
          * @param {int} timeout Number of milliseconds to wait in between ajax calls
          *     for new updates.
          * @param {int} stage Starting stage.
+         * @param {string} message Error message reported by the server, if any.
          */
-        var getStatus = function (url, timeout, stage) {
+        var getStatus = function (url, timeout, stage, message) {
             var currentStage = stage || 0;
             if (CourseImport.stopGetStatus) { return ;}
+            if (currentStage == 4) {
+                CourseImport.displayFinishedImport();
+                return;
+            }
+            if (currentStage < 0) {
+                CourseImport.stopGetStatus = true;
+                CourseImport.stageError(-currentStage, message);
+                return;
+            }
             updateStage(currentStage);
-            if (currentStage == 3 ) { return ;}
             var time = timeout || 1000;
             $.getJSON(url,
                 function (data) {
                     setTimeout(function () {
-                        getStatus(url, time, data.ImportStatus);
+                        getStatus(url, time, data.ImportStatus, data.Message);
                     }, time);
                 }
             );
@@ -74,6 +84,11 @@ define(
              */
             stopGetStatus: false,
 
+            /**
+             * Whether status updates have been requested for the current import.
+             */
+            isPolling: false,
+
             /**
              * Update DOM to set all stages as not-started (for retrying an upload that
              * failed).
@@ -90,6 +105,7 @@ define(
                     updateCog($(elem), false);
                 });
                 this.stopGetStatus = false;
+                this.isPolling = false;
             },
 
             /**
@@ -114,6 +130,8 @@ define(
              * @param {string} url The url to send Ajax GET requests for updates.
              */
             startServerFeedback: function (url){
+                if (this.isPolling) { return; }
+                this.isPolling = true;
                 this.stopGetStatus = false;
                 $('div.wrapper-status').removeClass('is-hidden');
                 $('.status-info').show();
@@ -38,7 +38,7 @@ urlpatterns = patterns('',  # nopep8
     url(r'^event$', 'contentstore.views.event', name='event'),
 
     url(r'^xmodule/', include('pipeline_js.urls')),
-    url(r'^heartbeat$', include('heartbeat.urls')),
+    url(r'^heartbeat', include('heartbeat.urls')),
 
     url(r'^user_api/', include('user_api.urls')),
     url(r'^lang_pref/', include('lang_pref.urls')),
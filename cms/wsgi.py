@@ -10,3 +10,6 @@ startup.run()
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
+from lms.lib import startup_profiler
+startup_profiler.finish()
+
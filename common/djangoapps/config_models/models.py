@@ -1,6 +1,11 @@
 """
 Django Model baseclass for database-backed configuration.
 """
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.cache import get_cache, InvalidCacheBackendError
@@ -10,6 +15,16 @@ try:
 except InvalidCacheBackendError:
     from django.core.cache import cache
 
+# Default number of seconds for which a process reuses the current configuration
+# it last read without asking the shared cache whether it changed
+MEMO_TIMEOUT = 5
+
+# model class -> (version stamp, expiry time, current configuration entry)
+_memo = {}  # pylint: disable=invalid-name
+# model class -> {'hits': count, 'misses': count}
+_memo_stats = {}  # pylint: disable=invalid-name
+_memo_stats_lock = threading.Lock()  # pylint: disable=invalid-name
+
 
 class ConfigurationModel(models.Model):
     """
@@ -36,18 +51,75 @@ class ConfigurationModel(models.Model):
         """
         super(ConfigurationModel, self).save(*args, **kwargs)
         cache.delete(self.cache_key_name())
+        # a new stamp tells the other processes to drop their memo
+        cache.set(self.version_key_name(), uuid4().hex, self.cache_timeout)
+        _memo.pop(type(self), None)
 
     @classmethod
     def cache_key_name(cls):
         """Return the name of the key to use to cache the current configuration"""
         return 'configuration/{}/current'.format(cls.__name__)
 
+    @classmethod
+    def version_key_name(cls):
+        """Return the name of the key of the stamp which changes whenever the configuration is saved"""
+        return 'configuration/{}/version'.format(cls.__name__)
+
+    @classmethod
+    def memo_stats(cls):
+        """
+        Return the number of calls to ``current`` answered from the in-process memo
+        (``hits``) and from the shared cache or the database (``misses``)
+        """
+        return dict(_memo_stats.get(cls, {'hits': 0, 'misses': 0}))
+
+    @classmethod
+    def _count(cls, outcome):
+        """Count a memo hit or miss"""
+        with _memo_stats_lock:
+            _memo_stats.setdefault(cls, {'hits': 0, 'misses': 0})[outcome] += 1
+
     @classmethod
     def current(cls):
         """
-        Return the active configuration entry, either from cache,
-        from the database, or by creating a new empty entry (which is not
-        persisted).
+        Return the active configuration entry, either from an in-process memo,
+        from cache, from the database, or by creating a new empty entry (which
+        is not persisted).
+
+        The memo is reused for CONFIGURATION_MODEL_MEMO_TIMEOUT seconds.  After
+        that only the configuration's version stamp is read from the cache, and
+        the memo is kept for another period if no process saved a new entry.
+        """
+        memo_timeout = getattr(settings, 'CONFIGURATION_MODEL_MEMO_TIMEOUT', MEMO_TIMEOUT)
+        if not memo_timeout:
+            cls._count('misses')
+            return cls._current()
+
+        now = time.time()
+        memo = _memo.get(cls)
+        if memo is not None and memo[1] > now:
+            cls._count('hits')
+            return memo[2]
+
+        version = cache.get(cls.version_key_name())
+        if memo is not None and version is not None and version == memo[0]:
+            _memo[cls] = (version, now + memo_timeout, memo[2])
+            cls._count('hits')
+            return memo[2]
+
+        cls._count('misses')
+        if version is None:
+            version = uuid4().hex
+            if not cache.add(cls.version_key_name(), version, cls.cache_timeout):
+                version = cache.get(cls.version_key_name())
+        current = cls._current()
+        _memo[cls] = (version, now + memo_timeout, current)
+        return current
+
+    @classmethod
+    def _current(cls):
+        """
+        Return the active configuration entry from cache or from the database
         """
         cached = cache.get(cls.cache_key_name())
         if cached is not None:
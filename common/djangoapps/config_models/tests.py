@@ -5,10 +5,12 @@ Tests of ConfigurationModel
 from django.contrib.auth.models import User
 from django.db import models
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from freezegun import freeze_time
 
 from mock import patch
+from config_models import models as config_models
 from config_models.models import ConfigurationModel
 
 
@@ -74,3 +76,57 @@ class ConfigurationModelTests(TestCase):
         ExampleConfig.current()
 
         mock_cache.set.assert_called_with(ExampleConfig.cache_key_name(), first, 300)
+
+
+@override_settings(CONFIGURATION_MODEL_MEMO_TIMEOUT=60)
+class ConfigurationModelMemoTests(TestCase):
+    """
+    Tests of the in-process memo of the current configuration
+    """
+    def setUp(self):
+        self.user = User()
+        self.user.save()
+        config_models.cache.clear()
+        config_models._memo.clear()  # pylint: disable=protected-access
+
+    def tearDown(self):
+        config_models.cache.clear()
+        config_models._memo.clear()  # pylint: disable=protected-access
+
+    def test_memo_hit(self):
+        ExampleConfig(changed_by=self.user, string_field='first').save()
+        stats = ExampleConfig.memo_stats()
+
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+        with patch.object(ExampleConfig, '_current') as mock_current:
+            self.assertEquals(ExampleConfig.current().string_field, 'first')
+        self.assertFalse(mock_current.called)
+
+        new_stats = ExampleConfig.memo_stats()
+        self.assertEquals(new_stats['misses'], stats['misses'] + 1)
+        self.assertEquals(new_stats['hits'], stats['hits'] + 1)
+
+    def test_save_drops_memo(self):
+        ExampleConfig(changed_by=self.user, string_field='first').save()
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+
+        ExampleConfig(changed_by=self.user, string_field='second').save()
+        self.assertEquals(ExampleConfig.current().string_field, 'second')
+
+    def test_expired_memo_revalidated(self):
+        ExampleConfig(changed_by=self.user, string_field='first').save()
+        ExampleConfig.current()
+
+        # expire the memo: an unchanged version stamp keeps it
+        version, __, current = config_models._memo[ExampleConfig]  # pylint: disable=protected-access
+        config_models._memo[ExampleConfig] = (version, 0, current)  # pylint: disable=protected-access
+        with patch.object(ExampleConfig, '_current') as mock_current:
+            self.assertEquals(ExampleConfig.current().string_field, 'first')
+        self.assertFalse(mock_current.called)
+
+        # a save in another process changes the stamp
+        config_models._memo[ExampleConfig] = (version, 0, current)  # pylint: disable=protected-access
+        config_models.cache.set(ExampleConfig.version_key_name(), 'changed elsewhere')
+        with patch.object(ExampleConfig, '_current') as mock_current:
+            ExampleConfig.current()
+        self.assertTrue(mock_current.called)
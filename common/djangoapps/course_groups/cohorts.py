@@ -3,16 +3,26 @@ This file contains the logic for cohort groups, as exposed internally to the
 forums, and to the cohort admin views.
 """
 
+from crum import get_current_request
+from django.core.cache import cache
 from django.http import Http404
 import logging
 import random
 
 from courseware import courses
+from django_comment_common.models import get_course_content_version
+from request_cache.middleware import RequestCache
 from student.models import get_user_by_username_or_email
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore.exceptions import InvalidLocationError
 from .models import CourseUserGroup
 
 log = logging.getLogger(__name__)
 
+# How long the cohort settings of a course are cached; they are also read again
+# as soon as the course content changes.
+COHORT_SETTINGS_TIMEOUT = 60 * 60
+
 
 # tl;dr: global state is bad.  capa reseeds random every time a problem is loaded.  Even
 # if and when that's fixed, it's a good idea to have a local generator to avoid any other
@@ -32,6 +42,61 @@ def local_random():
 
     return _local_random
 
+
+def _get_request_cache():
+    """
+    Return the dict in which the cohort settings and memberships read during
+    the current request are kept.
+
+    Outside of a request, as in celery tasks and management commands, nothing
+    clears the thread's request cache, so a new empty dict is returned instead.
+    """
+    if get_current_request() is None:
+        return {}
+    request_cache = RequestCache.get_request_cache()
+    if not hasattr(request_cache, 'data'):
+        # first use of the request cache in this thread
+        request_cache.data = {}
+    return request_cache.data.setdefault('course_groups.cohorts', {})
+
+
+def _get_cohort_settings(course_id):
+    """
+    Return a dict of the cohort settings of the course: 'is_cohorted',
+    'auto_cohort', 'auto_cohort_groups', 'cohorted_discussions' and
+    'top_level_discussion_topic_ids'.
+
+    The settings are read once per request, and from the course itself only
+    once per version of the course content.
+
+    Raises:
+       Http404 if the course doesn't exist.
+    """
+    request_cache = _get_request_cache()
+    cohort_settings = request_cache.get(('settings', course_id))
+    if cohort_settings is not None:
+        return cohort_settings
+
+    try:
+        location = CourseDescriptor.id_to_location(course_id)
+    except (ValueError, InvalidLocationError):
+        raise Http404("Invalid location")
+    key = u'course_groups.cohort_settings.{0}.{1}'.format(course_id, get_course_content_version(location))
+    cohort_settings = cache.get(key)
+    if cohort_settings is None:
+        course = courses.get_course_by_id(course_id)
+        cohort_settings = {
+            'is_cohorted': course.is_cohorted,
+            'auto_cohort': course.auto_cohort,
+            'auto_cohort_groups': course.auto_cohort_groups,
+            'cohorted_discussions': course.cohorted_discussions,
+            'top_level_discussion_topic_ids': course.top_level_discussion_topic_ids,
+        }
+        cache.set(key, cohort_settings, COHORT_SETTINGS_TIMEOUT)
+    request_cache[('settings', course_id)] = cohort_settings
+    return cohort_settings
+
+
 def is_course_cohorted(course_id):
     """
     Given a course id, return a boolean for whether or not the course is
@@ -40,7 +105,7 @@ def is_course_cohorted(course_id):
     Raises:
        Http404 if the course doesn't exist.
     """
-    return courses.get_course_by_id(course_id).is_cohorted
+    return _get_cohort_settings(course_id)['is_cohorted']
 
 
 def get_cohort_id(user, course_id):
@@ -64,15 +129,15 @@ def is_commentable_cohorted(course_id, commentable_id):
     Raises:
         Http404 if the course doesn't exist.
     """
-    course = courses.get_course_by_id(course_id)
+    cohort_settings = _get_cohort_settings(course_id)
 
-    if not course.is_cohorted:
+    if not cohort_settings['is_cohorted']:
         # this is the easy case :)
         ans = False
-    elif commentable_id in course.top_level_discussion_topic_ids:
+    elif commentable_id in cohort_settings['top_level_discussion_topic_ids']:
         # top level discussions have to be manually configured as cohorted
         # (default is not)
-        ans = commentable_id in course.cohorted_discussions
+        ans = commentable_id in cohort_settings['cohorted_discussions']
     else:
         # inline discussions are cohorted by default
         ans = True
@@ -88,13 +153,13 @@ def get_cohorted_commentables(course_id):
     Given a course_id return a list of strings representing cohorted commentables
     """
 
-    course = courses.get_course_by_id(course_id)
+    cohort_settings = _get_cohort_settings(course_id)
 
-    if not course.is_cohorted:
+    if not cohort_settings['is_cohorted']:
         # this is the easy case :)
         ans = []
     else:
-        ans = course.cohorted_discussions
+        ans = cohort_settings['cohorted_discussions']
 
     return ans
 
@@ -118,25 +183,40 @@ def get_cohort(user, course_id):
     # First check whether the course is cohorted (users shouldn't be in a cohort
     # in non-cohorted courses, but settings can change after course starts)
     try:
-        course = courses.get_course_by_id(course_id)
+        cohort_settings = _get_cohort_settings(course_id)
     except Http404:
         raise ValueError("Invalid course_id")
 
-    if not course.is_cohorted:
+    if not cohort_settings['is_cohorted']:
         return None
 
+    request_cache = _get_request_cache()
+    if ('cohort', course_id, user.id) in request_cache:
+        return request_cache[('cohort', course_id, user.id)]
+
+    group = _get_auto_cohort(user, course_id, cohort_settings)
+    request_cache[('cohort', course_id, user.id)] = group
+    return group
+
+
+def _get_auto_cohort(user, course_id, cohort_settings):
+    """
+    Return the cohort of the user in the cohorted course with the given cohort
+    settings, first putting the user in one of the course's auto cohorts if the
+    course is auto-cohorted and the user isn't in a cohort yet.
+    """
     try:
         return CourseUserGroup.objects.get(course_id=course_id,
-                                            group_type=CourseUserGroup.COHORT,
-                                            users__id=user.id)
+                                           group_type=CourseUserGroup.COHORT,
+                                           users__id=user.id)
     except CourseUserGroup.DoesNotExist:
         # Didn't find the group.  We'll go on to create one if needed.
         pass
 
-    if not course.auto_cohort:
+    if not cohort_settings['auto_cohort']:
         return None
 
-    choices = course.auto_cohort_groups
+    choices = cohort_settings['auto_cohort_groups']
     n = len(choices)
     if n == 0:
         # Nowhere to put user
@@ -171,6 +251,40 @@ def get_course_cohorts(course_id):
     return list(CourseUserGroup.objects.filter(course_id=course_id,
                                                group_type=CourseUserGroup.COHORT))
 
+
+def cohorts_for_users(course_id, user_ids):
+    """
+    Get the cohorts of many users of a course at once.
+
+    Arguments:
+        course_id: string in the format 'org/course/run'
+        user_ids: iterable of the ids of the users
+
+    Returns:
+        A dict mapping the id of each user who is in a cohort of the course to
+        their CourseUserGroup.  Unlike get_cohort, this does not check whether
+        the course is cohorted, nor put users in auto cohorts.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    cohorts = dict((cohort.id, cohort) for cohort in get_course_cohorts(course_id))
+    if not cohorts:
+        return {}
+    memberships = CourseUserGroup.users.through.objects.filter(
+        courseusergroup__in=cohorts.keys(),
+        user__in=user_ids,
+    ).values_list('user_id', 'courseusergroup_id')
+    return dict((user_id, cohorts[cohort_id]) for user_id, cohort_id in memberships)
+
+
+def get_course_cohort_names_by_id(course_id):
+    """
+    Return a dict mapping the id of each cohort in a course to its name, for
+    naming the cohorts of many forum threads without a query per thread.
+    """
+    return dict((cohort.id, cohort.name) for cohort in get_course_cohorts(course_id))
+
 ### Helpers for cohort management views
 
 
@@ -253,6 +367,7 @@ def add_user_to_cohort(cohort, username_or_email):
                                          course_cohorts[0].name))
 
     cohort.users.add(user)
+    _get_request_cache()[('cohort', cohort.course_id, user.id)] = cohort
     return user
 
 
@@ -1,12 +1,17 @@
 import django.test
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import cache
 
 from django.test.utils import override_settings
+from mock import patch, Mock
 
 from course_groups.models import CourseUserGroup
 from course_groups.cohorts import (get_cohort, get_course_cohorts,
-                                   is_commentable_cohorted, get_cohort_by_name)
+                                   is_commentable_cohorted, get_cohort_by_name,
+                                   is_course_cohorted, cohorts_for_users)
+from django_comment_common.models import update_course_content_version
+from request_cache.middleware import RequestCache
 
 from xmodule.modulestore.django import modulestore, clear_existing_modulestores
 
@@ -79,11 +84,19 @@ class TestCohorts(django.test.TestCase):
 
         course.cohort_config = d
 
+        # The course was changed in place rather than saved to the modulestore,
+        # so tell the cohorts that its content changed, as a save would.
+        update_course_content_version(None, course.location)
+        RequestCache().clear_request_cache()
+
     def setUp(self):
         """
-        Make sure that course is reloaded every time--clear out the modulestore.
+        Make sure that course is reloaded every time--clear out the modulestore,
+        and the cohort settings cached from it.
         """
         clear_existing_modulestores()
+        cache.clear()
+        RequestCache().clear_request_cache()
 
     def test_get_cohort(self):
         """
@@ -254,3 +267,62 @@ class TestCohorts(django.test.TestCase):
         self.assertTrue(
             is_commentable_cohorted(course.id, to_id("Feedback")),
             "Feedback was listed as cohorted.  Should be.")
+
+    def test_cohort_settings_cached(self):
+        """
+        Make sure the cohort settings are only read from the course once per
+        version of its content.
+        """
+        course = modulestore().get_course("edX/toy/2012_Fall")
+        self.config_course_cohorts(course, [], cohorted=True)
+        self.assertTrue(is_course_cohorted(course.id))
+
+        RequestCache().clear_request_cache()
+        with patch('course_groups.cohorts.courses.get_course_by_id') as mock_get_course:
+            self.assertTrue(is_course_cohorted(course.id))
+            self.assertTrue(is_commentable_cohorted(course.id, "random"))
+        self.assertFalse(mock_get_course.called)
+
+        self.config_course_cohorts(course, [], cohorted=False)
+        self.assertFalse(is_course_cohorted(course.id))
+
+    def test_request_cache_only_within_request(self):
+        """
+        Make sure the thread's request cache, which only requests clear, isn't
+        used outside of a request.
+        """
+        course = modulestore().get_course("edX/toy/2012_Fall")
+        self.config_course_cohorts(course, [], cohorted=True)
+
+        self.assertTrue(is_course_cohorted(course.id))
+        self.assertNotIn('course_groups.cohorts', RequestCache.get_request_cache().data)
+
+        with patch('course_groups.cohorts.get_current_request', return_value=Mock()):
+            self.assertTrue(is_course_cohorted(course.id))
+        self.assertIn(('settings', course.id), RequestCache.get_request_cache().data['course_groups.cohorts'])
+
+    def test_cohorts_for_users(self):
+        course = modulestore().get_course("edX/toy/2012_Fall")
+        user1 = User.objects.create(username="test", email="a@b.com")
+        user2 = User.objects.create(username="test2", email="a2@b.com")
+        user3 = User.objects.create(username="test3", email="a3@b.com")
+
+        self.assertEqual(cohorts_for_users(course.id, [user1.id, user2.id]), {})
+
+        cohort1 = CourseUserGroup.objects.create(name="TestCohort",
+                                                 course_id=course.id,
+                                                 group_type=CourseUserGroup.COHORT)
+        cohort2 = CourseUserGroup.objects.create(name="TestCohort2",
+                                                 course_id=course.id,
+                                                 group_type=CourseUserGroup.COHORT)
+        other_course_cohort = CourseUserGroup.objects.create(name="OtherCohort",
+                                                             course_id="a/b/c",
+                                                             group_type=CourseUserGroup.COHORT)
+        cohort1.users.add(user1)
+        cohort2.users.add(user2)
+        other_course_cohort.users.add(user3)
+
+        self.assertEqual(
+            cohorts_for_users(course.id, [user1.id, user2.id, user3.id]),
+            {user1.id: cohort1, user2.id: cohort2}
+        )
@@ -112,6 +112,22 @@ class CourseMode(models.Model):
                 return mode.min_price
         return 0
 
+    @classmethod
+    def min_course_prices_for_verified_for_currency(cls, currency):
+        """
+        Returns a dictionary mapping the id of each course with a non-expired *verified* mode in
+        `currency` to that mode's minimum price, as min_course_price_for_verified_for_currency
+        returns it.  Courses without such a mode are missing, and have a minimum price of 0.
+        """
+        now = datetime.now(pytz.UTC)
+        return dict(
+            cls.objects.filter(
+                Q(expiration_datetime__isnull=True) | Q(expiration_datetime__gte=now),
+                mode_slug='verified',
+                currency=currency,
+            ).values_list('course_id', 'min_price')
+        )
+
     @classmethod
     def min_course_price_for_currency(cls, course_id, currency):
         """
@@ -1,5 +1,7 @@
 import logging
+from uuid import uuid4
 
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -8,7 +10,7 @@ from django.db.models.signals import post_save
 from django.utils.translation import ugettext_noop
 from student.models import CourseEnrollment
 
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import modulestore, MODULESTORE_UPDATE_SIGNAL
 from xmodule.course_module import CourseDescriptor
 
 FORUM_ROLE_ADMINISTRATOR = ugettext_noop('Administrator')
@@ -39,6 +41,37 @@ def assign_default_role_on_enrollment(sender, instance, **kwargs):
     assign_default_role(instance.course_id, instance.user)
 
 
+def _course_content_version_key(course_location):
+    """
+    Cache key of the content version stamp of the course at `course_location`.
+    The stamp is shared by the runs of a course, as the modulestore signal does
+    not tell them apart.
+    """
+    return u'django_comment_common.content_version.{0}/{1}'.format(course_location.org, course_location.course)
+
+
+def get_course_content_version(course_location):
+    """
+    Return a stamp which changes whenever the modulestore writes to the course
+    at `course_location`, for keying values computed from the course content.
+    """
+    key = _course_content_version_key(course_location)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version):
+            version = cache.get(key, version)
+    return version
+
+
+@receiver(MODULESTORE_UPDATE_SIGNAL)
+def update_course_content_version(sender, location, **kwargs):  # pylint: disable=unused-argument
+    """
+    Change the content version stamp of the course written to
+    """
+    cache.set(_course_content_version_key(location), uuid4().hex)
+
+
 def assign_default_role(course_id, user):
     """
     Assign forum default role 'Student' to user
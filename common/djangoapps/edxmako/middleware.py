@@ -16,6 +16,29 @@ from django.template import RequestContext
 from util.request import safe_get_host
 requestcontext = None
 
+# (requestcontext, its layers collapsed into a single dictionary)
+_requestcontext_dict = (None, {})
+
+
+def get_requestcontext_dict():
+    """
+    Returns the layers of the current request context, including the results
+    of the context processors, collapsed into a single dictionary for mako.
+
+    They are only collapsed once per request; the dictionary must not be
+    modified.  It is empty when there is no current request context, as in
+    various testing contexts.
+    """
+    global _requestcontext_dict
+    context, context_dict = _requestcontext_dict
+    if context is not requestcontext:
+        context_dict = {}
+        if requestcontext is not None:
+            for d in requestcontext:
+                context_dict.update(d)
+        _requestcontext_dict = (requestcontext, context_dict)
+    return context_dict
+
 
 class MakoMiddleware(object):
 
@@ -1,14 +1,21 @@
 """
 Set up lookup paths for mako templates.
 """
+import logging
 import os
 import pkg_resources
+import threading
 
 from django.conf import settings
 from mako.lookup import TemplateLookup
 
 from . import LOOKUP
 
+log = logging.getLogger(__name__)
+
+# The extensions of the files which precompile_templates compiles
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
 
 class DynamicTemplateLookup(TemplateLookup):
     """
@@ -17,9 +24,43 @@ class DynamicTemplateLookup(TemplateLookup):
     """
     def add_directory(self, directory):
         """
-        Add a new directory to the template lookup path.
+        Add a new directory to the template lookup path, unless it is already in it.
         """
-        self.directories.append(os.path.normpath(directory))
+        directory = os.path.normpath(directory)
+        if directory not in self.directories:
+            self.directories.append(directory)
+
+
+# The setup of the lookup directories, when it is deferred to the first lookup,
+# and the lock which lets a single thread run it
+_deferred_setup = None
+_deferred_setup_lock = threading.Lock()
+
+
+def defer_lookup_setup(setup):
+    """
+    Defers calling `setup`, which sets up the lookup directories, until a
+    template is first looked up.
+    """
+    global _deferred_setup  # pylint: disable=global-statement
+    _deferred_setup = setup
+
+
+def ensure_lookups():
+    """
+    Sets up the lookup directories if their setup was deferred and hasn't run yet.
+
+    Lookups made while the setup runs wait for it to finish.  If the setup
+    raises, it is run again by the next lookup.
+    """
+    global _deferred_setup  # pylint: disable=global-statement
+    if _deferred_setup is None:
+        return
+    with _deferred_setup_lock:
+        # another thread may have run the setup while this one waited
+        if _deferred_setup is not None:
+            _deferred_setup()
+            _deferred_setup = None
 
 
 def add_lookup(namespace, directory, package=None):
@@ -48,4 +89,33 @@ def lookup_template(namespace, name):
     """
     Look up a Mako template by namespace and name.
     """
+    ensure_lookups()
     return LOOKUP[namespace].get_template(name)
+
+
+def precompile_templates(namespaces=None):
+    """
+    Compiles the templates of the given namespaces (by default, all of them)
+    into MAKO_MODULE_DIR, so that the first request to render each template
+    doesn't have to.  Returns the number of templates compiled.
+
+    Files which fail to compile, such as client side templates which happen to
+    share an extension with mako templates, are logged and skipped.
+    """
+    ensure_lookups()
+    count = 0
+    for namespace in (namespaces or LOOKUP.keys()):
+        templates = LOOKUP[namespace]
+        for directory in list(templates.directories):
+            for dirpath, _dirnames, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.endswith(TEMPLATE_EXTENSIONS):
+                        continue
+                    uri = os.path.relpath(os.path.join(dirpath, filename), directory).replace(os.sep, '/')
+                    try:
+                        templates.get_template(uri)
+                    except Exception:  # pylint: disable=broad-except
+                        log.debug("Could not precompile template %s in namespace %s", uri, namespace, exc_info=True)
+                    else:
+                        count += 1
+    return count
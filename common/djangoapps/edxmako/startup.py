@@ -3,11 +3,28 @@ Initialize the mako template lookup
 """
 from django.conf import settings
 from . import add_lookup
+from .paths import defer_lookup_setup, precompile_templates
 
 
 def run():
     """
-    Setup mako lookup directories.
+    Setup mako lookup directories, and precompile their templates if
+    MAKO_PRECOMPILE_TEMPLATES is set.
+
+    If DEFER_STARTUP_INITIALIZATION is set, this is all left to the first
+    template lookup instead.
+    """
+    if settings.DEFER_STARTUP_INITIALIZATION:
+        defer_lookup_setup(setup_lookups)
+    else:
+        setup_lookups()
+        if settings.MAKO_PRECOMPILE_TEMPLATES:
+            precompile_templates()
+
+
+def setup_lookups():
+    """
+    Adds the MAKO_TEMPLATES directories to their lookups.
     """
     template_locations = settings.MAKO_TEMPLATES
     for namespace, directories in template_locations.items():
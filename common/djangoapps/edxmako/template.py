@@ -18,6 +18,7 @@ from edxmako.shortcuts import marketing_link
 
 import edxmako
 import edxmako.middleware
+import edxmako.paths
 
 DJANGO_VARIABLES = ['output_encoding', 'encoding_errors']
 
@@ -35,6 +36,7 @@ class Template(MakoTemplate):
         """Overrides base __init__ to provide django variable overrides"""
         if not kwargs.get('no_django', False):
             overrides = {k: getattr(edxmako, k, None) for k in DJANGO_VARIABLES}
+            edxmako.paths.ensure_lookups()
             overrides['lookup'] = edxmako.LOOKUP['main']
             kwargs.update(overrides)
         super(Template, self).__init__(*args, **kwargs)
@@ -45,12 +47,7 @@ class Template(MakoTemplate):
         it to a render call on the mako template.
         """
         # collapse context_instance to a single dictionary for mako
-        context_dictionary = {}
-
-        # In various testing contexts, there might not be a current request context.
-        if edxmako.middleware.requestcontext is not None:
-            for d in edxmako.middleware.requestcontext:
-                context_dictionary.update(d)
+        context_dictionary = dict(edxmako.middleware.get_requestcontext_dict())
         for d in context_instance:
             context_dictionary.update(d)
         context_dictionary['settings'] = settings
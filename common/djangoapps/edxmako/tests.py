@@ -1,9 +1,16 @@
+import os
+import shutil
+import tempfile
+import threading
+
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from edxmako import add_lookup, LOOKUP
-from edxmako.shortcuts import marketing_link
-from mock import patch
+from edxmako.paths import precompile_templates, defer_lookup_setup, lookup_template
+from edxmako.shortcuts import marketing_link, render_to_string
+from mako.exceptions import TopLevelLookupException
+from mock import patch, Mock
 from util.testing import UrlResetMixin
 
 
@@ -37,3 +44,104 @@ class AddLookupTests(TestCase):
         dirs = LOOKUP['test'].directories
         self.assertEqual(len(dirs), 1)
         self.assertTrue(dirs[0].endswith('management'))
+
+
+class DeferredLookupSetupTests(TestCase):
+    """
+    Test deferring the setup of the lookups to the first lookup.
+    """
+    @patch('edxmako.LOOKUP', {})
+    def test_deferred_setup(self):
+        setup = Mock(side_effect=lambda: add_lookup('test', 'management', __name__))
+        defer_lookup_setup(setup)
+        self.assertFalse(setup.called)
+        # the lookup is set up on the first lookup, and only then
+        for __ in range(2):
+            with self.assertRaises(TopLevelLookupException):
+                lookup_template('test', 'missing.html')
+        self.assertEqual(setup.call_count, 1)
+
+    @patch('edxmako.LOOKUP', {})
+    def test_failed_setup_is_retried(self):
+        def flaky_setup():
+            """ Adds the lookup, but fails the first time after doing so """
+            add_lookup('test', 'management', __name__)
+            if setup.call_count == 1:
+                raise Exception("setup failed")
+        setup = Mock(side_effect=flaky_setup)
+        defer_lookup_setup(setup)
+        with self.assertRaises(Exception):
+            lookup_template('test', 'missing.html')
+        with self.assertRaises(TopLevelLookupException):
+            lookup_template('test', 'missing.html')
+        self.assertEqual(setup.call_count, 2)
+        # running the setup again didn't add the directory twice
+        dirs = LOOKUP['test'].directories
+        self.assertEqual(len([d for d in dirs if d.endswith('management')]), 1)
+
+    @patch('edxmako.LOOKUP', {})
+    def test_concurrent_first_lookups(self):
+        setup_started = threading.Event()
+        finish_setup = threading.Event()
+
+        def slow_setup():
+            """ Adds the lookup once told to """
+            setup_started.set()
+            finish_setup.wait(5)
+            add_lookup('test', 'management', __name__)
+        setup = Mock(side_effect=slow_setup)
+        defer_lookup_setup(setup)
+
+        errors = []
+
+        def first_lookup():
+            """ Looks up a template, recording what it raised """
+            try:
+                lookup_template('test', 'missing.html')
+            except Exception as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+        first = threading.Thread(target=first_lookup)
+        first.start()
+        setup_started.wait(5)
+        # a lookup made during the setup waits for it rather than failing with a KeyError
+        second = threading.Thread(target=first_lookup)
+        second.start()
+        finish_setup.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(setup.call_count, 1)
+        self.assertEqual([type(error) for error in errors], [TopLevelLookupException] * 2)
+
+
+class PrecompileTemplatesTests(TestCase):
+    """
+    Test the `precompile_templates` function.
+    """
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir)
+        os.mkdir(os.path.join(self.template_dir, 'sub'))
+        for name, content in (
+            ('valid.html', u'${greeting}'),
+            ('sub/nested.txt', u'hello'),
+            ('invalid.html', u'<%def name="x(">'),
+            ('script.js', u'${not_a_template}'),
+        ):
+            with open(os.path.join(self.template_dir, name), 'w') as template_file:
+                template_file.write(content)
+
+    @patch('edxmako.LOOKUP', {})
+    def test_precompile_templates(self):
+        add_lookup('test', self.template_dir)
+        # the invalid template and the script are skipped
+        self.assertEqual(precompile_templates(['test']), 2)
+
+    @patch('edxmako.LOOKUP', {})
+    def test_render_to_string(self):
+        add_lookup('test', self.template_dir)
+        dictionary = {'greeting': 'hi'}
+        self.assertEqual(render_to_string('valid.html', dictionary, namespace='test'), u'hi')
+        self.assertEqual(render_to_string('valid.html', dictionary, {'greeting': 'bye'}, namespace='test'), u'bye')
+        # the caller's dictionary is left alone
+        self.assertEqual(dictionary, {'greeting': 'hi'})
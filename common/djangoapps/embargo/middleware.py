@@ -8,6 +8,8 @@ reverse proxy is setting any of the well known client IP address headers (ex.,
 HTTP_X_FORWARDED_FOR).
 """
 
+import threading
+
 import pygeoip
 
 from django.core.exceptions import MiddlewareNotUsed
@@ -17,6 +19,40 @@ from ipware.ip import get_ip
 from util.request import course_id_from_url
 
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
+from embargo.networks import LRUCache
+
+# The number of client addresses whose country is remembered
+COUNTRY_CACHE_SIZE = 10000
+
+_geoip = None  # pylint: disable=invalid-name
+_geoip_lock = threading.Lock()  # pylint: disable=invalid-name
+_country_codes = LRUCache(COUNTRY_CACHE_SIZE)  # pylint: disable=invalid-name
+_UNKNOWN = object()
+
+
+def _geoip_reader():
+    """
+    Return the process wide GeoIP reader, opening the database (memory mapped)
+    the first time it is needed.
+    """
+    global _geoip  # pylint: disable=global-statement,invalid-name
+    if _geoip is None:
+        with _geoip_lock:
+            if _geoip is None:
+                _geoip = pygeoip.GeoIP(settings.GEOIP_PATH, pygeoip.MMAP_CACHE)
+    return _geoip
+
+
+def country_code_by_addr(ip_addr):
+    """
+    Return the country code of `ip_addr`, remembering it for the next requests
+    from the same address.
+    """
+    country_code = _country_codes.get(ip_addr, _UNKNOWN)
+    if country_code is _UNKNOWN:
+        country_code = _geoip_reader().country_code_by_addr(ip_addr)
+        _country_codes.set(ip_addr, country_code)
+    return country_code
 
 
 class EmbargoMiddleware(object):
@@ -40,15 +76,15 @@ class EmbargoMiddleware(object):
 
         # If they're trying to access a course that cares about embargoes
         if EmbargoedCourse.is_embargoed(course_id):
-            # If we're having performance issues, add caching here
             ip_addr = get_ip(request)
+            ip_filter = IPFilter.current()
 
             # if blacklisted, immediately fail
-            if ip_addr in IPFilter.current().blacklist_ips:
+            if ip_addr in ip_filter.blacklist_networks:
                 return redirect('embargo')
 
-            country_code_from_ip = pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+            country_code_from_ip = country_code_by_addr(ip_addr)
             is_embargoed = country_code_from_ip in EmbargoedState.current().embargoed_countries_list
             # Fail if country is embargoed and the ip address isn't explicitly whitelisted
-            if is_embargoed and ip_addr not in IPFilter.current().whitelist_ips:
+            if is_embargoed and ip_addr not in ip_filter.whitelist_networks:
                 return redirect('embargo')
@@ -13,6 +13,7 @@ file and check it in at the same time as your model changes. To do that,
 from django.db import models
 
 from config_models.models import ConfigurationModel
+from embargo.networks import IPNetworkSet
 
 
 class EmbargoedCourse(models.Model):
@@ -69,14 +70,20 @@ class IPFilter(ConfigurationModel):
     """
     Register specific IP addresses to explicitly block or unblock.
     """
+    # The parsed lists of the last few configurations, by list text, so that
+    # they are only parsed once per process and are reparsed when they change.
+    _network_sets = {}
+    _MAX_NETWORK_SETS = 8
     whitelist = models.TextField(
         blank=True,
-        help_text="A comma-separated list of IP addresses that should not fall under embargo restrictions."
+        help_text=(
+            "A comma-separated list of IP addresses or CIDR networks that should not fall under embargo restrictions."
+        )
     )
 
     blacklist = models.TextField(
         blank=True,
-        help_text="A comma-separated list of IP addresses that should fall under embargo restrictions."
+        help_text="A comma-separated list of IP addresses or CIDR networks that should fall under embargo restrictions."
     )
 
     @property
@@ -96,3 +103,29 @@ class IPFilter(ConfigurationModel):
         if self.blacklist == '':
             return []
         return [addr.strip() for addr in self.blacklist.split(',')]  # pylint: disable=no-member
+
+    @classmethod
+    def _network_set(cls, networks):
+        """
+        Return the IPNetworkSet of the comma-separated `networks`
+        """
+        network_set = cls._network_sets.get(networks)
+        if network_set is None:
+            if len(cls._network_sets) >= cls._MAX_NETWORK_SETS:
+                cls._network_sets.clear()
+            network_set = cls._network_sets[networks] = IPNetworkSet.from_csv(networks)
+        return network_set
+
+    @property
+    def whitelist_networks(self):
+        """
+        Return the whitelisted addresses and networks, for testing addresses against
+        """
+        return self._network_set(self.whitelist)
+
+    @property
+    def blacklist_networks(self):
+        """
+        Return the blacklisted addresses and networks, for testing addresses against
+        """
+        return self._network_set(self.blacklist)
@@ -0,0 +1,150 @@
+"""
+Parsing and matching of the IP addresses and CIDR networks of the embargo IP filters.
+"""
+import logging
+import socket
+import threading
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# address family -> (packed address length in bytes, address length in bits)
+_FAMILIES = {
+    socket.AF_INET: (4, 32),
+    socket.AF_INET6: (16, 128),
+}
+
+
+def _parse_address(address):
+    """
+    Returns the (family, integer value) of the ipv4 or ipv6 `address`.
+    Raises ValueError if it is not a valid address.
+    """
+    for family in _FAMILIES:
+        try:
+            packed = socket.inet_pton(family, address)
+        except (socket.error, UnicodeEncodeError):
+            continue
+        return family, int(packed.encode('hex'), 16)
+    raise ValueError("Invalid IP address: {0!r}".format(address))
+
+
+def parse_network(network):
+    """
+    Returns the (family, prefix length, integer network value) of `network`,
+    either a single ipv4/ipv6 address or a network in CIDR notation
+    ("10.1.0.0/16").  Host bits set in a CIDR network are ignored.
+    Raises ValueError if `network` is not valid.
+    """
+    address, separator, prefix = network.strip().partition('/')
+    family, value = _parse_address(address)
+    bits = _FAMILIES[family][1]
+    if not separator:
+        return family, bits, value
+    if not prefix.isdigit() or int(prefix) > bits:
+        raise ValueError("Invalid network prefix length: {0!r}".format(network))
+    prefix = int(prefix)
+    return family, prefix, value & _mask(bits, prefix)
+
+
+def is_valid_network(network):
+    """
+    Whether or not `network` is a valid ipv4/ipv6 address or CIDR network
+    """
+    try:
+        parse_network(network)
+    except ValueError:
+        return False
+    return True
+
+
+def _mask(bits, prefix):
+    """ The netmask of a `prefix` long network in a `bits` long address space """
+    return ((1 << prefix) - 1) << (bits - prefix)
+
+
+class IPNetworkSet(object):
+    """
+    A set of ip addresses and networks which can be tested for containing an address.
+
+    The networks are indexed by family and prefix length, so a lookup costs
+    one set membership test per distinct prefix length in the set however
+    many networks it holds.
+    """
+    def __init__(self, networks):
+        # (family, prefix length) -> set of integer network values
+        self._networks = {}
+        for network in networks:
+            family, prefix, value = parse_network(network)
+            self._networks.setdefault((family, prefix), set()).add(value)
+        self._masks = [
+            (key[0], _mask(_FAMILIES[key[0]][1], key[1]), values)
+            for key, values in self._networks.iteritems()
+        ]
+
+    @classmethod
+    def from_csv(cls, networks):
+        """
+        Builds the set from a comma separated list of addresses and networks.
+        Invalid entries are logged and left out, rather than failing every
+        embargo check until the list is fixed.
+        """
+        valid = []
+        for network in networks.split(','):
+            if not network.strip():
+                continue
+            if is_valid_network(network):
+                valid.append(network)
+            else:
+                log.warning("Ignoring invalid embargo IP filter entry %r", network.strip())
+        return cls(valid)
+
+    def __contains__(self, address):
+        try:
+            address_family, value = _parse_address(address)
+        except ValueError:
+            return False
+        return any(
+            value & mask in values
+            for family, mask, values in self._masks
+            if family == address_family
+        )
+
+    def __len__(self):
+        return sum(len(values) for values in self._networks.itervalues())
+
+
+class LRUCache(object):
+    """
+    A bounded, thread safe, least recently used mapping.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ Returns the value of `key`, marking it as recently used, or `default` """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        """ Stores `value` under `key`, evicting the least recently used item if full """
+        with self._lock:
+            self._items.pop(key, None)
+            if len(self._items) >= self.max_size:
+                self._items.popitem(last=False)
+            self._items[key] = value
+
+    def clear(self):
+        """ Empties the cache """
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
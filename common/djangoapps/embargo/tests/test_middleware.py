@@ -17,6 +17,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 # Explicitly import the cache from ConfigurationModel so we can reset it after each test
 from config_models.models import cache
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
+from embargo import middleware
 
 
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
@@ -52,6 +53,7 @@ class EmbargoMiddlewareTests(TestCase):
         # Explicitly clear ConfigurationModel's cache so tests have a clear cache
         # and don't interfere with each other
         cache.clear()
+        middleware._country_codes.clear()  # pylint: disable=protected-access
         self.patcher.stop()
 
     def mock_country_code_by_addr(self, ip_addr):
@@ -129,6 +131,50 @@ class EmbargoMiddlewareTests(TestCase):
         response = self.client.get(self.regular_page, HTTP_X_FORWARDED_FOR='5.0.0.0', REMOTE_ADDR='5.0.0.0')
         self.assertEqual(response.status_code, 200)
 
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_ip_network_exceptions(self):
+        # Whitelist/blacklist whole networks
+        IPFilter(
+            whitelist='1.0.0.0/8',
+            blacklist='5.0.0.0/30',
+            changed_by=self.user,
+            enabled=True
+        ).save()
+
+        # Accessing an embargoed page from a blocked IP in a whitelisted network should succeed
+        response = self.client.get(self.embargoed_page, HTTP_X_FORWARDED_FOR='1.0.0.0', REMOTE_ADDR='1.0.0.0')
+        self.assertEqual(response.status_code, 200)
+
+        # Accessing an embargoed course from an IP in a blacklisted network should cause a redirect
+        response = self.client.get(self.embargoed_page, HTTP_X_FORWARDED_FOR='5.0.0.0', REMOTE_ADDR='5.0.0.0')
+        self.assertEqual(response.status_code, 302)
+
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_invalid_ip_filter_entries(self):
+        # Malformed entries saved outside the admin form are ignored
+        IPFilter(
+            whitelist='1.0.0.0, 1.0.0.*',
+            blacklist='5.0.0.0/33, 5.0.0.0',
+            changed_by=self.user,
+            enabled=True
+        ).save()
+
+        response = self.client.get(self.embargoed_page, HTTP_X_FORWARDED_FOR='1.0.0.0', REMOTE_ADDR='1.0.0.0')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.embargoed_page, HTTP_X_FORWARDED_FOR='5.0.0.0', REMOTE_ADDR='5.0.0.0')
+        self.assertEqual(response.status_code, 302)
+
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_country_lookups_are_cached(self):
+        with mock.patch.object(
+            pygeoip.GeoIP, 'country_code_by_addr', return_value='CU'
+        ) as mock_country_code_by_addr:
+            for __ in range(2):
+                response = self.client.get(self.embargoed_page, HTTP_X_FORWARDED_FOR='1.0.0.0', REMOTE_ADDR='1.0.0.0')
+                self.assertEqual(response.status_code, 302)
+        self.assertEqual(mock_country_code_by_addr.call_count, 1)
+
     @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
     @mock.patch.dict(settings.FEATURES, {'EMBARGO': False})
     def test_countries_embargo_off(self):
@@ -0,0 +1,62 @@
+"""
+Tests for the embargo IP network sets
+"""
+import unittest
+
+from embargo.networks import IPNetworkSet, LRUCache, is_valid_network, parse_network
+
+
+class IPNetworkSetTest(unittest.TestCase):
+    """
+    Tests of parsing and matching addresses and networks
+    """
+    def test_valid_networks(self):
+        for network in ('18.244.1.5', '10.0.0.0/8', '0.0.0.0/0', '2002:c0a8:101::42', '2001:db8::/32'):
+            self.assertTrue(is_valid_network(network), network)
+
+    def test_invalid_networks(self):
+        for network in ('18.244.*', '.0.0.1', '10.0.0.0/33', '10.0.0.0/', '10.0.0.0/a', '2001:db8::/129', ''):
+            self.assertFalse(is_valid_network(network), network)
+
+    def test_host_bits_ignored(self):
+        self.assertEqual(parse_network('10.1.2.3/16'), parse_network('10.1.0.0/16'))
+
+    def test_contains(self):
+        networks = IPNetworkSet.from_csv(' 18.244.1.5, 10.0.0.0/8 , 2001:db8::/32,')
+        self.assertEqual(len(networks), 3)
+        self.assertIn('18.244.1.5', networks)
+        self.assertNotIn('18.244.1.6', networks)
+        self.assertIn('10.255.0.1', networks)
+        self.assertNotIn('11.0.0.1', networks)
+        self.assertIn('2001:db8::1', networks)
+        self.assertNotIn('2001:db9::1', networks)
+        self.assertNotIn('not an address', networks)
+
+    def test_invalid_entries_skipped(self):
+        networks = IPNetworkSet.from_csv('18.244.1.5, 18.244.*, 10.0.0.0/33, 10.0.0.0/8')
+        self.assertEqual(len(networks), 2)
+        self.assertIn('18.244.1.5', networks)
+        self.assertIn('10.0.0.1', networks)
+        self.assertNotIn('18.244.1.6', networks)
+
+    def test_empty(self):
+        networks = IPNetworkSet.from_csv('')
+        self.assertEqual(len(networks), 0)
+        self.assertNotIn('10.0.0.1', networks)
+
+
+class LRUCacheTest(unittest.TestCase):
+    """
+    Tests of the bounded LRU cache
+    """
+    def test_eviction(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+        # 'b' was the least recently used
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.get('c'), 3)
+        self.assertEqual(len(lru), 2)
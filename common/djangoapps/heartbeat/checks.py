@@ -0,0 +1,152 @@
+"""
+Checks of the services which the app depends on, for the deep heartbeat.
+
+Each check takes no argument, and raises an exception if its service is not
+usable.  The checks are cheap on purpose: they only prove that each service
+answers, so that polling them does not add load to a struggling cluster.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+
+from djcelery import celery
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore
+
+
+def check_sql():
+    """
+    Runs a trivial query on the default database.
+
+    The check runs in a thread of its own, whose database connection nothing
+    else would close, so it closes it.
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def _modulestore_databases():
+    """
+    Returns the mongo databases of the modulestores, which are behind a mixed
+    modulestore or are the modulestore itself.  XML modulestores have none.
+    """
+    store = modulestore()
+    stores = store.modulestores.values() if hasattr(store, 'modulestores') else [store]
+    databases = []
+    for store in stores:
+        # old mongo modulestores and split mongo modulestores respectively
+        for attribute in ('database', 'db'):
+            database = getattr(store, attribute, None)
+            if database is not None:
+                databases.append(database)
+                break
+    return databases
+
+
+def check_modulestore():
+    """ Pings the mongo databases of the modulestores """
+    for database in _modulestore_databases():
+        database.command('ping')
+
+
+def check_contentstore():
+    """ Pings the mongo database of the contentstore """
+    contentstore().fs_files.database.command('ping')
+
+
+def check_cache():
+    """ Stores and reads back a value in the default cache """
+    key = 'heartbeat.check.{0}'.format(uuid.uuid4().hex)
+    cache.set(key, 1, 10)
+    if cache.get(key) != 1:
+        raise Exception("The value stored in the cache could not be read back")
+    cache.delete(key)
+
+
+def check_celery_broker():
+    """ Connects to the celery broker """
+    with celery.connection() as conn:
+        conn.ensure_connection(max_retries=1)
+
+
+# (name, check) of the checks of the deep heartbeat, in report order
+HEALTH_CHECKS = (
+    ('sql', check_sql),
+    ('modulestore', check_modulestore),
+    ('contentstore', check_contentstore),
+    ('cache', check_cache),
+    ('celery_broker', check_celery_broker),
+)
+
+
+# The thread of the latest run of each check, by name, so that a check which
+# hangs is not started again in a new thread by every heartbeat
+_check_threads = {}
+_check_threads_lock = threading.Lock()
+
+
+def run_checks(checks, timeout):
+    """
+    Runs the (name, check) `checks` in parallel, each in its own thread, and
+    waits at most `timeout` seconds for them all.
+
+    Returns a dict mapping the name of each check to a dict of its outcome:
+    'ok', the 'latency' of the check in milliseconds, and the 'error' if it
+    failed.  Checks still running at the timeout fail, and are left to finish
+    in the background.  Until they do, they are not run again: they fail
+    right away instead, so that at most one thread per check is outstanding.
+    """
+    results = {}
+
+    def _run(name, check):
+        """ Runs one check, recording its outcome in `results` """
+        start = time.time()
+        try:
+            check()
+        except Exception as exc:  # pylint: disable=broad-except
+            error = u'{0}: {1}'.format(type(exc).__name__, exc)
+        else:
+            error = None
+        results[name] = {
+            'ok': error is None,
+            'latency': round((time.time() - start) * 1000, 1),
+            'error': error,
+        }
+
+    threads = []
+    still_running = set()
+    with _check_threads_lock:
+        for name, check in checks:
+            previous = _check_threads.get(name)
+            if previous is not None and previous.is_alive():
+                still_running.add(name)
+                continue
+            thread = threading.Thread(target=_run, args=(name, check), name='heartbeat-{0}'.format(name))
+            thread.daemon = True
+            thread.start()
+            _check_threads[name] = thread
+            threads.append(thread)
+
+    deadline = time.time() + timeout
+    for thread in threads:
+        thread.join(max(deadline - time.time(), 0))
+
+    outcomes = {}
+    for name, _check in checks:
+        if name in still_running:
+            error = u'Still running since an earlier heartbeat'
+        else:
+            error = u'Timed out after {0} seconds'.format(timeout)
+        outcomes[name] = results.get(name) or {
+            'ok': False,
+            'latency': None,
+            'error': error,
+        }
+    return outcomes
@@ -0,0 +1,108 @@
+"""
+Tests for the heartbeat views
+"""
+import json
+import time
+
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch, Mock
+
+from heartbeat import views
+from heartbeat.checks import run_checks, check_sql
+
+
+def _failing_check():
+    """ A check of a service which is down """
+    raise Exception("down")
+
+
+def _slow_check():
+    """ A check of a service which is too slow to answer """
+    time.sleep(0.5)
+
+
+@override_settings(HEARTBEAT_CHECK_TIMEOUT=0.1, HEARTBEAT_DEEP_CACHE_SECONDS=60)
+class HeartbeatTestCase(TestCase):
+    """
+    Tests for the heartbeat and deep heartbeat views
+    """
+    def setUp(self):
+        views._last_deep_heartbeat = (None, None)  # pylint: disable=protected-access
+
+    @patch('heartbeat.views.run_checks')
+    def test_heartbeat(self, mock_run_checks):
+        response = self.client.get(reverse('heartbeat'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('date', json.loads(response.content))
+        self.assertFalse(mock_run_checks.called)
+
+    def test_deep_heartbeat(self):
+        check = Mock()
+        with patch('heartbeat.views.HEALTH_CHECKS', (('sql', check), ('cache', check))):
+            response = self.client.get(reverse('deep_heartbeat'))
+        self.assertEqual(response.status_code, 200)
+        output = json.loads(response.content)
+        self.assertTrue(output['ok'])
+        self.assertEqual(set(output['checks']), set(['sql', 'cache']))
+        self.assertTrue(output['checks']['sql']['ok'])
+        self.assertIsNotNone(output['checks']['sql']['latency'])
+
+    def test_deep_heartbeat_failure(self):
+        with patch('heartbeat.views.HEALTH_CHECKS', (('sql', Mock()), ('cache', _failing_check))):
+            response = self.client.get(reverse('deep_heartbeat'))
+        self.assertEqual(response.status_code, 503)
+        output = json.loads(response.content)
+        self.assertFalse(output['ok'])
+        self.assertTrue(output['checks']['sql']['ok'])
+        self.assertEqual(output['checks']['cache']['error'], u'Exception: down')
+
+    def test_deep_heartbeat_cached(self):
+        check = Mock()
+        with patch('heartbeat.views.HEALTH_CHECKS', (('sql', check),)):
+            self.client.get(reverse('deep_heartbeat'))
+            self.client.get(reverse('deep_heartbeat'))
+        self.assertEqual(check.call_count, 1)
+
+        with override_settings(HEARTBEAT_DEEP_CACHE_SECONDS=0):
+            with patch('heartbeat.views.HEALTH_CHECKS', (('sql', check),)):
+                time.sleep(0.01)
+                self.client.get(reverse('deep_heartbeat'))
+        self.assertEqual(check.call_count, 2)
+
+    def test_check_timeout(self):
+        start = time.time()
+        outcomes = run_checks((('sql', Mock()), ('modulestore', _slow_check)), 0.1)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertTrue(outcomes['sql']['ok'])
+        self.assertFalse(outcomes['modulestore']['ok'])
+        self.assertIsNone(outcomes['modulestore']['latency'])
+
+    def test_hung_check_not_restarted(self):
+        slow_check = Mock(side_effect=_slow_check)
+        outcomes = run_checks((('contentstore', slow_check),), 0.1)
+        self.assertEqual(outcomes['contentstore']['error'], u'Timed out after 0.1 seconds')
+
+        # while the first run hangs, the check isn't started in another thread
+        outcomes = run_checks((('contentstore', slow_check),), 0.1)
+        self.assertEqual(outcomes['contentstore']['error'], u'Still running since an earlier heartbeat')
+        self.assertEqual(slow_check.call_count, 1)
+
+        # once it finished, the check runs again
+        time.sleep(0.6)
+        outcomes = run_checks((('contentstore', slow_check),), 1)
+        self.assertTrue(outcomes['contentstore']['ok'])
+        self.assertEqual(slow_check.call_count, 2)
+
+    @patch('heartbeat.checks.connection')
+    def test_check_sql_closes_connection(self, mock_connection):
+        check_sql()
+        mock_connection.cursor.return_value.execute.assert_called_once_with('SELECT 1')
+        self.assertTrue(mock_connection.close.called)
+
+        mock_connection.close.reset_mock()
+        mock_connection.cursor.return_value.execute.side_effect = Exception("down")
+        with self.assertRaises(Exception):
+            check_sql()
+        self.assertTrue(mock_connection.close.called)
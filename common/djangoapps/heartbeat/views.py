@@ -1,18 +1,74 @@
 import json
+import threading
+import time
 from datetime import datetime
 from pytz import UTC
+from django.conf import settings
 from django.http import HttpResponse
-from xmodule.modulestore.django import modulestore
 from dogapi import dog_stats_api
 
+from heartbeat.checks import HEALTH_CHECKS, run_checks
+from xmodule.block_registry import lookup_counts
+
+
+# The latest outcome of the deep heartbeat checks in this process, as a
+# (time.time() at which it was computed, output) pair, and the lock which lets
+# a single request run the checks at a time.
+_last_deep_heartbeat = (None, None)
+_deep_heartbeat_lock = threading.Lock()
+
 
 @dog_stats_api.timed('edxapp.heartbeat')
 def heartbeat(request):
     """
-    Simple view that a loadbalancer can check to verify that the app is up
+    Simple view that a loadbalancer can check to verify that the app is up.
+
+    It doesn't touch any of the services the app depends on, so that it stays
+    cheap however often it is polled; see deep_heartbeat for those.
     """
     output = {
         'date': datetime.now(UTC).isoformat(),
-        'courses': [course.location.url() for course in modulestore().get_courses()],
     }
-    return HttpResponse(json.dumps(output, indent=4))
+    return HttpResponse(json.dumps(output, indent=4), mimetype="application/json")
+
+
+@dog_stats_api.timed('edxapp.heartbeat.deep')
+def deep_heartbeat(request):
+    """
+    View that checks whether the services the app depends on are usable, and how
+    long each of them took to answer, in milliseconds.  Responds 503 if any of
+    them is not.
+
+    Each check is given settings.HEARTBEAT_CHECK_TIMEOUT seconds, and the outcome
+    of the checks is reused for settings.HEARTBEAT_DEEP_CACHE_SECONDS seconds by
+    the requests this process serves, so that frequent polling doesn't add load
+    to the services.  Whenever it runs the checks, it also reports the lookup
+    counts of the block registry of the process to datadog.
+    """
+    global _last_deep_heartbeat  # pylint: disable=global-statement
+
+    computed, output = _last_deep_heartbeat
+    if computed is None or time.time() - computed > settings.HEARTBEAT_DEEP_CACHE_SECONDS:
+        with _deep_heartbeat_lock:
+            # another request may have run the checks while this one waited
+            computed, output = _last_deep_heartbeat
+            if computed is None or time.time() - computed > settings.HEARTBEAT_DEEP_CACHE_SECONDS:
+                checks = run_checks(HEALTH_CHECKS, settings.HEARTBEAT_CHECK_TIMEOUT)
+                for name, outcome in checks.iteritems():
+                    if outcome['latency'] is not None:
+                        dog_stats_api.histogram('edxapp.heartbeat.check', outcome['latency'], tags=[u'check:{0}'.format(name)])
+                # report how well the block registry of this process serves its lookups
+                for name, count in lookup_counts().iteritems():
+                    dog_stats_api.gauge('edxapp.block_registry.{0}'.format(name), count)
+                output = {
+                    'date': datetime.now(UTC).isoformat(),
+                    'ok': all(outcome['ok'] for outcome in checks.itervalues()),
+                    'checks': checks,
+                }
+                _last_deep_heartbeat = (time.time(), output)
+
+    return HttpResponse(
+        json.dumps(output, indent=4),
+        mimetype="application/json",
+        status=200 if output['ok'] else 503,
+    )
@@ -14,6 +14,11 @@ from django.conf import settings
 _microsite_configuration_threadlocal = threading.local()
 _microsite_configuration_threadlocal.data = {}
 
+# (microsite template directory, relative template path) -> resolved template path.
+# The microsite template directories are set up with the settings, so which
+# templates they override doesn't change while the process runs.
+_microsite_template_paths = {}
+
 
 def has_microsite_configuration_set():
     """
@@ -66,14 +71,17 @@ class MicrositeConfiguration(object):
         microsite_template_path = cls.get_microsite_configuration_value('template_dir')
 
         if microsite_template_path:
-            search_path = microsite_template_path / relative_path
-
-            if os.path.isfile(search_path):
-                path = '{0}/templates/{1}'.format(
-                    cls.get_microsite_configuration_value('microsite_name'),
-                    relative_path
-                )
-                return path
+            key = (microsite_template_path, relative_path)
+            path = _microsite_template_paths.get(key)
+            if path is None:
+                path = relative_path
+                if os.path.isfile(microsite_template_path / relative_path):
+                    path = '{0}/templates/{1}'.format(
+                        cls.get_microsite_configuration_value('microsite_name'),
+                        relative_path
+                    )
+                _microsite_template_paths[key] = path
+            return path
 
         return relative_path
 
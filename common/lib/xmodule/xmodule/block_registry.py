@@ -0,0 +1,138 @@
+"""
+A process-wide registry of the XBlock classes of each block type, and of their
+classes with mixins applied.
+
+Resolving a block type scans the XBlock entry points whenever the type has no
+plugin of its own and falls back to a default class, and mixing a class
+creates a new class each time.  Every descriptor that is loaded does both, so
+the registry does each once per process, and the runtimes of the modulestores
+resolve and mix their classes through it.
+
+The registry assumes that the installed XBlocks don't change while the process
+runs; tests which register temporary plugins can call `clear` to forget them.
+"""
+import logging
+import threading
+
+from xblock.core import XBlock
+from xblock.runtime import Mixologist
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+
+# (block type, default class, select function) -> XBlock class
+_block_classes = {}
+
+# (XBlock class, mixins) -> XBlock class with the mixins applied
+_mixed_classes = {}
+
+# How many lookups in each of the two tables were answered from the registry
+# ('hits') and had to resolve or mix a class ('misses')
+_counts = {
+    'block_class_hits': 0,
+    'block_class_misses': 0,
+    'mixed_class_hits': 0,
+    'mixed_class_misses': 0,
+}
+
+
+def _count(name):
+    """ Increments the lookup count `name` """
+    with _lock:
+        _counts[name] += 1
+
+
+def load_block_class(block_type, default_class=None, select=None):
+    """
+    Returns the XBlock class of `block_type`, as
+    `XBlock.load_class(block_type, default_class, select)` does.
+    """
+    key = (block_type, default_class, select)
+    try:
+        block_class = _block_classes[key]
+    except KeyError:
+        pass
+    else:
+        _count('block_class_hits')
+        return block_class
+
+    # Resolve outside of the lock: another thread resolving the same type at
+    # the same time only does redundant work, and both get the same class.
+    block_class = XBlock.load_class(block_type, default_class, select)
+    with _lock:
+        block_class = _block_classes.setdefault(key, block_class)
+        _counts['block_class_misses'] += 1
+    return block_class
+
+
+def mixed_class(cls, mixins):
+    """
+    Returns the class with the `mixins` applied to `cls`, as
+    `Mixologist(mixins).mix(cls)` does, creating it only once for each
+    (class, mixins) pair.
+    """
+    key = (cls, tuple(mixins))
+    try:
+        mixed = _mixed_classes[key]
+    except KeyError:
+        pass
+    else:
+        _count('mixed_class_hits')
+        return mixed
+
+    mixed = Mixologist(key[1]).mix(cls)
+    with _lock:
+        mixed = _mixed_classes.setdefault(key, mixed)
+        _counts['mixed_class_misses'] += 1
+    return mixed
+
+
+class CachingMixologist(Mixologist):
+    """
+    A Mixologist whose mixed classes are shared by the whole process, through
+    the registry.
+    """
+    def mix(self, cls):
+        return mixed_class(cls, self._mixins)
+
+
+def warm(mixins=(), default_class=None, select=None):
+    """
+    Resolves every installed block type and mixes its class with `mixins`, so
+    that the first requests served by the process don't have to.
+
+    Returns the number of block types resolved.
+    """
+    block_types = set(block_type for block_type, _cls in XBlock.load_classes())
+    for block_type in block_types:
+        try:
+            mixed_class(load_block_class(block_type, default_class, select), mixins)
+        except Exception:  # pylint: disable=broad-except
+            # an XBlock which can't be loaded fails when it is used, as it would without warming
+            log.exception("Could not load the XBlock class of block type %s", block_type)
+    return len(block_types)
+
+
+def lookup_counts():
+    """
+    Returns a dict of how many lookups of block classes and of mixed classes
+    were answered from the registry ('..._hits') or not ('..._misses'), and of
+    how many classes of each the registry holds ('..._size').
+    """
+    with _lock:
+        counts = dict(_counts)
+        counts['block_class_size'] = len(_block_classes)
+        counts['mixed_class_size'] = len(_mixed_classes)
+    return counts
+
+
+def clear():
+    """
+    Forgets all the classes of the registry, and resets its lookup counts.
+    """
+    with _lock:
+        _block_classes.clear()
+        _mixed_classes.clear()
+        for name in _counts:
+            _counts[name] = 0
@@ -11,6 +11,7 @@ import logging
 from .content import StaticContent, ContentStore, StaticContentStream
 from xmodule.exceptions import NotFoundError
 from fs.osfs import OSFS
+import calendar
 import os
 import json
 
@@ -127,18 +128,55 @@ class MongoContentStore(ContentStore):
         :param assets_policy_file: the filename for the policy file which should be in the same
         directory as the other policy files.
         """
-        policy = {}
         assets, __ = self.get_all_content_for_course(course_location)
 
+        for asset in assets:
+            self.export(Location(asset['_id']), output_directory)
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(self._export_policy(assets), f)
+
+    def get_export_streams_for_course(self, course_location):
+        """
+        Return the policy of all of this course's assets (as export_all_for_course writes it to the
+        policy file) and an iterator over the assets themselves, for exporting the course without
+        writing its assets to disk.
+
+        The iterator yields a (path, file, modification time, length) tuple per asset, where path is
+        where export_all_for_course would put the asset relative to the output directory, and file is
+        the GridFS file to read its data from in chunks, which the caller must close.
+
+        :param course_location: the Location of type 'course'
+        """
+        assets, __ = self.get_all_content_for_course(course_location)
+
+        def asset_streams():
+            for asset in assets:
+                content_id = StaticContent.get_id_from_location(Location(asset['_id']))
+                try:
+                    fp = self.fs.get(content_id)
+                except NoFile:
+                    # deleted since the course's assets were listed
+                    continue
+                import_path = getattr(fp, 'import_path', None)
+                asset_path = os.path.join(os.path.dirname(import_path or ''), fp.displayname)
+                yield asset_path, fp, calendar.timegm(fp.upload_date.utctimetuple()), fp.length
+
+        return self._export_policy(assets), asset_streams()
+
+    @staticmethod
+    def _export_policy(assets):
+        """
+        Return the policy dict of the given assets: all of their attributes other than the ones GridFS
+        maintains itself, by asset name.
+        """
+        policy = {}
         for asset in assets:
             asset_location = Location(asset['_id'])
-            self.export(asset_location, output_directory)
             for attr, value in asset.iteritems():
                 if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize']:
                     policy.setdefault(asset_location.name, {})[attr] = value
-
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f)
+        return policy
 
     def get_all_content_thumbnails_for_course(self, location):
         return self._get_all_content_for_course(location, get_thumbnails=True)[0]
@@ -7,6 +7,7 @@ import logging
 import re
 
 from collections import namedtuple
+from contextlib import contextmanager
 
 from abc import ABCMeta, abstractmethod
 
@@ -39,6 +40,11 @@ INVALID_HTML_CHARS = re.compile(r"[^\w-]", re.UNICODE)
 
 _LocationBase = namedtuple('LocationBase', 'tag org course category name revision')
 
+# A lightweight stand-in for an item, as returned by get_item_records: its
+# location, category and display_name, and a dict of the values of the fields
+# which were asked for
+ItemRecord = namedtuple('ItemRecord', 'location category display_name fields')
+
 
 def _check_location_part(val, regexp):
     """
@@ -529,9 +535,38 @@ class ModuleStoreReadBase(ModuleStoreRead):
                 return c
         return None
 
+    def get_item_records(self, location, course_id=None, fields=()):
+        """
+        Returns a list of ItemRecords for the items that match location, as
+        get_items does, for callers which only need a few fields of the items.
+
+        fields: the names of the Scope.settings fields whose values the records
+            should hold.  The fields an item doesn't have are left out of its record.
+
+        Default impl--loads the items. Modulestores which can read the fields
+        without loading the items override it.
+        """
+        return [
+            ItemRecord(
+                item.location,
+                item.scope_ids.block_type,
+                getattr(item, 'display_name', None),
+                dict((name, getattr(item, name)) for name in fields if name in item.fields),
+            )
+            for item in self.get_items(location, course_id=course_id)
+        ]
+
 
 class ModuleStoreWriteBase(ModuleStoreReadBase, ModuleStoreWrite):
     '''
     Implement interface functionality that can be shared.
     '''
-    pass
+    @contextmanager
+    def bulk_write_operations(self):
+        '''
+        Context manager for making many writes in a row, which modulestores can use to
+        defer the work following each write until the end of the operation.
+
+        Default impl--nothing is deferred.
+        '''
+        yield
@@ -13,8 +13,9 @@ from django.core.cache import get_cache, InvalidCacheBackendError
 from django.dispatch import Signal
 import django.utils
 
+from xmodule import block_registry
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
-from xmodule.util.django import get_current_request_hostname
+from xmodule.util.django import get_current_request, get_current_request_hostname
 
 
 # We may not always have the request_cache module available
@@ -26,9 +27,28 @@ except ImportError:
 
 _MODULESTORES = {}
 
+# Sent by the modulestores whenever they write to a course; shared by all of them
+# so that receivers can connect to it without instantiating a modulestore.
+MODULESTORE_UPDATE_SIGNAL = Signal(providing_args=['modulestore', 'course_id', 'location'])
+
 FUNCTION_KEYS = ['render_template']
 
 
+class RequestScopedCache(object):
+    """
+    The request cache of the current thread, while it serves a request.
+
+    Outside of requests, as in celery workers and management commands, nothing
+    clears the request cache, so `data` is then a new empty dict on each access,
+    and the modulestores memoize nothing in it.
+    """
+    @property
+    def data(self):
+        if get_current_request() is None:
+            return {}
+        return RequestCache.get_request_cache().data
+
+
 def load_function(path):
     """
     Load a function by name.
@@ -54,7 +74,7 @@ def create_modulestore_instance(engine, doc_store_config, options, i18n_service=
             _options[key] = load_function(_options[key])
 
     if HAS_REQUEST_CACHE:
-        request_cache = RequestCache.get_request_cache()
+        request_cache = RequestScopedCache()
     else:
         request_cache = None
 
@@ -66,7 +86,7 @@ def create_modulestore_instance(engine, doc_store_config, options, i18n_service=
     return class_(
         metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
         request_cache=request_cache,
-        modulestore_update_signal=Signal(providing_args=['modulestore', 'course_id', 'location']),
+        modulestore_update_signal=MODULESTORE_UPDATE_SIGNAL,
         xblock_mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
         xblock_select=getattr(settings, 'XBLOCK_SELECT_FUNCTION', None),
         doc_store_config=doc_store_config,
@@ -191,6 +211,51 @@ def editable_modulestore(name='default'):
         return None
 
 
+def _default_classes(store_settings):
+    """
+    Returns the dot-separated names of the default classes of the modulestores
+    configured by `store_settings`, including those behind a mixed modulestore.
+    """
+    options = store_settings.get('OPTIONS', {})
+    names = set()
+    if options.get('default_class'):
+        names.add(options['default_class'])
+    for substore_settings in options.get('stores', {}).values():
+        names.update(_default_classes(substore_settings))
+    return names
+
+
+def warm_block_registry():
+    """
+    Resolves the classes of all the installed block types for the default
+    classes of the configured modulestores, and mixes them with
+    settings.XBLOCK_MIXINS, as loading their descriptors will.
+    """
+    default_classes = set([None])
+    for store_settings in settings.MODULESTORE.values():
+        default_classes.update(load_function(name) for name in _default_classes(store_settings))
+
+    for default_class in default_classes:
+        block_registry.warm(
+            mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
+            default_class=default_class,
+            select=getattr(settings, 'XBLOCK_SELECT_FUNCTION', None),
+        )
+
+
+def load_course_snapshots():
+    """
+    Loads the course snapshots kept on disk by the configured modulestores, and
+    those behind them, which use course snapshots.
+    """
+    for name in settings.MODULESTORE:
+        store = modulestore(name)
+        stores = store.modulestores.values() if hasattr(store, 'modulestores') else [store]
+        for store in stores:
+            if hasattr(store, 'load_course_snapshots'):
+                store.load_course_snapshots()
+
+
 class ModuleI18nService(object):
     """
     Implement the XBlock runtime "i18n" service.
@@ -2,6 +2,7 @@
 Method for converting among our differing Location/Locator whatever reprs
 '''
 from random import randint
+from uuid import uuid4
 import re
 import pymongo
 import bson.son
@@ -11,6 +12,9 @@ from xmodule.modulestore.locator import BlockUsageLocator, CourseLocator
 from xmodule.modulestore import Location
 import urllib
 
+# Bump when the cached course map stamps change so that those cached by older code are ignored
+COURSE_MAP_VERSION = 2
+
 
 class LocMapperStore(object):
     '''
@@ -25,6 +29,9 @@ class LocMapperStore(object):
 
     The expectation is that the configuration will have this use the same store as whatever is the default
     or dominant store, but that's not a requirement. This store creates its own connection.
+
+    The maps of the courses are kept in the memory of the process. The cache only holds a stamp for each of
+    them, which changes whenever any process changes the map, so that the processes reload it then.
     '''
 
     def __init__(
@@ -49,6 +56,8 @@ class LocMapperStore(object):
         self.location_map = self.db[collection + '.location_map']
         self.location_map.write_concern = {'w': 1}
         self.cache = cache
+        # cache key -> (stamp, the _CourseMap or the list of _CourseMaps read under that stamp)
+        self._course_maps = {}
 
     # location_map functions
     def create_map_entry(self, course_location, package_id=None, draft_branch='draft', prod_branch='published',
@@ -117,6 +126,7 @@ class LocMapperStore(object):
             location_update = {'lower_id': location_id_lower, 'lower_course_id': package_id.lower()}
             self.location_map.update({'_id': location_id}, {'$set': location_update})
 
+        self._invalidate_course_maps(course_location, package_id)
         return package_id
 
     def translate_location(self, old_style_course_id, location, published=True, add_entry_if_missing=True):
@@ -141,68 +151,50 @@ class LocMapperStore(object):
         NOTE: unlike old mongo, draft branches contain the whole course; so, it applies to all category
         of locations including course.
         """
-        location_id = self._interpret_location_course_id(old_style_course_id, location)
-        if old_style_course_id is None:
-            old_style_course_id = self._generate_location_course_id(location_id)
+        return self.translate_locations(old_style_course_id, [location], published, add_entry_if_missing)[0]
 
-        cached_value = self._get_locator_from_cache(old_style_course_id, location, published)
-        if cached_value:
-            return cached_value
+    def translate_locations(self, old_style_course_id, locations, published=True, add_entry_if_missing=True):
+        """
+        Translate the given module locations, which must all be in the same course, to Locators. This
+        is translate_location for many locations at once: the course's map is fetched once and any
+        missing entries are persisted in a single update.
 
-        maps = self.location_map.find(location_id)
-        maps = list(maps)
-        if len(maps) == 0:
-            if add_entry_if_missing:
-                # create a new map
-                course_location = location.replace(category='course', name=location_id['_id']['name'])
-                self.create_map_entry(course_location)
-                entry = self.location_map.find_one(location_id)
-            else:
-                raise ItemNotFoundError()
-        elif len(maps) == 1:
-            entry = maps[0]
-        else:
-            # find entry w/o name, if any; otherwise, pick arbitrary
-            entry = maps[0]
-            for item in maps:
-                if 'name' not in item['_id']:
-                    entry = item
-                    break
+        Returns the list of Locators in the order of locations.
 
-        block_id = entry['block_map'].get(self.encode_key_for_mongo(location.name))
-        if block_id is None:
-            if add_entry_if_missing:
-                block_id = self._add_to_block_map(location, location_id, entry['block_map'])
-            else:
-                raise ItemNotFoundError(location)
-        elif isinstance(block_id, dict):
-            # jump_to_id uses a None category.
-            if location.category is None:
-                if len(block_id) == 1:
-                    # unique match (most common case)
-                    block_id = block_id.values()[0]
-                else:
-                    raise InvalidLocationError()
-            elif location.category in block_id:
-                block_id = block_id[location.category]
-            elif add_entry_if_missing:
-                block_id = self._add_to_block_map(location, location_id, entry['block_map'])
-            else:
-                raise ItemNotFoundError()
-        else:
-            raise InvalidLocationError()
-
-        published_usage = BlockUsageLocator(
-            package_id=entry['course_id'], branch=entry['prod_branch'], block_id=block_id)
-        draft_usage = BlockUsageLocator(
-            package_id=entry['course_id'], branch=entry['draft_branch'], block_id=block_id)
-        if published:
-            result = published_usage
-        else:
-            result = draft_usage
+        :param old_style_course_id: the course_id used in old mongo not the new one (optional, will use the
+        first location)
+        :param locations: a list of Locations pointing to modules in the same course
+        :param published: a boolean to indicate whether the caller wants the draft or published branch.
+        :param add_entry_if_missing: a boolean as to whether to raise ItemNotFoundError or to create an entry if
+        the course or a block is not found in the map.
+        """
+        if not locations:
+            return []
+        location_id = self._interpret_location_course_id(old_style_course_id, locations[0])
+        if old_style_course_id is None:
+            old_style_course_id = self._generate_location_course_id(location_id)
 
-        self._cache_location_map_entry(old_style_course_id, location, published_usage, draft_usage)
-        return result
+        course_map = self._get_course_map(old_style_course_id, location_id, locations[0], add_entry_if_missing)
+        block_ids = course_map.block_ids(locations)
+        if None in block_ids:
+            # another process may have mapped them since the map was cached
+            course_map = self._get_course_map(
+                old_style_course_id, location_id, locations[0], add_entry_if_missing, refresh=True
+            )
+            block_ids = course_map.block_ids(locations)
+        if None in block_ids:
+            missing = [location for location, block_id in zip(locations, block_ids) if block_id is None]
+            if not add_entry_if_missing:
+                raise ItemNotFoundError(missing[0])
+            course_map = self._add_to_block_map(missing, course_map, self._course_map_key(old_style_course_id))
+            block_ids = course_map.block_ids(locations)
+
+        entry = course_map.entry
+        branch = entry['prod_branch'] if published else entry['draft_branch']
+        return [
+            BlockUsageLocator(package_id=entry['course_id'], branch=branch, block_id=block_id)
+            for block_id in block_ids
+        ]
 
     def translate_locator_to_location(self, locator, get_course=False, lower_only=False):
         """
@@ -222,64 +214,41 @@ class LocMapperStore(object):
 
         :param locator: a BlockUsageLocator
         """
-        if get_course:
-            cached_value = self._get_course_location_from_cache(locator.package_id, lower_only)
-        else:
-            cached_value = self._get_location_from_cache(locator)
-        if cached_value:
-            return cached_value
-
         # This does not require that the course exist in any modulestore
         # only that it has a mapping entry.
-        if lower_only:
-            maps = self.location_map.find({'lower_course_id': locator.package_id.lower()})
-        else:
-            maps = self.location_map.find({'course_id': locator.package_id})
-        # look for one which maps to this block block_id
-        if maps.count() == 0:
-            return None
-        result = None
-        for candidate in maps:
-            if get_course and 'name' in candidate['_id']:
-                candidate_id = candidate['_id']
-                return Location(
-                    'i4x', candidate_id['org'], candidate_id['course'], 'course', candidate_id['name']
+        course_maps, fresh = self._get_course_maps_for_package(locator.package_id, lower_only)
+        result = self._find_location(course_maps, locator, get_course)
+        if result is None and not fresh:
+            # the block may have been mapped since the maps were cached
+            course_maps, __ = self._get_course_maps_for_package(locator.package_id, lower_only, refresh=True)
+            result = self._find_location(course_maps, locator, get_course)
+        return result
+
+    def translate_locators_to_locations(self, locators, lower_only=False):
+        """
+        Translate the given Locators to old style Locations as translate_locator_to_location does, fetching
+        the map of each course once.
+
+        Returns the list of Locations (or None for those with no matches) in the order of locators.
+
+        :param locators: a list of BlockUsageLocators
+        """
+        maps_by_package = {}
+        result = []
+        for locator in locators:
+            if locator.package_id not in maps_by_package:
+                maps_by_package[locator.package_id] = self._get_course_maps_for_package(
+                    locator.package_id, lower_only
                 )
-            old_course_id = self._generate_location_course_id(candidate['_id'])
-            for old_name, cat_to_usage in candidate['block_map'].iteritems():
-                for category, block_id in cat_to_usage.iteritems():
-                    # cache all entries and then figure out if we have the one we want
-                    # Always return revision=None because the
-                    # old draft module store wraps locations as draft before
-                    # trying to access things.
-                    location = Location(
-                        'i4x',
-                        candidate['_id']['org'],
-                        candidate['_id']['course'],
-                        category,
-                        self.decode_key_from_mongo(old_name),
-                        None)
-
-                    if lower_only:
-                        candidate_key = "lower_course_id"
-                    else:
-                        candidate_key = "course_id"
-
-                    published_locator = BlockUsageLocator(
-                        candidate[candidate_key], branch=candidate['prod_branch'], block_id=block_id
-                    )
-                    draft_locator = BlockUsageLocator(
-                        candidate[candidate_key], branch=candidate['draft_branch'], block_id=block_id
-                    )
-                    self._cache_location_map_entry(old_course_id, location, published_locator, draft_locator)
-
-                    if get_course and category == 'course':
-                        result = location
-                    elif not get_course and block_id == locator.block_id:
-                        result = location
-            if result is not None:
-                return result
-        return None
+            course_maps, fresh = maps_by_package[locator.package_id]
+            location = self._find_location(course_maps, locator, False)
+            if location is None and not fresh:
+                maps_by_package[locator.package_id] = course_maps, fresh = self._get_course_maps_for_package(
+                    locator.package_id, lower_only, refresh=True
+                )
+                location = self._find_location(course_maps, locator, False)
+            result.append(location)
+        return result
 
     def translate_location_to_course_locator(self, old_style_course_id, location, published=True, lower_only=False):
         """
@@ -288,16 +257,40 @@ class LocMapperStore(object):
 
         :param course_id: old style course id
         """
-        cached = self._get_course_locator_from_cache(old_style_course_id, published)
-        if cached:
-            return cached
-
         location_id = self._interpret_location_course_id(old_style_course_id, location, lower_only)
+        if old_style_course_id is None:
+            old_style_course_id = self._generate_location_course_id(location_id.get('lower_id', location_id))
+
+        entry = self._get_course_map(
+            old_style_course_id, location_id, location, add_entry_if_missing=False, lower_only=lower_only
+        ).entry
+        if published:
+            return CourseLocator(package_id=entry['course_id'], branch=entry['prod_branch'])
+        else:
+            return CourseLocator(package_id=entry['course_id'], branch=entry['draft_branch'])
 
-        maps = self.location_map.find(location_id)
-        maps = list(maps)
+    def _get_course_map(
+        self, old_style_course_id, location_id, location, add_entry_if_missing, lower_only=False, refresh=False
+    ):
+        """
+        Get the _CourseMap of the map entry for old_style_course_id (or location_id), from the cache unless
+        refresh, creating the entry if there is none and add_entry_if_missing (or else raising
+        ItemNotFoundError).
+        """
+        cache_key = self._course_map_key(old_style_course_id, lower_only)
+        course_map, stamp = self._get_memoized(cache_key, refresh)
+        if course_map is not None:
+            return course_map
+
+        maps = list(self.location_map.find(location_id))
         if len(maps) == 0:
-            raise ItemNotFoundError()
+            if add_entry_if_missing:
+                # create a new map
+                course_location = location.replace(category='course', name=location_id['_id']['name'])
+                self.create_map_entry(course_location)
+                entry = self.location_map.find_one(location_id)
+            else:
+                raise ItemNotFoundError()
         elif len(maps) == 1:
             entry = maps[0]
         else:
@@ -307,30 +300,96 @@ class LocMapperStore(object):
                 if 'name' not in item['_id']:
                     entry = item
                     break
-        published_course_locator = CourseLocator(package_id=entry['course_id'], branch=entry['prod_branch'])
-        draft_course_locator = CourseLocator(package_id=entry['course_id'], branch=entry['draft_branch'])
-        self._cache_course_locator(old_style_course_id, published_course_locator, draft_course_locator)
-        if published:
-            return published_course_locator
-        else:
-            return draft_course_locator
-
-    def _add_to_block_map(self, location, location_id, block_map):
-        '''add the given location to the block_map and persist it'''
-        if self._block_id_is_guid(location.name):
-            # This makes the ids more meaningful with a small probability of name collision.
-            # The downside is that if there's more than one course mapped to from the same org/course root
-            # the block ids will likely be out of sync and collide from an id perspective. HOWEVER,
-            # if there are few == org/course roots or their content is unrelated, this will work well.
-            block_id = self._verify_uniqueness(location.category + location.name[:3], block_map)
+
+        course_map = _CourseMap(entry)
+        self._course_maps[cache_key] = (stamp, course_map)
+        return course_map
+
+    def _get_course_maps_for_package(self, package_id, lower_only=False, refresh=False):
+        """
+        Get the _CourseMaps of all of the map entries for the given package_id, from the cache unless
+        refresh. Returns them along with whether they were just read from the location_map.
+        """
+        cache_key = self._package_maps_key(package_id, lower_only)
+        course_maps, stamp = self._get_memoized(cache_key, refresh)
+        if course_maps is not None:
+            return course_maps, False
+
+        if lower_only:
+            maps = self.location_map.find({'lower_course_id': package_id.lower()})
         else:
-            # if 2 different category locations had same name, then they'll collide. Make the later
-            # mapped ones unique
-            block_id = self._verify_uniqueness(location.name, block_map)
-        encoded_location_name = self.encode_key_for_mongo(location.name)
-        block_map.setdefault(encoded_location_name, {})[location.category] = block_id
-        self.location_map.update(location_id, {'$set': {'block_map': block_map}})
-        return block_id
+            maps = self.location_map.find({'course_id': package_id})
+        course_maps = [_CourseMap(entry) for entry in maps]
+        if course_maps:
+            self._course_maps[cache_key] = (stamp, course_maps)
+        return course_maps, True
+
+    def _get_memoized(self, cache_key, refresh=False):
+        """
+        Get the maps kept in memory under cache_key, unless refresh or any process changed them since they
+        were read, along with the current stamp of cache_key to keep them under once they are read again.
+        The stamp is read first, so that a change made while they are read makes them be read again.
+        """
+        stamp = self.cache.get(cache_key)
+        if stamp is None:
+            stamp = uuid4().hex
+            self.cache.set(cache_key, stamp)
+        memoized_stamp, maps = self._course_maps.get(cache_key, (None, None))
+        if refresh or memoized_stamp != stamp:
+            return None, stamp
+        return maps, stamp
+
+    @staticmethod
+    def _find_location(course_maps, locator, get_course):
+        """
+        Find the Location which locator (or with get_course, its course) maps to in the first of course_maps
+        which maps it.
+        """
+        for course_map in course_maps:
+            candidate_id = course_map.entry['_id']
+            if get_course and 'name' in candidate_id:
+                return Location('i4x', candidate_id['org'], candidate_id['course'], 'course', candidate_id['name'])
+            if get_course:
+                name, category = course_map.course_name, 'course'
+            else:
+                name, category = course_map.locations_by_block_id.get(locator.block_id, (None, None))
+            if name is not None:
+                # Always return revision=None because the
+                # old draft module store wraps locations as draft before
+                # trying to access things.
+                return Location('i4x', candidate_id['org'], candidate_id['course'], category, name, None)
+        return None
+
+    def _add_to_block_map(self, locations, course_map, cache_key):
+        '''
+        Add the given locations to a copy of the course_map's block_map, persist them, and return the new
+        _CourseMap. The course_map itself is left as is, since other threads may be reading it.
+        '''
+        block_map = dict(course_map.entry['block_map'])
+        added = {}
+        for location in locations:
+            if self._block_id_is_guid(location.name):
+                # This makes the ids more meaningful with a small probability of name collision.
+                # The downside is that if there's more than one course mapped to from the same org/course root
+                # the block ids will likely be out of sync and collide from an id perspective. HOWEVER,
+                # if there are few == org/course roots or their content is unrelated, this will work well.
+                block_id = self._verify_uniqueness(location.category + location.name[:3], block_map)
+            else:
+                # if 2 different category locations had same name, then they'll collide. Make the later
+                # mapped ones unique
+                block_id = self._verify_uniqueness(location.name, block_map)
+            encoded_location_name = self.encode_key_for_mongo(location.name)
+            block_map[encoded_location_name] = dict(block_map.get(encoded_location_name, {}))
+            block_map[encoded_location_name][location.category] = block_id
+            added[u'block_map.{}.{}'.format(encoded_location_name, location.category)] = block_id
+        # only set the new keys so as not to clobber blocks concurrently mapped by others
+        self.location_map.update({'_id': course_map.entry['_id']}, {'$set': added})
+        course_map = _CourseMap(dict(course_map.entry, block_map=block_map))
+        # a new stamp, so that the other processes read the map again
+        stamp = uuid4().hex
+        self.cache.set(cache_key, stamp)
+        self._course_maps[cache_key] = (stamp, course_map)
+        return course_map
 
     def _interpret_location_course_id(self, course_id, location, lower_only=False):
         """
@@ -428,69 +487,85 @@ class LocMapperStore(object):
         """
         return urllib.unquote(fieldname)
 
-    def _get_locator_from_cache(self, old_course_id, location, published):
-        """
-        See if the location x published pair is in the cache. If so, return the mapped locator.
-        """
-        entry = self.cache.get(u'{}+{}'.format(old_course_id, location.url()))
-        if entry is not None:
-            if published:
-                return entry[0]
-            else:
-                return entry[1]
-        return None
-
-    def _get_course_locator_from_cache(self, old_course_id, published):
-        """
-        Get the course Locator for this old course id
-        """
-        if not old_course_id:
-            return None
-        entry = self.cache.get(old_course_id)
-        if entry is not None:
-            if published:
-                return entry[0].as_course_locator()
-            else:
-                return entry[1].as_course_locator()
-
-    def _get_location_from_cache(self, locator):
-        """
-        See if the locator is in the cache. If so, return the mapped location.
-        """
-        return self.cache.get(unicode(locator))
-
-    def _get_course_location_from_cache(self, locator_package_id, lower_only=False):
+    @staticmethod
+    def _course_map_key(old_course_id, lower_only=False):
         """
-        See if the package_id is in the cache. If so, return the mapped location to the
-        course root.
+        The cache key of the stamp of the _CourseMap for the given old style course id.
         """
         if lower_only:
-            cache_key = u'courseIdLower+{}'.format(locator_package_id.lower())
-        else:
-            cache_key = u'courseId+{}'.format(locator_package_id)
+            return u'courseMapLower.v{}+{}'.format(COURSE_MAP_VERSION, old_course_id.lower())
+        return u'courseMap.v{}+{}'.format(COURSE_MAP_VERSION, old_course_id)
 
-        return self.cache.get(cache_key)
-
-    def _cache_course_locator(self, old_course_id, published_course_locator, draft_course_locator):
-        """
-        For quick lookup of courses
-        """
-        if not old_course_id:
-            return
-        self.cache.set(old_course_id, (published_course_locator, draft_course_locator))
-
-    def _cache_location_map_entry(self, old_course_id, location, published_usage, draft_usage):
+    @staticmethod
+    def _package_maps_key(package_id, lower_only=False):
         """
-        Cache the mapping from location to the draft and published Locators in entry.
-        Also caches the inverse. If the location is category=='course', it caches it for
-        the get_course query
+        The cache key of the stamp of the _CourseMaps of all of the map entries for the given package_id.
         """
-        setmany = {}
-        if location.category == 'course':
-            setmany[u'courseId+{}'.format(published_usage.package_id)] = location
-            setmany[u'courseIdLower+{}'.format(published_usage.package_id.lower())] = location
-        setmany[unicode(published_usage)] = location
-        setmany[unicode(draft_usage)] = location
-        setmany[u'{}+{}'.format(old_course_id, location.url())] = (published_usage, draft_usage)
-        setmany[old_course_id] = (published_usage, draft_usage)
-        self.cache.set_many(setmany)
+        if lower_only:
+            return u'packageMapsLower.v{}+{}'.format(COURSE_MAP_VERSION, package_id.lower())
+        return u'packageMaps.v{}+{}'.format(COURSE_MAP_VERSION, package_id)
+
+    def _invalidate_course_maps(self, course_location, package_id):
+        """
+        Drop the maps which a new map entry for course_location to package_id may change, along with their
+        stamps, so that the other processes read them again too.
+        """
+        course_ids = [u'{0.org}/{0.course}'.format(course_location)]
+        if course_location.category == 'course':
+            course_ids.append(u'{0.org}/{0.course}/{0.name}'.format(course_location))
+        keys = [self._package_maps_key(package_id), self._package_maps_key(package_id, True)]
+        for course_id in course_ids:
+            keys.extend([self._course_map_key(course_id), self._course_map_key(course_id, True)])
+        self.cache.delete_many(keys)
+        for key in keys:
+            self._course_maps.pop(key, None)
+
+
+class _CourseMap(object):
+    """
+    A location_map entry along with its block_map indexed by block_id, so that a course's translations
+    in both directions are served from one map.
+    """
+    def __init__(self, entry):
+        self.entry = entry
+        self.reindex()
+
+    def reindex(self):
+        """
+        Rebuild the index from the entry's block_map.
+        """
+        self.locations_by_block_id = {}
+        self.course_name = None
+        for old_name, cat_to_usage in self.entry['block_map'].iteritems():
+            if not isinstance(cat_to_usage, dict):
+                continue
+            old_name = LocMapperStore.decode_key_from_mongo(old_name)
+            for category, block_id in cat_to_usage.iteritems():
+                self.locations_by_block_id[block_id] = (old_name, category)
+                if category == 'course':
+                    self.course_name = old_name
+
+    def block_ids(self, locations):
+        """
+        Return the block_id of each of the locations, or None for those which aren't mapped.
+        """
+        block_map = self.entry['block_map']
+        result = []
+        for location in locations:
+            block_id = block_map.get(LocMapperStore.encode_key_for_mongo(location.name))
+            if block_id is None:
+                pass
+            elif isinstance(block_id, dict):
+                # jump_to_id uses a None category.
+                if location.category is None:
+                    if len(block_id) == 1:
+                        # unique match (most common case)
+                        block_id = block_id.values()[0]
+                    else:
+                        raise InvalidLocationError()
+                else:
+                    block_id = block_id.get(location.category)
+            else:
+                raise InvalidLocationError()
+            result.append(block_id)
+        return result
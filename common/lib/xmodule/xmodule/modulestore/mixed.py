@@ -5,6 +5,8 @@ In this way, courses can be served up both - say - XMLModuleStore or MongoModule
 
 """
 
+from contextlib import contextmanager, nested
+
 from . import ModuleStoreWriteBase
 from xmodule.modulestore.django import create_modulestore_instance, loc_mapper
 import logging
@@ -87,6 +89,46 @@ class MixedModuleStore(ModuleStoreWriteBase):
         locator = loc_mapper().translate_location(course_id, reference, reference.revision == 'draft', True)
         return unicode(locator) if stringify else locator
 
+    def _locators_to_locations(self, references):
+        """
+        Convert the referenced locators to locations as _locator_to_location does, all at once
+        """
+        stringify = [isinstance(reference, basestring) for reference in references]
+        locators = [
+            BlockUsageLocator(url=reference) if as_string else reference
+            for reference, as_string in zip(references, stringify)
+        ]
+        locations = loc_mapper().translate_locators_to_locations(locators)
+        return [
+            location.url() if as_string else location
+            for location, as_string in zip(locations, stringify)
+        ]
+
+    def _locations_to_locators(self, course_id, references):
+        """
+        Convert the referenced locations to locators as _location_to_locator does, all at once
+        """
+        stringify = [isinstance(reference, basestring) for reference in references]
+        locations = [
+            Location(reference) if as_string else reference
+            for reference, as_string in zip(references, stringify)
+        ]
+        locators = [None] * len(locations)
+        # the branch depends on the revision; so, translate each kind in one go
+        for published in set(location.revision == 'draft' for location in locations):
+            indexes = [
+                index for index, location in enumerate(locations) if (location.revision == 'draft') == published
+            ]
+            translated = loc_mapper().translate_locations(
+                course_id, [locations[index] for index in indexes], published, True
+            )
+            for index, locator in zip(indexes, translated):
+                locators[index] = locator
+        return [
+            unicode(locator) if as_string else locator
+            for locator, as_string in zip(locators, stringify)
+        ]
+
     def _incoming_reference_adaptor(self, store, course_id, reference):
         """
         Convert the reference to the type the persistence layer wants
@@ -107,7 +149,27 @@ class MixedModuleStore(ModuleStoreWriteBase):
             return self._location_to_locator(course_id, reference)
         return self._locator_to_location(reference)
 
-    def _xblock_adaptor_iterator(self, adaptor, string_converter, store, course_id, xblock):
+    def _incoming_references_adaptor(self, store, course_id, references):
+        """
+        Convert the list of references to the type the persistence layer wants
+        """
+        if issubclass(store.reference_type, Location if self.use_locations else Locator):
+            return references
+        if store.reference_type == Location:
+            return self._locators_to_locations(references)
+        return self._locations_to_locators(course_id, references)
+
+    def _outgoing_references_adaptor(self, store, course_id, references):
+        """
+        Convert the list of references to the type the application wants
+        """
+        if issubclass(store.reference_type, Location if self.use_locations else Locator):
+            return references
+        if store.reference_type == Location:
+            return self._locations_to_locators(course_id, references)
+        return self._locators_to_locations(references)
+
+    def _xblock_adaptor_iterator(self, adaptor, list_adaptor, string_converter, store, course_id, xblock):
         """
         Change all reference fields in this xblock to the type expected by the receiving layer
         """
@@ -121,10 +183,7 @@ class MixedModuleStore(ModuleStoreWriteBase):
                 elif isinstance(field, ReferenceList):
                     field.write_to(
                         xblock,
-                        [
-                            adaptor(store, course_id, ref)
-                            for ref in field.read_from(xblock)
-                        ]
+                        list_adaptor(store, course_id, field.read_from(xblock))
                     )
                 elif isinstance(field, String):
                     # replace links within the string
@@ -139,7 +198,8 @@ class MixedModuleStore(ModuleStoreWriteBase):
             course_id, store.reference_type, xblock.location
         )
         return self._xblock_adaptor_iterator(
-            self._incoming_reference_adaptor, string_converter, store, course_id, xblock
+            self._incoming_reference_adaptor, self._incoming_references_adaptor,
+            string_converter, store, course_id, xblock
         )
 
     def _outgoing_xblock_adaptor(self, store, course_id, xblock):
@@ -150,7 +210,8 @@ class MixedModuleStore(ModuleStoreWriteBase):
             course_id, xblock.location.__class__, xblock.location
         )
         return self._xblock_adaptor_iterator(
-            self._outgoing_reference_adaptor, string_converter, store, course_id, xblock
+            self._outgoing_reference_adaptor, self._outgoing_references_adaptor,
+            string_converter, store, course_id, xblock
         )
 
     CONVERT_RE = re.compile(r"/jump_to_id/({}+)".format(ALLOWED_ID_CHARS))
@@ -265,6 +326,20 @@ class MixedModuleStore(ModuleStoreWriteBase):
         xblocks = [self._outgoing_xblock_adaptor(store, course_id, xblock) for xblock in xblocks]
         return xblocks
 
+    def get_item_records(self, location, course_id=None, fields=()):
+        """
+        See ModuleStoreReadBase.get_item_records.  When the app and the modulestore of
+        the course both use Locations, the records of the modulestore are returned as
+        is; otherwise, they are made from the items, whose references get converted.
+        """
+        if not course_id:
+            raise Exception("Must pass in a course_id when calling get_item_records()")
+
+        store = self._get_modulestore_for_courseid(course_id)
+        if self.use_locations and store.reference_type == Location and isinstance(location, Location):
+            return store.get_item_records(location, course_id, fields)
+        return super(MixedModuleStore, self).get_item_records(location, course_id, fields)
+
     def get_courses(self):
         '''
         Returns a list containing the top level XModuleDescriptors of the courses
@@ -395,3 +470,15 @@ class MixedModuleStore(ModuleStoreWriteBase):
         store = self._get_modulestore_for_courseid(location.package_id)
         decoded_ref = self._incoming_reference_adaptor(store, location.package_id, location)
         return store.delete_item(decoded_ref, **kwargs)
+
+    @contextmanager
+    def bulk_write_operations(self):
+        """
+        Runs the bulk write operations of all the writable stores, so that the writes
+        made through this store, or any of its stores, are deferred the same way.
+        """
+        with nested(*[
+            store.bulk_write_operations() for store in self.modulestores.values()
+            if hasattr(store, 'bulk_write_operations')
+        ]):
+            yield
@@ -16,8 +16,14 @@ import pymongo
 import sys
 import logging
 import copy
+import glob
+import hashlib
+import os
+import threading
+import uuid
 
 from bson.son import SON
+from contextlib import contextmanager
 from fs.osfs import OSFS
 from itertools import repeat
 from path import path
@@ -30,14 +36,31 @@ from xblock.runtime import KvsFieldData
 from xblock.exceptions import InvalidScopeError
 from xblock.fields import Scope, ScopeIds
 
-from xmodule.modulestore import ModuleStoreWriteBase, Location, MONGO_MODULESTORE_TYPE
+from xmodule.block_registry import load_block_class, mixed_class
+from xmodule.modulestore import ModuleStoreWriteBase, Location, ItemRecord, MONGO_MODULESTORE_TYPE
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import own_metadata, InheritanceMixin, inherit_metadata, InheritanceKeyValueStore
+from xmodule.modulestore.mongo.snapshot import CourseSnapshot, SnapshotFormatError, SnapshotModuleData
 from xmodule.modulestore.xml import LocationReader
 from xblock.core import XBlock
 
 log = logging.getLogger(__name__)
 
+# The bulk write operations in progress in each thread: their nesting depth, and
+# the deferred refreshes and signals of the courses written to, as a dict mapping
+# (modulestore, metadata cache key) -> the location last written to.  Shared by
+# all the Mongo modulestores, so that an operation writing through both a draft
+# and a direct modulestore is one bulk operation.
+_bulk_writes = threading.local()
+
+# The size of the chunks course snapshots are split in, in the metadata inheritance
+# cache: memcached doesn't store items over 1MB, their keys and headers included
+SNAPSHOT_CHUNK_SIZE = 1000 * 1000
+
+# How long, in seconds, the other processes wait for the process building a
+# course snapshot, before one of them builds it instead
+SNAPSHOT_BUILD_LOCK_TIMEOUT = 5 * 60
+
 
 def get_course_id_no_run(location):
     '''
@@ -251,6 +274,26 @@ def metadata_cache_key(location):
     return u"{0.org}/{0.course}".format(location)
 
 
+def snapshot_version_cache_key(key):
+    """The cache key of the current snapshot version of the course with metadata cache key `key`"""
+    return u"course_snapshot_version/{0}".format(key)
+
+
+def snapshot_cache_key(key, version):
+    """The cache key of the `version` snapshot of the course with metadata cache key `key`"""
+    return u"course_snapshot/{0}/{1}".format(key, version)
+
+
+def snapshot_build_lock_cache_key(key, version):
+    """The cache key of the lock on building the `version` snapshot of the course with metadata cache key `key`"""
+    return u"course_snapshot_build/{0}/{1}".format(key, version)
+
+
+def snapshot_chunk_cache_key(key, version, index):
+    """The cache key of chunk `index` of the `version` snapshot of the course with metadata cache key `key`"""
+    return u"course_snapshot/{0}/{1}/{2}".format(key, version, index)
+
+
 class MongoModuleStore(ModuleStoreWriteBase):
     """
     A Mongodb backed ModuleStore
@@ -264,9 +307,15 @@ class MongoModuleStore(ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None,
+                 course_snapshots=False,
+                 course_snapshot_dir=None,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param course_snapshots: whether to load the published blocks of courses from snapshots of them
+            (see xmodule.modulestore.mongo.snapshot), which are kept in the metadata inheritance cache.
+        :param course_snapshot_dir: a directory in which to also keep the snapshots, so that the processes of
+            a server can load them at startup.
         """
 
         super(MongoModuleStore, self).__init__(**kwargs)
@@ -303,6 +352,10 @@ class MongoModuleStore(ModuleStoreWriteBase):
             zip(('_id.' + field for field in Location._fields), repeat(1)),
         )
         # pylint: enable=no-member, protected_access
+        # and one for the queries by category within a course which don't specify the tag,
+        # such as the one computing the metadata inheritance tree (see mongo_indexes.md),
+        # built in the background so as not to block a large collection
+        self.collection.ensure_index([('_id.org', 1), ('_id.course', 1), ('_id.category', 1)], background=True)
 
         if default_class is not None:
             module_path, _, class_name = default_class.rpartition('.')
@@ -317,6 +370,11 @@ class MongoModuleStore(ModuleStoreWriteBase):
 
         self.ignore_write_events_on_courses = []
 
+        self.course_snapshots = course_snapshots
+        self.course_snapshot_dir = course_snapshot_dir
+        # metadata cache key -> (version, CourseSnapshot) of the snapshots this process loaded
+        self._course_snapshots = {}
+
     def compute_metadata_inheritance_tree(self, location):
         '''
         TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
@@ -424,15 +482,253 @@ class MongoModuleStore(ModuleStoreWriteBase):
 
         return tree
 
+    @contextmanager
+    def bulk_write_operations(self):
+        """
+        Context manager for making many writes in a row, such as importing or
+        duplicating large parts of a course.
+
+        Until the outermost bulk operation of the thread finishes, writes to the Mongo
+        modulestores don't refresh the metadata inheritance trees of their courses nor
+        send the update signal; then each course written to gets one refresh and one
+        signal, even if the operation failed partway.  Inherited settings read during
+        the operation may therefore be stale.
+        """
+        _bulk_writes.depth = getattr(_bulk_writes, 'depth', 0) + 1
+        if _bulk_writes.depth == 1:
+            _bulk_writes.pending = {}
+        try:
+            yield
+        finally:
+            _bulk_writes.depth -= 1
+            if _bulk_writes.depth == 0:
+                pending, _bulk_writes.pending = _bulk_writes.pending, {}
+                for (store, _key), location in pending.iteritems():
+                    store.refresh_cached_metadata_inheritance_tree(location)
+                    store.fire_updated_modulestore_signal(get_course_id_no_run(location), location)
+
+    def _defer_to_bulk_write(self, location):
+        """
+        If a bulk write operation is in progress in this thread, records that the
+        course of `location` was written to, and returns True.
+        """
+        if not getattr(_bulk_writes, 'depth', 0):
+            return False
+        _bulk_writes.pending[(self, metadata_cache_key(location))] = location
+        return True
+
     def refresh_cached_metadata_inheritance_tree(self, location):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
-        for location
+        for location, unless a bulk write operation defers it
         """
+        # even while write events are ignored, the snapshots of the course must not be
+        # used anymore, by any process
+        self.invalidate_course_snapshot(location)
+
+        if self._defer_to_bulk_write(location):
+            return
         pseudo_course_id = '/'.join([location.org, location.course])
         if pseudo_course_id not in self.ignore_write_events_on_courses:
             self.get_cached_metadata_inheritance_tree(location, force_refresh=True)
 
+    def _course_snapshot_version(self, key, create=True):
+        """
+        Returns the current snapshot version of the course with metadata cache key
+        `key`, as recorded in the metadata inheritance cache.  If there is none, and
+        `create` is True, starts a new one; otherwise, returns None.
+
+        Any write to the course changes the version, so a snapshot built after
+        reading the version is only used as long as it is current.
+        """
+        if self.request_cache is not None and key in self.request_cache.data.get('course_snapshot_version', {}):
+            return self.request_cache.data['course_snapshot_version'][key]
+
+        cache_key = snapshot_version_cache_key(key)
+        version = self.metadata_inheritance_cache_subsystem.get(cache_key)
+        if version is None and create:
+            # another process may be starting a version at the same time: use whichever was first
+            self.metadata_inheritance_cache_subsystem.add(cache_key, uuid.uuid4().hex)
+            version = self.metadata_inheritance_cache_subsystem.get(cache_key)
+
+        if self.request_cache is not None and version is not None:
+            self.request_cache.data.setdefault('course_snapshot_version', {})[key] = version
+        return version
+
+    def invalidate_course_snapshot(self, location):
+        """
+        Starts a new snapshot version of the course of `location`, so that no process
+        uses the snapshots built before.  Called after any write to the course.
+        """
+        key = metadata_cache_key(location)
+        self._course_snapshots.pop(key, None)
+        if self.request_cache is not None:
+            self.request_cache.data.get('course_snapshot_version', {}).pop(key, None)
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(snapshot_version_cache_key(key), uuid.uuid4().hex)
+
+    def _snapshot_path(self, key, version=None):
+        """
+        Returns the path of the file holding the `version` snapshot of the course with
+        metadata cache key `key` in the snapshot directory, or a glob of all of them.
+        """
+        return os.path.join(
+            self.course_snapshot_dir,
+            u'{0}.{1}.snapshot'.format(hashlib.md5(key.encode('utf-8')).hexdigest(), version or '*'),
+        )
+
+    def _read_course_snapshot(self, key, version):
+        """
+        Returns the `version` snapshot of the course with metadata cache key `key` from
+        the snapshot directory or the metadata inheritance cache, or None.
+        """
+        data = None
+        if self.course_snapshot_dir is not None:
+            try:
+                with open(self._snapshot_path(key, version), 'rb') as snapshot_file:
+                    data = snapshot_file.read()
+            except IOError:
+                pass
+        if data is None:
+            data = self._read_cached_course_snapshot(key, version)
+        if data is None:
+            return None
+
+        try:
+            return CourseSnapshot.loads(data)
+        except SnapshotFormatError:
+            # written by a version of the platform using another format
+            return None
+
+    def _read_cached_course_snapshot(self, key, version):
+        """
+        Returns the serialized `version` snapshot of the course with metadata cache key
+        `key` from the metadata inheritance cache, or None if any of its chunks is missing.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        chunk_count = cache.get(snapshot_cache_key(key, version))
+        if chunk_count is None:
+            return None
+        chunk_keys = [snapshot_chunk_cache_key(key, version, index) for index in xrange(chunk_count)]
+        chunks = cache.get_many(chunk_keys)
+        if len(chunks) != chunk_count:
+            # evicted, or too large for the cache to store: the snapshot is rebuilt
+            return None
+        return ''.join(chunks[chunk_key] for chunk_key in chunk_keys)
+
+    def _write_course_snapshot(self, key, version, snapshot):
+        """
+        Stores the `version` snapshot of the course with metadata cache key `key` in
+        the metadata inheritance cache and, replacing its older versions, in the
+        snapshot directory.
+
+        In the cache, the snapshot is split in chunks of SNAPSHOT_CHUNK_SIZE bytes, since
+        memcached doesn't store values over 1MB, and its entry only holds their count.
+        """
+        data = snapshot.dumps()
+        chunks = [data[start:start + SNAPSHOT_CHUNK_SIZE] for start in xrange(0, len(data), SNAPSHOT_CHUNK_SIZE)]
+        self.metadata_inheritance_cache_subsystem.set_many(dict(
+            (snapshot_chunk_cache_key(key, version, index), chunk) for index, chunk in enumerate(chunks)
+        ))
+        # stored last, so that readers don't look for chunks before they are all stored
+        self.metadata_inheritance_cache_subsystem.set(snapshot_cache_key(key, version), len(chunks))
+
+        if self.course_snapshot_dir is not None:
+            path_ = self._snapshot_path(key, version)
+            try:
+                # write then rename, so that other processes never read a partial snapshot
+                temp_path = u'{0}.{1}.tmp'.format(path_, os.getpid())
+                with open(temp_path, 'wb') as snapshot_file:
+                    snapshot_file.write(data)
+                os.rename(temp_path, path_)
+                for old_path in glob.glob(self._snapshot_path(key)):
+                    if old_path != path_:
+                        os.remove(old_path)
+            except (IOError, OSError):
+                log.warning("Could not write the course snapshot %s", path_, exc_info=True)
+
+    def _build_course_snapshot(self, location):
+        """
+        Builds the snapshot of the published blocks of the course of `location`.
+        """
+        query = {
+            '_id.tag': 'i4x',
+            '_id.org': location.org,
+            '_id.course': location.course,
+            '_id.revision': None,
+        }
+        items = list(self.collection.find(query))
+        return CourseSnapshot.build(
+            location.org, location.course, items, self.get_cached_metadata_inheritance_tree(location)
+        )
+
+    def get_course_snapshot(self, location):
+        """
+        Returns the current snapshot of the published blocks of the course of
+        `location`, loading or building it if needed.
+
+        Returns None if this modulestore doesn't use course snapshots, if `location`
+        isn't published, or if the course has no blocks.  Also returns None while
+        another process builds the snapshot, so that after a write to the course,
+        only one process builds it while the others read the blocks from Mongo.
+        """
+        if not self.course_snapshots or location.revision is not None:
+            return None
+        if self.metadata_inheritance_cache_subsystem is None:
+            # snapshots can't be kept current without a cache shared by the processes
+            return None
+
+        key = metadata_cache_key(location)
+        # the version must be read before the blocks, so that a snapshot never
+        # holds blocks older than its version
+        version = self._course_snapshot_version(key)
+        loaded = self._course_snapshots.get(key)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+
+        snapshot = self._read_course_snapshot(key, version)
+        if snapshot is None:
+            lock_key = snapshot_build_lock_cache_key(key, version)
+            if not self.metadata_inheritance_cache_subsystem.add(lock_key, True, SNAPSHOT_BUILD_LOCK_TIMEOUT):
+                return None
+            try:
+                snapshot = self._build_course_snapshot(location)
+            except Exception:
+                self.metadata_inheritance_cache_subsystem.delete(lock_key)
+                raise
+            if not len(snapshot):
+                return None
+            # the lock is left to expire, so that a snapshot the cache doesn't keep
+            # isn't built again by each process
+            self._write_course_snapshot(key, version, snapshot)
+
+        self._course_snapshots[key] = (version, snapshot)
+        return snapshot
+
+    def load_course_snapshots(self):
+        """
+        Loads the current snapshots of the snapshot directory, so that the first
+        requests for their courses don't have to.  Returns how many were loaded.
+        """
+        if not self.course_snapshots or self.course_snapshot_dir is None:
+            return 0
+        if self.metadata_inheritance_cache_subsystem is None:
+            return 0
+
+        loaded = 0
+        for path_ in glob.glob(os.path.join(self.course_snapshot_dir, '*.snapshot')):
+            version = os.path.basename(path_).split('.')[1]
+            try:
+                with open(path_, 'rb') as snapshot_file:
+                    snapshot = CourseSnapshot.loads(snapshot_file.read())
+            except (IOError, SnapshotFormatError):
+                continue
+            key = metadata_cache_key(snapshot)
+            if self._course_snapshot_version(key, create=False) == version:
+                self._course_snapshots[key] = (version, snapshot)
+                loaded += 1
+        return loaded
+
     def _clean_item_data(self, item):
         """
         Renames the '_id' field in item to 'location'
@@ -484,9 +780,10 @@ class MongoModuleStore(ModuleStoreWriteBase):
 
         return data
 
-    def _load_item(self, item, data_cache, apply_cached_metadata=True):
+    def _load_item(self, item, data_cache, apply_cached_metadata=True, snapshot=None):
         """
-        Load an XModuleDescriptor from item, using the children stored in data_cache
+        Load an XModuleDescriptor from item, using the children stored in data_cache,
+        and the metadata inheritance tree of `snapshot` if the item comes from one
         """
         location = Location(item['location'])
         data_dir = getattr(item, 'data_dir', location.course)
@@ -498,7 +795,9 @@ class MongoModuleStore(ModuleStoreWriteBase):
         resource_fs = OSFS(root)
 
         cached_metadata = {}
-        if apply_cached_metadata:
+        if snapshot is not None:
+            cached_metadata = snapshot.inheritance_tree
+        elif apply_cached_metadata:
             cached_metadata = self.get_cached_metadata_inheritance_tree(location)
 
         services = {}
@@ -600,6 +899,15 @@ class MongoModuleStore(ModuleStoreWriteBase):
             calls to get_children() to cache. None indicates to cache all descendents.
         """
         location = Location.ensure_fully_specified(location)
+        snapshot = self.get_course_snapshot(location)
+        if snapshot is not None:
+            # the snapshot holds all the blocks of the course, whatever the depth
+            data_cache = SnapshotModuleData(snapshot)
+            item = data_cache.get(location)
+            if item is None:
+                raise ItemNotFoundError(location)
+            return self._load_item(item, data_cache, snapshot=snapshot)
+
         item = self._find_one(location)
         module = self._load_items([item], depth)[0]
         return module
@@ -625,6 +933,53 @@ class MongoModuleStore(ModuleStoreWriteBase):
         modules = self._load_items(list(items), depth)
         return modules
 
+    def get_item_records(self, location, course_id=None, fields=()):
+        """
+        See ModuleStoreReadBase.get_item_records.  Only reads the location and the
+        asked for metadata of the items, and converts their values with the fields
+        of the items' classes, without loading the items.  Like the items, the records
+        get the values of the inheritable fields their items don't set from the
+        metadata inheritance tree, and the defaults of the fields otherwise.
+        """
+        names = ('display_name',) + tuple(fields)
+        record_filter = {'_id': 1}
+        for name in names:
+            record_filter['metadata.{0}'.format(name)] = 1
+
+        records = []
+        for item in self.collection.find(location_to_query(location), record_filter):
+            item_location = Location(item['_id'])
+            block_class = mixed_class(
+                load_block_class(item_location.category, self.default_class, self.xblock_select),
+                self.xblock_mixins,
+            )
+            metadata = item.get('metadata', {})
+            inherited = None
+
+            values = {}
+            for name in names:
+                field = block_class.fields.get(name)
+                if field is None or field.scope != Scope.settings:
+                    continue
+                if name in metadata:
+                    values[name] = field.from_json(metadata[name])
+                    continue
+                if name in InheritanceMixin.fields:
+                    if inherited is None:
+                        inherited = self.get_cached_metadata_inheritance_tree(item_location).get(
+                            item_location.replace(revision=None).url(), {}
+                        )
+                    if name in inherited:
+                        values[name] = field.from_json(inherited[name])
+                        continue
+                values[name] = field.default
+
+            records.append(ItemRecord(
+                item_location, item_location.category, values.pop('display_name', None),
+                dict((name, values[name]) for name in fields if name in values),
+            ))
+        return records
+
     def create_xmodule(self, location, definition_data=None, metadata=None, system=None):
         """
         Create the new xmodule but don't save it. Returns the new module.
@@ -734,8 +1089,11 @@ class MongoModuleStore(ModuleStoreWriteBase):
 
     def fire_updated_modulestore_signal(self, course_id, location):
         """
-        Send a signal using `self.modulestore_update_signal`, if that has been set
+        Send a signal using `self.modulestore_update_signal`, if that has been set,
+        unless a bulk write operation defers it
         """
+        if self._defer_to_bulk_write(location):
+            return
         if self.modulestore_update_signal is not None:
             self.modulestore_update_signal.send(self, modulestore=self, course_id=course_id,
                                                 location=location)
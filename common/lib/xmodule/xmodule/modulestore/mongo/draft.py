@@ -81,6 +81,19 @@ class DraftModuleStore(MongoModuleStore):
         except ItemNotFoundError:
             return wrap_draft(super(DraftModuleStore, self).get_item(location, depth=depth))
 
+    def get_item_records(self, location, course_id=None, fields=()):
+        """
+        Loads the items, so that the records are those of their drafts if they have any.
+        """
+        return super(MongoModuleStore, self).get_item_records(location, course_id=course_id, fields=fields)
+
+    def get_course_snapshot(self, location):
+        """
+        Course snapshots only hold the published blocks, so they are never used to
+        read the drafts.
+        """
+        return None
+
     def get_instance(self, course_id, location, depth=0):
         """
         Get an instance of this location, with policy for course_id applied.
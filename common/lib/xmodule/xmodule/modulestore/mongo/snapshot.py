@@ -0,0 +1,236 @@
+"""
+Snapshots of the published blocks of a course of the Mongo modulestore.
+
+A snapshot holds the documents of all the published blocks of a course and the
+metadata inheritance tree of the course, so that a process can load any block
+of the course without querying Mongo or recomputing the tree.  It is meant to
+be built once, stored in a shared cache or on local disk, and loaded by every
+process which serves the course.
+
+Rather than a dict per block, a snapshot is a few arrays indexed by block: the
+category of each block (as an index in a table of categories), its name, the
+range of its children in a flat array of block indexes, and its other fields,
+pickled.  The inherited settings are deduplicated into a table as well, since
+all the blocks of a container inherit the same settings.  Blocks are only
+turned back into the documents the modulestore expects when they are loaded.
+"""
+import cPickle as pickle
+import struct
+import zlib
+from array import array
+
+from xmodule.modulestore import Location
+
+# The version of the format of the serialized snapshots.  Snapshots of another
+# version are not loaded; bump it whenever the format changes.
+SNAPSHOT_FORMAT = 1
+
+_HEADER = struct.Struct('!4sH')
+_MAGIC = 'XSNP'
+
+
+class SnapshotFormatError(ValueError):
+    """
+    Raised when serialized data is not a snapshot of the current format
+    """
+    pass
+
+
+class CourseSnapshot(object):
+    """
+    The published blocks of a course and their inherited settings.
+
+    Blocks are identified by their index; the urls of the children and of the
+    inheritance tree which are not blocks of the snapshot (such as dangling
+    children) are indexed after them, as `extra_urls`.
+    """
+    def __init__(self, org, course, categories, category_ids, names, extra_urls,
+                 child_offsets, child_ids, fields, inherited, inherited_ids):
+        self.org = org
+        self.course = course
+        self.categories = categories
+        self.category_ids = category_ids
+        self.names = names
+        self.extra_urls = extra_urls
+        self.child_offsets = child_offsets
+        self.child_ids = child_ids
+        self.fields = fields
+        self.inherited = inherited
+        self.inherited_ids = inherited_ids
+        self._indexes = None
+        self._inheritance_tree = None
+
+    @classmethod
+    def build(cls, org, course, items, inheritance_tree):
+        """
+        Builds the snapshot of a course from the Mongo documents of its
+        published blocks, `items`, and from its metadata inheritance tree.
+        """
+        categories = []
+        category_indexes = {}
+        category_ids = array('H')
+        names = []
+        indexes = {}
+        for item in items:
+            location = Location(item['_id'])
+            if location.category not in category_indexes:
+                category_indexes[location.category] = len(categories)
+                categories.append(location.category)
+            category_ids.append(category_indexes[location.category])
+            names.append(location.name)
+            indexes[location.url()] = len(names) - 1
+
+        extra_urls = []
+
+        def _index(url):
+            """ Returns the index of `url`, indexing it as an extra url if it isn't a block """
+            if url not in indexes:
+                indexes[url] = len(names) + len(extra_urls)
+                extra_urls.append(url)
+            return indexes[url]
+
+        child_offsets = array('I', [0])
+        child_ids = array('I')
+        fields = []
+        for item in items:
+            payload = dict(item)
+            del payload['_id']
+            definition = dict(payload.get('definition', {}))
+            child_ids.extend(_index(child) for child in definition.pop('children', []))
+            child_offsets.append(len(child_ids))
+            payload['definition'] = definition
+            fields.append(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+        inherited = []
+        inherited_indexes = {}
+        inherited_by_index = {}
+        for url, settings in inheritance_tree.iteritems():
+            serialized = pickle.dumps(settings, pickle.HIGHEST_PROTOCOL)
+            if serialized not in inherited_indexes:
+                inherited_indexes[serialized] = len(inherited)
+                inherited.append(serialized)
+            inherited_by_index[_index(url)] = inherited_indexes[serialized]
+        inherited_ids = array('i', (
+            inherited_by_index.get(index, -1) for index in xrange(len(names) + len(extra_urls))
+        ))
+
+        return cls(
+            org, course, categories, category_ids, names, extra_urls,
+            child_offsets, child_ids, fields, inherited, inherited_ids,
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def url(self, index):
+        """ Returns the url of the block or extra url at `index` """
+        if index < len(self.names):
+            return self.location(index).url()
+        return self.extra_urls[index - len(self.names)]
+
+    def location(self, index):
+        """ Returns the Location of the block at `index` """
+        return Location('i4x', self.org, self.course, self.categories[self.category_ids[index]], self.names[index], None)
+
+    def index(self, location):
+        """ Returns the index of the block at `location`, or None if it isn't in the snapshot """
+        if self._indexes is None:
+            self._indexes = dict((self.url(index), index) for index in xrange(len(self)))
+        return self._indexes.get(Location(location).url())
+
+    def item(self, index):
+        """
+        Returns a new copy of the document of the block at `index`, in the form
+        the modulestore caches them, with a 'location' rather than an '_id'.
+        """
+        item = pickle.loads(self.fields[index])
+        item['location'] = self.location(index).dict()
+        start, end = self.child_offsets[index], self.child_offsets[index + 1]
+        if end > start:
+            item['definition']['children'] = [self.url(child) for child in self.child_ids[start:end]]
+        return item
+
+    @property
+    def inheritance_tree(self):
+        """
+        The metadata inheritance tree of the course, as computed by the
+        modulestore: a dict of the settings each url inherits.
+        """
+        if self._inheritance_tree is None:
+            inherited = [pickle.loads(settings) for settings in self.inherited]
+            self._inheritance_tree = dict(
+                (self.url(index), inherited[inherited_id])
+                for index, inherited_id in enumerate(self.inherited_ids)
+                if inherited_id >= 0
+            )
+        return self._inheritance_tree
+
+    def dumps(self):
+        """ Serializes the snapshot """
+        state = (
+            self.org, self.course, self.categories, self.category_ids.tostring(), self.names, self.extra_urls,
+            self.child_offsets.tostring(), self.child_ids.tostring(), self.fields, self.inherited,
+            self.inherited_ids.tostring(),
+        )
+        return _HEADER.pack(_MAGIC, SNAPSHOT_FORMAT) + zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Deserializes a snapshot serialized by `dumps`.  Raises SnapshotFormatError
+        if `data` is not a snapshot of the current format.
+        """
+        try:
+            magic, version = _HEADER.unpack_from(data)
+        except struct.error:
+            raise SnapshotFormatError("Not a course snapshot")
+        if magic != _MAGIC or version != SNAPSHOT_FORMAT:
+            raise SnapshotFormatError("Not a course snapshot of format {0}".format(SNAPSHOT_FORMAT))
+        (org, course, categories, category_ids, names, extra_urls, child_offsets, child_ids,
+         fields, inherited, inherited_ids) = pickle.loads(zlib.decompress(data[_HEADER.size:]))
+        return cls(
+            org, course, categories, array('H', category_ids), names, extra_urls,
+            array('I', child_offsets), array('I', child_ids), fields, inherited, array('i', inherited_ids),
+        )
+
+
+class SnapshotModuleData(object):
+    """
+    The module_data of a CachingDescriptorSystem loading blocks from a snapshot:
+    a cache of the documents of the blocks, by Location, which gets each of
+    them from the snapshot the first time it is asked for.
+
+    Like the dicts it stands in for, it only holds the documents which were
+    loaded, so updating another module_data with it only copies those.
+    """
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._items = {}
+
+    def get(self, location, default=None):
+        """ Returns the document of the block at `location`, or `default` """
+        location = Location(location)
+        if location not in self._items:
+            index = self.snapshot.index(location)
+            if index is None:
+                return default
+            self._items[location] = self.snapshot.item(index)
+        return self._items[location]
+
+    def __getitem__(self, location):
+        item = self.get(location)
+        if item is None:
+            raise KeyError(location)
+        return item
+
+    def __contains__(self, location):
+        return Location(location) in self._items or self.snapshot.index(location) is not None
+
+    def keys(self):
+        """ Returns the Locations of the documents loaded so far """
+        return self._items.keys()
+
+    def update(self, other):
+        """ Adds the documents of the dict, or module_data, `other` """
+        for location in other.keys():
+            self._items[Location(location)] = other[location]
@@ -55,6 +55,7 @@ import collections
 import copy
 from pytz import UTC
 
+from xmodule.block_registry import CachingMixologist, load_block_class
 from xmodule.errortracker import null_error_tracker
 from xmodule.x_module import prefer_xmodules
 from xmodule.modulestore.locator import (
@@ -67,7 +68,6 @@ from ..exceptions import ItemNotFoundError
 from .definition_lazy_loader import DefinitionLazyLoader
 from .caching_descriptor_system import CachingDescriptorSystem
 from xblock.fields import Scope
-from xblock.runtime import Mixologist
 from bson.objectid import ObjectId
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
 from xblock.core import XBlock
@@ -135,7 +135,7 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         # TODO: Don't have a runtime just to generate the appropriate mixin classes (cpennington)
         # This is only used by _partition_fields_by_scope, which is only needed because
         # the split mongo store is used for item creation as well as item persistence
-        self.mixologist = Mixologist(self.xblock_mixins)
+        self.mixologist = CachingMixologist(self.xblock_mixins)
 
     def cache_items(self, system, base_block_ids, depth=0, lazy=True):
         '''
@@ -1503,7 +1503,7 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         """
         if fields is None:
             return {}
-        cls = self.mixologist.mix(XBlock.load_class(category, select=self.xblock_select))
+        cls = self.mixologist.mix(load_block_class(category, select=self.xblock_select))
         result = collections.defaultdict(dict)
         for field_name, value in fields.iteritems():
             field = getattr(cls, field_name)
@@ -0,0 +1,86 @@
+"""
+Tests of the snapshots of the courses of the Mongo modulestore
+"""
+from unittest import TestCase
+
+from xmodule.modulestore import Location
+from xmodule.modulestore.mongo.snapshot import CourseSnapshot, SnapshotFormatError, SnapshotModuleData
+
+
+COURSE = Location('i4x', 'edX', 'toy', 'course', '2012_Fall', None)
+CHAPTER = Location('i4x', 'edX', 'toy', 'chapter', 'Overview', None)
+HTML = Location('i4x', 'edX', 'toy', 'html', 'toylab', None)
+MISSING = Location('i4x', 'edX', 'toy', 'html', 'missing', None)
+
+
+def _item(location, children=None, **metadata):
+    """ Returns a Mongo document of a published block """
+    definition = {'data': {'text': location.name}}
+    if children is not None:
+        definition['children'] = [child.url() for child in children]
+    return {'_id': location.dict(), 'definition': definition, 'metadata': metadata}
+
+
+class CourseSnapshotTest(TestCase):
+    """
+    Tests of building, serializing and reading course snapshots
+    """
+    def setUp(self):
+        self.items = [
+            _item(COURSE, [CHAPTER], display_name='Toy Course', graceperiod='1 day'),
+            _item(CHAPTER, [HTML, MISSING], display_name='Overview'),
+            _item(HTML),
+        ]
+        inherited = {'graceperiod': '1 day'}
+        self.inheritance_tree = {
+            CHAPTER.url(): inherited,
+            HTML.url(): inherited,
+            MISSING.url(): inherited,
+        }
+        self.snapshot = CourseSnapshot.build('edX', 'toy', self.items, self.inheritance_tree)
+
+    def assert_snapshot_of_items(self, snapshot):
+        """ Asserts that `snapshot` holds self.items and self.inheritance_tree """
+        self.assertEqual(len(snapshot), 3)
+        for item in self.items:
+            location = Location(item['_id'])
+            loaded = snapshot.item(snapshot.index(location))
+            self.assertEqual(Location(loaded['location']), location)
+            self.assertEqual(loaded['metadata'], item['metadata'])
+            self.assertEqual(loaded['definition'], item['definition'])
+        self.assertIsNone(snapshot.index(MISSING))
+        self.assertEqual(snapshot.inheritance_tree, self.inheritance_tree)
+
+    def test_build(self):
+        self.assert_snapshot_of_items(self.snapshot)
+        # the blocks inheriting the same settings share them
+        self.assertEqual(len(self.snapshot.inherited), 1)
+
+    def test_serialization(self):
+        self.assert_snapshot_of_items(CourseSnapshot.loads(self.snapshot.dumps()))
+
+    def test_other_format(self):
+        with self.assertRaises(SnapshotFormatError):
+            CourseSnapshot.loads('not a snapshot')
+        data = self.snapshot.dumps()
+        with self.assertRaises(SnapshotFormatError):
+            CourseSnapshot.loads(data[:4] + '\xff\xff' + data[6:])
+
+    def test_items_are_copies(self):
+        index = self.snapshot.index(COURSE)
+        self.snapshot.item(index)['metadata']['display_name'] = 'Changed'
+        self.assertEqual(self.snapshot.item(index)['metadata']['display_name'], 'Toy Course')
+
+    def test_module_data(self):
+        module_data = SnapshotModuleData(self.snapshot)
+        self.assertEqual(module_data.keys(), [])
+        item = module_data.get(CHAPTER)
+        self.assertIs(module_data[CHAPTER], item)
+        self.assertIn(HTML, module_data)
+        self.assertNotIn(MISSING, module_data)
+        self.assertIsNone(module_data.get(MISSING))
+        self.assertEqual(module_data.keys(), [CHAPTER])
+
+        other = {}
+        other.update(module_data)
+        self.assertEqual(other, {CHAPTER: item})
@@ -9,7 +9,7 @@ from xmodule.modulestore import Location
 from xmodule.modulestore.locator import BlockUsageLocator
 from xmodule.modulestore.exceptions import ItemNotFoundError, InvalidLocationError
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
-from mock import Mock
+from mock import Mock, patch
 
 
 class TestLocationMapper(unittest.TestCase):
@@ -18,16 +18,16 @@ class TestLocationMapper(unittest.TestCase):
     """
 
     def setUp(self):
-        modulestore_options = {
+        self.modulestore_options = {
             'host': 'localhost',
             'db': 'test_xmodule',
             'collection': 'modulestore{0}'.format(uuid.uuid4().hex[:5]),
         }
 
-        cache_standin = TrivialCache()
-        self.instrumented_cache = Mock(spec=cache_standin, wraps=cache_standin)
+        self.cache_standin = TrivialCache()
+        self.instrumented_cache = Mock(spec=self.cache_standin, wraps=self.cache_standin)
         # pylint: disable=W0142
-        TestLocationMapper.loc_store = LocMapperStore(self.instrumented_cache, **modulestore_options)
+        TestLocationMapper.loc_store = LocMapperStore(self.instrumented_cache, **self.modulestore_options)
 
     def tearDown(self):
         dbref = TestLocationMapper.loc_store.db
@@ -382,6 +382,83 @@ class TestLocationMapper(unittest.TestCase):
         with self.assertRaises(ItemNotFoundError):
             chapter_xlate = loc_mapper().translate_location(None, eponymous_block, add_entry_if_missing=False)
 
+    def test_batch_translation(self):
+        """
+        Test translating many locations and locators at once
+        """
+        org = 'foo_org'
+        course = 'bar_course'
+        old_style_course_id = '{}/{}/{}'.format(org, course, 'baz_run')
+        new_style_package_id = '{}.geek_dept.{}.baz_run'.format(org, course)
+        loc_mapper().create_map_entry(
+            Location('i4x', org, course, 'course', 'baz_run'),
+            new_style_package_id,
+            block_map={'abc123': {'problem': 'problem2'}},
+        )
+        locations = [
+            Location('i4x', org, course, 'problem', 'abc123'),
+            Location('i4x', org, course, 'chapter', 'intro'),
+            Location('i4x', org, course, 'vertical', 'unit1'),
+        ]
+        with self.assertRaises(ItemNotFoundError):
+            loc_mapper().translate_locations(old_style_course_id, locations, add_entry_if_missing=False)
+
+        locators = loc_mapper().translate_locations(old_style_course_id, locations, published=False)
+        self.assertEqual([locator.block_id for locator in locators], ['problem2', 'intro', 'unit1'])
+        self.assertTrue(all(locator.branch == 'draft' for locator in locators))
+        # the new blocks were persisted in the course's map
+        entry = loc_mapper().location_map.find_one({
+            '_id': loc_mapper()._construct_location_son(org, course, 'baz_run')  # pylint: disable=protected-access
+        })
+        self.assertEqual(entry['block_map']['unit1'], {'vertical': 'unit1'})
+
+        unknown_locator = BlockUsageLocator(package_id=new_style_package_id, block_id='nope', branch='draft')
+        self.assertEqual(
+            loc_mapper().translate_locators_to_locations(locators + [unknown_locator]),
+            locations + [None]
+        )
+
+    def test_course_map_kept_in_memory(self):
+        """
+        Test that the course's map is read once and kept in memory, the cache only holding its stamp
+        """
+        org = 'foo_org'
+        course = 'bar_course'
+        old_style_course_id = '{}/{}/{}'.format(org, course, 'baz_run')
+        loc_mapper().create_map_entry(
+            Location('i4x', org, course, 'course', 'baz_run'),
+            block_map={'abc123': {'problem': 'problem2'}, 'def456': {'problem': 'problem4'}},
+        )
+        location_map = Mock(wraps=loc_mapper().location_map)
+        with patch.object(loc_mapper(), 'location_map', location_map):
+            for name in ['abc123', 'def456', 'abc123']:
+                loc_mapper().translate_location(
+                    old_style_course_id, Location('i4x', org, course, 'problem', name), add_entry_if_missing=False
+                )
+        self.assertEqual(location_map.find.call_count, 1)
+        self.assertEqual(self.instrumented_cache.set.call_count, 1)
+        self.assertTrue(all(isinstance(value, basestring) for value in self.cache_standin.cache.values()))
+
+    def test_course_map_changed_by_other_process(self):
+        """
+        Test that the blocks mapped by another process's store are seen without refreshing
+        """
+        org = 'foo_org'
+        course = 'bar_course'
+        old_style_course_id = '{}/{}/{}'.format(org, course, 'baz_run')
+        loc_mapper().create_map_entry(Location('i4x', org, course, 'course', 'baz_run'))
+        location = Location('i4x', org, course, 'problem', 'abc123')
+        loc_mapper().translate_location(old_style_course_id, Location('i4x', org, course, 'course', 'baz_run'))
+
+        other_store = LocMapperStore(self.instrumented_cache, **self.modulestore_options)  # pylint: disable=W0142
+        locator = other_store.translate_location(old_style_course_id, location)
+        other_store.db.connection.close()
+
+        # pylint: disable=protected-access
+        location_id = {'_id': loc_mapper()._construct_location_son(org, course, 'baz_run')}
+        course_map = loc_mapper()._get_course_map(old_style_course_id, location_id, location, False)
+        self.assertEqual(course_map.block_ids([location]), [locator.block_id])
+
 
 #==================================
 # functions to mock existing services
@@ -422,3 +499,10 @@ class TrivialCache(object):
         mock set
         """
         self.cache[key] = entry
+
+    def delete_many(self, keys):
+        """
+        mock delete_many
+        """
+        for key in keys:
+            self.cache.pop(key, None)
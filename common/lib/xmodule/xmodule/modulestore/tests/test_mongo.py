@@ -1,11 +1,12 @@
 from pprint import pprint
 # pylint: disable=E0611
 from nose.tools import assert_equals, assert_raises, \
-    assert_not_equals, assert_false
+    assert_not_equals, assert_false, assert_true
 from itertools import ifilter
 # pylint: enable=E0611
 import pymongo
 import logging
+from mock import patch
 from uuid import uuid4
 
 from xblock.fields import Scope
@@ -16,13 +17,14 @@ from xmodule.tests import DATA_DIR
 from xmodule.modulestore import Location, MONGO_MODULESTORE_TYPE
 from xmodule.modulestore.mongo import MongoModuleStore, MongoKeyValueStore
 from xmodule.modulestore.draft import DraftModuleStore
+from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.xml_importer import import_from_xml, perform_xlint
 from xmodule.contentstore.mongo import MongoContentStore
 
 from xmodule.modulestore.tests.test_modulestore import check_path_to_location
 from IPython.testing.nose_assert_methods import assert_in
 from xmodule.exceptions import NotFoundError
-from xmodule.modulestore.exceptions import InsufficientSpecificationError
+from xmodule.modulestore.exceptions import InsufficientSpecificationError, ItemNotFoundError
 
 log = logging.getLogger(__name__)
 
@@ -35,6 +37,27 @@ DEFAULT_CLASS = 'xmodule.raw_module.RawDescriptor'
 RENDER_TEMPLATE = lambda t_n, d, ctx = None, nsp = 'main': ''
 
 
+class DictCache(dict):
+    '''A cache kept in a dict, standing in for the metadata inheritance cache'''
+    def set(self, key, value):
+        self[key] = value
+
+    def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        if key in self:
+            return False
+        self[key] = value
+        return True
+
+    def delete(self, key):
+        self.pop(key, None)
+
+    def get_many(self, keys):
+        return dict((key, self[key]) for key in keys if key in self)
+
+    def set_many(self, data):
+        self.update(data)
+
+
 class TestMongoModuleStore(object):
     '''Tests!'''
     @classmethod
@@ -218,6 +241,168 @@ class TestMongoModuleStore(object):
         assert_equals('Resources', get_tab_name(3))
         assert_equals('Discussion', get_tab_name(4))
 
+    def test_course_snapshots(self):
+        '''Make sure courses load the same from their snapshots, without querying the db again'''
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            metadata_inheritance_cache_subsystem=DictCache(), course_snapshots=True,
+        )
+
+        def assert_same_tree(block, expected):
+            '''Assert that block and its descendants are the same as expected's'''
+            assert_equals(block.location, expected.location)
+            assert_equals(block.display_name, expected.display_name)
+            assert_equals(block.xblock_kvs.inherited_settings, expected.xblock_kvs.inherited_settings)
+            children = block.get_children()
+            expected_children = expected.get_children()
+            assert_equals(len(children), len(expected_children))
+            for child, expected_child in zip(children, expected_children):
+                assert_same_tree(child, expected_child)
+
+        location = Location("i4x://edX/toy/course/2012_Fall")
+        expected = self.store.get_item(location, depth=None)
+        assert_same_tree(store.get_item(location), expected)
+
+        with patch.object(store, '_build_course_snapshot') as build:
+            # loaded from the cache by a new process
+            store._course_snapshots.clear()
+            assert_same_tree(store.get_item(location), expected)
+            assert_false(build.called)
+            with assert_raises(ItemNotFoundError):
+                store.get_item(Location("i4x://edX/toy/html/not_a_block"))
+
+        # after a write to the course, the snapshot is not used anymore
+        snapshot = store.get_course_snapshot(location)
+        store.invalidate_course_snapshot(location)
+        assert_not_equals(store.get_course_snapshot(location), snapshot)
+
+    @patch('xmodule.modulestore.mongo.base.SNAPSHOT_CHUNK_SIZE', 100)
+    def test_chunked_course_snapshots(self):
+        '''Make sure snapshots are stored in chunks, and rebuilt when any of them is missing'''
+        cache = DictCache()
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            metadata_inheritance_cache_subsystem=cache, course_snapshots=True,
+        )
+        location = Location("i4x://edX/toy/course/2012_Fall")
+        snapshot = store.get_course_snapshot(location)
+        chunk_keys = [key for key in cache if key.startswith('course_snapshot/') and key.count('/') == 4]
+        assert_true(len(chunk_keys) > 1)
+        assert_true(all(len(cache[key]) <= 100 for key in chunk_keys))
+
+        with patch.object(store, '_build_course_snapshot') as build:
+            store._course_snapshots.clear()
+            assert_equals(store.get_course_snapshot(location).dumps(), snapshot.dumps())
+            assert_false(build.called)
+
+        # a chunk the cache evicted, or didn't store, makes the store rebuild the snapshot
+        del cache[chunk_keys[0]]
+        store._course_snapshots.clear()
+        with patch.object(store, '_build_course_snapshot', return_value=snapshot) as build:
+            assert_equals(store.get_course_snapshot(location), snapshot)
+            assert_true(build.called)
+
+    def test_course_snapshot_built_once(self):
+        '''Make sure only one process builds a snapshot, the others reading the blocks from the db meanwhile'''
+        cache = DictCache()
+        stores = [
+            MongoModuleStore(
+                {'host': HOST, 'db': DB, 'collection': COLLECTION},
+                FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+                metadata_inheritance_cache_subsystem=cache, course_snapshots=True,
+            )
+            for __ in range(2)
+        ]
+        location = Location("i4x://edX/toy/course/2012_Fall")
+        stores[0].invalidate_course_snapshot(location)
+
+        # while the first store builds the snapshot, the other one reads the blocks from the db
+        builder = stores[0]._build_course_snapshot
+        during_build = []
+
+        def build_course_snapshot(location):
+            '''Builds the snapshot, after the other store looked for it'''
+            during_build.append(stores[1].get_course_snapshot(location))
+            during_build.append(stores[1].get_item(location).location)
+            return builder(location)
+
+        with patch.object(stores[0], '_build_course_snapshot', side_effect=build_course_snapshot):
+            snapshot = stores[0].get_course_snapshot(location)
+        assert_equals(during_build, [None, location])
+
+        # once it is stored, the other store loads it
+        with patch.object(stores[1], '_build_course_snapshot') as build:
+            assert_equals(stores[1].get_course_snapshot(location).dumps(), snapshot.dumps())
+            assert_false(build.called)
+
+        # a failed build doesn't keep the others from building the snapshot
+        stores[0].invalidate_course_snapshot(location)
+        with patch.object(stores[0], '_build_course_snapshot', side_effect=ValueError):
+            with assert_raises(ValueError):
+                stores[0].get_course_snapshot(location)
+        assert_true(stores[1].get_course_snapshot(location) is not None)
+
+    def test_get_item_records(self):
+        '''Make sure the records of items have the same fields as the items, inherited or not'''
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS, xblock_mixins=(InheritanceMixin,),
+        )
+        location = Location('i4x', 'edX', 'toy', 'video', None)
+        fields = ('start', 'graceperiod', 'youtube_id_1_0', 'not_a_field')
+        items = dict((item.location, item) for item in store.get_items(location))
+        records = store.get_item_records(location, fields=fields)
+        assert_not_equals(records, [])
+
+        assert_equals(set(record.location for record in records), set(items))
+        for record in records:
+            item = items[record.location]
+            assert_equals(record.category, 'video')
+            assert_equals(record.display_name, item.display_name)
+            assert_equals(
+                record.fields,
+                dict((name, getattr(item, name)) for name in fields if name in item.fields)
+            )
+
+    def test_bulk_write_operations(self):
+        """
+        Writes made during nested bulk write operations refresh the inheritance tree of
+        each course written to, and signal its update, once, at the end
+        """
+        store = TestMongoModuleStore.store
+        locations = [
+            Location('i4x', 'edX', course, 'html', 'bulk_{0}'.format(index))
+            for course in ('bulk', 'bulk_other') for index in range(3)
+        ]
+        with patch.object(store, 'get_cached_metadata_inheritance_tree') as refresh:
+            with patch.object(store, 'modulestore_update_signal') as signal:
+                with store.bulk_write_operations():
+                    for location in locations[:3]:
+                        store.create_and_save_xmodule(location)
+                    with store.bulk_write_operations():
+                        for location in locations[3:]:
+                            store.create_and_save_xmodule(location)
+                        store.delete_item(locations[3])
+                    assert_equals(refresh.call_count, 0)
+                    assert_equals(signal.send.call_count, 0)
+
+                assert_equals(refresh.call_count, 2)
+                assert_equals(signal.send.call_count, 2)
+                assert_equals(
+                    set(call[1]['course_id'] for call in signal.send.call_args_list),
+                    set(['edX/bulk', 'edX/bulk_other'])
+                )
+
+                # outside of bulk write operations, each write refreshes and signals
+                store.delete_item(locations[4])
+                assert_equals(refresh.call_count, 3)
+                assert_equals(signal.send.call_count, 3)
+
+        for location in locations[:3] + locations[5:]:
+            store.delete_item(location)
+
     def test_contentstore_attrs(self):
         """
         Test getting, setting, and defaulting the locked attr and arbitrary attrs.
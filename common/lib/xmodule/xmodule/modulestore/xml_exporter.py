@@ -8,12 +8,16 @@ from xblock.fields import Scope
 from xmodule.modulestore import Location
 from xmodule.modulestore.inheritance import own_metadata
 from fs.osfs import OSFS
+from fs.memoryfs import MemoryFS
 from json import dumps
 import json
 import datetime
 import os
 from path import path
 import shutil
+import StringIO
+import tarfile
+import time
 
 DRAFT_DIR = "drafts"
 PUBLISHED_DIR = "published"
@@ -57,12 +61,102 @@ def export_to_xml(modulestore, contentstore, course_location, root_dir, course_d
     `draft_modulestore`: An optional `DraftModuleStore` that contains draft content, which will be exported
         alongside the public content in the course.
     """
+    fs = OSFS(root_dir)
+    export_fs = fs.makeopendir(course_dir)
+
+    _export_course(modulestore, course_location, export_fs, draft_modulestore)
+
+    # export the static assets
+    if contentstore:
+        contentstore.export_all_for_course(
+            course_location,
+            root_dir + '/' + course_dir + '/static/',
+            root_dir + '/' + course_dir + '/policies/assets.json',
+        )
+
+
+def export_to_tar_stream(modulestore, contentstore, course_location, course_dir, draft_modulestore=None):
+    """
+    Export the course like `export_to_xml`, but as a gzipped tarball holding `course_dir`, which is returned
+    as an iterator over the pieces of the compressed tarball, for streaming.
+
+    The course xml is exported (and any `SerializationError` raised) before this returns; it is held in
+    memory rather than on disk. The static assets are read from `contentstore` in chunks while the iterator
+    is consumed, so they are never all in memory at once.
+    """
+    memory_fs = MemoryFS()
+    export_fs = memory_fs.makeopendir(course_dir)
+
+    _export_course(modulestore, course_location, export_fs, draft_modulestore)
+
+    assets = []
+    if contentstore:
+        policy, assets = contentstore.get_export_streams_for_course(course_location)
+        with export_fs.open('policies/assets.json', 'w') as assets_policy:
+            assets_policy.write(dumps(policy, cls=EdxJSONEncoder))
+
+    return (piece for piece in _tar_stream(memory_fs, course_dir, assets) if piece)
+
 
+class _TarStreamBuffer(object):
+    """
+    A write-only file holding the output of a streaming `TarFile` until it is taken.
+    """
+    def __init__(self):
+        self.pieces = []
+
+    def write(self, data):
+        self.pieces.append(data)
+
+    def take(self):
+        """
+        Returns and forgets everything written so far.
+        """
+        data = ''.join(self.pieces)
+        self.pieces = []
+        return data
+
+
+def _tar_stream(memory_fs, course_dir, assets):
+    """
+    Yields a gzipped tarball of the files in `memory_fs` and of `assets`, an iterable of
+    (path inside `course_dir`/static, file, modification time, length) tuples, piece by piece.
+    """
+    buf = _TarStreamBuffer()
+    now = time.time()
+    tar = tarfile.open(fileobj=buf, mode='w|gz')
+    try:
+        for file_path in memory_fs.walkfiles():
+            data = memory_fs.getcontents(file_path)
+            tarinfo = tarfile.TarInfo(file_path.lstrip('/').encode('utf-8'))
+            tarinfo.size = len(data)
+            tarinfo.mtime = now
+            tar.addfile(tarinfo, StringIO.StringIO(data))
+            yield buf.take()
+
+        for asset_path, asset_file, mtime, length in assets:
+            try:
+                tarinfo = tarfile.TarInfo(os.path.join(course_dir, 'static', asset_path).encode('utf-8'))
+                tarinfo.size = length
+                tarinfo.mtime = mtime
+                tar.addfile(tarinfo, asset_file)
+            finally:
+                asset_file.close()
+            yield buf.take()
+    finally:
+        tar.close()
+    yield buf.take()
+
+
+def _export_course(modulestore, course_location, export_fs, draft_modulestore=None):
+    """
+    Export the modules of the course at `course_location` from `modulestore` (and the drafts from
+    `draft_modulestore`, if given) as xml into the filesystem `export_fs`.
+    """
     course_id = course_location.course_id
     course = modulestore.get_course(course_id)
 
-    fs = OSFS(root_dir)
-    export_fs = course.runtime.export_fs = fs.makeopendir(course_dir)
+    course.runtime.export_fs = export_fs
 
     root = lxml.etree.Element('unknown')
     course.add_xml_to_node(root)
@@ -70,14 +164,7 @@ def export_to_xml(modulestore, contentstore, course_location, root_dir, course_d
     with export_fs.open('course.xml', 'w') as course_xml:
         lxml.etree.ElementTree(root).write(course_xml)
 
-    # export the static assets
     policies_dir = export_fs.makeopendir('policies')
-    if contentstore:
-        contentstore.export_all_for_course(
-            course_location,
-            root_dir + '/' + course_dir + '/static/',
-            root_dir + '/' + course_dir + '/policies/assets.json',
-        )
 
     # export the static tabs
     export_extra_content(export_fs, modulestore, course_id, course_location, 'static_tab', 'tabs', '.html')
@@ -1,6 +1,8 @@
+import hashlib
 import logging
 import os
 import mimetypes
+from multiprocessing.pool import ThreadPool
 from path import path
 import json
 
@@ -16,12 +18,62 @@ import xblock
 log = logging.getLogger(__name__)
 
 
+# Number of static assets read and written to the content store concurrently
+IMPORT_STATIC_WORKERS = 4
+
+# Size of the pieces in which static asset files are read and streamed out
+STATIC_CHUNK_SIZE = 256 * 1024
+
+
+def _read_chunks(filepath):
+    """
+    Yields the contents of the file at `filepath` in STATIC_CHUNK_SIZE pieces.
+    """
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(STATIC_CHUNK_SIZE), ''):
+            yield chunk
+
+
+def _file_md5(filepath):
+    """
+    Returns the hex md5 digest of the file at `filepath`, as GridFS computes it.
+    """
+    digest = hashlib.md5()
+    for chunk in _read_chunks(filepath):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_unchanged(existing, md5, content):
+    """
+    Whether the stored asset description `existing` (as returned by
+    get_all_content_for_course) has the same data and attributes as `content`.
+    """
+    return (
+        existing is not None and
+        existing.get('md5') == md5 and
+        existing.get('displayname') == content.name and
+        existing.get('contentType') == content.content_type and
+        existing.get('import_path') == content.import_path and
+        existing.get('locked', False) == content.locked
+    )
+
+
 def import_static_content(
         modules, course_loc, course_data_path, static_content_store,
-        target_location_namespace, subpath='static', verbose=False):
+        target_location_namespace, subpath='static', verbose=False,
+        schedule_thumbnails=None):
+    """
+    Imports the files below `subpath` of `course_data_path` as static assets of
+    the course at `target_location_namespace`, and returns a dict mapping the
+    path of each imported file to the name of its asset.
 
-    remap_dict = {}
+    Files are streamed into the content store, several at a time; files whose
+    data and attributes match the stored asset are not written again.
 
+    If `schedule_thumbnails` is given, it is called with the locations of the
+    imported images instead of generating their thumbnails during the import.
+    """
     # now import all static assets
     static_dir = course_data_path / subpath
     try:
@@ -35,69 +87,107 @@ def import_static_content(
     verbose = True
     mimetypes_list = mimetypes.types_map.values()
 
-    for dirname, _, filenames in os.walk(static_dir):
-        for filename in filenames:
-
-            content_path = os.path.join(dirname, filename)
+    stored_assets, __ = static_content_store.get_all_content_for_course(target_location_namespace)
+    stored_assets = dict((asset['_id']['name'], asset) for asset in stored_assets)
 
-            if filename.endswith('~'):
-                if verbose:
-                    log.debug('skipping static content %s...', content_path)
-                continue
+    def import_file(content_path):
+        """
+        Imports the file at `content_path`. Returns the (file path, asset name)
+        pair for the remapping and the location of the asset if it is an image
+        that was written, or None if the file cannot be read.
+        """
+        filename = os.path.basename(content_path)
+        if verbose:
+            log.debug('importing static content %s...', content_path)
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
+        try:
+            md5 = _file_md5(content_path)
+        except IOError:
+            if filename.startswith('._'):
+                # OS X "companion files". See
+                # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+                return None
+            # Not a 'hidden file', then re-raise exception
+            raise
+
+        # strip away leading path from the name
+        fullname_with_subpath = content_path.replace(static_dir, '')
+        if fullname_with_subpath.startswith('/'):
+            fullname_with_subpath = fullname_with_subpath[1:]
+        content_loc = StaticContent.compute_location(
+            target_location_namespace.org, target_location_namespace.course,
+            fullname_with_subpath
+        )
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            content_loc = StaticContent.compute_location(
-                target_location_namespace.org, target_location_namespace.course,
-                fullname_with_subpath
-            )
+        policy_ele = policy.get(content_loc.name, {})
+        displayname = policy_ele.get('displayname', filename)
+        locked = policy_ele.get('locked', False)
+        mime_type = policy_ele.get('contentType')
+
+        # Check extracted contentType in list of all valid mimetypes
+        if not mime_type or mime_type not in mimetypes_list:
+            mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+        content = StaticContent(
+            content_loc, displayname, mime_type, _read_chunks(content_path),
+            import_path=fullname_with_subpath, locked=locked
+        )
 
-            policy_ele = policy.get(content_loc.name, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                content_loc, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+        remap = (fullname_with_subpath, content_loc.name)
+        if _is_unchanged(stored_assets.get(content_loc.name), md5, content):
+            if verbose:
+                log.debug('static content %s is unchanged', content_path)
+            return remap, None
 
+        if schedule_thumbnails is None:
             # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(
+                content, tempfile_path=content_path
+            )
 
             if thumbnail_content is not None:
                 content.thumbnail_location = thumbnail_location
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception('Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+        # then commit the content
+        try:
+            static_content_store.save(content)
+        except Exception as err:
+            log.exception('Error importing {0}, error={1}'.format(
+                fullname_with_subpath, err
+            ))
+            return remap, None
+
+        is_image = mime_type is not None and mime_type.split('/')[0] == 'image'
+        return remap, content_loc if is_image else None
+
+    content_paths = []
+    for dirname, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            content_path = os.path.join(dirname, filename)
+            if filename.endswith('~'):
+                if verbose:
+                    log.debug('skipping static content %s...', content_path)
+                continue
+            content_paths.append(content_path)
 
+    remap_dict = {}
+    image_locations = []
+    pool = ThreadPool(IMPORT_STATIC_WORKERS)
+    try:
+        for result in pool.imap_unordered(import_file, content_paths):
+            if result is None:
+                continue
+            (fullname_with_subpath, asset_name), image_location = result
             # store the remapping information which will be needed
             # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = content_loc.name
+            remap_dict[fullname_with_subpath] = asset_name
+            if image_location is not None:
+                image_locations.append(image_location)
+    finally:
+        pool.close()
+        pool.join()
+
+    if schedule_thumbnails is not None and image_locations:
+        schedule_thumbnails(image_locations)
 
     return remap_dict
 
@@ -107,7 +197,7 @@ def import_from_xml(
         default_class='xmodule.raw_module.RawDescriptor',
         load_error_modules=True, static_content_store=None,
         target_location_namespace=None, verbose=False, draft_store=None,
-        do_import_static=True):
+        do_import_static=True, schedule_thumbnails=None):
     """
     Import the specified xml data_dir into the "store" modulestore,
     using org and course as the location org and course.
@@ -130,6 +220,11 @@ def import_from_xml(
         time the course is loaded. Static content for some courses may also be
         served directly by nginx, instead of going through django.
 
+    :param schedule_thumbnails:
+        if given, a callable which is passed the locations of the imported
+        images so that their thumbnails can be generated in the background,
+        rather than during the import.
+
     """
 
     xml_module_store = XMLModuleStore(
@@ -148,19 +243,9 @@ def import_from_xml(
     course_items = []
     for course_id in xml_module_store.modules.keys():
 
-        if target_location_namespace is not None:
-            pseudo_course_id = u'{0.org}/{0.course}'.format(target_location_namespace)
-        else:
-            course_id_components = Location.parse_course_id(course_id)
-            pseudo_course_id = u'{org}/{course}'.format(**course_id_components)
-
-        try:
-            # turn off all write signalling while importing as this
-            # is a high volume operation on stores that need it
-            if (hasattr(store, 'ignore_write_events_on_courses') and
-                    pseudo_course_id not in store.ignore_write_events_on_courses):
-                store.ignore_write_events_on_courses.append(pseudo_course_id)
-
+        # defer all write signalling while importing, to the end of the import
+        # of the course, as this is a high volume operation
+        with store.bulk_write_operations():
             course_data_path = None
             course_location = None
 
@@ -228,7 +313,8 @@ def import_from_xml(
                 import_static_content(
                     xml_module_store.modules[course_id], course_location,
                     course_data_path, static_content_store,
-                    _namespace_rename, subpath='static', verbose=verbose
+                    _namespace_rename, subpath='static', verbose=verbose,
+                    schedule_thumbnails=schedule_thumbnails
                 )
 
             elif verbose and not do_import_static:
@@ -257,7 +343,8 @@ def import_from_xml(
                 import_static_content(
                     xml_module_store.modules[course_id], course_location,
                     course_data_path, static_content_store,
-                    _namespace_rename, subpath=simport, verbose=verbose
+                    _namespace_rename, subpath=simport, verbose=verbose,
+                    schedule_thumbnails=schedule_thumbnails
                 )
 
             # finally loop through all the modules
@@ -295,15 +382,6 @@ def import_from_xml(
                     target_location_namespace if target_location_namespace else course_location
                 )
 
-        finally:
-            # turn back on all write signalling on stores that need it
-            if (hasattr(store, 'ignore_write_events_on_courses') and
-                    pseudo_course_id in store.ignore_write_events_on_courses):
-                store.ignore_write_events_on_courses.remove(pseudo_course_id)
-                store.refresh_cached_metadata_inheritance_tree(
-                    target_location_namespace if target_location_namespace is not None else course_location
-                )
-
     return xml_module_store, course_items
 
 
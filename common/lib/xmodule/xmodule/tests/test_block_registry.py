@@ -0,0 +1,80 @@
+"""
+Tests of the registry of XBlock classes and of their mixed classes
+"""
+from unittest import TestCase
+
+from xblock.core import XBlock
+from xblock.fields import XBlockMixin
+
+from xmodule import block_registry
+from xmodule.html_module import HtmlDescriptor
+from xmodule.raw_module import RawDescriptor
+from xmodule.x_module import only_xmodules
+
+
+class FirstMixin(XBlockMixin):
+    """ A mixin to apply to the classes """
+    pass
+
+
+class SecondMixin(XBlockMixin):
+    """ Another mixin to apply to the classes """
+    pass
+
+
+class BlockRegistryTest(TestCase):
+    """
+    Tests of the block registry
+    """
+    def setUp(self):
+        block_registry.clear()
+        self.addCleanup(block_registry.clear)
+
+    def test_load_block_class(self):
+        self.assertIs(block_registry.load_block_class('html', select=only_xmodules), HtmlDescriptor)
+        self.assertIs(block_registry.load_block_class('html', select=only_xmodules), HtmlDescriptor)
+        counts = block_registry.lookup_counts()
+        self.assertEqual(counts['block_class_misses'], 1)
+        self.assertEqual(counts['block_class_hits'], 1)
+        self.assertEqual(counts['block_class_size'], 1)
+
+    def test_load_block_class_default(self):
+        for __ in range(2):
+            self.assertIs(
+                block_registry.load_block_class('not_a_block_type', RawDescriptor, only_xmodules),
+                RawDescriptor
+            )
+        self.assertEqual(block_registry.lookup_counts()['block_class_misses'], 1)
+
+    def test_load_block_class_missing(self):
+        with self.assertRaises(Exception):
+            block_registry.load_block_class('not_a_block_type')
+        self.assertEqual(block_registry.lookup_counts()['block_class_size'], 0)
+
+    def test_mixed_class(self):
+        mixed = block_registry.mixed_class(HtmlDescriptor, (FirstMixin,))
+        self.assertTrue(issubclass(mixed, HtmlDescriptor))
+        self.assertTrue(issubclass(mixed, FirstMixin))
+        self.assertIs(block_registry.mixed_class(HtmlDescriptor, [FirstMixin]), mixed)
+
+        other = block_registry.mixed_class(HtmlDescriptor, (FirstMixin, SecondMixin))
+        self.assertIsNot(other, mixed)
+        self.assertTrue(issubclass(other, SecondMixin))
+
+        counts = block_registry.lookup_counts()
+        self.assertEqual(counts['mixed_class_misses'], 2)
+        self.assertEqual(counts['mixed_class_hits'], 1)
+
+    def test_caching_mixologist(self):
+        first = block_registry.CachingMixologist((FirstMixin,))
+        second = block_registry.CachingMixologist((FirstMixin,))
+        self.assertIs(first.mix(HtmlDescriptor), second.mix(HtmlDescriptor))
+
+    def test_warm(self):
+        warmed = block_registry.warm((FirstMixin,), RawDescriptor, only_xmodules)
+        self.assertEqual(warmed, len(set(name for name, __ in XBlock.load_classes())))
+
+        counts = block_registry.lookup_counts()
+        block_registry.mixed_class(block_registry.load_block_class('html', RawDescriptor, only_xmodules), (FirstMixin,))
+        self.assertEqual(block_registry.lookup_counts()['block_class_misses'], counts['block_class_misses'])
+        self.assertEqual(block_registry.lookup_counts()['mixed_class_misses'], counts['mixed_class_misses'])
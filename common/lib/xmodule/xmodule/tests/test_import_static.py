@@ -1,6 +1,7 @@
 """
 Tests that check that we ignore the appropriate files when importing courses.
 """
+import hashlib
 import unittest
 from mock import Mock
 from xmodule.modulestore import Location
@@ -8,16 +9,68 @@ from xmodule.modulestore.xml_importer import import_static_content
 from xmodule.tests import DATA_DIR
 
 
+def _content_store(stored_assets=()):
+    """
+    Returns a mock content store which holds the assets `stored_assets`.
+    """
+    content_store = Mock()
+    content_store.generate_thumbnail.return_value = ("content", "location")
+    content_store.get_all_content_for_course.return_value = (list(stored_assets), len(stored_assets))
+    return content_store
+
+
+def _saved_data(content_store):
+    """
+    Returns a dict of the names and data of the content saved to `content_store`.
+    """
+    saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+    return {sc.name: ''.join(sc.data) for sc in saved_static_content}
+
+
 class IgnoredFilesTestCase(unittest.TestCase):
     "Tests for ignored files"
     def test_ignore_tilde_static_files(self):
         course_dir = DATA_DIR / "tilde"
         loc = Location("edX", "tilde", "Fall_2012")
-        content_store = Mock()
-        content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store = _content_store()
         import_static_content(Mock(), Mock(), course_dir, content_store, loc)
-        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
-        name_val = {sc.name: sc.data for sc in saved_static_content}
+        name_val = _saved_data(content_store)
         self.assertIn("example.txt", name_val)
         self.assertNotIn("example.txt~", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
+
+
+class UnchangedFilesTestCase(unittest.TestCase):
+    "Tests for re-importing static files"
+    def setUp(self):
+        self.course_dir = DATA_DIR / "tilde"
+        self.loc = Location("edX", "tilde", "Fall_2012")
+        with open(self.course_dir / "static" / "example.txt", "rb") as f:
+            md5 = hashlib.md5(f.read()).hexdigest()
+        self.stored_asset = {
+            '_id': {'name': 'example.txt'}, 'md5': md5, 'displayname': 'example.txt',
+            'contentType': 'text/plain', 'import_path': 'example.txt',
+        }
+
+    def test_skip_unchanged_static_files(self):
+        content_store = _content_store([self.stored_asset])
+        remap = import_static_content(Mock(), Mock(), self.course_dir, content_store, self.loc)
+        self.assertNotIn("example.txt", _saved_data(content_store))
+        # unchanged files are still remapped
+        self.assertEqual(remap["example.txt"], "example.txt")
+
+    def test_import_changed_static_files(self):
+        self.stored_asset['md5'] = hashlib.md5("something else").hexdigest()
+        content_store = _content_store([self.stored_asset])
+        import_static_content(Mock(), Mock(), self.course_dir, content_store, self.loc)
+        self.assertIn("example.txt", _saved_data(content_store))
+
+    def test_schedule_thumbnails(self):
+        content_store = _content_store()
+        schedule_thumbnails = Mock()
+        import_static_content(
+            Mock(), Mock(), self.course_dir, content_store, self.loc, schedule_thumbnails=schedule_thumbnails
+        )
+        self.assertFalse(content_store.generate_thumbnail.called)
+        # the course has no images, so there is nothing to generate
+        self.assertFalse(schedule_thumbnails.called)
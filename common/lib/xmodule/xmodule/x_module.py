@@ -20,6 +20,7 @@ from xblock.fields import Scope, Integer, Float, List, XBlockMixin, String, Dict
 from xblock.fragment import Fragment
 from xblock.plugin import default_select
 from xblock.runtime import Runtime
+from xmodule.block_registry import CachingMixologist, load_block_class
 from xmodule.fields import RelativeTime
 
 from xmodule.errortracker import exc_info_to_str
@@ -963,6 +964,7 @@ class DescriptorSystem(ConfigurableFragmentWrapper, Runtime):  # pylint: disable
 
         """
         super(DescriptorSystem, self).__init__(**kwargs)
+        self.mixologist = CachingMixologist(kwargs.get('mixins', ()))
 
         # This is used by XModules to write out separate files during xml export
         self.export_fs = None
@@ -979,6 +981,13 @@ class DescriptorSystem(ConfigurableFragmentWrapper, Runtime):  # pylint: disable
         """See documentation for `xblock.runtime:Runtime.get_block`"""
         return self.load_item(usage_id)
 
+    def load_block_type(self, block_type):
+        """
+        See :meth:`xblock.runtime.Runtime.load_block_type`; the classes are
+        resolved once per process, by the block registry.
+        """
+        return load_block_class(block_type, self.default_class, self.select)
+
     def get_field_provenance(self, xblock, field):
         """
         For the given xblock, return a dict for the field's current state:
@@ -1155,6 +1164,7 @@ class ModuleSystem(ConfigurableFragmentWrapper, Runtime):  # pylint: disable=abs
         # Usage_store is unused, and field_data is often supplanted with an
         # explicit field_data during construct_xblock.
         super(ModuleSystem, self).__init__(id_reader=None, field_data=field_data, **kwargs)
+        self.mixologist = CachingMixologist(kwargs.get('mixins', ()))
 
         self.STATIC_URL = static_url
         self.xqueue = xqueue
@@ -5,6 +5,9 @@ Format and create csv responses
 """
 
 import csv
+from itertools import chain
+from StringIO import StringIO
+
 from django.http import HttpResponse
 
 
@@ -14,21 +17,33 @@ def create_csv_response(filename, header, datarows):
 
     header   e.g. ['Name', 'Email']
     datarows e.g. [['Jim', 'jim@edy.org'], ['Jake', 'jake@edy.org'], ...]
+
+    `datarows` can be any iterable, such as a generator; rows are encoded and
+    sent as the response is written out, rather than built up in memory.
     """
-    response = HttpResponse(mimetype='text/csv')
+    response = HttpResponse(_csv_lines(header, datarows), mimetype='text/csv')
     response['Content-Disposition'] = 'attachment; filename={0}'\
         .format(filename)
+    return response
+
+
+def _csv_lines(header, datarows):
+    """
+    Yield the utf-8 encoded csv lines for `header` and each of `datarows`.
+    """
+    buff = StringIO()
     csvwriter = csv.writer(
-        response,
+        buff,
         dialect='excel',
         quotechar='"',
         quoting=csv.QUOTE_ALL)
 
-    csvwriter.writerow(header)
-    for datarow in datarows:
+    for datarow in chain([header], datarows):
         encoded_row = [unicode(s).encode('utf-8') for s in datarow]
         csvwriter.writerow(encoded_row)
-    return response
+        yield buff.getvalue()
+        buff.seek(0)
+        buff.truncate()
 
 
 def format_dictlist(dictlist, features):
@@ -77,6 +92,15 @@ def format_dictlist(dictlist, features):
     return header, datarows
 
 
+def iter_dictlist_rows(dicts, features):
+    """
+    Like format_dictlist, but lazily: yield the row of each dictionary in the
+    iterable `dicts`, in the order of `features`.  Missing features are None.
+    """
+    for dct in dicts:
+        yield [dct.get(feature) for feature in features]
+
+
 def format_instances(instances, features):
     """
     Convert a list of instances into a header list and datarows list.
@@ -112,29 +112,20 @@ def profile_distribution(course_id, feature):
         choices = [(short, full)
                    for (short, full) in raw_choices] + [('no_data', 'No Data')]
 
-        def get_filter(feature, value):
-            """ Get the orm filter parameters for a feature. """
-            return {
-                'gender': {'user__profile__gender': value},
-                'level_of_education': {'user__profile__level_of_education': value},
-            }[feature]
-
-        def get_count(feature, value):
-            """ Get the count of enrolled students matching the feature value. """
-            return CourseEnrollment.objects.filter(
-                course_id=course_id,
-                **get_filter(feature, value)
-            ).count()
+        # count the enrollments for each value of the feature in one grouped query
+        query_distribution = CourseEnrollment.objects.filter(
+            course_id=course_id
+        ).values('user__profile__' + feature).annotate(Count('id')).order_by()
+        counts = dict((vald['user__profile__' + feature], vald['id__count'])
+                      for vald in query_distribution)
 
         distribution = {}
         for (short, full) in choices:
             # handle no data case
             if short == 'no_data':
-                distribution['no_data'] = 0
-                distribution['no_data'] += get_count(feature, None)
-                distribution['no_data'] += get_count(feature, '')
+                distribution['no_data'] = counts.get(None, 0) + counts.get('', 0)
             else:
-                distribution[short] = get_count(feature, short)
+                distribution[short] = counts.get(short, 0)
 
         prd.data = distribution
         prd.choices_display_names = dict(choices)
@@ -143,26 +134,20 @@ def profile_distribution(course_id, feature):
         profiles = UserProfile.objects.filter(
             user__courseenrollment__course_id=course_id
         )
+        # count rows rather than values of the feature, since
+        # django does not count NULL values when using annotate Count(feature)
         query_distribution = profiles.values(
-            feature).annotate(Count(feature)).order_by()
-        # query_distribution is of the form [{'featureval': 'value1', 'featureval__count': 4},
-        #    {'featureval': 'value2', 'featureval__count': 2}, ...]
+            feature).annotate(Count('id')).order_by()
+        # query_distribution is of the form [{'featureval': 'value1', 'id__count': 4},
+        #    {'featureval': 'value2', 'id__count': 2}, ...]
 
-        distribution = dict((vald[feature], vald[feature + '__count'])
+        distribution = dict((vald[feature], vald['id__count'])
                             for vald in query_distribution)
         # distribution is of the form {'value1': 4, 'value2': 2, ...}
 
         # change none to no_data for valid json key
         if None in distribution:
-            # django does not properly count NULL values when using annotate Count
-            # so
-            #     distribution['no_data'] = distribution.pop(None)
-            # would always be 0.
-
-            # Correctly count null values
-            distribution['no_data'] = profiles.filter(
-                **{feature: None}
-            ).count()
+            distribution['no_data'] = distribution.pop(None)
 
         prd.data = distribution
 
@@ -3,10 +3,13 @@ Tests for instructor.basic
 """
 
 from django.test import TestCase
+from mock import patch
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
+from course_groups.models import CourseUserGroup
 
-from analytics.basic import enrolled_students_features, AVAILABLE_FEATURES, STUDENT_FEATURES, PROFILE_FEATURES
+from analytics.basic import (enrolled_students_features, AVAILABLE_FEATURES, STUDENT_FEATURES,
+                             PROFILE_FEATURES, COHORT_FEATURES)
 
 
 class TestAnalyticsBasic(TestCase):
@@ -38,6 +41,22 @@ class TestAnalyticsBasic(TestCase):
             self.assertIn(userreport['email'], [user.email for user in self.users])
             self.assertIn(userreport['name'], [user.profile.name for user in self.users])
 
+    @patch('analytics.basic.COHORT_LOOKUP_BATCH_SIZE', 7)
+    def test_enrolled_students_features_cohort(self):
+        cohort = CourseUserGroup.objects.create(name="TestCohort",
+                                                course_id=self.course_id,
+                                                group_type=CourseUserGroup.COHORT)
+        cohort.users.add(*self.users[::2])
+        userreports = enrolled_students_features(self.course_id, ('username', 'cohort'))
+        self.assertEqual(len(userreports), len(self.users))
+        cohorted_usernames = set(user.username for user in self.users[::2])
+        for userreport in userreports:
+            self.assertEqual(set(userreport.keys()), set(['username', 'cohort']))
+            self.assertEqual(
+                userreport['cohort'],
+                "TestCohort" if userreport['username'] in cohorted_usernames else ''
+            )
+
     def test_available_features(self):
-        self.assertEqual(len(AVAILABLE_FEATURES), len(STUDENT_FEATURES + PROFILE_FEATURES))
-        self.assertEqual(set(AVAILABLE_FEATURES), set(STUDENT_FEATURES + PROFILE_FEATURES))
+        self.assertEqual(len(AVAILABLE_FEATURES), len(STUDENT_FEATURES + PROFILE_FEATURES + COHORT_FEATURES))
+        self.assertEqual(set(AVAILABLE_FEATURES), set(STUDENT_FEATURES + PROFILE_FEATURES + COHORT_FEATURES))
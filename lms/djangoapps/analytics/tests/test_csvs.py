@@ -3,7 +3,7 @@
 from django.test import TestCase
 from nose.tools import raises
 
-from analytics.csvs import create_csv_response, format_dictlist, format_instances
+from analytics.csvs import create_csv_response, format_dictlist, format_instances, iter_dictlist_rows
 
 
 class TestAnalyticsCSVS(TestCase):
@@ -27,6 +27,13 @@ class TestAnalyticsCSVS(TestCase):
         self.assertEqual(res['Content-Disposition'], 'attachment; filename={0}'.format('robot.csv'))
         self.assertEqual(res.content.strip(), '"Name","Email"\r\n"Jim","jim@edy.org"\r\n"Jake","jake@edy.org"\r\n"Jeeves","jeeves@edy.org"')
 
+    def test_create_csv_response_generator(self):
+        header = ['Name', 'Email']
+        datarows = ([name, email] for name, email in [(u'J\xfcrgen', 'jurgen@edy.org')])
+
+        res = create_csv_response('robot.csv', header, datarows)
+        self.assertEqual(res.content.strip(), '"Name","Email"\r\n"J\xc3\xbcrgen","jurgen@edy.org"')
+
     def test_create_csv_response_empty(self):
         header = []
         datarows = []
@@ -66,6 +73,14 @@ class TestAnalyticsFormatDictlist(TestCase):
         self.assertEqual(header, ideal_header)
         self.assertEqual(datarows, ideal_datarows)
 
+    def test_iter_dictlist_rows(self):
+        dictlist = [
+            {'label1': 'value-1,1', 'label2': 'value-1,2'},
+            {'label1': 'value-2,1'},
+        ]
+        datarows = iter_dictlist_rows(iter(dictlist), ['label2', 'label1'])
+        self.assertEqual(list(datarows), [['value-1,2', 'value-1,1'], [None, 'value-2,1']])
+
     def test_format_dictlist_empty(self):
         header, datarows = format_dictlist([], [])
         self.assertEqual(header, [])
@@ -213,6 +213,48 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    @staticmethod
+    def _compile(format_string, message_body, context):
+        """
+        Render a template once for all the recipients of an email.
+
+        `context` holds the values shared by all recipients; the recipient's
+        'name' and 'email' are left as slots, which the returned
+        CompiledEmailTemplate fills in.
+        """
+        context = dict(context, name=CompiledEmailTemplate.NAME_SLOT, email=CompiledEmailTemplate.EMAIL_SLOT)
+        return CompiledEmailTemplate(CourseEmailTemplate._render(format_string, message_body, context))
+
+    def compile_plaintext(self, plaintext, context):
+        """
+        Create the plain text message of an email, to be completed per recipient.
+        """
+        return CourseEmailTemplate._compile(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Create the HTML text message of an email, to be completed per recipient.
+        """
+        return CourseEmailTemplate._compile(self.html_template, htmltext, context)
+
+
+class CompiledEmailTemplate(object):
+    """
+    An email message rendered from a CourseEmailTemplate, but for the
+    recipient's name and email address.
+    """
+    NAME_SLOT = u'\x00name\x00'
+    EMAIL_SLOT = u'\x00email\x00'
+
+    def __init__(self, rendered):
+        self.rendered = rendered
+
+    def render(self, name, email):
+        """
+        Return the message for the recipient with the given `name` and `email`.
+        """
+        return self.rendered.replace(self.NAME_SLOT, unicode(name)).replace(self.EMAIL_SLOT, unicode(email))
+
 
 class CourseAuthorization(models.Model):
     """
@@ -5,7 +5,10 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+import Queue
+import threading
+from multiprocessing.pool import ThreadPool
+from time import sleep, time
 
 from dogapi import dog_stats_api
 from smtplib import SMTPServerDisconnected, SMTPDataError, SMTPConnectError, SMTPException
@@ -29,6 +32,7 @@ from celery.exceptions import RetryTaskError
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.urlresolvers import reverse
 
@@ -98,7 +102,8 @@ def _get_recipient_queryset(user_id, to_option, course_id, course_location):
     `to_option` is either SEND_TO_MYSELF, SEND_TO_STAFF, or SEND_TO_ALL.
 
     Recipients who are in more than one category (e.g. enrolled in the course and are staff or self)
-    will be properly deduped.
+    will be properly deduped.  Recipients who have opted out of email from the course are not
+    included here; see _exclude_optouts().
     """
     if to_option not in TO_OPTIONS:
         log.error("Unexpected bulk email TO_OPTION found: %s", to_option)
@@ -125,6 +130,19 @@ def _get_recipient_queryset(user_id, to_option, course_id, course_location):
     return recipient_qset
 
 
+def _exclude_optouts(recipient_qset, course_id):
+    """
+    Returns `recipient_qset` without the users who have opted out of email from the course.
+
+    The optouts are excluded by the database, with a subquery on the Optout table,
+    so that the recipients never need to be checked against them one subtask at a time.
+    """
+    # Optouts not yet migrated from email to user have no user, and a NULL
+    # would make the NOT IN exclude everyone.
+    optout_user_ids = Optout.objects.filter(course_id=course_id, user__isnull=False).values('user')
+    return recipient_qset.exclude(pk__in=optout_user_ids)
+
+
 def _get_course_email_context(course):
     """
     Returns context arguments to apply to all emails, independent of recipient.
@@ -219,9 +237,13 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
         )
         return new_subtask
 
-    recipient_qset = _get_recipient_queryset(user_id, to_option, course_id, course.location)
+    all_recipient_qset = _get_recipient_queryset(user_id, to_option, course_id, course.location)
+    recipient_qset = _exclude_optouts(all_recipient_qset, course_id)
     recipient_fields = ['profile__name', 'email']
 
+    # Recipients who opted out are reported as skipped by the task as a whole.
+    num_optout = all_recipient_qset.count() - recipient_qset.count()
+
     log.info(u"Task %s: Preparing to queue subtasks for sending emails for course %s, email %s, to_option %s",
              task_id, course_id, email_id, to_option)
 
@@ -232,7 +254,8 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
         recipient_qset,
         recipient_fields,
         settings.BULK_EMAIL_EMAILS_PER_QUERY,
-        settings.BULK_EMAIL_EMAILS_PER_TASK
+        settings.BULK_EMAIL_EMAILS_PER_TASK,
+        num_optout
     )
 
     # We want to return progress here, as this is what will be stored in the
@@ -274,7 +297,7 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
         Most values will be zero on initial call, but may be different when the task is
         invoked as part of a retry.
 
-    Sends to all addresses contained in to_list that are not also in the Optout table.
+    Sends to all addresses contained in to_list, from which optouts have already been excluded.
     Emails are sent multi-part, in both plain text and html.  Updates InstructorTask object
     with status information (sends, failures, skips) and updates number of subtasks completed.
     """
@@ -338,26 +361,6 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     return new_subtask_status.to_dict()
 
 
-def _filter_optouts_from_recipients(to_list, course_id):
-    """
-    Filters a recipient list based on student opt-outs for a given course.
-
-    Returns the filtered recipient list, as well as the number of optouts
-    removed from the list.
-    """
-    optouts = Optout.objects.filter(
-        course_id=course_id,
-        user__in=[i['pk'] for i in to_list]
-    ).values_list('user__email', flat=True)
-    optouts = set(optouts)
-    # Only count the num_optout for the first time the optouts are calculated.
-    # We assume that the number will not change on retries, and so we don't need
-    # to calculate it each time.
-    num_optout = len(optouts)
-    to_list = [recipient for recipient in to_list if recipient['email'] not in optouts]
-    return to_list, num_optout
-
-
 def _get_source_address(course_id, course_title):
     """
     Calculates an email address to be used as the 'from-address' for sent emails.
@@ -399,7 +402,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         template.  It does not include 'name' and 'email', which will be provided by the to_list.
       * `subtask_status` : object of class SubtaskStatus representing current status.
 
-    Sends to all addresses contained in to_list that are not also in the Optout table.
+    Sends to all addresses contained in to_list, from which optouts have already been excluded.
     Emails are sent multi-part, in both plain text and html.
 
     Returns a tuple of two values:
@@ -418,97 +421,43 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         log.exception("Task %s: could not find email id:%s to send.", task_id, email_id)
         raise
 
-    # Exclude optouts (if not a retry):
-    # Note that we don't have to do the optout logic at all if this is a retry,
-    # because we have presumably already performed the optout logic on the first
-    # attempt.  Anyone on the to_list on a retry has already passed the filter
-    # that existed at that time, and we don't need to keep checking for changes
-    # in the Optout list.
-    if subtask_status.get_retry_count() == 0:
-        to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
-        subtask_status.increment(skipped=num_optout)
+    # Note that optouts have already been excluded from the to_list, when the
+    # recipients were queried for all of the subtasks.  Anyone on the to_list
+    # has passed the filter that existed at that time, and we don't need to keep
+    # checking for changes in the Optout list.
 
     course_title = global_email_context['course_title']
     subject = "[" + course_title + "] " + course_email.subject
     from_addr = _get_source_address(course_email.course_id, course_title)
 
     course_email_template = CourseEmailTemplate.get_template()
+    connections = []
     try:
-        connection = get_connection()
-        connection.open()
-
-        # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
-        email_context.update(global_email_context)
-
-        while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
+        # Render the messages once; only the recipient's name and email are
+        # filled in per message.
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, global_email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, global_email_context)
+
+        for __ in xrange(max(1, min(settings.BULK_EMAIL_CONNECTIONS_PER_TASK, len(to_list)))):
+            connection = get_connection()
+            connections.append(connection)
+            connection.open()
+
+        sender = _EmailSender(
+            connections, task_id, email_id, subject, from_addr, plaintext_template, html_template, course_title,
             # Throttle if we have gotten the rate limiter.  This is not very high-tech,
             # but if a task has been retried for rate-limiting reasons, then we sleep
             # for a period of time between all emails within this task.  Choice of
             # the value depends on the number of workers that might be sending email in
             # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
-
-            try:
-                log.debug('Email with id %s to be sent to %s', email_id, email)
-
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
-                    # This will fall through and not retry the message.
-                    log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
-
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
-
-            else:
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
-                else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            to_list.pop()
+            settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS if subtask_status.retried_nomax > 0 else 0,
+        )
+        # The to_list is left holding the recipients remaining to be emailed.
+        # This is convenient for retries, which will need to send to those who haven't
+        # yet been emailed, but not send to those who have already been sent to.
+        to_list[:], send_exception = sender.send(to_list, subtask_status)
+        if send_exception is not None:
+            raise send_exception  # pylint: disable=E0702
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -564,7 +513,161 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        for connection in connections:
+            connection.close()
+
+
+def _acquire_send_token():
+    """
+    Waits until sending one more message keeps all the workers together under
+    settings.BULK_EMAIL_MAX_SENDS_PER_SECOND, if set.
+
+    The messages sent in each second are counted in the cache, so that the
+    allowance is shared by all the workers.  Returns whether a rate is set.
+    """
+    max_sends = getattr(settings, 'BULK_EMAIL_MAX_SENDS_PER_SECOND', None)
+    if not max_sends:
+        return False
+    while True:
+        now = time()
+        key = 'bulk_email.sends.{0}'.format(int(now))
+        cache.add(key, 0, 10)
+        try:
+            sends = cache.incr(key)
+        except ValueError:
+            # the counter expired or was evicted under us
+            continue
+        if sends <= max_sends:
+            return True
+        sleep(int(now) + 1 - now)
+
+
+class _EmailSender(object):
+    """
+    Sends the messages of a course email over a pool of open connections.
+
+    Recipients are handed to the connections in batches of
+    settings.BULK_EMAIL_SEND_BATCH_SIZE, sent in parallel when there is more
+    than one connection.  Each message is still passed to its connection's
+    send_messages() by itself, so that an address that is refused fails that
+    recipient only.  The first error that calls for a retry or ends the task
+    stops all the connections.
+    """
+    def __init__(self, connections, task_id, email_id, subject, from_addr,
+                 plaintext_template, html_template, course_title, throttle_delay):
+        self.connections = Queue.Queue()
+        for connection in connections:
+            self.connections.put(connection)
+        self.num_connections = len(connections)
+        self.task_id = task_id
+        self.email_id = email_id
+        self.subject = subject
+        self.from_addr = from_addr
+        self.plaintext_template = plaintext_template
+        self.html_template = html_template
+        self.course_title = course_title
+        self.throttle_delay = throttle_delay
+        self.stopped = threading.Event()
+
+    def send(self, to_list, subtask_status):
+        """
+        Emails the recipients in `to_list`, recording the outcomes in `subtask_status`.
+
+        Returns the list of recipients that were not processed, and the
+        exception that stopped the sending, or None.
+        """
+        batch_size = settings.BULK_EMAIL_SEND_BATCH_SIZE
+        batches = [to_list[index:index + batch_size] for index in xrange(0, len(to_list), batch_size)]
+        if self.num_connections > 1:
+            pool = ThreadPool(self.num_connections)
+            try:
+                results = pool.map(self._send_batch, batches)
+            finally:
+                pool.close()
+        else:
+            results = [self._send_batch(batch) for batch in batches]
+
+        remaining = []
+        send_exception = None
+        for batch, (num_processed, succeeded, failed, exception) in zip(batches, results):
+            subtask_status.increment(succeeded=succeeded, failed=failed)
+            remaining.extend(batch[num_processed:])
+            send_exception = send_exception or exception
+        return remaining, send_exception
+
+    def _send_batch(self, batch):
+        """
+        Emails the recipients in `batch` over one of the connections.
+
+        Returns the number of recipients processed, how many of them succeeded
+        and failed, and the exception which stopped the batch, or None.
+        """
+        succeeded = failed = 0
+        connection = self.connections.get()
+        try:
+            for num_processed, recipient in enumerate(batch):
+                if self.stopped.is_set():
+                    return num_processed, succeeded, failed, None
+                try:
+                    if self._send(connection, recipient):
+                        succeeded += 1
+                    else:
+                        failed += 1
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.stopped.set()
+                    return num_processed, succeeded, failed, exc
+            return len(batch), succeeded, failed, None
+        finally:
+            self.connections.put(connection)
+
+    def _send(self, connection, recipient):
+        """
+        Emails one recipient.  Returns whether the message was accepted.
+
+        Errors other than a refused address are raised.
+        """
+        email = recipient['email']
+        email_msg = EmailMultiAlternatives(
+            self.subject,
+            self.plaintext_template.render(recipient['profile__name'], email),
+            self.from_addr,
+            [email],
+            connection=connection
+        )
+        email_msg.attach_alternative(self.html_template.render(recipient['profile__name'], email), 'text/html')
+
+        if not _acquire_send_token() and self.throttle_delay:
+            sleep(self.throttle_delay)
+
+        try:
+            log.debug('Email with id %s to be sent to %s', self.email_id, email)
+
+            with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(self.course_title)]):
+                connection.send_messages([email_msg])
+
+        except SMTPDataError as exc:
+            # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+            if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                # This will cause the outer handler to catch the exception and retry the entire task.
+                raise exc
+            else:
+                # This will fall through and not retry the message.
+                log.warning('Task %s: email with id %s not delivered to %s due to error %s', self.task_id, self.email_id, email, exc.smtp_error)
+                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(self.course_title)])
+                return False
+
+        except SINGLE_EMAIL_FAILURE_ERRORS as exc:
+            # This will fall through and not retry the message.
+            log.warning('Task %s: email with id %s not delivered to %s due to error %s', self.task_id, self.email_id, email, exc)
+            dog_stats_api.increment('course_email.error', tags=[_statsd_tag(self.course_title)])
+            return False
+
+        dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(self.course_title)])
+        if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+            log.info('Email with id %s sent to %s', self.email_id, email)
+        else:
+            log.debug('Email with id %s sent to %s', self.email_id, email)
+        return True
 
 
 def _get_current_task():
@@ -93,6 +93,23 @@ class CourseEmailTemplateTest(TestCase):
             with self.assertRaises(KeyError):
                 template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_templates_match_rendered(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        del context['email']
+        plaintext = template.compile_plaintext(u"My new plain text.", context)
+        htmltext = template.compile_htmltext(u"My new html text.", context)
+        for name, email in [(u'Robot', u'robot@test.com'), (u'N\xe9e', u'nee@test.com')]:
+            recipient_context = dict(context, name=name, email=email)
+            self.assertEquals(
+                plaintext.render(name, email),
+                template.render_plaintext(u"My new plain text.", recipient_context)
+            )
+            self.assertEquals(
+                htmltext.render(name, email),
+                template.render_htmltext(u"My new html text.", recipient_context)
+            )
+
     def test_render_html(self):
         template = CourseEmailTemplate.get_template()
         context = self._get_sample_html_context()
@@ -1,12 +1,11 @@
 from django.core.management.base import BaseCommand
-from certificates.models import certificate_status_for_student
 from certificates.queue import XQueueCertInterface
 from django.contrib.auth.models import User
 from optparse import make_option
 from django.conf import settings
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore.django import modulestore
-from certificates.models import CertificateStatuses
+from certificates.models import CertificateStatuses, CertificateGenerationCheckpoint
 import datetime
 from pytz import UTC
 
@@ -21,6 +20,12 @@ class Command(BaseCommand):
 
     Use the --noop option to test without actually putting certificates on the
     queue to be generated.
+
+    Students are processed in chunks, each of which is graded and put on the
+    queue at once.  After
+    each chunk the run records how far it got in the database, and a run which
+    was interrupted resumes from there unless --restart is given.  Runs with
+    --noop don't record how far they got.
     """
 
     option_list = BaseCommand.option_list + (
@@ -48,6 +53,17 @@ class Command(BaseCommand):
                     'whose entry in the certificate table matches STATUS. '
                     'STATUS can be generating, unavailable, deleted, error '
                     'or notpassing.'),
+        make_option('--restart',
+                    action='store_true',
+                    dest='restart',
+                    default=False,
+                    help="Start from the first student, even if a previous run was interrupted"),
+        make_option('--chunk-size',
+                    metavar='NUM',
+                    dest='chunk_size',
+                    type='int',
+                    default=settings.CERTIFICATES_PER_TASK,
+                    help='Number of students graded and put on the queue at a time'),
     )
 
     def handle(self, *args, **options):
@@ -57,7 +73,7 @@ class Command(BaseCommand):
         # to something else with the force flag
 
         if options['force']:
-            valid_statuses = getattr(CertificateStatuses, options['force'])
+            valid_statuses = [getattr(CertificateStatuses, options['force'])]
         else:
             valid_statuses = [CertificateStatuses.unavailable]
 
@@ -84,8 +100,16 @@ class Command(BaseCommand):
 
             print "Fetching enrolled students for {0}".format(course_id)
             enrolled_students = User.objects.filter(
-                courseenrollment__course_id=course_id).prefetch_related(
-                    "groups").order_by('username')
+                courseenrollment__course_id=course_id).order_by('pk')
+
+            checkpoint_fields = {'course_id': course_id, 'statuses': ','.join(sorted(valid_statuses))}
+            checkpoints = CertificateGenerationCheckpoint.objects.filter(**checkpoint_fields)
+            last_id = None
+            if not options['restart']:
+                last_id = next(iter(checkpoints.values_list('last_student_id', flat=True)), None)
+            if last_id is not None:
+                print "Resuming after student id {0}".format(last_id)
+                enrolled_students = enrolled_students.filter(pk__gt=last_id)
 
             xq = XQueueCertInterface()
             if options['insecure']:
@@ -94,24 +118,42 @@ class Command(BaseCommand):
             count = 0
             start = datetime.datetime.now(UTC)
 
-            for student in enrolled_students:
-                count += 1
-                if count % STATUS_INTERVAL == 0:
+            while True:
+                # read the students a chunk at a time, after the last one processed
+                chunk_students = enrolled_students if last_id is None else enrolled_students.filter(pk__gt=last_id)
+                students = list(chunk_students.prefetch_related("groups")[:options['chunk_size']])
+                if not students:
+                    break
+
+                if not options['noop']:
+                    # Add the certificate requests to the queue
+                    new_statuses = xq.add_certs(students, course_id, course=course, statuses=valid_statuses)
+                    for student in students:
+                        if new_statuses.get(student.id) == CertificateStatuses.generating:
+                            print '{0} - {1}'.format(student, CertificateStatuses.generating)
+
+                last_id = students[-1].id
+                if not options['noop']:
+                    checkpoint, __ = CertificateGenerationCheckpoint.objects.get_or_create(
+                        defaults={'last_student_id': last_id}, **checkpoint_fields
+                    )
+                    checkpoint.last_student_id = last_id
+                    checkpoint.save()
+
+                previous_count = count
+                count += len(students)
+                if count // STATUS_INTERVAL > previous_count // STATUS_INTERVAL:
                     # Print a status update with an approximation of
                     # how much time is left based on how long the last
                     # interval took
                     diff = datetime.datetime.now(UTC) - start
-                    timeleft = diff * (total - count) / STATUS_INTERVAL
+                    timeleft = diff * (total - count) / (count - previous_count)
                     hours, remainder = divmod(timeleft.seconds, 3600)
                     minutes, seconds = divmod(remainder, 60)
                     print "{0}/{1} completed ~{2:02}:{3:02}m remaining".format(
                         count, total, hours, minutes)
-                    start = datetime.datetime.now(UTC)
-
-                if certificate_status_for_student(
-                        student, course_id)['status'] in valid_statuses:
-                    if not options['noop']:
-                        # Add the certificate request to the queue
-                        ret = xq.add_cert(student, course_id, course=course)
-                        if ret == 'generating':
-                            print '{0} - {1}'.format(student, ret)
+                start = datetime.datetime.now(UTC)
+
+            # the course is done, so the next run starts over
+            if not options['noop']:
+                checkpoints.delete()
@@ -76,6 +76,22 @@ class CertificateWhitelist(models.Model):
     whitelist = models.BooleanField(default=0)
 
 
+class CertificateGenerationCheckpoint(models.Model):
+    """
+    Records the last student processed by the ungenerated_certs run which
+    certifies the students of a course with a certificate status in
+    `statuses`, so that an interrupted run resumes after that student.
+    """
+    course_id = models.CharField(max_length=255)
+    # the comma separated, sorted certificate statuses of the run
+    statuses = models.CharField(max_length=255)
+    last_student_id = models.IntegerField()
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (('course_id', 'statuses'),)
+
+
 class GeneratedCertificate(models.Model):
     user = models.ForeignKey(User)
     course_id = models.CharField(max_length=255, blank=True, default='')
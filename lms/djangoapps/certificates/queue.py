@@ -15,11 +15,22 @@ from verify_student.models import SoftwareSecurePhotoVerification
 import json
 import random
 import logging
+from multiprocessing.pool import ThreadPool
 from xmodule.modulestore import Location
 
 
 logger = logging.getLogger(__name__)
 
+# Statuses from which a new certificate may be requested
+VALID_STATUSES = [status.generating,
+                  status.unavailable,
+                  status.deleted,
+                  status.error,
+                  status.notpassing]
+
+# Number of requests add_certs keeps in flight to the queue server at a time
+XQUEUE_CONCURRENCY = 8
+
 
 class XQueueCertInterface(object):
     """
@@ -150,12 +161,6 @@ class XQueueCertInterface(object):
 
         """
 
-        VALID_STATUSES = [status.generating,
-                          status.unavailable,
-                          status.deleted,
-                          status.error,
-                          status.notpassing]
-
         cert_status = certificate_status_for_student(student, course_id)['status']
 
         new_status = cert_status
@@ -169,69 +174,203 @@ class XQueueCertInterface(object):
                 course = courses.get_course_by_id(course_id)
             profile = UserProfile.objects.get(user=student)
 
-            # Needed
-            self.request.user = student
-            self.request.session = {}
-
-            grade = grades.grade(student, self.request, course)
+            grade = self._grade(student, course)
             is_whitelisted = self.whitelist.filter(
                 user=student, course_id=course_id, whitelist=True).exists()
             enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)
-            mode_is_verified = (enrollment_mode == GeneratedCertificate.MODES.verified)
-            user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(student)
-            user_is_reverified = SoftwareSecurePhotoVerification.user_is_reverified_for_all(course_id, student)
-            course_id_dict = Location.parse_course_id(course_id)
-            cert_mode = enrollment_mode
-            if (mode_is_verified and user_is_verified and user_is_reverified):
-                template_pdf = "certificate-template-{org}-{course}-verified.pdf".format(**course_id_dict)
-            elif (mode_is_verified and not (user_is_verified and user_is_reverified)):
-                template_pdf = "certificate-template-{org}-{course}.pdf".format(**course_id_dict)
-                cert_mode = GeneratedCertificate.MODES.honor
-            else:
-                # honor code and audit students
-                template_pdf = "certificate-template-{org}-{course}.pdf".format(**course_id_dict)
-
             cert, __ = GeneratedCertificate.objects.get_or_create(user=student, course_id=course_id)
 
-            cert.mode = cert_mode
-            cert.user = student
-            cert.grade = grade['percent']
-            cert.course_id = course_id
-            cert.name = profile.name
-
-            if is_whitelisted or grade['grade'] is not None:
-
-                # check to see whether the student is on the
-                # the embargoed country restricted list
-                # otherwise, put a new certificate request
-                # on the queue
-
-                if self.restricted.filter(user=student).exists():
-                    new_status = status.restricted
-                    cert.status = new_status
-                    cert.save()
-                else:
-                    key = make_hashkey(random.random())
-                    cert.key = key
-                    contents = {
-                        'action': 'create',
-                        'username': student.username,
-                        'course_id': course_id,
-                        'name': profile.name,
-                        'grade': grade['grade'],
-                        'template_pdf': template_pdf,
-                    }
-                    new_status = status.generating
-                    cert.status = new_status
-                    cert.save()
-                    self._send_to_xqueue(contents, key)
-            else:
-                new_status = status.notpassing
-                cert.status = new_status
-                cert.save()
+            new_status, xqueue_request = self._update_cert(
+                cert, student, course_id, profile, grade, is_whitelisted, enrollment_mode
+            )
+            if xqueue_request is not None:
+                self._send_to_xqueue(*xqueue_request)
 
         return new_status
 
+    def add_certs(self, students, course_id, course=None, statuses=None):
+        """
+        Request new certificates for many students of a course at once.
+
+        Arguments:
+          students - list of User objects
+          course_id - courseenrollment.course_id (string)
+          statuses - the certificate statuses from which to request a new
+                     certificate, by default those allowed by add_cert
+
+        Works as add_cert for each student, but the certificates, profiles,
+        whitelist entries and enrollment modes of all the students are each
+        loaded with one query, and the requests are sent to the queue several at
+        a time.  A student whose request cannot be sent is left in
+        the 'error' state rather than stopping the others.
+
+        Returns a dict of the new status of each student (by user id) whose
+        certificate status was in `statuses`, or None for a student who
+        could not be graded.
+        """
+        statuses = set(VALID_STATUSES if statuses is None else statuses).intersection(VALID_STATUSES)
+        student_ids = [student.id for student in students]
+
+        certs = dict(
+            (cert.user_id, cert) for cert in
+            GeneratedCertificate.objects.filter(course_id=course_id, user__in=student_ids)
+        )
+        students = [
+            student for student in students
+            if (certs[student.id].status if student.id in certs else status.unavailable) in statuses
+        ]
+        if not students:
+            return {}
+        student_ids = [student.id for student in students]
+
+        if course is None:
+            course = courses.get_course_by_id(course_id)
+        profiles = dict(
+            (profile.user_id, profile) for profile in UserProfile.objects.filter(user__in=student_ids)
+        )
+        whitelisted_ids = set(self.whitelist.filter(
+            user__in=student_ids, course_id=course_id, whitelist=True
+        ).values_list('user_id', flat=True))
+        enrollment_modes = dict(
+            (enrollment.user_id, enrollment.mode if enrollment.is_active else None) for enrollment in
+            CourseEnrollment.objects.filter(user__in=student_ids, course_id=course_id)
+        )
+        grades_by_user = self._grades(students, course)
+
+        new_statuses = {}
+        xqueue_requests = []
+        for student in students:
+            grade = grades_by_user[student.id]
+            if grade is None or student.id not in profiles:
+                new_statuses[student.id] = None
+                continue
+            cert = certs.get(student.id) or GeneratedCertificate(user=student, course_id=course_id)
+            certs[student.id] = cert
+            new_statuses[student.id], xqueue_request = self._update_cert(
+                cert, student, course_id, profiles[student.id], grade,
+                student.id in whitelisted_ids, enrollment_modes.get(student.id)
+            )
+            if xqueue_request is not None:
+                xqueue_requests.append((student.id, xqueue_request))
+
+        for user_id, error in self._send_all_to_xqueue(xqueue_requests):
+            cert = certs[user_id]
+            cert.status = new_statuses[user_id] = status.error
+            cert.error_reason = error
+            cert.save()
+        return new_statuses
+
+    def _grade(self, student, course):
+        """
+        Grades `student` in `course`.
+        """
+        # Needed
+        self.request.user = student
+        self.request.session = {}
+
+        return grades.grade(student, self.request, course)
+
+    def _grades(self, students, course):
+        """
+        Returns the grade of each of the `students` in `course`, by user id.
+
+        The students are always graded afresh: a grade computed offline may
+        predate changes to the course content or grading policy, which are not
+        recorded with the course.  The grade of a student who cannot be graded
+        is None.
+        """
+        grades_by_user = {}
+        for student in students:
+            try:
+                grades_by_user[student.id] = self._grade(student, course)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Cannot grade student %s in course %s', student.id, course.id)
+                grades_by_user[student.id] = None
+        return grades_by_user
+
+    def _update_cert(self, cert, student, course_id, profile, grade, is_whitelisted, enrollment_mode):
+        """
+        Updates and saves the certificate `cert` of `student` from their
+        grade, whitelisting and enrollment mode.
+
+        Returns the new status, and the (contents, key) of the request to
+        put on the queue for the certificate, or None.
+        """
+        mode_is_verified = (enrollment_mode == GeneratedCertificate.MODES.verified)
+        course_id_dict = Location.parse_course_id(course_id)
+        cert_mode = enrollment_mode
+        if mode_is_verified and SoftwareSecurePhotoVerification.user_is_verified(student) and \
+                SoftwareSecurePhotoVerification.user_is_reverified_for_all(course_id, student):
+            template_pdf = "certificate-template-{org}-{course}-verified.pdf".format(**course_id_dict)
+        elif mode_is_verified:
+            template_pdf = "certificate-template-{org}-{course}.pdf".format(**course_id_dict)
+            cert_mode = GeneratedCertificate.MODES.honor
+        else:
+            # honor code and audit students
+            template_pdf = "certificate-template-{org}-{course}.pdf".format(**course_id_dict)
+
+        cert.mode = cert_mode
+        cert.user = student
+        cert.grade = grade['percent']
+        cert.course_id = course_id
+        cert.name = profile.name
+
+        xqueue_request = None
+        if is_whitelisted or grade['grade'] is not None:
+
+            # check to see whether the student is on the
+            # the embargoed country restricted list
+            # otherwise, put a new certificate request
+            # on the queue
+
+            if not profile.allow_certificate:
+                new_status = status.restricted
+            else:
+                key = make_hashkey(random.random())
+                cert.key = key
+                contents = {
+                    'action': 'create',
+                    'username': student.username,
+                    'course_id': course_id,
+                    'name': profile.name,
+                    'grade': grade['grade'],
+                    'template_pdf': template_pdf,
+                }
+                new_status = status.generating
+                xqueue_request = (contents, key)
+        else:
+            new_status = status.notpassing
+
+        cert.status = new_status
+        cert.save()
+        return new_status, xqueue_request
+
+    def _send_all_to_xqueue(self, xqueue_requests):
+        """
+        Puts the (user id, (contents, key)) `xqueue_requests` on the queue,
+        XQUEUE_CONCURRENCY at a time over the interface's session.
+
+        Returns the (user id, error message) of each request that failed.
+        """
+        def send(xqueue_request):
+            """ Sends one request, returning its error message if it fails """
+            user_id, (contents, key) = xqueue_request
+            try:
+                self._send_to_xqueue(contents, key)
+            except Exception as exc:  # pylint: disable=broad-except
+                return user_id, unicode(exc)
+            return None
+
+        if len(xqueue_requests) > 1:
+            pool = ThreadPool(min(XQUEUE_CONCURRENCY, len(xqueue_requests)))
+            try:
+                results = pool.map(send, xqueue_requests)
+            finally:
+                pool.close()
+        else:
+            results = [send(xqueue_request) for xqueue_request in xqueue_requests]
+        return [result for result in results if result is not None]
+
     def _send_to_xqueue(self, contents, key):
 
         if self.use_https:
@@ -0,0 +1,143 @@
+"""
+Celery tasks for generating the certificates of a course.
+
+The students of the course are divided into chunks, each of which is handed to
+a subtask that requests the certificates of its students in bulk.  The progress
+of the subtasks is recorded in the InstructorTask of the generation, so that a
+generation that was interrupted can be resumed with the chunks left to do.
+"""
+import json
+import logging
+
+from celery import task
+from celery.states import SUCCESS, FAILURE
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from courseware.courses import get_course_by_id
+from instructor_task.models import InstructorTask
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    requeue_unfinished_subtasks,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
+
+from certificates.models import CertificateStatuses
+from certificates.queue import XQueueCertInterface
+
+
+log = logging.getLogger(__name__)
+
+
+def _get_student_queryset(course_id):
+    """
+    Returns a query set of the students of a course who may need a certificate.
+    """
+    return User.objects.filter(courseenrollment__course_id=course_id)
+
+
+def perform_delegate_certificate_generation(entry_id, course_id, task_input, action_name):
+    """
+    Divides the students of a course into chunks of no more than
+    settings.CERTIFICATES_PER_TASK, and queues a subtask for each chunk.
+
+    If the subtasks have already been defined, this is a resumed generation, and
+    only the subtasks that have not completed are queued again.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    def _create_generate_certificates_subtask(to_list, initial_subtask_status):
+        """Creates a subtask to generate the certificates of a chunk of students."""
+        subtask_id = initial_subtask_status.task_id
+        return generate_certificates_chunk.subtask(
+            (
+                entry_id,
+                course_id,
+                [item['pk'] for item in to_list],
+                task_input,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=subtask_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    student_qset = _get_student_queryset(course_id)
+
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        num_subtasks = requeue_unfinished_subtasks(entry, _create_generate_certificates_subtask, student_qset, [])
+        log.warning("Task %s: resuming certificate generation for course %s with %s subtasks",
+                    entry.task_id, course_id, num_subtasks)
+        return json.loads(entry.task_output)
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_generate_certificates_subtask,
+        student_qset,
+        [],
+        settings.CERTIFICATES_PER_QUERY,
+        settings.CERTIFICATES_PER_TASK
+    )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def generate_certificates_chunk(entry_id, course_id, student_ids, task_input, subtask_status_dict):
+    """
+    Requests the certificates of a chunk of the students of a course.
+
+    Inputs are:
+      * `entry_id`: id of the InstructorTask object to which progress should be recorded.
+      * `course_id`: id of the course.
+      * `student_ids`: ids of the students of the chunk.
+      * `task_input`: the input of the certificate generation.  Its optional 'statuses'
+        entry lists the certificate statuses from which to request a new certificate
+        (by default, 'unavailable').  Its optional 'insecure' entry asks for the LMS
+        to be called back over http rather than https.
+      * `subtask_status_dict`: dict representing the current status of the subtask.
+
+    Students whose certificate is requested, or found to be not passing or restricted,
+    succeed; students who could not be graded, or whose request could not be sent,
+    fail; the others are skipped.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    log.info("Preparing to generate certificates of %d students in course %s as subtask %s for instructor task %d",
+             len(student_ids), course_id, current_task_id, entry_id)
+
+    # As for bulk email subtasks, a subtask that was queued twice should only run once.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        xqueue = XQueueCertInterface()
+        xqueue.use_https = not task_input.get('insecure', False)
+        students = list(User.objects.filter(id__in=student_ids).prefetch_related('groups'))
+        new_statuses = xqueue.add_certs(
+            students,
+            course_id,
+            course=get_course_by_id(course_id, depth=2),
+            statuses=task_input.get('statuses') or [CertificateStatuses.unavailable],
+        )
+    except Exception:
+        # Unexpected exception.  Try to write out the failure to the entry before failing.
+        log.exception("Certificate generation subtask %s for course %s: failed unexpectedly!", current_task_id, course_id)
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    num_failed = sum(
+        1 for new_status in new_statuses.itervalues()
+        if new_status in (None, CertificateStatuses.error)
+    )
+    subtask_status.increment(
+        succeeded=len(new_statuses) - num_failed,
+        failed=num_failed,
+        skipped=len(student_ids) - len(new_statuses),
+        state=SUCCESS,
+    )
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    log.info("Certificate generation subtask %s for course %s: returning status %s",
+             current_task_id, course_id, subtask_status)
+    return subtask_status.to_dict()
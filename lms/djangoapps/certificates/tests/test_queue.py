@@ -0,0 +1,172 @@
+"""
+Tests of the requests of certificates to the queue server
+"""
+import json
+
+from mock import patch
+
+from django.test.utils import override_settings
+
+from courseware.models import OfflineComputedGrade
+from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
+from student.models import UserProfile
+from student.tests.factories import UserFactory, CourseEnrollmentFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from certificates.models import CertificateStatuses, CertificateWhitelist, GeneratedCertificate
+from certificates.queue import XQueueCertInterface
+
+PASSING = {'grade': 'Pass', 'percent': 0.9}
+FAILING = {'grade': None, 'percent': 0.1}
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class XQueueCertInterfaceTest(ModuleStoreTestCase):
+    """
+    Tests of XQueueCertInterface
+    """
+    def setUp(self):
+        self.course = CourseFactory.create(org='MITx', number='999', display_name='Robot Super Course')
+        self.students = [UserFactory.create() for __ in range(4)]
+        for student in self.students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id)
+        self.xqueue = XQueueCertInterface()
+
+    def _certificate(self, student):
+        """ The certificate of `student` in the course """
+        return GeneratedCertificate.objects.get(user=student, course_id=self.course.id)
+
+    def test_update_cert(self):
+        student = self.students[0]
+        profile = UserProfile.objects.get(user=student)
+        cert = GeneratedCertificate(user=student, course_id=self.course.id)
+
+        new_status, xqueue_request = self.xqueue._update_cert(  # pylint: disable=protected-access
+            cert, student, self.course.id, profile, PASSING, False, 'honor'
+        )
+        self.assertEqual(new_status, CertificateStatuses.generating)
+        contents, key = xqueue_request
+        self.assertEqual(contents['username'], student.username)
+        self.assertEqual(contents['grade'], 'Pass')
+        self.assertEqual(contents['template_pdf'], 'certificate-template-MITx-999.pdf')
+        self.assertEqual(self._certificate(student).key, key)
+        self.assertEqual(self._certificate(student).status, CertificateStatuses.generating)
+
+    def test_update_cert_not_passing(self):
+        student = self.students[0]
+        profile = UserProfile.objects.get(user=student)
+        cert = GeneratedCertificate(user=student, course_id=self.course.id)
+        self.assertEqual(
+            self.xqueue._update_cert(  # pylint: disable=protected-access
+                cert, student, self.course.id, profile, FAILING, False, 'honor'
+            ),
+            (CertificateStatuses.notpassing, None)
+        )
+        # unless whitelisted
+        new_status, xqueue_request = self.xqueue._update_cert(  # pylint: disable=protected-access
+            cert, student, self.course.id, profile, FAILING, True, 'honor'
+        )
+        self.assertEqual(new_status, CertificateStatuses.generating)
+        self.assertIsNotNone(xqueue_request)
+
+    def test_update_cert_restricted(self):
+        student = self.students[0]
+        profile = UserProfile.objects.get(user=student)
+        profile.allow_certificate = False
+        cert = GeneratedCertificate(user=student, course_id=self.course.id)
+        self.assertEqual(
+            self.xqueue._update_cert(  # pylint: disable=protected-access
+                cert, student, self.course.id, profile, PASSING, True, 'honor'
+            ),
+            (CertificateStatuses.restricted, None)
+        )
+
+    def test_update_cert_unverified(self):
+        # a student in the verified track who wasn't verified gets an honor certificate
+        student = self.students[0]
+        profile = UserProfile.objects.get(user=student)
+        cert = GeneratedCertificate(user=student, course_id=self.course.id)
+        self.xqueue._update_cert(  # pylint: disable=protected-access
+            cert, student, self.course.id, profile, PASSING, False, 'verified'
+        )
+        self.assertEqual(self._certificate(student).mode, GeneratedCertificate.MODES.honor)
+
+    def test_grades_are_fresh(self):
+        # grades computed offline may predate changes to the course, so they aren't used
+        for student in self.students:
+            OfflineComputedGrade.objects.create(
+                user=student, course_id=self.course.id, gradeset=json.dumps(FAILING)
+            )
+
+        def grade(student, _course):
+            """ Grades the students, failing to grade the first one """
+            if student == self.students[0]:
+                raise Exception('grading failed')
+            return PASSING
+
+        with patch.object(XQueueCertInterface, '_grade', side_effect=grade) as mock_grade:
+            grades_by_user = self.xqueue._grades(self.students, self.course)  # pylint: disable=protected-access
+        self.assertEqual(mock_grade.call_count, len(self.students))
+        self.assertEqual(grades_by_user[self.students[0].id], None)
+        for student in self.students[1:]:
+            self.assertEqual(grades_by_user[student.id], PASSING)
+
+    def test_add_certs(self):
+        # the second student isn't passing, the third one's certificate is already downloadable,
+        # and the request of the fourth one cannot be sent
+        GeneratedCertificate.objects.create(
+            user=self.students[2], course_id=self.course.id, status=CertificateStatuses.downloadable
+        )
+        grades_by_user = {
+            self.students[0].id: PASSING,
+            self.students[1].id: FAILING,
+            self.students[3].id: PASSING,
+        }
+
+        def send(contents, _key):
+            """ Fails to send the request of the fourth student """
+            if contents['username'] == self.students[3].username:
+                raise Exception('Unable to send queue message')
+
+        with patch.object(XQueueCertInterface, '_grades', return_value=grades_by_user), \
+                patch.object(XQueueCertInterface, '_send_to_xqueue', side_effect=send) as mock_send:
+            new_statuses = self.xqueue.add_certs(self.students, self.course.id, course=self.course)
+
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(new_statuses, {
+            self.students[0].id: CertificateStatuses.generating,
+            self.students[1].id: CertificateStatuses.notpassing,
+            self.students[3].id: CertificateStatuses.error,
+        })
+        self.assertEqual(self._certificate(self.students[0]).status, CertificateStatuses.generating)
+        self.assertEqual(self._certificate(self.students[1]).status, CertificateStatuses.notpassing)
+        self.assertEqual(self._certificate(self.students[2]).status, CertificateStatuses.downloadable)
+        self.assertEqual(self._certificate(self.students[3]).status, CertificateStatuses.error)
+        self.assertEqual(self._certificate(self.students[3]).error_reason, 'Unable to send queue message')
+
+    def test_add_certs_whitelisted_and_ungraded(self):
+        CertificateWhitelist.objects.create(user=self.students[0], course_id=self.course.id, whitelist=True)
+        grades_by_user = {self.students[0].id: FAILING, self.students[1].id: None}
+
+        with patch.object(XQueueCertInterface, '_grades', return_value=grades_by_user), \
+                patch.object(XQueueCertInterface, '_send_to_xqueue') as mock_send:
+            new_statuses = self.xqueue.add_certs(self.students[:2], self.course.id, course=self.course)
+
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(new_statuses, {
+            self.students[0].id: CertificateStatuses.generating,
+            self.students[1].id: None,
+        })
+        self.assertFalse(GeneratedCertificate.objects.filter(user=self.students[1]).exists())
+
+    def test_add_certs_statuses(self):
+        GeneratedCertificate.objects.create(
+            user=self.students[0], course_id=self.course.id, status=CertificateStatuses.error
+        )
+        with patch.object(XQueueCertInterface, '_grades', return_value={self.students[0].id: PASSING}), \
+                patch.object(XQueueCertInterface, '_send_to_xqueue'):
+            new_statuses = self.xqueue.add_certs(
+                self.students, self.course.id, course=self.course, statuses=[CertificateStatuses.error]
+            )
+        self.assertEqual(new_statuses, {self.students[0].id: CertificateStatuses.generating})
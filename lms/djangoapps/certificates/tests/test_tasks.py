@@ -0,0 +1,122 @@
+"""
+Tests of the celery tasks generating the certificates of a course
+"""
+import json
+from uuid import uuid4
+
+from celery.states import SUCCESS, FAILURE
+from mock import patch, Mock
+
+from django.test.utils import override_settings
+
+from instructor_task.models import InstructorTask
+from instructor_task.subtasks import SubtaskStatus
+from instructor_task.tests.factories import InstructorTaskFactory
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase
+
+from certificates.models import CertificateStatuses, GeneratedCertificate
+from certificates.queue import XQueueCertInterface
+from certificates.tasks import perform_delegate_certificate_generation, generate_certificates_chunk
+
+PASSING = {'grade': 'Pass', 'percent': 0.9}
+
+
+@patch.object(XQueueCertInterface, '_grade', Mock(return_value=PASSING))
+class GenerateCertificatesTest(InstructorTaskCourseTestCase):
+    """
+    Tests of the generation of the certificates of a course over subtasks
+    """
+    def setUp(self):
+        super(GenerateCertificatesTest, self).setUp()
+        self.initialize_course()
+        self.students = [self.create_student('robot{0}'.format(i)) for i in xrange(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='generate_certificates',
+            task_input=json.dumps({}),
+            task_key='',
+            task_id=str(uuid4()),
+        )
+
+    def _statuses(self):
+        """ The certificate status of each student, by user id """
+        return dict(GeneratedCertificate.objects.filter(course_id=self.course.id).values_list('user_id', 'status'))
+
+    def _subtask_states(self):
+        """ The state of each subtask of the generation """
+        subtask_dict = json.loads(InstructorTask.objects.get(id=self.entry.id).subtasks)
+        return [subtask_status['state'] for subtask_status in subtask_dict['status'].values()]
+
+    @override_settings(CERTIFICATES_PER_TASK=2)
+    def test_generate_certificates(self):
+        with patch.object(XQueueCertInterface, '_send_to_xqueue') as mock_send:
+            perform_delegate_certificate_generation(self.entry.id, self.course.id, {}, 'certified')
+
+        self.assertEqual(mock_send.call_count, len(self.students))
+        self.assertEqual(
+            self._statuses(),
+            dict((student.id, CertificateStatuses.generating) for student in self.students)
+        )
+        self.assertEqual(self._subtask_states(), [SUCCESS] * 3)
+        task_output = json.loads(InstructorTask.objects.get(id=self.entry.id).task_output)
+        self.assertEqual(task_output['succeeded'], len(self.students))
+
+    @override_settings(CERTIFICATES_PER_TASK=2)
+    def test_resume(self):
+        # the subtasks of the first run are lost
+        with patch('certificates.tasks.generate_certificates_chunk') as mock_chunk:
+            perform_delegate_certificate_generation(self.entry.id, self.course.id, {}, 'certified')
+        self.assertEqual(mock_chunk.subtask.call_count, 3)
+        self.assertEqual(self._statuses(), {})
+
+        # running the generation again queues them again, rather than new subtasks
+        subtask_ids = set(json.loads(InstructorTask.objects.get(id=self.entry.id).subtasks)['status'])
+        with patch.object(XQueueCertInterface, '_send_to_xqueue'):
+            perform_delegate_certificate_generation(self.entry.id, self.course.id, {}, 'certified')
+        self.assertEqual(set(json.loads(InstructorTask.objects.get(id=self.entry.id).subtasks)['status']), subtask_ids)
+        self.assertEqual(self._subtask_states(), [SUCCESS] * 3)
+        self.assertEqual(len(self._statuses()), len(self.students))
+
+    def _run_chunk(self, task_input):
+        """ Runs the single subtask of the generation on all the students """
+        with patch('certificates.tasks.generate_certificates_chunk'):
+            perform_delegate_certificate_generation(self.entry.id, self.course.id, task_input, 'certified')
+        subtask_id = json.loads(InstructorTask.objects.get(id=self.entry.id).subtasks)['status'].keys()[0]
+        return generate_certificates_chunk(
+            self.entry.id, self.course.id, [student.id for student in self.students],
+            task_input, SubtaskStatus.create(subtask_id).to_dict()
+        )
+
+    def test_chunk(self):
+        # the first student already has a certificate, and the request of the second one cannot be sent
+        GeneratedCertificate.objects.create(
+            user=self.students[0], course_id=self.course.id, status=CertificateStatuses.downloadable
+        )
+
+        def send(contents, _key):
+            """ Fails to send the request of the second student """
+            if contents['username'] == self.students[1].username:
+                raise Exception('Unable to send queue message')
+
+        with patch.object(XQueueCertInterface, '_send_to_xqueue', side_effect=send):
+            subtask_status = self._run_chunk({})
+        self.assertEqual(subtask_status['state'], SUCCESS)
+        self.assertEqual(subtask_status['succeeded'], 3)
+        self.assertEqual(subtask_status['failed'], 1)
+        self.assertEqual(subtask_status['skipped'], 1)
+
+    def test_chunk_statuses(self):
+        GeneratedCertificate.objects.create(
+            user=self.students[0], course_id=self.course.id, status=CertificateStatuses.error
+        )
+        with patch.object(XQueueCertInterface, '_send_to_xqueue'):
+            subtask_status = self._run_chunk({'statuses': [CertificateStatuses.error]})
+        self.assertEqual(subtask_status['succeeded'], 1)
+        self.assertEqual(subtask_status['skipped'], len(self.students) - 1)
+        self.assertEqual(self._statuses(), {self.students[0].id: CertificateStatuses.generating})
+
+    def test_chunk_failure(self):
+        with patch.object(XQueueCertInterface, 'add_certs', side_effect=Exception('unexpected')):
+            with self.assertRaises(Exception):
+                self._run_chunk({})
+        self.assertEqual(self._subtask_states(), [FAILURE])
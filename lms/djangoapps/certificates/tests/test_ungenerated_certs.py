@@ -0,0 +1,83 @@
+"""
+Tests of the ungenerated_certs command
+"""
+from mock import patch
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
+from student.tests.factories import UserFactory, CourseEnrollmentFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from certificates.models import CertificateStatuses, CertificateGenerationCheckpoint
+from certificates.queue import XQueueCertInterface
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class UngeneratedCertsTest(ModuleStoreTestCase):
+    """
+    Tests of the chunked, resumable runs of ungenerated_certs
+    """
+    def setUp(self):
+        self.course = CourseFactory.create()
+        self.students = [UserFactory.create() for __ in range(5)]
+        for student in self.students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id)
+
+    def _run(self, **options):
+        """ Runs the command on the course, two students at a time """
+        call_command('ungenerated_certs', course=self.course.id, chunk_size=2, **options)
+
+    @staticmethod
+    def _certified(mock_add_certs):
+        """ The ids of the students passed to add_certs """
+        return [student.id for call in mock_add_certs.call_args_list for student in call[0][0]]
+
+    def test_run(self):
+        with patch.object(XQueueCertInterface, 'add_certs', return_value={}) as mock_add_certs:
+            self._run()
+        self.assertEqual(mock_add_certs.call_count, 3)
+        self.assertEqual(self._certified(mock_add_certs), [student.id for student in self.students])
+        self.assertEqual(
+            mock_add_certs.call_args[1]['statuses'], [CertificateStatuses.unavailable]
+        )
+        self.assertFalse(CertificateGenerationCheckpoint.objects.exists())
+
+    def test_resume(self):
+        # the run is interrupted while the second chunk is on the queue
+        with patch.object(XQueueCertInterface, 'add_certs', side_effect=[{}, Exception('interrupted')]):
+            with self.assertRaises(Exception):
+                self._run()
+        checkpoint = CertificateGenerationCheckpoint.objects.get(course_id=self.course.id)
+        self.assertEqual(checkpoint.last_student_id, self.students[1].id)
+        self.assertEqual(checkpoint.statuses, CertificateStatuses.unavailable)
+
+        with patch.object(XQueueCertInterface, 'add_certs', return_value={}) as mock_add_certs:
+            self._run()
+        self.assertEqual(self._certified(mock_add_certs), [student.id for student in self.students[2:]])
+        self.assertFalse(CertificateGenerationCheckpoint.objects.exists())
+
+    def test_restart(self):
+        CertificateGenerationCheckpoint.objects.create(
+            course_id=self.course.id, statuses=CertificateStatuses.unavailable, last_student_id=self.students[3].id
+        )
+        with patch.object(XQueueCertInterface, 'add_certs', return_value={}) as mock_add_certs:
+            self._run(restart=True)
+        self.assertEqual(self._certified(mock_add_certs), [student.id for student in self.students])
+
+    def test_noop(self):
+        # a dry run neither puts requests on the queue nor records how far it got
+        checkpoint = CertificateGenerationCheckpoint.objects.create(
+            course_id=self.course.id, statuses=CertificateStatuses.unavailable, last_student_id=self.students[1].id
+        )
+        with patch.object(XQueueCertInterface, 'add_certs') as mock_add_certs:
+            self._run(noop=True)
+        self.assertFalse(mock_add_certs.called)
+        self.assertEqual(CertificateGenerationCheckpoint.objects.get(id=checkpoint.id).last_student_id, self.students[1].id)
+
+        with patch.object(XQueueCertInterface, 'add_certs') as mock_add_certs:
+            self._run(noop=True, restart=True)
+        self.assertFalse(mock_add_certs.called)
+        self.assertEqual(CertificateGenerationCheckpoint.objects.get(id=checkpoint.id).last_student_id, self.students[1].id)
@@ -2,12 +2,15 @@
 from __future__ import division
 from collections import defaultdict
 import json
+import multiprocessing
 import random
 import logging
 
 from contextlib import contextmanager
+from datetime import timedelta
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Max, Min
 from django.test.client import RequestFactory
 
 from dogapi import dog_stats_api
@@ -19,7 +22,7 @@ from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import StudentModule, ProblemAnswerDistribution
 from .module_render import get_module_for_descriptor
 
 log = logging.getLogger("edx.courseware")
@@ -48,34 +51,181 @@ def yield_dynamic_descriptor_descendents(descriptor, module_creator):
         yield next_descriptor
 
 
-def answer_distributions(course_id):
+# Number of StudentModule rows fetched per query when counting answers
+ANSWER_DISTRIBUTION_CHUNK_SIZE = 1000
+
+# How far before the last modified submission read the next refresh of the
+# answer distributions starts, for the submissions the read replica didn't
+# have yet, or which app servers with late clocks dated earlier
+ANSWER_DISTRIBUTION_REFRESH_MARGIN = timedelta(minutes=5)
+
+STUDENT_ANSWERS_KEY = '"student_answers"'
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _student_answers(state):
     """
-    Given a course_id, return answer distributions in the form of a dictionary
+    Return the "student_answers" dict of a StudentModule state JSON string.
+
+    When the key occurs only once in the state, only its value is decoded,
+    rather than the whole state (which also holds the correct map, input
+    state, etc).  Raises ValueError if the state cannot be parsed.
+    """
+    if not state:
+        return {}
+
+    start = state.find(STUDENT_ANSWERS_KEY)
+    if start == -1:
+        return json.loads(state).get("student_answers", {})
+
+    if state.find(STUDENT_ANSWERS_KEY, start + 1) == -1:
+        index = start + len(STUDENT_ANSWERS_KEY)
+        while index < len(state) and state[index].isspace():
+            index += 1
+        if index < len(state) and state[index] == ':':
+            index += 1
+            while index < len(state) and state[index].isspace():
+                index += 1
+            try:
+                value, _end = _JSON_DECODER.raw_decode(state, index)
+            except ValueError:
+                pass
+            else:
+                if isinstance(value, dict):
+                    return value
+
+    # The key shows up more than once (eg inside an answer), so fall back to
+    # parsing everything.
+    return json.loads(state).get("student_answers", {})
+
+
+def submitted_problem_id_ranges(course_id, num_ranges):
+    """
+    Split the ids of the submitted problem StudentModules of a course into at
+    most `num_ranges` (start_id, end_id) ranges of similar width, so that
+    raw_answer_counts can be run for each range by parallel workers.  Ranges
+    include start_id and exclude end_id.
+    """
+    bounds = StudentModule.all_submitted_problems_read_only(course_id).aggregate(Min('id'), Max('id'))
+    if bounds['id__min'] is None:
+        return []
+
+    first, last = bounds['id__min'], bounds['id__max'] + 1
+    width = max(1, -(-(last - first) // num_ranges))
+    return [(start, min(start + width, last)) for start in xrange(first, last, width)]
+
+
+def raw_answer_counts(course_id, start_id=None, end_id=None, module_state_keys=None):
+    """
+    Count the answers submitted to the problems of a course, returning a dict
     mapping:
 
-      (problem url_name, problem display_name, problem_id) -> {dict: answer -> count}
+      (module_state_key, problem_part_id) -> {dict: answer -> count}
 
-    Answer distributions are found by iterating through all StudentModule
-    entries for a given course with type="problem" and a grade that is not null.
-    This means that we only count LoncapaProblems that people have submitted.
-    Other types of items like ORA or sequences will not be collected. Empty
-    Loncapa problem state that gets created from runnig the progress page is
-    also not counted.
+    StudentModule rows are read ANSWER_DISTRIBUTION_CHUNK_SIZE at a time in id
+    order, fetching only the columns needed, so memory use does not grow with
+    the number of submissions.  The rows can be restricted to ids in
+    [start_id, end_id) (see submitted_problem_id_ranges) and to the given
+    module_state_keys; the counts of separate ranges are combined with
+    merge_answer_counts.
+    """
+    queryset = StudentModule.all_submitted_problems_read_only(course_id)
+    if start_id is not None:
+        queryset = queryset.filter(id__gte=start_id)
+    if end_id is not None:
+        queryset = queryset.filter(id__lt=end_id)
+    if module_state_keys is not None:
+        queryset = queryset.filter(module_state_key__in=list(module_state_keys))
+    queryset = queryset.order_by('id').values_list('id', 'student_id', 'module_state_key', 'state')
 
-    This method accesses the StudentModule table directly instead of using the
-    CapaModule abstraction. The main reason for this is so that we can generate
-    the report without any side-effects -- we don't have to worry about answer
-    distribution potentially causing re-evaluation of the student answer. This
-    also allows us to use the read-replica database, which reduces risk of bad
-    locking behavior. And quite frankly, it makes this a lot less confusing.
+    answer_counts = defaultdict(lambda: defaultdict(int))
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk[:ANSWER_DISTRIBUTION_CHUNK_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1][0]
 
-    Also, we're pulling all available records from the database for this course
-    rather than crawling through a student's course-tree -- the latter could
-    potentially cause us trouble with A/B testing. The distribution report may
-    not be aware of problems that are not visible to the user being used to
-    generate the report.
+        for module_id, student_id, module_state_key, state in rows:
+            try:
+                raw_answers = _student_answers(state)
+            except ValueError:
+                log.error(
+                    "Answer Distribution: Could not parse module state for " +
+                    "StudentModule id={}, course={}".format(module_id, course_id)
+                )
+                continue
 
-    This method will try to use a read-replica database if one is available.
+            # Each problem part has an ID that is derived from the
+            # module.module_state_key (with some suffix appended)
+            for problem_part_id, raw_answer in raw_answers.items():
+                # Convert whatever raw answers we have (numbers, unicode, None, etc.)
+                # to be unicode values. Note that if we get a string, it's always
+                # unicode and not str -- state comes from the json decoder, and that
+                # always returns unicode for strings.
+                answer_counts[(module_state_key, problem_part_id)][unicode(raw_answer)] += 1
+
+    return answer_counts
+
+
+def merge_answer_counts(partial_counts):
+    """
+    Combine the results of several raw_answer_counts calls (eg over disjoint
+    id ranges) into one.
+    """
+    answer_counts = defaultdict(lambda: defaultdict(int))
+    for counts in partial_counts:
+        for key, answers in counts.iteritems():
+            for answer, count in answers.iteritems():
+                answer_counts[key][answer] += count
+    return answer_counts
+
+
+def _count_answers_range(args):
+    """
+    Process pool entry point: count the answers of one (course_id, start_id, end_id)
+    range, as plain dicts so that they can be sent back to the parent process.
+    """
+    counts = raw_answer_counts(*args)
+    return dict((key, dict(answers)) for key, answers in counts.iteritems())
+
+
+def _init_counting_worker():
+    """
+    Drop the database connection inherited from the parent process, so that each
+    pool worker opens its own.
+    """
+    connection.close()
+
+
+def parallel_raw_answer_counts(course_id, processes):
+    """
+    Count the answers submitted to the problems of a course like raw_answer_counts,
+    splitting the submissions into id ranges (see submitted_problem_id_ranges)
+    counted by a pool of `processes` worker processes.
+    """
+    ranges = submitted_problem_id_ranges(course_id, processes)
+    if processes <= 1 or len(ranges) <= 1:
+        return raw_answer_counts(course_id)
+
+    # don't share the parent's database connection with the workers
+    connection.close()
+    pool = multiprocessing.Pool(processes, initializer=_init_counting_worker)
+    try:
+        return merge_answer_counts(pool.imap_unordered(
+            _count_answers_range, [(course_id, start_id, end_id) for start_id, end_id in ranges]
+        ))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _problem_answer_distributions(course_id, answer_counts):
+    """
+    Turn raw_answer_counts results, keyed by (module_state_key, problem_part_id),
+    into answer distributions keyed by (url_name, display_name, problem_part_id).
+    Problems that no longer exist in the course are left out.
     """
     # dict: { module.module_state_key : (url_name, display_name) }
     state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
@@ -104,45 +254,115 @@ def answer_distributions(course_id):
 
         return state_keys_to_problem_info[module_state_key]
 
-    # Iterate through all problems submitted for this course in no particular
-    # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
-    for module in StudentModule.all_submitted_problems_read_only(course_id):
+    distributions = {}
+    for (module_state_key, problem_part_id), answers in answer_counts.iteritems():
         try:
-            state_dict = json.loads(module.state) if module.state else {}
-            raw_answers = state_dict.get("student_answers", {})
-        except ValueError:
-            log.error(
-                "Answer Distribution: Could not parse module state for " +
-                "StudentModule id={}, course={}".format(module.id, course_id)
-            )
+            url, display_name = url_and_display_name(module_state_key)
+        except ItemNotFoundError:
+            msg = "Answer Distribution: Item {} referenced in StudentModule " + \
+                  "in course {} not found; " + \
+                  "This can happen if a student answered a question that " + \
+                  "was later deleted from the course. This answer will be " + \
+                  "omitted from the answer distribution CSV."
+            log.warning(msg.format(module_state_key, course_id))
             continue
 
-        # Each problem part has an ID that is derived from the
-        # module.module_state_key (with some suffix appended)
-        for problem_part_id, raw_answer in raw_answers.items():
-            # Convert whatever raw answers we have (numbers, unicode, None, etc.)
-            # to be unicode values. Note that if we get a string, it's always
-            # unicode and not str -- state comes from the json decoder, and that
-            # always returns unicode for strings.
-            answer = unicode(raw_answer)
+        distributions[(url, display_name, problem_part_id)] = answers
 
-            try:
-                url, display_name = url_and_display_name(module.module_state_key)
-            except ItemNotFoundError:
-                msg = "Answer Distribution: Item {} referenced in StudentModule {} " + \
-                      "for user {} in course {} not found; " + \
-                      "This can happen if a student answered a question that " + \
-                      "was later deleted from the course. This answer will be " + \
-                      "omitted from the answer distribution CSV."
-                log.warning(
-                    msg.format(module.module_state_key, module.id, module.student_id, course_id)
-                )
-                continue
+    return distributions
 
-            answer_counts[(url, display_name, problem_part_id)][answer] += 1
 
-    return answer_counts
+def answer_distributions(course_id):
+    """
+    Given a course_id, return answer distributions in the form of a dictionary
+    mapping:
+
+      (problem url_name, problem display_name, problem_id) -> {dict: answer -> count}
+
+    Answer distributions are found by iterating through all StudentModule
+    entries for a given course with type="problem" and a grade that is not null.
+    This means that we only count LoncapaProblems that people have submitted.
+    Other types of items like ORA or sequences will not be collected. Empty
+    Loncapa problem state that gets created from runnig the progress page is
+    also not counted.
+
+    This method accesses the StudentModule table directly instead of using the
+    CapaModule abstraction. The main reason for this is so that we can generate
+    the report without any side-effects -- we don't have to worry about answer
+    distribution potentially causing re-evaluation of the student answer. This
+    also allows us to use the read-replica database, which reduces risk of bad
+    locking behavior. And quite frankly, it makes this a lot less confusing.
+
+    Also, we're pulling all available records from the database for this course
+    rather than crawling through a student's course-tree -- the latter could
+    potentially cause us trouble with A/B testing. The distribution report may
+    not be aware of problems that are not visible to the user being used to
+    generate the report.
+
+    This method will try to use a read-replica database if one is available.
+    """
+    return _problem_answer_distributions(course_id, raw_answer_counts(course_id))
+
+
+def refresh_answer_distributions(course_id, processes=1):
+    """
+    Bring the ProblemAnswerDistribution rows of a course up to date, recounting
+    only the problems with submissions modified since the previous refresh.
+    The first refresh of a course counts all of its submissions, in a pool of
+    `processes` worker processes when more than one.  Returns the number of
+    problems recounted.
+    """
+    since = ProblemAnswerDistribution.objects.filter(
+        course_id=course_id
+    ).aggregate(Max('high_water_mark'))['high_water_mark__max']
+
+    submitted = StudentModule.all_submitted_problems_read_only(course_id)
+    if since is not None:
+        submitted = submitted.filter(modified__gt=since)
+    module_state_keys = set(submitted.values_list('module_state_key', flat=True).distinct())
+    if not module_state_keys:
+        return 0
+    # taken from the submissions read rather than from the clock, so that none
+    # is skipped; those within the margin are counted again by the next refresh
+    high_water_mark = submitted.aggregate(Max('modified'))['modified__max'] - ANSWER_DISTRIBUTION_REFRESH_MARGIN
+
+    distributions = defaultdict(dict)
+    if since is None:
+        counts = parallel_raw_answer_counts(course_id, processes)
+    else:
+        counts = raw_answer_counts(course_id, module_state_keys=module_state_keys)
+    for (module_state_key, problem_part_id), answers in counts.iteritems():
+        distributions[module_state_key][problem_part_id] = answers
+
+    with transaction.commit_on_success():
+        ProblemAnswerDistribution.objects.filter(
+            course_id=course_id, module_state_key__in=list(module_state_keys)
+        ).delete()
+        ProblemAnswerDistribution.objects.bulk_create([
+            ProblemAnswerDistribution(
+                course_id=course_id,
+                module_state_key=module_state_key,
+                distribution=json.dumps(distributions.get(module_state_key, {})),
+                high_water_mark=high_water_mark,
+            )
+            for module_state_key in module_state_keys
+        ])
+
+    return len(module_state_keys)
+
+
+def stored_answer_distributions(course_id):
+    """
+    Return the answer distributions saved by refresh_answer_distributions, in
+    the same form as answer_distributions.
+    """
+    answer_counts = {}
+    for module_state_key, distribution in ProblemAnswerDistribution.objects.filter(
+            course_id=course_id).values_list('module_state_key', 'distribution'):
+        for problem_part_id, answers in json.loads(distribution).iteritems():
+            answer_counts[(module_state_key, problem_part_id)] = answers
+    return _problem_answer_distributions(course_id, answer_counts)
+
 
 @transaction.commit_manually
 def grade(student, request, course, keep_raw_scores=False):
@@ -0,0 +1,37 @@
+"""
+Command to bring the stored answer distributions of courses up to date, so that
+the answer distribution reports only recount what changed since.
+"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.grades import refresh_answer_distributions
+from xmodule.modulestore.django import modulestore
+
+
+class Command(BaseCommand):
+    """
+    Refresh the stored answer distributions of the given courses, or of all the
+    courses when none is given.
+    """
+    args = '[<course_id> ...]'
+    help = 'Refresh the stored answer distributions of the given courses (default: all)'
+
+    option_list = BaseCommand.option_list + (
+        make_option('-p', '--processes',
+                    metavar='N',
+                    type='int',
+                    dest='processes',
+                    default=1,
+                    help='Number of worker processes to count the submissions of a course with'),
+    )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+
+        course_ids = args or [course.id for course in modulestore().get_courses()]
+        for course_id in course_ids:
+            recounted = refresh_answer_distributions(course_id, processes=options['processes'])
+            self.stdout.write('{0}: {1} problems recounted\n'.format(course_id, recounted))
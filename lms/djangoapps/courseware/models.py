@@ -225,6 +225,7 @@ class OfflineComputedGrade(models.Model):
     updated = models.DateTimeField(auto_now=True, db_index=True)
 
     gradeset = models.TextField(null=True, blank=True)		# grades, stored as JSON
+    percent = models.FloatField(null=True, blank=True, db_index=True)  # overall grade, for sorting
 
     class Meta:
         unique_together = (('user', 'course_id'), )
@@ -246,6 +247,31 @@ class OfflineComputedGradeLog(models.Model):
     created = models.DateTimeField(auto_now_add=True, null=True, db_index=True)
     seconds = models.IntegerField(default=0)  	# seconds elapsed for computation
     nstudents = models.IntegerField(default=0)
+    # submissions modified before this time are reflected in the offline grades
+    high_water_mark = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id, self.created)
+
+
+class ProblemAnswerDistribution(models.Model):
+    """
+    Answer distribution of a problem in a course, as computed by
+    courseware.grades.refresh_answer_distributions.  Only problems with
+    submissions modified since the previous refresh are recomputed.
+    """
+    class Meta:
+        unique_together = (('course_id', 'module_state_key'),)
+
+    course_id = models.CharField(max_length=255, db_index=True)
+    module_state_key = models.CharField(max_length=255, db_index=True)
+
+    # counts, stored as JSON: {problem_part_id: {answer: count}}
+    distribution = models.TextField(default='{}')
+
+    # submissions modified before this time are counted in the distribution
+    high_water_mark = models.DateTimeField(db_index=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return "[ProblemAnswerDistribution] %s: %s (%s)" % (self.course_id, self.module_state_key, self.high_water_mark)
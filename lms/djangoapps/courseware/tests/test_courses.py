@@ -6,7 +6,7 @@ import mock
 
 from django.http import Http404
 from django.test.utils import override_settings
-from xmodule.modulestore.django import get_default_store_name_for_current_request
+from xmodule.modulestore.django import get_default_store_name_for_current_request, RequestScopedCache
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.tests.xml import factories as xml
@@ -83,6 +83,15 @@ class CoursesTest(ModuleStoreTestCase):
     def test_default_modulestore_published_mapping(self):
         self.assertEqual(get_default_store_name_for_current_request(), 'default')
 
+    def test_request_scoped_cache(self):
+        request_cache = RequestScopedCache()
+        with mock.patch('xmodule.modulestore.django.get_current_request', mock.Mock(return_value=None)):
+            request_cache.data['key'] = 'value'
+            self.assertNotIn('key', request_cache.data)
+        with mock.patch('xmodule.modulestore.django.get_current_request', mock.Mock()):
+            request_cache.data['key'] = 'value'
+            self.assertEqual(request_cache.data['key'], 'value')
+
 
 @override_settings(
     MODULESTORE=TEST_DATA_MONGO_MODULESTORE, CMS_BASE=CMS_BASE_TEST
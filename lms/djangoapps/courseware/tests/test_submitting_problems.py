@@ -5,12 +5,14 @@ Integration tests for submitting problem responses and getting grades.
 # text processing dependencies
 import json
 import os
+from datetime import timedelta
 from textwrap import dedent
 
 from mock import patch
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -1008,3 +1010,96 @@ class TestAnswerDistributions(TestSubmittingProblems):
                     },
                 }
             )
+
+    def test_student_answers_parsing(self):
+        # Only the student_answers value is decoded when the key is unique,
+        # and we fall back to a full parse when an answer mentions the key.
+        answers = {'i4x-MITx-100-problem-p1_2_1': u'"student_answers": {}'}
+        state = json.dumps({'correct_map': {}, 'student_answers': answers, 'attempts': 1})
+        self.assertEqual(grades._student_answers(state), answers)  # pylint: disable=protected-access
+
+        state = json.dumps({'student_answers': {'i4x-MITx-100-problem-p1_2_1': u'choice_1'}, 'seed': 1})
+        self.assertEqual(
+            grades._student_answers(state),  # pylint: disable=protected-access
+            {'i4x-MITx-100-problem-p1_2_1': u'choice_1'}
+        )
+
+    @patch('courseware.grades.ANSWER_DISTRIBUTION_CHUNK_SIZE', 1)
+    def test_merged_id_ranges(self):
+        # Counting id ranges separately, a row at a time, and merging the
+        # results gives the same distributions as counting everything at once.
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        self.submit_question_answer('p3', {'2_1': u'Correct'})
+
+        ranges = grades.submitted_problem_id_ranges(self.course.id, 2)
+        self.assertEqual(len(ranges), 2)
+        merged = grades.merge_answer_counts(
+            grades.raw_answer_counts(self.course.id, start_id, end_id) for start_id, end_id in ranges
+        )
+        self.assertEqual(merged, grades.raw_answer_counts(self.course.id))
+        self.assertEqual(len(merged), 3)
+
+    @patch('courseware.grades.ANSWER_DISTRIBUTION_REFRESH_MARGIN', timedelta(0))
+    def test_refresh_stored_distributions(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        self.assertEqual(grades.refresh_answer_distributions(self.course.id), 2)
+        self.assertEqual(
+            grades.stored_answer_distributions(self.course.id),
+            grades.answer_distributions(self.course.id)
+        )
+
+        # Nothing changed, so nothing is recounted
+        self.assertEqual(grades.refresh_answer_distributions(self.course.id), 0)
+
+        # Only the problem with a new submission is recounted
+        self.submit_question_answer('p2', {'2_1': u'Correct'})
+        self.assertEqual(grades.refresh_answer_distributions(self.course.id), 1)
+        self.assertEqual(
+            grades.stored_answer_distributions(self.course.id),
+            {
+                ('p1', 'p1', 'i4x-MITx-100-problem-p1_2_1'): {
+                    'Correct': 1
+                },
+                ('p2', 'p2', 'i4x-MITx-100-problem-p2_2_1'): {
+                    'Correct': 1
+                },
+            }
+        )
+
+    def test_refresh_margin(self):
+        # The submissions within the margin of the last one read are counted again
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.assertEqual(grades.refresh_answer_distributions(self.course.id), 1)
+        self.assertEqual(grades.refresh_answer_distributions(self.course.id), 1)
+
+        # so is a submission dated before the last one read, as by a late clock
+        p1_modified = StudentModule.objects.get(module_state_key__contains='p1').modified
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        StudentModule.objects.filter(module_state_key__contains='p2').update(
+            modified=p1_modified - timedelta(minutes=1)
+        )
+        self.assertEqual(grades.refresh_answer_distributions(self.course.id), 2)
+        self.assertEqual(
+            grades.stored_answer_distributions(self.course.id),
+            grades.answer_distributions(self.course.id)
+        )
+
+    def test_count_answers_range(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        (start_id, end_id), = grades.submitted_problem_id_ranges(self.course.id, 1)
+        # the counts of a range go back to the parent process as plain dicts
+        counts = grades._count_answers_range((self.course.id, start_id, end_id))  # pylint: disable=protected-access
+        self.assertEqual(type(counts.values()[0]), dict)
+        self.assertEqual(counts, grades.raw_answer_counts(self.course.id))
+
+    def test_refresh_command(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        call_command('refresh_answer_distributions', self.course.id)
+        self.assertEqual(
+            grades.stored_answer_distributions(self.course.id),
+            grades.answer_distributions(self.course.id)
+        )
@@ -12,7 +12,8 @@ import newrelic.agent
 from edxmako.shortcuts import render_to_response
 from courseware.courses import get_course_with_access
 from course_groups.cohorts import (is_course_cohorted, get_cohort_id, is_commentable_cohorted,
-                                   get_cohorted_commentables, get_course_cohorts, get_cohort_by_id)
+                                   get_cohorted_commentables, get_course_cohorts,
+                                   get_course_cohort_names_by_id)
 from courseware.access import has_access
 
 from django_comment_client.permissions import cached_has_permission
@@ -85,10 +86,13 @@ def get_threads(request, course_id, discussion_id=None, per_page=THREADS_PER_PAG
     threads, page, num_pages = cc.Thread.search(query_params)
 
     #now add the group name if the thread has a group id
+    cohort_names = None
     for thread in threads:
 
         if thread.get('group_id'):
-            thread['group_name'] = get_cohort_by_id(course_id, thread.get('group_id')).name
+            if cohort_names is None:
+                cohort_names = get_course_cohort_names_by_id(course_id)
+            thread['group_name'] = cohort_names[int(thread.get('group_id'))]
             thread['group_string'] = "This post visible only to Group %s." % (thread['group_name'])
         else:
             thread['group_name'] = ""
@@ -272,9 +276,12 @@ def single_thread(request, course_id, discussion_id, thread_id):
         with newrelic.agent.FunctionTrace(nr_transaction, "add_courseware_context"):
             add_courseware_context(threads, course)
 
+        cohort_names = None
         for thread in threads:
             if thread.get('group_id') and not thread.get('group_name'):
-                thread['group_name'] = get_cohort_by_id(course_id, thread.get('group_id')).name
+                if cohort_names is None:
+                    cohort_names = get_course_cohort_names_by_id(course_id)
+                thread['group_name'] = cohort_names[int(thread.get('group_id'))]
 
             #patch for backward compatibility with comments service
             if not "pinned" in thread:
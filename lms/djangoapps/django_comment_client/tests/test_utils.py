@@ -501,6 +501,22 @@ class CategoryMapTestCase(ModuleStoreTestCase):
             }
         )
 
+    def test_cached_per_content_version(self):
+        self.create_discussion("Chapter", "Discussion 1")
+        first = utils.get_discussion_category_map(self.course)
+
+        with mock.patch('django_comment_client.utils._get_discussion_modules') as mock_get_modules:
+            self.assertEqual(utils.get_discussion_category_map(self.course), first)
+            utils.add_courseware_context([{"commentable_id": "discussion1"}], self.course)
+        self.assertFalse(mock_get_modules.called)
+
+        # writing to the course invalidates the cached maps
+        self.create_discussion("Chapter", "Discussion 2")
+        self.assertItemsEqual(
+            utils.get_discussion_category_map(self.course)["subcategories"]["Chapter"]["children"],
+            ["Discussion 1", "Discussion 2"]
+        )
+
 
 class JsonResponseTestCase(TestCase, UnicodeTestMixin):
     def _test_unicode_data(self, text):
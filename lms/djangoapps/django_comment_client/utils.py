@@ -4,11 +4,12 @@ import logging
 from datetime import datetime
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
 from django.utils import simplejson
-from django_comment_common.models import Role, FORUM_ROLE_STUDENT
+from django_comment_common.models import Role, FORUM_ROLE_STUDENT, get_course_content_version
 from django_comment_client.permissions import check_permissions_by_view
 
 from edxmako import lookup_template
@@ -20,6 +21,10 @@ from django.utils.timezone import UTC
 
 log = logging.getLogger(__name__)
 
+# How long the discussion maps of a course are cached; they are also rebuilt
+# as soon as the course content changes.
+DISCUSSION_MAPS_TIMEOUT = 60 * 60
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -54,15 +59,24 @@ def has_forum_access(uname, course_id, rolename):
     return role.users.filter(username=uname).exists()
 
 
+# The fields of the inline discussions which the category and id maps are built from
+DISCUSSION_FIELDS = ('discussion_id', 'discussion_category', 'discussion_target', 'sort_key', 'start')
+
+
 def _get_discussion_modules(course):
-    all_modules = modulestore().get_items(
+    """
+    Returns the ItemRecords of the course's inline discussions, with their
+    DISCUSSION_FIELDS, rather than the discussion modules themselves.
+    """
+    all_modules = modulestore().get_item_records(
         Location('i4x', course.location.org, course.location.course, 'discussion', None),
-        course_id=course.id
+        course_id=course.id,
+        fields=DISCUSSION_FIELDS,
     )
 
     def has_required_keys(module):
         for key in ('discussion_id', 'discussion_category', 'discussion_target'):
-            if getattr(module, key) is None:
+            if module.fields.get(key) is None:
                 log.warning("Required key '%s' not in discussion %s, leaving out of category map" % (key, module.location))
                 return False
         return True
@@ -70,14 +84,22 @@ def _get_discussion_modules(course):
     return filter(has_required_keys, all_modules)
 
 
-def _get_discussion_id_map(course):
+def _build_discussion_id_map(modules):
     def get_entry(module):
-        discussion_id = module.discussion_id
-        title = module.discussion_target
-        last_category = module.discussion_category.split("/")[-1].strip()
-        return (discussion_id, {"location": module.location, "title": last_category + " / " + title})
+        discussion_id = module.fields['discussion_id']
+        title = module.fields['discussion_target']
+        last_category = module.fields['discussion_category'].split("/")[-1].strip()
+        return (discussion_id, {"location": module.location.url(), "title": last_category + " / " + title})
 
-    return dict(map(get_entry, _get_discussion_modules(course)))
+    return dict(map(get_entry, modules))
+
+
+def _get_discussion_id_map(course):
+    """
+    Returns the index of the course's inline discussions:
+    discussion_id -> {"location": location url, "title": title}
+    """
+    return _get_discussion_maps(course)["id_map"]
 
 
 def _filter_unstarted_categories(category_map):
@@ -130,20 +152,20 @@ def _sort_map_entries(category_map, sort_alpha):
     category_map["children"] = [x[0] for x in sorted(things, key=lambda x: x[1]["sort_key"])]
 
 
-def get_discussion_category_map(course):
-    course_id = course.id
-
+def _build_inline_category_map(modules, sort_alpha):
+    """
+    Returns the category tree of the inline discussion `modules`, sorted.
+    """
     unexpanded_category_map = defaultdict(list)
 
-    modules = _get_discussion_modules(course)
-
     for module in modules:
-        id = module.discussion_id
-        title = module.discussion_target
-        sort_key = module.sort_key
-        category = " / ".join([x.strip() for x in module.discussion_category.split("/")])
+        id = module.fields['discussion_id']
+        title = module.fields['discussion_target']
+        sort_key = module.fields.get('sort_key')
+        category = " / ".join([x.strip() for x in module.fields['discussion_category'].split("/")])
         #Handle case where module.start is None
-        entry_start_date = module.start if module.start else datetime.max.replace(tzinfo=pytz.UTC)
+        start = module.fields.get('start')
+        entry_start_date = start if start else datetime.max.replace(tzinfo=pytz.UTC)
         unexpanded_category_map[category].append({"title": title, "id": id, "sort_key": sort_key, "start_date": entry_start_date})
 
     category_map = {"entries": defaultdict(dict), "subcategories": defaultdict(dict)}
@@ -183,15 +205,59 @@ def get_discussion_category_map(course):
                                                       "sort_key": entry["sort_key"],
                                                       "start_date": entry["start_date"]}
 
+    _sort_map_entries(category_map, sort_alpha)
+
+    return category_map
+
+
+def _get_discussion_maps(course):
+    """
+    Returns the sorted category tree of the course's inline discussions and
+    their discussion_id index, computed once per version of the course content.
+    """
+    key = u'django_comment_client.discussion_maps.{0}.{1}.{2}'.format(
+        course.id, get_course_content_version(course.location), course.discussion_sort_alpha
+    )
+    maps = cache.get(key)
+    if maps is None:
+        modules = _get_discussion_modules(course)
+        maps = {
+            "category_map": _build_inline_category_map(modules, course.discussion_sort_alpha),
+            "id_map": _build_discussion_id_map(modules),
+        }
+        cache.set(key, maps, DISCUSSION_MAPS_TIMEOUT)
+    return maps
+
+
+def _sort_top_level(category_map, sort_alpha):
+    """
+    Like _sort_map_entries, but only orders the top level of `category_map`,
+    whose subcategories are already sorted.
+    """
+    things = []
+    for title, entry in category_map["entries"].items():
+        if entry["sort_key"] is None and sort_alpha:
+            entry = category_map["entries"][title] = dict(entry, sort_key=title)
+        things.append((title, entry))
+    things.extend(category_map["subcategories"].items())
+    category_map["children"] = [x[0] for x in sorted(things, key=lambda x: x[1]["sort_key"])]
+
+
+def get_discussion_category_map(course):
+    category_map = _get_discussion_maps(course)["category_map"]
+
+    # The course wide topics and the start dates can change without the
+    # course content changing, so they are applied to the cached tree per call.
     # TODO.  BUG! : course location is not unique across multiple course runs!
     # (I think Kevin already noticed this)  Need to send course_id with requests, store it
     # in the backend.
-    for topic, entry in course.discussion_topics.items():
-        category_map['entries'][topic] = {"id": entry["id"],
-                                          "sort_key": entry.get("sort_key", topic),
-                                          "start_date": datetime.now(UTC())}
-
-    _sort_map_entries(category_map, course.discussion_sort_alpha)
+    if course.discussion_topics:
+        category_map = dict(category_map, entries=dict(category_map["entries"]))
+        for topic, entry in course.discussion_topics.items():
+            category_map['entries'][topic] = {"id": entry["id"],
+                                              "sort_key": entry.get("sort_key", topic),
+                                              "start_date": datetime.now(UTC())}
+        _sort_top_level(category_map, course.discussion_sort_alpha)
 
     return _filter_unstarted_categories(category_map)
 
@@ -344,7 +410,7 @@ def add_courseware_context(content_list, course):
     for content in content_list:
         commentable_id = content['commentable_id']
         if commentable_id in id_map:
-            location = id_map[commentable_id]["location"].url()
+            location = id_map[commentable_id]["location"]
             title = id_map[commentable_id]["title"]
 
             url = reverse('jump_to', kwargs={"course_id": course.location.course_id,
@@ -3,7 +3,9 @@
 # django management command: dump grades to csv files
 # for use by batch processes
 
-from instructor.offline_gradecalc import offline_grade_calculation
+from optparse import make_option
+
+from instructor.offline_gradecalc import offline_grade_calculation, refresh_offline_grades
 from courseware.courses import get_course_by_id
 from xmodule.modulestore.django import modulestore
 
@@ -16,6 +18,20 @@ class Command(BaseCommand):
     help += "   course_id_or_dir: either course_id or course_dir\n"
     help += 'Example course_id: MITx/8.01rq_MW/Classical_Mechanics_Reading_Questions_Fall_2012_MW_Section'
 
+    option_list = BaseCommand.option_list + (
+        make_option('-i', '--incremental',
+                    action='store_true',
+                    dest='incremental',
+                    default=False,
+                    help='Only regrade students with submissions since the last run'),
+        make_option('-p', '--processes',
+                    metavar='N',
+                    type='int',
+                    dest='processes',
+                    default=1,
+                    help='Number of worker processes to grade students with'),
+    )
+
     def handle(self, *args, **options):
 
         print "args = ", args
@@ -38,6 +54,9 @@ class Command(BaseCommand):
                 return
 
         print "-----------------------------------------------------------------------------"
-        print "Computing grades for %s" % (course.id)
-
-        offline_grade_calculation(course.id)
+        if options['incremental']:
+            print "Computing grades of students with new submissions for %s" % (course.id)
+            refresh_offline_grades(course.id, processes=options['processes'])
+        else:
+            print "Computing grades for %s" % (course.id)
+            offline_grade_calculation(course.id, processes=options['processes'])
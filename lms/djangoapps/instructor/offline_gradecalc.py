@@ -6,15 +6,27 @@
 # The grades are stored in the OfflineComputedGrade table of the courseware model.
 
 import json
+import multiprocessing
 import time
 
+from datetime import datetime
 from json import JSONEncoder
+from pytz import UTC
 from courseware import grades, models
 from courseware.courses import get_course_by_id
 from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from xmodule.modulestore import django as modulestore_django
 
 from instructor.utils import DummyRequest
 
+# Number of students graded by a pool worker at a time
+GRADING_CHUNK_SIZE = 100
+
+# Number of OfflineComputedGrade rows written per bulk insert
+STORE_BATCH_SIZE = 500
+
 class MyEncoder(JSONEncoder):
 
     def _iterencode(self, obj, markers=None):
@@ -26,43 +38,201 @@ class MyEncoder(JSONEncoder):
             yield chunk
 
 
-def offline_grade_calculation(course_id):
-    '''
-    Compute grades for all students for a specified course, and save results to the DB.
+def _grade_students(course_id, student_ids):
     '''
+    Grade the students with the given ids in the specified course.
 
-    tstart = time.time()
-    enrolled_students = User.objects.filter(
-        courseenrollment__course_id=course_id,
-        courseenrollment__is_active=1
-    ).prefetch_related("groups").order_by('username')
-
-    enc = MyEncoder()
-
-    print "%d enrolled students" % len(enrolled_students)
+    Returns a list of (user_id, gradeset encoded as JSON, overall percent) tuples.
+    '''
     course = get_course_by_id(course_id)
+    students = User.objects.filter(id__in=student_ids).prefetch_related("groups").order_by('username')
+    enc = MyEncoder()
 
-    for student in enrolled_students:
+    results = []
+    for student in students:
         request = DummyRequest()
         request.user = student
         request.session = {}
 
         gradeset = grades.grade(student, request, course, keep_raw_scores=True)
-        gs = enc.encode(gradeset)
-        ocg, created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_id)
-        ocg.gradeset = gs
-        ocg.save()
+        results.append((student.id, enc.encode(gradeset), gradeset.get('percent')))
         print "%s done" % student  	# print statement used because this is run by a management command
+    return results
+
+
+def _grade_students_chunk(args):
+    '''
+    Process pool entry point: grade one (course_id, student_ids) chunk.
+    '''
+    return _grade_students(*args)
+
+
+def _init_grading_worker():
+    '''
+    Drop the database connection, modulestores and loc mapper inherited from the parent
+    process, so that each pool worker opens its own Mongo connections.
+    '''
+    connection.close()
+    # pylint: disable=protected-access
+    modulestore_django._MODULESTORES.clear()
+    # not clear_existing_modulestores, which would also clear the shared loc mapper cache
+    modulestore_django._loc_singleton = None
+
+
+def _store_grades(course_id, results):
+    '''
+    Upsert the OfflineComputedGrade rows for the given (user_id, gradeset, percent) results,
+    replacing the existing rows of those users in bulk rather than saving one row at a time.
+    '''
+    for start in xrange(0, len(results), STORE_BATCH_SIZE):
+        batch = results[start:start + STORE_BATCH_SIZE]
+        with transaction.commit_on_success():
+            models.OfflineComputedGrade.objects.filter(
+                course_id=course_id, user__in=[user_id for user_id, _gradeset, _percent in batch]
+            ).delete()
+            models.OfflineComputedGrade.objects.bulk_create([
+                models.OfflineComputedGrade(user_id=user_id, course_id=course_id, gradeset=gradeset, percent=percent)
+                for user_id, gradeset, percent in batch
+            ])
+
+
+def _compute_and_store_grades(course_id, student_ids, processes=1):
+    '''
+    Grade the given students, in a pool of `processes` worker processes when more than one,
+    and store the results in the OfflineComputedGrade table.
+    '''
+    student_ids = sorted(student_ids)
+    if processes > 1 and len(student_ids) > GRADING_CHUNK_SIZE:
+        chunks = [
+            (course_id, student_ids[start:start + GRADING_CHUNK_SIZE])
+            for start in xrange(0, len(student_ids), GRADING_CHUNK_SIZE)
+        ]
+        # don't share the parent's database connection with the workers
+        connection.close()
+        pool = multiprocessing.Pool(processes, initializer=_init_grading_worker)
+        try:
+            for results in pool.imap_unordered(_grade_students_chunk, chunks):
+                _store_grades(course_id, results)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _store_grades(course_id, _grade_students(course_id, student_ids))
+
+
+def _enrolled_student_ids(course_id):
+    '''
+    Return the set of ids of the students actively enrolled in a course.
+    '''
+    return set(User.objects.filter(
+        courseenrollment__course_id=course_id,
+        courseenrollment__is_active=1
+    ).values_list('id', flat=True))
+
+
+def offline_grade_calculation(course_id, processes=1):
+    '''
+    Compute grades for all students for a specified course, and save results to the DB.
+    '''
+
+    tstart = time.time()
+    high_water_mark = datetime.now(UTC)
+    enrolled_ids = _enrolled_student_ids(course_id)
+
+    print "%d enrolled students" % len(enrolled_ids)
+
+    _compute_and_store_grades(course_id, enrolled_ids, processes)
 
     tend = time.time()
     dt = tend - tstart
 
-    ocgl = models.OfflineComputedGradeLog(course_id=course_id, seconds=dt, nstudents=len(enrolled_students))
+    ocgl = models.OfflineComputedGradeLog(
+        course_id=course_id, seconds=dt, nstudents=len(enrolled_ids), high_water_mark=high_water_mark
+    )
     ocgl.save()
     print ocgl
     print "All Done!"
 
 
+def students_needing_regrade(course_id):
+    '''
+    Return the ids of enrolled students whose offline grade is missing, or older than
+    their most recently modified StudentModule in the course.
+    '''
+    enrolled_ids = _enrolled_student_ids(course_id)
+
+    graded_at = dict(
+        models.OfflineComputedGrade.objects.filter(course_id=course_id).values_list('user_id', 'updated')
+    )
+    last_modified = models.StudentModule.objects.filter(
+        course_id=course_id
+    ).values('student_id').annotate(last_modified=Max('modified'))
+
+    stale_ids = set(
+        row['student_id'] for row in last_modified
+        if row['student_id'] in graded_at and row['last_modified'] > graded_at[row['student_id']]
+    )
+    missing_ids = enrolled_ids.difference(graded_at)
+    return enrolled_ids.intersection(stale_ids.union(missing_ids))
+
+
+def students_with_new_submissions(course_id, since):
+    '''
+    Return the ids of enrolled students with a StudentModule in the course modified at or
+    after `since`, plus the enrolled students without an offline grade yet.
+    '''
+    enrolled_ids = _enrolled_student_ids(course_id)
+    submitted_ids = set(models.StudentModule.objects.filter(
+        course_id=course_id, modified__gte=since
+    ).values_list('student_id', flat=True).distinct())
+    graded_ids = set(
+        models.OfflineComputedGrade.objects.filter(course_id=course_id).values_list('user_id', flat=True)
+    )
+    return enrolled_ids.intersection(submitted_ids.union(enrolled_ids.difference(graded_ids)))
+
+
+def last_high_water_mark(course_id):
+    '''
+    Return the time up to which all submissions of a course have been offline graded,
+    or None if no run of the course recorded one.
+    '''
+    ocgl = models.OfflineComputedGradeLog.objects.filter(
+        course_id=course_id, high_water_mark__isnull=False
+    ).order_by('-high_water_mark')[:1]
+    return ocgl[0].high_water_mark if ocgl else None
+
+
+def refresh_offline_grades(course_id, processes=1):
+    '''
+    Regrade only the students of a course whose submissions changed since their offline grade
+    was computed, and log the run.  Meant to be run periodically (eg cronjob), so that the
+    OfflineComputedGrade table backing the gradebook stays current without regrading everyone.
+
+    Students are found through the high water mark stored by the previous run, ie the
+    StudentModule rows modified since it started; without one, every student's offline
+    grade is compared with their latest StudentModule.
+    '''
+    tstart = time.time()
+    since = last_high_water_mark(course_id)
+    high_water_mark = datetime.now(UTC)
+
+    if since is None:
+        student_ids = students_needing_regrade(course_id)
+    else:
+        student_ids = students_with_new_submissions(course_id, since)
+
+    print "%d students need regrading" % len(student_ids)
+    _compute_and_store_grades(course_id, student_ids, processes)
+
+    ocgl = models.OfflineComputedGradeLog(
+        course_id=course_id, seconds=time.time() - tstart, nstudents=len(student_ids),
+        high_water_mark=high_water_mark
+    )
+    ocgl.save()
+    print ocgl
+    return ocgl
+
+
 def offline_grades_available(course_id):
     '''
     Returns False if no offline grades available for specified course.
@@ -13,7 +13,7 @@ from mock import Mock, patch
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from django.http import HttpRequest, HttpResponse
-from django_comment_common.models import FORUM_ROLE_COMMUNITY_TA
+from django_comment_common.models import FORUM_ROLE_COMMUNITY_TA, Role
 from django.core import mail
 from django.utils.timezone import utc
 
@@ -27,6 +27,7 @@ from courseware.tests.factories import StaffFactory, InstructorFactory
 
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
 from courseware.models import StudentModule
+from course_groups.models import CourseUserGroup
 
 # modules which are mocked in test cases.
 import instructor_task.api
@@ -132,12 +133,14 @@ class TestInstructorAPIDenyLevels(ModuleStoreTestCase, LoginEnrollmentTestCase):
             ('list_background_email_tasks', {}),
             ('list_grade_downloads', {}),
             ('calculate_grades_csv', {}),
+            ('calculate_students_features_csv', {}),
         ]
         # Endpoints that only Instructors can access
         self.instructor_level_endpoints = [
             ('modify_access', {'email': self.user.email, 'rolename': 'beta', 'action': 'allow'}),
             ('list_course_role_members', {'rolename': 'beta'}),
             ('rescore_problem', {'problem_to_reset': self.problem_urlname, 'unique_student_identifier': self.user.email}),
+            ('generate_certificates', {'resume': 'true'}),
         ]
 
     def _access_endpoint(self, endpoint, args, status_code, msg):
@@ -781,6 +784,40 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
             self.assertEqual(student_json['username'], student.username)
             self.assertEqual(student_json['email'], student.email)
 
+    def test_get_students_features_cohorted(self):
+        """
+        Test that the students' cohorts are listed when the course is cohorted.
+        """
+        cohort = CourseUserGroup.objects.create(name="TestCohort",
+                                                course_id=self.course.id,
+                                                group_type=CourseUserGroup.COHORT)
+        cohort.users.add(self.students[0])
+        url = reverse('get_students_features', kwargs={'course_id': self.course.id})
+        with patch('instructor.views.api.is_course_cohorted', return_value=True):
+            response = self.client.get(url, {})
+        res_json = json.loads(response.content)
+        self.assertIn('cohort', res_json['queried_features'])
+        cohorts = dict((x['username'], x['cohort']) for x in res_json['students'])
+        self.assertEqual(cohorts[self.students[0].username], "TestCohort")
+        self.assertEqual(cohorts[self.students[1].username], "")
+
+    def test_list_forum_members_cohorts(self):
+        """
+        Test that the cohorts of the forum members are listed.
+        """
+        cohort = CourseUserGroup.objects.create(name="TestCohort",
+                                                course_id=self.course.id,
+                                                group_type=CourseUserGroup.COHORT)
+        cohort.users.add(self.students[0])
+        role = Role.objects.create(name=FORUM_ROLE_COMMUNITY_TA, course_id=self.course.id)
+        role.users.add(self.students[0], self.students[1])
+        url = reverse('list_forum_members', kwargs={'course_id': self.course.id})
+        with patch('instructor.views.api.is_course_cohorted', return_value=True):
+            response = self.client.get(url, {'rolename': FORUM_ROLE_COMMUNITY_TA})
+        members = json.loads(response.content)[FORUM_ROLE_COMMUNITY_TA]
+        cohorts = dict((member['username'], member['cohort']) for member in members)
+        self.assertEqual(cohorts, {self.students[0].username: "TestCohort", self.students[1].username: ""})
+
     def test_get_anon_ids(self):
         """
         Test the CSV output for the anonymized user ids.
@@ -838,6 +875,34 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
         already_running_status = "A grade report generation task is already in progress. Check the 'Pending Instructor Tasks' table for the status of the task. When completed, the report will be available for download in the table below."
         self.assertIn(already_running_status, response.content)
 
+    def test_generate_certificates_success(self):
+        url = reverse('generate_certificates', kwargs={'course_id': self.course.id})
+
+        with patch('instructor_task.api.submit_generate_certificates') as mock_submit:
+            mock_submit.return_value = True
+            response = self.client.get(url, {})
+        self.assertIn("The certificates are being generated!", response.content)
+
+    def test_generate_certificates_already_running(self):
+        url = reverse('generate_certificates', kwargs={'course_id': self.course.id})
+
+        with patch('instructor_task.api.submit_generate_certificates') as mock_submit:
+            mock_submit.side_effect = AlreadyRunningError()
+            response = self.client.get(url, {})
+        self.assertIn("A certificate generation task is already in progress.", response.content)
+
+    def test_resume_generate_certificates(self):
+        url = reverse('generate_certificates', kwargs={'course_id': self.course.id})
+
+        with patch('instructor_task.api.resume_generate_certificates') as mock_resume:
+            mock_resume.return_value = None
+            response = self.client.get(url, {'resume': 'true'})
+            self.assertIn("There is no certificate generation task to resume.", response.content)
+
+            mock_resume.return_value = True
+            response = self.client.get(url, {'resume': 'true'})
+            self.assertIn("The certificate generation task is being resumed.", response.content)
+
     def test_get_students_features_csv(self):
         """
         Test that some minimum of information is formatted
@@ -846,6 +911,26 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
         url = reverse('get_students_features', kwargs={'course_id': self.course.id})
         response = self.client.get(url + '/csv', {})
         self.assertEqual(response['Content-Type'], 'text/csv')
+        for student in self.students:
+            self.assertIn('"{}"'.format(student.email), response.content)
+
+    def test_calculate_students_features_csv_success(self):
+        url = reverse('calculate_students_features_csv', kwargs={'course_id': self.course.id})
+
+        with patch('instructor_task.api.submit_calculate_students_features_csv') as mock_submit:
+            mock_submit.return_value = True
+            response = self.client.get(url, {})
+        success_status = "Your enrolled student profile report is being generated!"
+        self.assertIn(success_status, response.content)
+
+    def test_calculate_students_features_csv_already_running(self):
+        url = reverse('calculate_students_features_csv', kwargs={'course_id': self.course.id})
+
+        with patch('instructor_task.api.submit_calculate_students_features_csv') as mock_submit:
+            mock_submit.side_effect = AlreadyRunningError()
+            response = self.client.get(url, {})
+        already_running_status = "An enrolled student profile report generation task is already in progress."
+        self.assertIn(already_running_status, response.content)
 
     def test_get_distribution_no_feature(self):
         """
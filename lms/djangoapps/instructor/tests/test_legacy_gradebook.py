@@ -1,6 +1,10 @@
 """
 Tests of the instructor dashboard gradebook
 """
+import datetime
+
+from mock import patch
+from pytz import UTC
 
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
@@ -10,8 +14,14 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
 from capa.tests.response_xml_factory import StringResponseXMLFactory
 from courseware.tests.factories import StudentModuleFactory
+from courseware.models import OfflineComputedGrade, StudentModule
+from instructor.offline_gradecalc import (
+    _init_grading_worker, offline_grade_calculation, refresh_offline_grades, students_needing_regrade,
+    students_with_new_submissions, last_high_water_mark
+)
 from xmodule.modulestore import Location
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import modulestore, loc_mapper
+from xmodule.modulestore import django as modulestore_django
 
 
 USER_COUNT = 11
@@ -151,3 +161,98 @@ class TestLetterCutoffPolicy(TestGradebook):
         # User 0 has 0 on the class [1]
         # One use at the top of the page [1]
         self.assertEquals(3, self.response.content.count('grade_None'))
+
+
+def student_link(user):
+    """
+    The gradebook markup linking to `user`'s progress page
+    """
+    return '>{0}</a>'.format(user.username)
+
+
+class TestGradebookPagination(TestGradebook):
+    """
+    Tests of gradebook searching and paging
+    """
+    def test_search(self):
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)), {'search': self.users[3].username})
+        self.assertIn(student_link(self.users[3]), response.content)
+        self.assertNotIn(student_link(self.users[4]), response.content)
+
+    def test_search_is_escaped(self):
+        search = '"><script>alert("gradebook")</script>'
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)), {'search': search})
+        self.assertEquals(response.status_code, 200)
+        self.assertNotIn(search, response.content)
+        self.assertIn('&lt;script&gt;alert(', response.content)
+
+    @patch('instructor.views.legacy.GRADEBOOK_PAGE_SIZE', 5)
+    def test_paging(self):
+        users = sorted(self.users, key=lambda user: user.username)
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)), {'page': 2})
+        for user in users[5:10]:
+            self.assertIn(student_link(user), response.content)
+        for user in users[:5] + users[10:]:
+            self.assertNotIn(student_link(user), response.content)
+
+
+class TestOfflineGradebook(TestGradebook):
+    """
+    Tests of the gradebook served from offline computed grades
+    """
+    def setUp(self):
+        super(TestOfflineGradebook, self).setUp()
+        offline_grade_calculation(self.course.id)
+
+    def test_nobody_needs_regrade(self):
+        self.assertEquals(set(), students_needing_regrade(self.course.id))
+
+    def test_stale_grade_needs_regrade(self):
+        OfflineComputedGrade.objects.filter(user=self.users[2]).update(
+            updated=datetime.datetime.now(UTC) - datetime.timedelta(days=1)
+        )
+        self.assertEquals(set([self.users[2].id]), students_needing_regrade(self.course.id))
+
+    def test_refresh_only_regrades_new_submissions(self):
+        high_water_mark = last_high_water_mark(self.course.id)
+        self.assertIsNotNone(high_water_mark)
+        self.assertEquals(set(), students_with_new_submissions(self.course.id, high_water_mark))
+
+        StudentModule.objects.filter(student=self.users[2]).update(
+            modified=high_water_mark + datetime.timedelta(seconds=1)
+        )
+        self.assertEquals(
+            set([self.users[2].id]), students_with_new_submissions(self.course.id, high_water_mark)
+        )
+
+        ocgl = refresh_offline_grades(self.course.id)
+        self.assertEquals(1, ocgl.nstudents)
+        self.assertGreater(last_high_water_mark(self.course.id), high_water_mark)
+        self.assertEquals(USER_COUNT, OfflineComputedGrade.objects.filter(course_id=self.course.id).count())
+
+    def test_sort_by_grade(self):
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)), {'sort': '-grade'})
+        self.assertEquals(response.status_code, 200)
+        # Users with more correct problems have the higher grades
+        content = response.content
+        self.assertLess(content.index(student_link(self.users[-1])), content.index(student_link(self.users[0])))
+
+    def test_students_without_offline_grade_are_listed(self):
+        OfflineComputedGrade.objects.filter(user=self.users[-1]).delete()
+        response = self.client.get(reverse('gradebook', args=(self.course.id,)), {'sort': '-grade'})
+        self.assertEquals(response.status_code, 200)
+        content = response.content
+        for user in self.users:
+            self.assertIn(student_link(user), content)
+        self.assertIn('1 enrolled student has no offline computed grade yet', content)
+        self.assertEquals(1, content.count('title="No offline computed grade"'))
+        # the student without an offline grade sorts as the lowest grade
+        self.assertLess(content.index(student_link(self.users[0])), content.index(student_link(self.users[-1])))
+
+    def test_grading_worker_drops_inherited_stores(self):
+        modulestore()
+        loc_mapper()
+        _init_grading_worker()
+        # pylint: disable=protected-access
+        self.assertEquals({}, modulestore_django._MODULESTORES)
+        self.assertIsNone(modulestore_django._loc_singleton)
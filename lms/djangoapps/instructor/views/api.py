@@ -28,6 +28,7 @@ from django_comment_common.models import (Role,
                                           FORUM_ROLE_COMMUNITY_TA)
 
 from courseware.models import StudentModule
+from course_groups.cohorts import is_course_cohorted, cohorts_for_users
 from student.models import unique_id_for_user
 import instructor_task.api
 from instructor_task.api_helper import AlreadyRunningError
@@ -57,6 +58,22 @@ from xmodule.modulestore import Location
 
 log = logging.getLogger(__name__)
 
+# Profile information exported by get_students_features and calculate_students_features_csv
+STUDENT_PROFILE_QUERY_FEATURES = [
+    'username', 'name', 'email', 'language', 'location', 'year_of_birth', 'gender',
+    'level_of_education', 'mailing_address', 'goals'
+]
+
+
+def _student_profile_query_features(course_id):
+    """
+    The profile information exported for the students of the course, including
+    their cohort if the course is cohorted.
+    """
+    if is_course_cohorted(course_id):
+        return STUDENT_PROFILE_QUERY_FEATURES + ['cohort']
+    return STUDENT_PROFILE_QUERY_FEATURES
+
 
 def common_exceptions_400(func):
     """
@@ -413,12 +430,10 @@ def get_students_features(request, course_id, csv=False):  # pylint: disable=W06
     TO DO accept requests for different attribute sets.
     """
     available_features = analytics.basic.AVAILABLE_FEATURES
-    query_features = ['username', 'name', 'email', 'language', 'location', 'year_of_birth', 'gender',
-                      'level_of_education', 'mailing_address', 'goals']
-
-    student_data = analytics.basic.enrolled_students_features(course_id, query_features)
+    query_features = _student_profile_query_features(course_id)
 
     if not csv:
+        student_data = analytics.basic.enrolled_students_features(course_id, query_features)
         response_payload = {
             'course_id': course_id,
             'students': student_data,
@@ -428,8 +443,59 @@ def get_students_features(request, course_id, csv=False):  # pylint: disable=W06
         }
         return JsonResponse(response_payload)
     else:
-        header, datarows = analytics.csvs.format_dictlist(student_data, query_features)
-        return analytics.csvs.create_csv_response("enrolled_profiles.csv", header, datarows)
+        datarows = analytics.csvs.iter_dictlist_rows(
+            analytics.basic.iter_enrolled_students_features(course_id, query_features),
+            query_features
+        )
+        return analytics.csvs.create_csv_response("enrolled_profiles.csv", query_features, datarows)
+
+
+@ensure_csrf_cookie
+@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@require_level('staff')
+def calculate_students_features_csv(request, course_id):
+    """
+    Submit a background task generating the enrolled students' profile
+    information CSV, for courses too large to export within a request.
+    """
+    try:
+        instructor_task.api.submit_calculate_students_features_csv(request, course_id, _student_profile_query_features(course_id))
+        success_status = _("Your enrolled student profile report is being generated! You can view the status of the generation task in the 'Pending Instructor Tasks' section.")
+        return JsonResponse({"status": success_status})
+    except AlreadyRunningError:
+        already_running_status = _("An enrolled student profile report generation task is already in progress. Check the 'Pending Instructor Tasks' table for the status of the task. When completed, the report will be available for download in the table below.")
+        return JsonResponse({
+            "status": already_running_status
+        })
+
+
+@ensure_csrf_cookie
+@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@require_level('instructor')
+def generate_certificates(request, course_id):
+    """
+    Submit a background task requesting the certificates of the students of
+    the course who don't have one yet, or resume the generation of the
+    certificates which was interrupted.
+
+    Query parameters:
+    - `resume` is 'true' to resume the interrupted generation instead
+    """
+    if request.GET.get('resume') in ['true', 'True', True]:
+        if instructor_task.api.resume_generate_certificates(request, course_id) is None:
+            return JsonResponse({"status": _("There is no certificate generation task to resume.")})
+        success_status = _("The certificate generation task is being resumed. You can view its status in the 'Pending Instructor Tasks' section.")
+        return JsonResponse({"status": success_status})
+
+    try:
+        instructor_task.api.submit_generate_certificates(request, course_id)
+        success_status = _("The certificates are being generated! You can view the status of the generation task in the 'Pending Instructor Tasks' section.")
+        return JsonResponse({"status": success_status})
+    except AlreadyRunningError:
+        already_running_status = _("A certificate generation task is already in progress. Check the 'Pending Instructor Tasks' table for the status of the task. If it stopped making progress, resume it instead.")
+        return JsonResponse({
+            "status": already_running_status
+        })
 
 
 @ensure_csrf_cookie
@@ -837,17 +903,22 @@ def list_forum_members(request, course_id):
 
     try:
         role = Role.objects.get(name=rolename, course_id=course_id)
-        users = role.users.all().order_by('username')
+        users = list(role.users.all().order_by('username'))
     except Role.DoesNotExist:
         users = []
 
+    # the cohorts of all the members, in one query
+    cohorts = cohorts_for_users(course_id, [user.id for user in users]) if is_course_cohorted(course_id) else {}
+
     def extract_user_info(user):
         """ Convert user to dict for json rendering. """
+        cohort = cohorts.get(user.id)
         return {
             'username': user.username,
             'email': user.email,
             'first_name': user.first_name,
             'last_name': user.last_name,
+            'cohort': cohort.name if cohort is not None else '',
         }
 
     response_payload = {
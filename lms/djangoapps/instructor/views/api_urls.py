@@ -51,4 +51,10 @@ urlpatterns = patterns('',  # nopep8
         'instructor.views.api.list_grade_downloads', name="list_grade_downloads"),
     url(r'calculate_grades_csv$',
         'instructor.views.api.calculate_grades_csv', name="calculate_grades_csv"),
+    url(r'calculate_students_features_csv$',
+        'instructor.views.api.calculate_students_features_csv', name="calculate_students_features_csv"),
+
+    # Certificates...
+    url(r'^generate_certificates$',
+        'instructor.views.api.generate_certificates', name="generate_certificates"),
 )
@@ -192,6 +192,8 @@ def _section_data_download(course_id, access):
         'list_instructor_tasks_url': reverse('list_instructor_tasks', kwargs={'course_id': course_id}),
         'list_grade_downloads_url': reverse('list_grade_downloads', kwargs={'course_id': course_id}),
         'calculate_grades_csv_url': reverse('calculate_grades_csv', kwargs={'course_id': course_id}),
+        'calculate_students_features_csv_url': reverse('calculate_students_features_csv', kwargs={'course_id': course_id}),
+        'generate_certificates_url': reverse('generate_certificates', kwargs={'course_id': course_id}),
     }
     return section_data
 
@@ -15,6 +15,8 @@ from StringIO import StringIO
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db.models import Q
 from django.http import HttpResponse
 from django_future.csrf import ensure_csrf_cookie
 from django.views.decorators.cache import cache_control
@@ -36,7 +38,7 @@ from courseware.courses import get_course_with_access, get_cms_course_link
 from student.roles import (
     CourseStaffRole, CourseInstructorRole, CourseBetaTesterRole, GlobalStaff
 )
-from courseware.models import StudentModule
+from courseware.models import StudentModule, OfflineComputedGrade
 from django_comment_common.models import (
     Role, FORUM_ROLE_ADMINISTRATOR, FORUM_ROLE_MODERATOR, FORUM_ROLE_COMMUNITY_TA
 )
@@ -72,6 +74,17 @@ FORUM_ROLE_REMOVE = 'remove'
 # For determining if a shibboleth course
 SHIBBOLETH_DOMAIN_PREFIX = 'shib:'
 
+# Number of students shown per gradebook page
+GRADEBOOK_PAGE_SIZE = 100
+
+# Gradebook sort keys, mapped to the user field (or offline grade field) they order by
+GRADEBOOK_SORT_KEYS = {
+    'username': 'username',
+    'email': 'email',
+    'name': 'profile__name',
+    'grade': 'percent',
+}
+
 
 def split_by_comma_and_whitespace(a_str):
     """
@@ -1165,7 +1178,7 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
     enrolled_students = User.objects.filter(
         courseenrollment__course_id=course_id,
         courseenrollment__is_active=1,
-    ).prefetch_related("groups").order_by('username')
+    ).select_related('profile', 'externalauthmap').prefetch_related("groups").order_by('username')
 
     header = [_u('ID'), _u('Username'), _u('Full Name'), _u('edX email'), _u('External email')]
     assignments = []
@@ -1207,33 +1220,115 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
 #-----------------------------------------------------------------------------
 
 
+def _paginate(request, queryset, per_page):
+    """
+    Return the page of `queryset` requested by the 'page' GET parameter,
+    falling back to the first or last page on bad input.
+    """
+    paginator = Paginator(queryset, per_page)
+    try:
+        return paginator.page(request.GET.get('page'))
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
+
+
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 def gradebook(request, course_id):
     """
     Show the gradebook for this course:
     - only displayed to course staff
-    - shows students who are enrolled.
+    - shows students who are enrolled, one page at a time.
+
+    When offline grades have been computed for the course (see
+    instructor.offline_gradecalc), the page is served from the
+    OfflineComputedGrade table, and can be sorted by grade.  Enrolled students
+    who have no offline grade yet are graded on the fly and flagged, and sort
+    as the lowest grades.  Otherwise only the students on the requested page
+    are graded on the fly.
+
+    GET parameters:
+    - page: page number, starting at 1
+    - search: only show students whose username, email or name contains it
+    - sort: one of GRADEBOOK_SORT_KEYS, prefixed with '-' for descending order
     """
     course = get_course_with_access(request.user, course_id, 'staff', depth=None)
 
-    enrolled_students = User.objects.filter(
+    search = request.GET.get('search', '').strip()
+    sort = request.GET.get('sort', 'username')
+    use_offline = bool(offline_grades_available(course_id))
+    if sort.lstrip('-') not in GRADEBOOK_SORT_KEYS or (sort.lstrip('-') == 'grade' and not use_offline):
+        sort = 'username'
+    descending = sort.startswith('-')
+
+    enrolled = User.objects.filter(
         courseenrollment__course_id=course_id,
         courseenrollment__is_active=1
-    ).order_by('username').select_related("profile")
+    )
+    rows = enrolled.select_related("profile")
 
-    # TODO (vshnayder): implement pagination.
-    enrolled_students = enrolled_students[:1000]   # HACK!
+    if search:
+        rows = rows.filter(
+            Q(username__icontains=search) |
+            Q(email__icontains=search) |
+            Q(profile__name__icontains=search)
+        )
+
+    order_field = GRADEBOOK_SORT_KEYS[sort.lstrip('-')]
+    if order_field == 'percent':
+        # left join the offline grades, so that the students without one are listed too
+        rows = rows.extra(
+            select={'offline_percent': (
+                'SELECT percent FROM courseware_offlinecomputedgrade '
+                'WHERE courseware_offlinecomputedgrade.user_id = auth_user.id '
+                'AND courseware_offlinecomputedgrade.course_id = %s'
+            )},
+            select_params=(course_id,),
+        )
+        order_field = 'offline_percent'
+    rows = rows.order_by(('-' if descending else '') + order_field, 'username')
 
-    student_info = [{'username': student.username,
-                     'id': student.id,
-                     'email': student.email,
-                     'grade_summary': student_grades(student, request, course),
-                     'realname': student.profile.name,
-                     }
-                    for student in enrolled_students]
+    page = _paginate(request, rows, GRADEBOOK_PAGE_SIZE)
+
+    offline_grades = {}
+    missing_offline = 0
+    if use_offline:
+        offline_grades = dict(
+            (grade.user_id, grade) for grade in OfflineComputedGrade.objects.filter(
+                course_id=course_id,
+                user__in=[student.id for student in page.object_list],
+            )
+        )
+        missing_offline = enrolled.count() - OfflineComputedGrade.objects.filter(
+            course_id=course_id,
+            user__courseenrollment__course_id=course_id,
+            user__courseenrollment__is_active=1,
+        ).count()
+
+    student_info = []
+    for student in page.object_list:
+        offline_grade = offline_grades.get(student.id)
+        if offline_grade is not None:
+            grade_summary = json.loads(offline_grade.gradeset)
+        else:
+            grade_summary = student_grades(student, request, course)
+        student_info.append({
+            'username': student.username,
+            'id': student.id,
+            'email': student.email,
+            'grade_summary': grade_summary,
+            'realname': student.profile.name,
+            'offline_missing': use_offline and offline_grade is None,
+        })
 
     return render_to_response('courseware/gradebook.html', {
         'students': student_info,
+        'page': page,
+        'search': search,
+        'sort': sort,
+        'use_offline': use_offline,
+        'missing_offline': missing_offline,
         'course': course,
         'course_id': course_id,
         # Checked above
@@ -1521,7 +1616,8 @@ def get_and_clean_student_list(students):
 
 def get_answers_distribution(request, course_id):
     """
-    Get the distribution of answers for all graded problems in the course.
+    Get the distribution of answers for all graded problems in the course,
+    from the stored distributions, which are first brought up to date.
 
     Return a dict with two keys:
     'header': a header row
@@ -1529,7 +1625,8 @@ def get_answers_distribution(request, course_id):
     """
     course = get_course_with_access(request.user, course_id, 'staff')
 
-    dist = grades.answer_distributions(course.id)
+    grades.refresh_answer_distributions(course.id)
+    dist = grades.stored_answer_distributions(course.id)
 
     d = {}
     d['header'] = ['url_name', 'display name', 'answer id', 'answer', 'count']
@@ -17,11 +17,14 @@ from instructor_task.tasks import (rescore_problem,
                                    reset_problem_attempts,
                                    delete_problem_state,
                                    send_bulk_course_email,
-                                   calculate_grades_csv)
+                                   calculate_grades_csv,
+                                   calculate_students_features_csv,
+                                   generate_certificates)
 
 from instructor_task.api_helper import (check_arguments_for_rescoring,
                                         encode_problem_and_student_input,
-                                        submit_task)
+                                        submit_task,
+                                        resubmit_task)
 from bulk_email.models import CourseEmail
 
 
@@ -219,3 +222,48 @@ def submit_calculate_grades_csv(request, course_id):
     task_key = ""
 
     return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def submit_calculate_students_features_csv(request, course_id, features):
+    """
+    Submits a task to generate a CSV of the profile information of enrolled students.
+
+    AlreadyRunningError is raised if such a CSV is already being generated.
+    """
+    task_type = 'profile_info_csv'
+    task_class = calculate_students_features_csv
+    task_input = {'features': features}
+    task_key = ""
+
+    return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def submit_generate_certificates(request, course_id, statuses=None):
+    """
+    Submits a task to generate the certificates of the students of a course.
+
+    New certificates are requested for the students whose certificate status
+    is in `statuses`, by default only those without one.
+
+    AlreadyRunningError is raised if the course's certificates are already being generated.
+    """
+    task_type = 'generate_certificates'
+    task_class = generate_certificates
+    task_input = {'statuses': sorted(statuses)} if statuses else {}
+    task_key = ""
+
+    return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def resume_generate_certificates(request, course_id):
+    """
+    Resumes the most recent generation of the certificates of a course which has not
+    completed, for instance because the worker running it was lost.  Only the subtasks
+    of the generation which have not completed are queued again.
+
+    Returns the InstructorTask of the generation, or None if there is none to resume.
+    """
+    unfinished_tasks = get_running_instructor_tasks(course_id).filter(task_type='generate_certificates')
+    if not unfinished_tasks.exists():
+        return None
+    return resubmit_task(request, generate_certificates, unfinished_tasks[0])
@@ -293,3 +293,18 @@ def submit_task(request, task_type, task_class, course_id, task_input, task_key)
     task_class.apply_async(task_args, task_id=task_id)
 
     return instructor_task
+
+
+def resubmit_task(request, task_class, instructor_task):
+    """
+    Helper method to submit again the task of an existing `instructor_task` entry.
+
+    The task is submitted with the entry's own task_id, so that a task which was
+    interrupted before completing can pick up where it stopped.  Arguments are
+    extracted from the `request` as for submit_task().
+    """
+    task_id = instructor_task.task_id
+    task_args = [instructor_task.id, _get_xmodule_instance_args(request, task_id)]  # pylint: disable=E1101
+    task_class.apply_async(task_args, task_id=task_id)
+
+    return instructor_task
@@ -12,12 +12,12 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
-from cStringIO import StringIO
 from gzip import GzipFile
 from uuid import uuid4
 import csv
 import json
 import hashlib
+import tempfile
 import os
 import os.path
 import urllib
@@ -192,9 +192,8 @@ class InstructorTask(models.Model):
 class GradesStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for grades
-    download. Should probably refactor later to create a GradesFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows` writes the rows out as they are iterated, so that
+    the whole dataset never has to be held in memory.
     """
     @classmethod
     def from_config(cls):
@@ -297,18 +296,32 @@ class S3GradesStore(GradesStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write the rows as they are iterated to a gzip'd csv temporary
+        file, and then upload that file to S3.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csv.writer(gzip_file).writerows(rows)
-        gzip_file.close()
-
-        self.store(course_id, filename, output_buffer)
+        with tempfile.TemporaryFile() as temp_file:
+            gzip_file = GzipFile(fileobj=temp_file, mode="wb")
+            csv.writer(gzip_file).writerows(rows)
+            gzip_file.close()
+
+            size = temp_file.tell()
+            key = self.key_for(course_id, filename)
+            key.size = size
+            key.content_encoding = "gzip"
+            key.content_type = "text/csv"
+            # boto reads the file a chunk at a time as it sends it
+            key.set_contents_from_file(
+                temp_file,
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Length": size,
+                    "Content-Type": "text/csv",
+                },
+                rewind=True,
+            )
 
     def links_for(self, course_id):
         """
@@ -380,11 +393,15 @@ class LocalFSGradesStore(GradesStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out, a row at a time as they are iterated.
         """
-        output_buffer = StringIO()
-        csv.writer(output_buffer).writerows(rows)
-        self.store(course_id, filename, output_buffer)
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        with open(full_path, "wb") as f:
+            csv.writer(f).writerows(rows)
 
     def links_for(self, course_id):
         """
@@ -2,6 +2,7 @@
 This module contains celery task functions for handling the management of subtasks.
 """
 from time import time
+from itertools import izip
 import json
 from uuid import uuid4
 import math
@@ -29,29 +30,46 @@ class DuplicateTaskException(Exception):
     pass
 
 
-def _get_number_of_subtasks(total_num_items, items_per_query, items_per_task):
+def _get_chunk_boundaries(item_queryset, items_per_query, items_per_task):
     """
-    Determines number of subtasks that would be generated by _generate_items_for_subtask.
+    Divides the "items" of a queryset into the chunks that should be passed to subtasks.
 
-    This needs to be calculated before a query is executed so that the list of all subtasks can be
-    stored in the InstructorTask before any subtasks are started.
+    Only the primary keys of the items are read, `items_per_query` at a time, by walking
+    the primary key index (with `pk > last pk seen`) rather than by offsets into the query.
+    Each page of primary keys is broken into as many subtasks as are needed to
+    hold no more than `items_per_task` items each.
 
-    The number of subtask_id values returned by this should match the number of chunks returned
-    by the generate_items_for_subtask generator.
-    """
-    total_num_tasks = 0
-    num_queries = int(math.ceil(float(total_num_items) / float(items_per_query)))
-    num_items_remaining = total_num_items
-    for _ in range(num_queries):
-        num_items_this_query = min(num_items_remaining, items_per_query)
-        num_items_remaining -= num_items_this_query
-        num_tasks_this_query = int(math.ceil(float(num_items_this_query) / float(items_per_task)))
-        total_num_tasks += num_tasks_this_query
-
-    return total_num_tasks
+    This needs to be calculated before the items themselves are read so that the list
+    of all subtasks can be stored in the InstructorTask before any subtasks are started.
 
-
-def _generate_items_for_subtask(item_queryset, item_fields, total_num_items, total_num_subtasks, items_per_query, items_per_task):
+    Returns a tuple of two values:
+      * a list of [first_pk, last_pk, number of subtasks] for each page.  The last page is
+        left open-ended (its last_pk is None), so that items added to the queryset since it
+        was read will still be processed.
+      * the total number of items.
+    """
+    pk_queryset = item_queryset.order_by('pk').values_list('pk', flat=True)
+    chunk_boundaries = []
+    total_num_items = 0
+    last_pk = None
+    while True:
+        page_queryset = pk_queryset if last_pk is None else pk_queryset.filter(pk__gt=last_pk)
+        page = list(page_queryset[:items_per_query])
+        if not page:
+            break
+        total_num_items += len(page)
+        num_tasks_this_query = int(math.ceil(float(len(page)) / float(items_per_task)))
+        chunk_boundaries.append([page[0], page[-1], num_tasks_this_query])
+        last_pk = page[-1]
+        if len(page) < items_per_query:
+            break
+
+    if chunk_boundaries:
+        chunk_boundaries[-1][1] = None
+    return chunk_boundaries, total_num_items
+
+
+def _generate_items_for_subtask(item_queryset, item_fields, chunk_boundaries, total_num_items):
     """
     Generates a chunk of "items" that should be passed into a subtask.
 
@@ -59,38 +77,29 @@ def _generate_items_for_subtask(item_queryset, item_fields, total_num_items, tot
         `item_queryset` : a query set that defines the "items" that should be passed to subtasks.
         `item_fields` : the fields that should be included in the dict that is returned.
             These are in addition to the 'pk' field.
-        `total_num_items` : the result of item_queryset.count().
-        `items_per_query` : size of chunks to break the query operation into.
-        `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
+        `chunk_boundaries` : the primary key ranges of the chunks, as returned by _get_chunk_boundaries().
+        `total_num_items` : the number of items found by _get_chunk_boundaries(), or None if not known.
 
-    Returns:  yields a list of dicts, where each dict contains the fields in `item_fields`, plus the 'pk' field.
+    Each range is read with a single query on the primary key, and the items found are
+    divided evenly among the range's subtasks.
 
-    Warning:  if the algorithm here changes, the _get_number_of_subtasks() method should similarly be changed.
+    Returns:  yields a list of dicts, where each dict contains the fields in `item_fields`, plus the 'pk' field.
     """
-    num_queries = int(math.ceil(float(total_num_items) / float(items_per_query)))
-    last_pk = item_queryset.order_by('pk')[0].pk - 1
     num_items_queued = 0
-    available_num_subtasks = total_num_subtasks
     all_item_fields = list(item_fields)
     all_item_fields.append('pk')
 
-    for query_number in range(num_queries):
-        # In case total_num_items has increased since it was initially calculated
-        # include all remaining items in last query.
-        item_sublist = item_queryset.order_by('pk').filter(pk__gt=last_pk).values(*all_item_fields)
-        if query_number < num_queries - 1:
-            item_sublist = list(item_sublist[:items_per_query])
-        else:
-            item_sublist = list(item_sublist)
-
-        last_pk = item_sublist[-1]['pk']
+    for first_pk, last_pk, num_tasks_this_query in chunk_boundaries:
+        item_sublist = item_queryset.order_by('pk').filter(pk__gte=first_pk)
+        if last_pk is not None:
+            item_sublist = item_sublist.filter(pk__lte=last_pk)
+        item_sublist = list(item_sublist.values(*all_item_fields))
         num_items_this_query = len(item_sublist)
 
-        # In case total_num_items has increased since it was initially calculated just distribute the extra
-        # items among the available subtasks.
-        num_tasks_this_query = min(available_num_subtasks, int(math.ceil(float(num_items_this_query) / float(items_per_task))))
-        available_num_subtasks -= num_tasks_this_query
-
+        # In case items have been added to the last range since it was read,
+        # just distribute the extra items among its subtasks.  Every subtask is
+        # generated, even if items have since been removed, so that all of the
+        # subtasks stored in the InstructorTask get to run.
         chunk = int(math.ceil(float(num_items_this_query) / float(num_tasks_this_query)))
         for i in range(num_tasks_this_query):
             items_for_task = item_sublist[i * chunk:i * chunk + chunk]
@@ -102,7 +111,7 @@ def _generate_items_for_subtask(item_queryset, item_fields, total_num_items, tot
     # from the initial count. For example if the queryset is of the CourseEnrollment model students may
     # enroll or unenroll while queueing is in progress. The purpose of the original count is to estimate the
     # number of subtasks needed to perform the requested task.
-    if num_items_queued != total_num_items:
+    if total_num_items is not None and num_items_queued != total_num_items:
         TASK_LOG.info("Number of items generated by chunking %s not equal to original total %s", num_items_queued, total_num_items)
 
 
@@ -195,7 +204,7 @@ class SubtaskStatus(object):
         return unicode(repr(self))
 
 
-def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
+def initialize_subtask_info(entry, action_name, total_num, subtask_id_list, num_skipped=0, chunk_boundaries=None):
     """
     Store initial subtask information to InstructorTask object.
 
@@ -216,6 +225,11 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     information for each subtask.  The value for each subtask (keyed by its task_id)
     is its subtask status, as defined by SubtaskStatus.to_dict().
 
+    `num_skipped` items, which were left out before any subtask was defined, are counted as
+    'skipped' from the start, and included in the total.  If the subtasks were defined by
+    `chunk_boundaries`, as returned by _get_chunk_boundaries(), these are stored under the
+    'chunks' key, each with the ids of the subtasks to which its items were passed.
+
     This information needs to be set up in the InstructorTask before any of the subtasks start
     running.  If not, there is a chance that the subtasks could complete before the parent task
     is done creating subtasks.  Doing so also simplifies the save() here, as it avoids the need
@@ -229,9 +243,9 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
         'action_name': action_name,
         'attempted': 0,
         'failed': 0,
-        'skipped': 0,
+        'skipped': num_skipped,
         'succeeded': 0,
-        'total': total_num,
+        'total': total_num + num_skipped,
         'duration_ms': int(0),
         'start_time': time()
     }
@@ -249,6 +263,12 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
         'failed': 0,
         'status': subtask_status
     }
+    if chunk_boundaries is not None:
+        subtask_ids = iter(subtask_id_list)
+        subtask_dict['chunks'] = [
+            [first_pk, last_pk, [next(subtask_ids) for _ in range(num_chunk_subtasks)]]
+            for first_pk, last_pk, num_chunk_subtasks in chunk_boundaries
+        ]
     entry.subtasks = json.dumps(subtask_dict)
 
     # and save the entry immediately, before any subtasks actually start work:
@@ -256,7 +276,7 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     return task_progress
 
 
-def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_queryset, item_fields, items_per_query, items_per_task):
+def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_queryset, item_fields, items_per_query, items_per_task, num_skipped_items=0):
     """
     Generates and queues subtasks to each execute a chunk of "items" generated by a queryset.
 
@@ -271,31 +291,30 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
             These are in addition to the 'pk' field.
         `items_per_query` : size of chunks to break the query operation into.
         `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
+        `num_skipped_items` : number of items already left out of `item_queryset`, to be reported as skipped.
 
     Returns:  the task progress as stored in the InstructorTask object.
 
     """
     task_id = entry.task_id
-    total_num_items = item_queryset.count()
 
-    # Calculate the number of tasks that will be created, and create a list of ids for each task.
-    total_num_subtasks = _get_number_of_subtasks(total_num_items, items_per_query, items_per_task)
+    # Divide the items into chunks, and create a list of ids for the task of each chunk.
+    chunk_boundaries, total_num_items = _get_chunk_boundaries(item_queryset, items_per_query, items_per_task)
+    total_num_subtasks = sum(num_subtasks for _first_pk, _last_pk, num_subtasks in chunk_boundaries)
     subtask_id_list = [str(uuid4()) for _ in range(total_num_subtasks)]
 
     # Update the InstructorTask  with information about the subtasks we've defined.
     TASK_LOG.info("Task %s: updating InstructorTask %s with subtask info for %s subtasks to process %s items.",
              task_id, entry.id, total_num_subtasks, total_num_items)  # pylint: disable=E1101
-    progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list)
+    progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list, num_skipped_items, chunk_boundaries)
 
     # Construct a generator that will return the recipients to use for each subtask.
     # Pass in the desired fields to fetch for each recipient.
     item_generator = _generate_items_for_subtask(
         item_queryset,
         item_fields,
-        total_num_items,
-        total_num_subtasks,
-        items_per_query,
-        items_per_task
+        chunk_boundaries,
+        total_num_items
     )
 
     # Now create the subtasks, and start them running.
@@ -315,6 +334,44 @@ def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_querys
     return progress
 
 
+def requeue_unfinished_subtasks(entry, create_subtask_fcn, item_queryset, item_fields):
+    """
+    Queues again the subtasks of `entry` that have not completed, so that a task whose
+    subtasks were lost (for example with the worker running them) resumes where it stopped.
+
+    The items of the subtasks are read again from `item_queryset`, over the chunk boundaries
+    stored by queue_subtasks_for_query(), and only for the chunks with unfinished subtasks.
+    Arguments are as for queue_subtasks_for_query().  Each subtask keeps its id and the
+    status it last recorded.  A subtask which is in fact still queued or running is rejected
+    by check_subtask_is_valid() once the other copy is done with it.
+
+    Returns the number of subtasks queued.
+    """
+    subtask_dict = json.loads(entry.subtasks)
+    subtask_status_info = subtask_dict['status']
+    unfinished_chunks = [
+        (first_pk, last_pk, subtask_ids) for first_pk, last_pk, subtask_ids in subtask_dict.get('chunks', [])
+        if any(subtask_status_info[subtask_id]['state'] not in READY_STATES for subtask_id in subtask_ids)
+    ]
+    item_generator = _generate_items_for_subtask(
+        item_queryset,
+        item_fields,
+        [[first_pk, last_pk, len(subtask_ids)] for first_pk, last_pk, subtask_ids in unfinished_chunks],
+        None
+    )
+    subtask_ids = [subtask_id for _first_pk, _last_pk, chunk_subtask_ids in unfinished_chunks for subtask_id in chunk_subtask_ids]
+
+    num_subtasks = 0
+    for subtask_id, item_list in izip(subtask_ids, item_generator):
+        subtask_status = SubtaskStatus.from_dict(subtask_status_info[subtask_id])
+        if subtask_status.state in READY_STATES:
+            continue
+        TASK_LOG.info("Task %s: requeuing subtask %s to process %s items.", entry.task_id, subtask_id, len(item_list))
+        create_subtask_fcn(item_list, subtask_status).apply_async()
+        num_subtasks += 1
+    return num_subtasks
+
+
 def _acquire_subtask_lock(task_id):
     """
     Mark the specified task_id as being in progress.
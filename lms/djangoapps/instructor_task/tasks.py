@@ -31,8 +31,10 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     push_grades_to_s3,
+    push_students_csv_to_s3,
 )
 from bulk_email.tasks import perform_delegate_email_batches
+from certificates.tasks import perform_delegate_certificate_generation
 
 
 @task(base=BaseInstructorTask)  # pylint: disable=E1102
@@ -139,3 +141,39 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     action_name = ugettext_noop('graded')
     task_fn = partial(push_grades_to_s3, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def calculate_students_features_csv(entry_id, xmodule_instance_args):
+    """
+    Export the profile information of a course's enrolled students to a CSV
+    file in the grade downloads store.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('generated')
+    task_fn = partial(push_students_csv_to_s3, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def generate_certificates(entry_id, _xmodule_instance_args):
+    """Generates the certificates of the students of a course.
+
+    `entry_id` is the id value of the InstructorTask entry that corresponds to this task.
+    The entry contains the `course_id` that identifies the course, as well as the
+    `task_input`, which contains task-specific input.
+
+    The task_input may contain the following entries:
+
+      'statuses': the certificate statuses from which new certificates are requested.
+          Defaults to 'unavailable'.
+
+      'insecure': if true, the queue server calls the LMS back over http.
+
+    Running the task again for the same entry resumes it, queueing only the
+    subtasks which have not completed.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('certified')
+    visit_fcn = perform_delegate_certificate_generation
+    return run_main_task(entry_id, visit_fcn, action_name)
@@ -19,6 +19,8 @@ from pytz import UTC
 from xmodule.modulestore.django import modulestore
 from track.views import task_track
 
+from analytics.basic import iter_enrolled_students_features
+from analytics.csvs import iter_dictlist_rows
 from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
@@ -572,3 +574,50 @@ def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
     # One last update before we close out...
     return update_task_progress()
+
+
+def push_students_csv_to_s3(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
+    """
+    For a given `course_id`, generate a CSV file of the profile information
+    (the `features` of `task_input`) of all enrolled students, and store it
+    using a `GradesStore`, next to the grade reports.
+
+    Students are read and written out one at a time, to a temporary file
+    which is then uploaded, so the size of the course only affects the size of
+    the (gzipped) file, not the memory used.
+    """
+    start_time = datetime.now(UTC)
+    features = task_input['features']
+
+    def encoded(row):
+        """Encode a row in utf-8, the way csv.writer needs it."""
+        return [unicode(value).encode('utf-8') for value in row]
+
+    num_students = [0]
+
+    def rows():
+        """Yield the header and student rows, counting the students."""
+        yield encoded(features)
+        for row in iter_dictlist_rows(iter_enrolled_students_features(course_id, features), features):
+            num_students[0] += 1
+            yield encoded(row)
+
+    timestamp_str = start_time.strftime("%Y-%m-%d-%H%M")
+    course_id_prefix = urllib.quote(course_id.replace("/", "_"))
+    GradesStore.from_config().store_rows(
+        course_id,
+        u"{}_student_profile_info_{}.csv".format(course_id_prefix, timestamp_str),
+        rows()
+    )
+
+    progress = {
+        'action_name': action_name,
+        'attempted': num_students[0],
+        'succeeded': num_students[0],
+        'failed': 0,
+        'total': num_students[0],
+        'duration_ms': int((datetime.now(UTC) - start_time).total_seconds() * 1000),
+        'step': "Uploading CSV",
+    }
+    _get_current_task().update_state(state=PROGRESS, meta=progress)
+    return progress
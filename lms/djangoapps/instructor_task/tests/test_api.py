@@ -1,6 +1,7 @@
 """
 Test for LMS instructor background task queue management
 """
+from mock import patch
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
@@ -15,6 +16,8 @@ from instructor_task.api import (
     submit_reset_problem_attempts_for_all_students,
     submit_delete_problem_state_for_all_students,
     submit_bulk_course_email,
+    submit_generate_certificates,
+    resume_generate_certificates,
 )
 
 from instructor_task.api_helper import AlreadyRunningError
@@ -183,3 +186,19 @@ class InstructorTaskCourseSubmitTest(InstructorTaskCourseTestCase):
 
         with self.assertRaises(AlreadyRunningError):
             instructor_task = submit_bulk_course_email(self.create_task_request(self.instructor), self.course.id, email_id)
+
+    @patch('instructor_task.api.generate_certificates')
+    def test_submit_and_resume_generate_certificates(self, mock_task):
+        request = self.create_task_request(self.instructor)
+        self.assertIsNone(resume_generate_certificates(request, self.course.id))
+
+        instructor_task = submit_generate_certificates(request, self.course.id)
+        with self.assertRaises(AlreadyRunningError):
+            submit_generate_certificates(request, self.course.id)
+
+        # the unfinished generation is submitted again with its own task id
+        mock_task.apply_async.reset_mock()
+        self.assertEqual(resume_generate_certificates(request, self.course.id), instructor_task)
+        args, kwargs = mock_task.apply_async.call_args
+        self.assertEqual(args[0][0], instructor_task.id)
+        self.assertEqual(kwargs['task_id'], instructor_task.task_id)
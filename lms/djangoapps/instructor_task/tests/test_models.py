@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the stores of the instructor task CSV files
+"""
+import csv
+import shutil
+import tempfile
+from gzip import GzipFile
+
+from django.test import TestCase
+from mock import Mock, patch
+
+from instructor_task.models import LocalFSGradesStore, S3GradesStore
+
+
+COURSE_ID = 'edX/test/2014'
+ROWS = [['username', 'email'], ['student', 'student@test.com'], [u'élève'.encode('utf-8'), 'eleve@test.com']]
+
+
+def row_generator():
+    """ The rows of the CSV, one at a time """
+    for row in ROWS:
+        yield row
+
+
+class LocalFSGradesStoreTest(TestCase):
+    """
+    Tests of storing CSV files locally
+    """
+    def setUp(self):
+        self.root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root_path)
+
+    def test_store_rows(self):
+        store = LocalFSGradesStore(self.root_path)
+        store.store_rows(COURSE_ID, 'grades.csv', row_generator())
+        with open(store.path_to(COURSE_ID, 'grades.csv')) as csv_file:
+            self.assertEqual(list(csv.reader(csv_file)), ROWS)
+
+
+class S3GradesStoreTest(TestCase):
+    """
+    Tests of storing gzipped CSV files on S3
+    """
+    def test_store_rows(self):
+        uploaded = {}
+
+        def set_contents_from_file(fp, headers, rewind):
+            """ Read back the uploaded file, as boto does """
+            self.assertTrue(rewind)
+            fp.seek(0)
+            uploaded['data'] = fp.read()
+            uploaded['headers'] = headers
+
+        key = Mock(set_contents_from_file=Mock(side_effect=set_contents_from_file))
+        with patch('instructor_task.models.S3Connection'):
+            store = S3GradesStore('bucket', 'root')
+        with patch.object(store, 'key_for', return_value=key):
+            store.store_rows(COURSE_ID, 'grades.csv', row_generator())
+
+        self.assertEqual(uploaded['headers']['Content-Length'], len(uploaded['data']))
+        self.assertEqual(uploaded['headers']['Content-Encoding'], 'gzip')
+        with tempfile.TemporaryFile() as gzipped:
+            gzipped.write(uploaded['data'])
+            gzipped.seek(0)
+            self.assertEqual(list(csv.reader(GzipFile(fileobj=gzipped))), ROWS)
@@ -1,13 +1,14 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
 from mock import Mock, patch
 
 from student.models import CourseEnrollment
 
-from instructor_task.subtasks import queue_subtasks_for_query
+from instructor_task.subtasks import queue_subtasks_for_query, requeue_unfinished_subtasks
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase
 
@@ -93,3 +94,74 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 4)
         self.assertEqual(len(mock_create_subtask_fcn_args[3][0][0]), 4)
+
+    def test_queue_subtasks_stores_chunks(self):
+        """Test that queue_subtasks_for_query() stores the primary key range of each subtask's items."""
+
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='bulk_course_email',
+        )
+        self._enroll_students_in_course(self.course.id, 8)
+        task_queryset = CourseEnrollment.objects.filter(course_id=self.course.id).order_by('pk')
+        pks = list(task_queryset.values_list('pk', flat=True))
+
+        mock_create_subtask_fcn = Mock()
+        progress = queue_subtasks_for_query(
+            entry=instructor_task,
+            action_name='action_name',
+            create_subtask_fcn=mock_create_subtask_fcn,
+            item_queryset=task_queryset,
+            item_fields=[],
+            items_per_query=6,
+            items_per_task=3,
+            num_skipped_items=2,
+        )
+        self.assertEqual(progress['total'], 10)
+        self.assertEqual(progress['skipped'], 2)
+
+        subtask_dict = json.loads(instructor_task.subtasks)
+        self.assertEqual(subtask_dict['total'], 3)
+        chunks = subtask_dict['chunks']
+        self.assertEqual([chunk[:2] for chunk in chunks], [[pks[0], pks[5]], [pks[6], None]])
+        self.assertEqual([len(chunk[2]) for chunk in chunks], [2, 1])
+        self.assertEqual(
+            sorted(subtask_id for chunk in chunks for subtask_id in chunk[2]),
+            sorted(subtask_dict['status'])
+        )
+
+        # Each subtask gets the items of its own range.
+        subtask_items = [call[0][0] for call in mock_create_subtask_fcn.call_args_list]
+        self.assertEqual([[item['pk'] for item in items] for items in subtask_items], [pks[0:3], pks[3:6], pks[6:8]])
+
+    def test_requeue_unfinished_subtasks(self):
+        """Test that requeue_unfinished_subtasks() queues the subtasks that have not completed, with their items."""
+
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='bulk_course_email',
+        )
+        self._enroll_students_in_course(self.course.id, 8)
+        task_queryset = CourseEnrollment.objects.filter(course_id=self.course.id).order_by('pk')
+        pks = list(task_queryset.values_list('pk', flat=True))
+
+        queue_subtasks_for_query(instructor_task, 'action_name', Mock(), task_queryset, [], 6, 3)
+        subtask_dict = json.loads(instructor_task.subtasks)
+        first_chunk_ids, last_chunk_ids = [chunk[2] for chunk in subtask_dict['chunks']]
+        # the first subtask completed; the others were lost
+        subtask_dict['status'][first_chunk_ids[0]]['state'] = 'SUCCESS'
+        instructor_task.subtasks = json.dumps(subtask_dict)
+
+        mock_create_subtask_fcn = Mock()
+        num_subtasks = requeue_unfinished_subtasks(instructor_task, mock_create_subtask_fcn, task_queryset, [])
+        self.assertEqual(num_subtasks, 2)
+
+        requeued = [
+            (call[0][1].task_id, [item['pk'] for item in call[0][0]])
+            for call in mock_create_subtask_fcn.call_args_list
+        ]
+        self.assertEqual(requeued, [(first_chunk_ids[1], pks[3:6]), (last_chunk_ids[0], pks[6:8])])
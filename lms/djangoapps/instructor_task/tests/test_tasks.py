@@ -5,12 +5,18 @@ Runs tasks on answers to course problems to validate that code
 paths actually work.
 
 """
+import csv
 import json
+import os
+import shutil
+import tempfile
+from urllib import quote
 from uuid import uuid4
 
 from mock import Mock, MagicMock, patch
 
 from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
@@ -18,11 +24,11 @@ from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
-from instructor_task.models import InstructorTask
-from instructor_task.tests.test_base import InstructorTaskModuleTestCase
+from instructor_task.models import InstructorTask, LocalFSGradesStore
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase, InstructorTaskModuleTestCase
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tasks import rescore_problem, reset_problem_attempts, delete_problem_state
-from instructor_task.tasks_helper import UpdateProblemModuleStateError
+from instructor_task.tasks_helper import UpdateProblemModuleStateError, push_students_csv_to_s3
 
 PROBLEM_URL_NAME = "test_urlname"
 
@@ -437,3 +443,32 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                 StudentModule.objects.get(course_id=self.course.id,
                                           student=student,
                                           module_state_key=self.problem_url)
+
+
+class TestStudentsCsvTask(InstructorTaskCourseTestCase):
+    """
+    Tests of the task storing the CSV of the profiles of the enrolled students
+    """
+    def setUp(self):
+        super(TestStudentsCsvTask, self).setUp()
+        self.initialize_course()
+        self.grades_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.grades_dir)
+
+    def test_push_students_csv(self):
+        students = [self.create_student(u'student{0}'.format(index)) for index in range(3)]
+        with override_settings(GRADES_DOWNLOAD={'STORAGE_TYPE': 'localfs', 'ROOT_PATH': self.grades_dir}):
+            with patch('instructor_task.tasks_helper._get_current_task'):
+                progress = push_students_csv_to_s3(
+                    None, None, self.course.id, {'features': ['username', 'email']}, 'created'
+                )
+
+        self.assertEqual(progress['succeeded'], len(students))
+        (filename, __), = LocalFSGradesStore(self.grades_dir).links_for(self.course.id)
+        with open(os.path.join(self.grades_dir, quote(self.course.id, safe=''), filename)) as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0], ['username', 'email'])
+        self.assertEqual(
+            sorted(rows[1:]),
+            sorted([student.username, student.email] for student in students)
+        )
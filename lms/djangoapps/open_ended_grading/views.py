@@ -93,9 +93,11 @@ def find_peer_grading_module(course):
     # Get the course id and split it.
     peer_grading_query = course.location.replace(category='peergrading', name=None)
     # Get the peer grading modules currently in the course.  Explicitly specify the course id to avoid issues with different runs.
-    items = modulestore().get_items(peer_grading_query, course_id=course.id)
+    items = modulestore().get_item_records(
+        peer_grading_query, course_id=course.id, fields=('use_for_single_location',)
+    )
     #See if any of the modules are centralized modules (ie display info from multiple problems)
-    items = [i for i in items if not getattr(i, "use_for_single_location", True)]
+    items = [i for i in items if not i.fields.get("use_for_single_location", True)]
     # Loop through all potential peer grading modules, and find the first one that has a path to it.
     for item in items:
         item_location = item.location
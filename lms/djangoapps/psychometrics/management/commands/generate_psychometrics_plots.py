@@ -0,0 +1,23 @@
+"""
+Command to generate the psychometrics plots of the problems of courses ahead of
+time, so that the instructor dashboard serves them from the cache.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from psychometrics.psychoanalyze import generate_plots_for_course
+
+
+class Command(BaseCommand):
+    """
+    Generate the plots of the problems with new psychometric data of the given courses
+    """
+    args = '<course_id> [<course_id> ...]'
+    help = 'Generate the psychometrics plots of the problems with new data of the given courses'
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError('At least one course_id is required')
+
+        for course_id in args:
+            plots = generate_plots_for_course(course_id)
+            self.stdout.write('{0}: plots of {1} problems are up to date\n'.format(course_id, len(plots)))
@@ -6,14 +6,17 @@
 from __future__ import division
 
 import datetime
+import hashlib
 import logging
 import json
 import math
 import numpy as np
+from collections import defaultdict
 from scipy.optimize import curve_fit
 
 from django.conf import settings
-from django.db.models import Sum, Max
+from django.core.cache import cache
+from django.db.models import Count, Max
 from psychometrics.models import PsychometricData
 from courseware.models import StudentModule
 from pytz import UTC
@@ -25,6 +28,9 @@ log = logging.getLogger("edx.psychometrics")
 
 db = getattr(settings, 'DATABASE_FOR_PSYCHOMETRICS', 'default')
 
+# generated plots are cached per problem until its psychometric data changes
+PLOTS_CACHE_TIMEOUT = 24 * 60 * 60
+
 #-----------------------------------------------------------------------------
 # fit functions
 
@@ -37,6 +43,19 @@ def func_2pl(x, a, b):
     edax = np.exp(D * a * (x - b))
     return edax / (1 + edax)
 
+
+def fit_2pl(xdat, ydat, p0):
+    """
+    Least-squares fit of the 2PL function to the points xdat, ydat, starting
+    from the (a, b) parameters p0.  Returns the fitted (a, b) parameters, or
+    None if the fit failed.
+    """
+    try:
+        return curve_fit(func_2pl, xdat, ydat, p0)[0]
+    except Exception as err:
+        log.debug('Error in psychoanalyze curve fitting: %s' % err)
+        return None
+
 #-----------------------------------------------------------------------------
 # statistics class
 
@@ -70,6 +89,20 @@ class StatVar(object):
         self.sum2 += x ** 2
         self.cnt += 1
 
+    def add_array(self, xdata):
+        """
+        Add all the numbers of the numpy array xdata, ignoring NaNs (missing values).
+        """
+        xdata = xdata[~np.isnan(xdata)]
+        if not len(xdata):
+            return
+        xmin, xmax = float(xdata.min()), float(xdata.max())
+        self.min = xmin if self.min is None else min(self.min, xmin)
+        self.max = xmax if self.max is None else max(self.max, xmax)
+        self.sum += float(xdata.sum())
+        self.sum2 += float((xdata ** 2).sum())
+        self.cnt += len(xdata)
+
     def avg(self):
         if self.cnt is None:
             return 0
@@ -110,59 +143,150 @@ def make_histogram(ydata, bins=None):
         bins = range(0, 100, 10)
 
     nbins = len(bins)
-    hist = dict(zip(bins, [0] * nbins))
-    for y in ydata:
-        for b in bins[::-1]:  # in reverse order
-            if y > b:
-                hist[b] += 1
-                break
+    ydata = np.asarray(ydata, dtype=float)
+    ydata = ydata[~np.isnan(ydata)]
+    # each y goes in the largest bin it is strictly greater than, if any
+    index = np.searchsorted(np.asarray(bins, dtype=float), ydata, side='left') - 1
+    index = index[index >= 0]
+    counts = np.bincount(index, minlength=nbins) if index.size else np.zeros(nbins, dtype=int)
+    hist = dict(zip(bins, [int(count) for count in counts[:nbins]]))
     # hist['bins'] = bins
     return hist
 
 #-----------------------------------------------------------------------------
 
 
+def _problem_stamps(pmdset):
+    '''
+    Return dict of {problem (location url): (count, last modified)} for the given PsychometricData,
+    in a single grouped query.  A problem's plots only change when its stamp does.
+    '''
+    rows = pmdset.values('studentmodule__module_state_key').annotate(
+        count=Count('id'), modified=Max('studentmodule__modified')
+    )
+    return dict((row['studentmodule__module_state_key'], (row['count'], row['modified'])) for row in rows)
+
+
 def problems_with_psychometric_data(course_id):
     '''
     Return dict of {problems (location urls): count} for which psychometric data is available.
     Does this for a given course_id.
     '''
     pmdset = PsychometricData.objects.using(db).filter(studentmodule__course_id=course_id)
-    plist = [p['studentmodule__module_state_key'] for p in pmdset.values('studentmodule__module_state_key').distinct()]
-    problems = dict((p, pmdset.filter(studentmodule__module_state_key=p).count()) for p in plist)
-
-    return problems
+    return dict((problem, count) for problem, (count, _modified) in _problem_stamps(pmdset).iteritems())
 
 #-----------------------------------------------------------------------------
 
 
-def generate_plots_for_problem(problem):
+def _load_psychometric_data(pmdset):
+    '''
+    Load the given PsychometricData with one query, returning dict of
+    {problem (location url): (grades, max_grades, attempts, checktimes)}, where
+    grades and max_grades are float numpy arrays (NaN when missing), attempts an
+    int numpy array, and checktimes a list of the stored checktimes strings.
+    '''
+    columns = defaultdict(lambda: ([], [], [], []))
+    rows = pmdset.values_list(
+        'studentmodule__module_state_key', 'studentmodule__grade', 'studentmodule__max_grade',
+        'attempts', 'checktimes'
+    )
+    for problem, grade, max_grade, attempts, checktimes in rows.iterator():
+        grades, max_grades, attempt_counts, checktimes_list = columns[problem]
+        grades.append(np.nan if grade is None else grade)
+        max_grades.append(np.nan if max_grade is None else max_grade)
+        attempt_counts.append(attempts or 0)
+        checktimes_list.append(checktimes)
+
+    return dict(
+        (problem, (
+            np.array(grades, dtype=float),
+            np.array(max_grades, dtype=float),
+            np.array(attempt_counts, dtype=int),
+            checktimes_list,
+        ))
+        for problem, (grades, max_grades, attempt_counts, checktimes_list) in columns.iteritems()
+    )
+
+
+def _plots_cache_key(problem, stamp):
+    '''
+    Cache key for the plots of a problem, valid as long as its stamp (see _problem_stamps) is unchanged.
+    '''
+    return 'psychometrics.plots.{0}'.format(hashlib.md5(repr((problem, stamp))).hexdigest())
 
+
+def generate_plots_for_course(course_id):
+    '''
+    Generate (and cache) the plots of every problem of a course with psychometric data.
+
+    Only the problems whose data changed since their plots were cached are
+    recomputed, from the data of the whole course loaded in one query.
+    Returns dict of {problem: (msg, plots)}.
+    '''
+    pmdset = PsychometricData.objects.using(db).filter(studentmodule__course_id=course_id)
+    stamps = _problem_stamps(pmdset)
+    keys = dict((problem, _plots_cache_key(problem, stamp)) for problem, stamp in stamps.iteritems())
+
+    cached = cache.get_many(keys.values())
+    results = dict((problem, cached[key]) for problem, key in keys.iteritems() if key in cached)
+
+    stale = set(keys).difference(results)
+    if stale:
+        data = _load_psychometric_data(pmdset.filter(studentmodule__module_state_key__in=list(stale)))
+        fresh = _generate_plots_batch(data)
+        cache.set_many(dict((keys[problem], result) for problem, result in fresh.iteritems()), PLOTS_CACHE_TIMEOUT)
+        results.update(fresh)
+
+    return results
+
+
+def generate_plots_for_problem(problem):
+    '''
+    Return (msg, plots) for the given problem, using the cached plots if its
+    psychometric data did not change since they were generated.
+    '''
     pmdset = PsychometricData.objects.using(db).filter(studentmodule__module_state_key=problem)
-    nstudents = pmdset.count()
+    stamp = _problem_stamps(pmdset).get(problem, (0, None))
+    key = _plots_cache_key(problem, stamp)
+
+    result = cache.get(key)
+    if result is None:
+        data = _load_psychometric_data(pmdset).get(problem)
+        if data is None:
+            return _generate_plots(problem, np.array([]), np.array([]), np.array([], dtype=int), [])
+        result = _generate_plots(problem, *data)
+        cache.set(key, result, PLOTS_CACHE_TIMEOUT)
+    return result
+
+
+def _analyze_problem(problem, grades, max_grades, attempts, checktimes_list):
+    '''
+    Compute the grade histogram and check time histogram plots of a problem
+    from its psychometric data arrays (see _load_psychometric_data), and the
+    IRT curves to fit.  Returns a dict with keys msg, plots, and, unless the
+    problem has too few students, xdat, max_attempts, max_grade and curves:
+    a dict of {grade: cumulative fraction of the students with this grade who
+    got it within 1, 2, ... attempts}.
+    '''
+    nstudents = len(grades)
     msg = ""
     plots = []
 
     if nstudents < 2:
         msg += "%s nstudents=%d --> skipping, too few" % (problem, nstudents)
-        return msg, plots
+        return {'msg': msg, 'plots': plots}
 
-    max_grade = pmdset[0].studentmodule.max_grade
+    max_grade = None if np.isnan(max_grades[0]) else float(max_grades[0])
 
-    agdat = pmdset.aggregate(Sum('attempts'), Max('attempts'))
-    max_attempts = agdat['attempts__max']
-    total_attempts = agdat['attempts__sum']  # not used yet
+    max_attempts = int(attempts.max())
 
     msg += "max attempts = %d" % max_attempts
 
     xdat = range(1, max_attempts + 1)
-    dataset = {'xdat': xdat}
 
     # compute grade statistics
-    grades = [pmd.studentmodule.grade for pmd in pmdset]
     gsv = StatVar()
-    for g in grades:
-        gsv += g
+    gsv.add_array(grades)
     msg += "<br><p><font color='blue'>Grade distribution: %s</font></p>" % gsv
 
     # generate grade histogram
@@ -197,23 +321,19 @@ def generate_plots_for_problem(problem):
         msg += "<br/>Not generating histogram: max_grade=%s" % max_grade
 
     # histogram of time differences between checks
-    # Warning: this is inefficient - doesn't scale to large numbers of students
     dtset = []  # time differences in minutes
-    dtsv = StatVar()
-    for pmd in pmdset:
+    for checktimes_text in checktimes_list:
         try:
-            checktimes = eval(pmd.checktimes)  # update log of attempt timestamps
+            checktimes = eval(checktimes_text)  # update log of attempt timestamps
         except:
             continue
         if len(checktimes) < 2:
             continue
-        ct0 = checktimes[0]
-        for ct in checktimes[1:]:
-            dt = (ct - ct0).total_seconds() / 60.0
-            if dt < 20:  # ignore if dt too long
-                dtset.append(dt)
-                dtsv += dt
-            ct0 = ct
+        dts = np.array([(ct - ct0).total_seconds() / 60.0 for ct0, ct in zip(checktimes[:-1], checktimes[1:])])
+        dtset.extend(dts[dts < 20])  # ignore if dt too long
+    dtset = np.array(dtset, dtype=float)
+    dtsv = StatVar()
+    dtsv.add_array(dtset)
     if dtsv.cnt > 2:
         msg += "<br/><p><font color='brown'>Time differences between checks: %s</font></p>" % dtsv
         bins = np.linspace(0, 1.5 * dtsv.sdv(), 30)
@@ -232,32 +352,51 @@ def generate_plots_for_problem(problem):
         plots.append(plot)
 
     # one IRT plot curve for each grade received (TODO: this assumes integer grades)
+    curves = {}
     for grade in range(1, int(max_grade) + 1):
-        yset = {}
-        gset = pmdset.filter(studentmodule__grade=grade)
-        ngset = gset.count()
+        gattempts = attempts[grades == grade]
+        ngset = len(gattempts)
         if ngset == 0:
             continue
-        ydat = []
-        ylast = 0
-        for x in xdat:
-            y = gset.filter(attempts=x).count() / ngset
-            ydat.append(y + ylast)
-            ylast = y + ylast
-        yset['ydat'] = ydat
-
-        if len(ydat) > 3:  # try to fit to logistic function if enough data points
-            try:
-                cfp = curve_fit(func_2pl, xdat, ydat, [1.0, max_attempts / 2.0])
-                yset['fitparam'] = cfp
-                yset['fitpts'] = func_2pl(np.array(xdat), *cfp[0])
-                yset['fiterr'] = [yd - yf for (yd, yf) in zip(ydat, yset['fitpts'])]
-                fitx = np.linspace(xdat[0], xdat[-1], 100)
-                yset['fitx'] = fitx
-                yset['fity'] = func_2pl(np.array(fitx), *cfp[0])
-            except Exception as err:
-                log.debug('Error in psychoanalyze curve fitting: %s' % err)
+        # cumulative fraction of the students with this grade who got it within x attempts
+        gattempts = gattempts[gattempts >= 1]
+        if gattempts.size:
+            counts = np.bincount(gattempts, minlength=max_attempts + 1)[1:max_attempts + 1]
+        else:
+            counts = np.zeros(max_attempts, dtype=int)
+        curves[grade] = [float(y) for y in np.cumsum(counts) / ngset]
+
+    return {
+        'msg': msg,
+        'plots': plots,
+        'xdat': xdat,
+        'max_attempts': max_attempts,
+        'max_grade': max_grade,
+        'curves': curves,
+    }
 
+
+def _irt_plots(analysis, fits):
+    '''
+    Return (msg, plots) for a problem analyzed by _analyze_problem, adding the
+    IRT plots of its curves, with the 2PL fit parameters (a, b) given by `fits`,
+    a dict of {grade: parameters}, for the curves which were fitted.
+    '''
+    msg, plots = analysis['msg'], analysis['plots']
+    if 'curves' not in analysis:
+        return msg, plots
+    xdat = analysis['xdat']
+
+    dataset = {'xdat': xdat}
+    for grade, ydat in analysis['curves'].iteritems():
+        yset = {'ydat': ydat}
+        if fits.get(grade) is not None:
+            yset['fitparam'] = fits[grade]
+            yset['fitpts'] = func_2pl(np.array(xdat), *fits[grade])
+            yset['fiterr'] = [yd - yf for (yd, yf) in zip(ydat, yset['fitpts'])]
+            fitx = np.linspace(xdat[0], xdat[-1], 100)
+            yset['fitx'] = fitx
+            yset['fity'] = func_2pl(np.array(fitx), *fits[grade])
         dataset['grade_%d' % grade] = yset
 
     axisopts = """{
@@ -272,7 +411,7 @@ def generate_plots_for_problem(problem):
          }"""
 
     # generate points for flot plot
-    for grade in range(1, int(max_grade) + 1):
+    for grade in range(1, int(analysis['max_grade']) + 1):
         jsdata = ""
         jsplots = []
         gkey = 'grade_%d' % grade
@@ -283,7 +422,7 @@ def generate_plots_for_problem(problem):
             if 'fitpts' in yset:
                 jsdata += 'var fit = %s;\n' % (json.dumps(zip(yset['fitx'], yset['fity'])))
                 jsplots.append('{ data: fit,  lines: { show: true }, color: "blue" }')
-                (a, b) = yset['fitparam'][0]
+                (a, b) = yset['fitparam']
                 irtinfo = "(2PL: D=1.7, a=%6.3f, b=%6.3f)" % (a, b)
             else:
                 irtinfo = ""
@@ -298,6 +437,33 @@ def generate_plots_for_problem(problem):
     #log.debug('plots = %s' % plots)
     return msg, plots
 
+
+def _generate_plots_batch(data):
+    '''
+    Return dict of {problem: (msg, plots)} for the problems of `data`, a dict of
+    {problem: psychometric data arrays} (see _load_psychometric_data).
+    '''
+    analyses = dict((problem, _analyze_problem(problem, *arrays)) for problem, arrays in data.iteritems())
+
+    problem_fits = defaultdict(dict)
+    for problem, analysis in analyses.iteritems():
+        for grade, ydat in analysis.get('curves', {}).iteritems():
+            # only fit to the logistic function if enough data points
+            if len(ydat) > 3:
+                problem_fits[problem][grade] = fit_2pl(
+                    analysis['xdat'], ydat, [1.0, analysis['max_attempts'] / 2.0]
+                )
+
+    return dict((problem, _irt_plots(analysis, problem_fits[problem])) for problem, analysis in analyses.iteritems())
+
+
+def _generate_plots(problem, grades, max_grades, attempts, checktimes_list):
+    '''
+    Compute the grade histogram, check time histogram and IRT plots of a
+    problem from its psychometric data arrays (see _load_psychometric_data).
+    '''
+    return _generate_plots_batch({problem: (grades, max_grades, attempts, checktimes_list)})[problem]
+
 #-----------------------------------------------------------------------------
 
 
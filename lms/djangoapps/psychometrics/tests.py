@@ -0,0 +1,151 @@
+"""
+Tests of the psychometrics plots
+"""
+import datetime
+
+import numpy as np
+from mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from courseware.tests.factories import StudentModuleFactory
+from psychometrics import psychoanalyze
+from psychometrics.models import PsychometricData
+
+
+COURSE_ID = 'MITx/999/Robot_Super_Course'
+PROBLEM = 'i4x://MITx/999/problem/robot'
+
+
+def loop_histogram(ydata, bins):
+    """
+    The histogram of ydata as make_histogram computed it with nested loops
+    """
+    hist = dict(zip(bins, [0] * len(bins)))
+    for y in ydata:
+        for b in bins[::-1]:  # in reverse order
+            if y > b:
+                hist[b] += 1
+                break
+    return hist
+
+
+class HistogramTest(TestCase):
+    """
+    Tests of make_histogram and StatVar
+    """
+    def test_histogram_matches_loops(self):
+        ydata = np.random.RandomState(0).uniform(-10, 110, 1000)
+        ydata[::7] = np.round(ydata[::7], -1)  # values on the bins
+        for bins in (None, range(0, 100, 10), list(np.linspace(0, 100, 30))):
+            expected = loop_histogram(ydata, bins if bins is not None else range(0, 100, 10))
+            self.assertEqual(psychoanalyze.make_histogram(ydata, bins), expected)
+
+    def test_histogram_ignores_missing_values(self):
+        self.assertEqual(
+            psychoanalyze.make_histogram([np.nan, 15, 5], [0, 10]),
+            {0: 1, 10: 1}
+        )
+        self.assertEqual(psychoanalyze.make_histogram([], [0, 10]), {0: 0, 10: 0})
+        # no value above the first bin
+        self.assertEqual(psychoanalyze.make_histogram([0, -5], [0, 10]), {0: 0, 10: 0})
+
+    def test_add_array_matches_add(self):
+        values = [3.0, 1.5, 7.25, 0.0, 2.0]
+        added = psychoanalyze.StatVar()
+        for value in values + [None]:
+            added += value
+        added_array = psychoanalyze.StatVar()
+        added_array.add_array(np.array(values[:2] + [np.nan]))
+        added_array.add_array(np.array(values[2:]))
+        for stat in ('cnt', 'min', 'max', 'sum', 'sum2'):
+            self.assertEqual(getattr(added_array, stat), getattr(added, stat))
+        self.assertAlmostEqual(added_array.sdv(), added.sdv())
+
+
+class FitTest(TestCase):
+    """
+    Tests of the 2PL fits of the IRT curves
+    """
+    def test_fit_recovers_parameters(self):
+        xdat = range(1, 11)
+        ydat = list(psychoanalyze.func_2pl(np.array(xdat), 1.2, 4.5))
+        np.testing.assert_allclose(psychoanalyze.fit_2pl(xdat, ydat, [1.0, 5.0]), [1.2, 4.5], rtol=1e-4)
+
+    def test_failed_fit(self):
+        with patch('psychometrics.psychoanalyze.curve_fit', side_effect=RuntimeError('no convergence')):
+            self.assertIsNone(psychoanalyze.fit_2pl(range(1, 6), [0.1, 0.2, 0.5, 0.8, 0.9], [1.0, 2.5]))
+
+
+class PlotsTest(TestCase):
+    """
+    Tests of the plots generated from the psychometric data of a problem
+    """
+    def setUp(self):
+        cache.clear()
+        # stored as the repr of naive datetimes, which the plots eval
+        start = datetime.datetime(2014, 1, 1)
+        # (grade, attempts) of each student
+        self.students = [(1, 1), (1, 2), (1, 2), (1, 4), (0, 3), (1, 3), (0, 5), (1, 5)]
+        for grade, attempts in self.students:
+            module = StudentModuleFactory.create(
+                course_id=COURSE_ID, module_state_key=PROBLEM, grade=grade, max_grade=1
+            )
+            checktimes = [start + datetime.timedelta(minutes=minutes) for minutes in range(attempts)]
+            PsychometricData.objects.create(studentmodule=module, attempts=attempts, checktimes=repr(checktimes))
+
+    def test_problems_with_psychometric_data(self):
+        self.assertEqual(
+            psychoanalyze.problems_with_psychometric_data(COURSE_ID),
+            {PROBLEM: len(self.students)}
+        )
+
+    def test_irt_curves_match_loops(self):
+        data = psychoanalyze._load_psychometric_data(PsychometricData.objects.all())  # pylint: disable=protected-access
+        analysis = psychoanalyze._analyze_problem(PROBLEM, *data[PROBLEM])  # pylint: disable=protected-access
+
+        # the fraction of the students with grade 1 who got it within x attempts, counted one x at a time
+        attempts = [student_attempts for grade, student_attempts in self.students if grade == 1]
+        ylast = 0
+        expected = []
+        for x in analysis['xdat']:
+            ylast += len([student_attempts for student_attempts in attempts if student_attempts == x]) / float(len(attempts))
+            expected.append(ylast)
+        self.assertEqual(analysis['curves'].keys(), [1])
+        np.testing.assert_allclose(analysis['curves'][1], expected)
+
+    def test_irt_curves_without_attempts(self):
+        grades, max_grades = np.array([1.0, 1.0, 0.0]), np.array([1.0, 1.0, 1.0])
+        analysis = psychoanalyze._analyze_problem(  # pylint: disable=protected-access
+            PROBLEM, grades, max_grades, np.array([0, 0, 2]), ['[]'] * 3
+        )
+        self.assertEqual(analysis['curves'], {1: [0.0, 0.0]})
+
+    def test_plots(self):
+        msg, plots = psychoanalyze.generate_plots_for_problem(PROBLEM)
+        self.assertIn('max attempts = 5', msg)
+        self.assertIn('thistogram', [plot['id'] for plot in plots])
+        self.assertIn('irt1', [plot['id'] for plot in plots])
+
+    def test_plots_are_cached(self):
+        result = psychoanalyze.generate_plots_for_problem(PROBLEM)
+        with patch('psychometrics.psychoanalyze._generate_plots_batch') as generate:
+            self.assertEqual(psychoanalyze.generate_plots_for_problem(PROBLEM), result)
+            self.assertEqual(psychoanalyze.generate_plots_for_course(COURSE_ID), {PROBLEM: result})
+            self.assertFalse(generate.called)
+
+    def test_new_data_refreshes_plots(self):
+        psychoanalyze.generate_plots_for_course(COURSE_ID)
+        module = StudentModuleFactory.create(course_id=COURSE_ID, module_state_key=PROBLEM, grade=1, max_grade=1)
+        PsychometricData.objects.create(studentmodule=module, attempts=1)
+        with patch('psychometrics.psychoanalyze._generate_plots_batch', return_value={PROBLEM: ('', [])}) as generate:
+            psychoanalyze.generate_plots_for_course(COURSE_ID)
+            self.assertEqual(generate.call_count, 1)
+
+    def test_command(self):
+        call_command('generate_psychometrics_plots', COURSE_ID)
+        with patch('psychometrics.psychoanalyze._generate_plots_batch') as generate:
+            psychoanalyze.generate_plots_for_problem(PROBLEM)
+            self.assertFalse(generate.called)
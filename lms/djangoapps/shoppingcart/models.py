@@ -1,6 +1,6 @@
 """ Models for the shopping cart and assorted purchase types """
 
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from decimal import Decimal
 import pytz
@@ -16,7 +16,7 @@ from django.core.mail import send_mail
 from django.contrib.auth.models import User
 from django.utils.translation import ugettext as _
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Count, Sum
 from django.core.urlresolvers import reverse
 from model_utils.managers import InheritanceManager
 
@@ -615,3 +615,41 @@ class CertificateItem(OrderItem):
                 mode='verified',
                 status='purchased',
                 unit_cost__gt=(CourseMode.min_course_price_for_verified_for_currency(course_id, 'usd')))).count()
+
+    @classmethod
+    def verified_certificates_totals_by_course(cls):
+        """
+        Returns a dictionary mapping (course_id, status) to the 'count' of the verified certificates of
+        the course with that status and the sums of their 'unit_cost' and 'service_fee', computed for
+        all courses with a single GROUP BY query.  Missing keys are zero totals.
+        """
+        query = use_read_replica_if_available(
+            CertificateItem.objects.filter(mode='verified').values('course_id', 'status').order_by().annotate(
+                count=Count('id'), unit_cost_sum=Sum('unit_cost'), service_fee_sum=Sum('service_fee')))
+        totals = defaultdict(lambda: {'count': 0, 'unit_cost': Decimal(0.00), 'service_fee': Decimal(0.00)})
+        for item in query:
+            course_totals = totals[(item['course_id'], item['status'])]
+            course_totals['count'] = item['count']
+            for field in ('unit_cost', 'service_fee'):
+                if item[field + '_sum'] is not None:
+                    course_totals[field] = item[field + '_sum']
+        return totals
+
+    @classmethod
+    def verified_certificates_contributing_more_than_minimum_by_course(cls, min_prices):
+        """
+        Returns a dictionary mapping course ids to the number of purchased verified certificates of the
+        course which cost more than its minimum price in `min_prices` (a dictionary of course ids to
+        prices, in which a missing course has a minimum of 0).  Missing course ids have no such certificate.
+
+        The certificates are counted by course and unit cost in the database, so only the distinct prices
+        of each course are compared in memory.
+        """
+        query = use_read_replica_if_available(
+            CertificateItem.objects.filter(mode='verified', status='purchased').values(
+                'course_id', 'unit_cost').order_by().annotate(Count('id')))
+        counts = defaultdict(int)
+        for item in query:
+            if item['unit_cost'] > min_prices.get(item['course_id'], 0):
+                counts[item['course_id']] += item['id__count']
+        return counts
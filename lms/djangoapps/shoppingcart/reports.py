@@ -1,11 +1,11 @@
 """ Objects and functions related to generating CSV reports """
 
 from decimal import Decimal
+from StringIO import StringIO
 import unicodecsv
 
 from django.utils.translation import ugettext as _
 
-from courseware.courses import get_course_by_id
 from course_modes.models import CourseMode
 from shoppingcart.models import CertificateItem, OrderItem
 from student.models import CourseEnrollment
@@ -48,11 +48,23 @@ class Report(object):
         Given a file object to write to and {start/end date, start/end letter} bounds,
         generates a CSV report of the appropriate type.
         """
-        items = self.rows()
-        writer = unicodecsv.writer(filelike, encoding="utf-8")
+        for line in self.csv_lines():
+            filelike.write(line)
+
+    def csv_lines(self):
+        """
+        Generates the utf-8 encoded lines of the CSV report one row at a time, so that
+        the report can be streamed out as its rows are computed.
+        """
+        buff = StringIO()
+        writer = unicodecsv.writer(buff, encoding="utf-8")
         writer.writerow(self.header())
-        for item in items:
+        yield buff.getvalue()
+        for item in self.rows():
+            buff.seek(0)
+            buff.truncate()
             writer.writerow(item)
+            yield buff.getvalue()
 
 
 class RefundReport(Report):
@@ -150,15 +162,21 @@ class CertificateStatusReport(Report):
     inclusive, (i.e., the letter range H-J includes both Ithaca College and Harvard University), we
     calculate the total enrollment, audit enrollment, honor enrollment, verified enrollment, total
     gross revenue, gross revenue over the minimum, and total dollars refunded.
+
+    The figures of all the courses are computed by a few GROUP BY queries up front, rather than
+    by several queries per course.
     """
     def rows(self):
-        for course_id in course_ids_between(self.start_word, self.end_word):
-            # If the first letter of the university is between start_word and end_word, then we include
-            # it in the report.  These comparisons are unicode-safe.
-            cur_course = get_course_by_id(course_id)
-            university = cur_course.org
-            course = cur_course.number + " " + cur_course.display_name_with_default  # TODO add term (i.e. Fall 2013)?
-            counts = CourseEnrollment.enrollment_counts(course_id)
+        courses = course_names_between(self.start_word, self.end_word)
+        if not courses:
+            return
+        enrollment_counts = CourseEnrollment.enrollment_counts_by_course()
+        certificate_totals = CertificateItem.verified_certificates_totals_by_course()
+        min_prices = CourseMode.min_course_prices_for_verified_for_currency('usd')
+        contributing_more_than_minimum = CertificateItem.verified_certificates_contributing_more_than_minimum_by_course(min_prices)
+
+        for course_id, university, course in courses:
+            counts = enrollment_counts[course_id]
             total_enrolled = counts['total']
             audit_enrolled = counts['audit']
             honor_enrolled = counts['honor']
@@ -169,17 +187,15 @@ class CertificateStatusReport(Report):
                 gross_rev_over_min = Decimal(0.00)
             else:
                 verified_enrolled = counts['verified']
-                gross_rev = CertificateItem.verified_certificates_monetary_field_sum(course_id, 'purchased', 'unit_cost')
-                gross_rev_over_min = gross_rev - (CourseMode.min_course_price_for_verified_for_currency(course_id, 'usd') * verified_enrolled)
+                gross_rev = certificate_totals[(course_id, 'purchased')]['unit_cost']
+                gross_rev_over_min = gross_rev - (min_prices.get(course_id, 0) * verified_enrolled)
 
-            num_verified_over_the_minimum = CertificateItem.verified_certificates_contributing_more_than_minimum(course_id)
+            num_verified_over_the_minimum = contributing_more_than_minimum[course_id]
 
             # should I be worried about is_active here?
-            number_of_refunds = CertificateItem.verified_certificates_count(course_id, 'refunded')
-            if number_of_refunds == 0:
-                dollars_refunded = Decimal(0.00)
-            else:
-                dollars_refunded = CertificateItem.verified_certificates_monetary_field_sum(course_id, 'refunded', 'unit_cost')
+            refunded = certificate_totals[(course_id, 'refunded')]
+            number_of_refunds = refunded['count']
+            dollars_refunded = refunded['unit_cost']
 
             course_announce_date = ""
             course_reg_start_date = ""
@@ -234,24 +250,25 @@ class UniversityRevenueShareReport(Report):
     total payments collected, service fees, number of refunds, and total amount of refunds.
     """
     def rows(self):
-        for course_id in course_ids_between(self.start_word, self.end_word):
-            cur_course = get_course_by_id(course_id)
-            university = cur_course.org
-            course = cur_course.number + " " + cur_course.display_name_with_default
-            total_payments_collected = CertificateItem.verified_certificates_monetary_field_sum(course_id, 'purchased', 'unit_cost')
-            service_fees = CertificateItem.verified_certificates_monetary_field_sum(course_id, 'purchased', 'service_fee')
-            num_refunds = CertificateItem.verified_certificates_count(course_id, "refunded")
-            amount_refunds = CertificateItem.verified_certificates_monetary_field_sum(course_id, 'refunded', 'unit_cost')
-            num_transactions = (num_refunds * 2) + CertificateItem.verified_certificates_count(course_id, "purchased")
+        courses = course_names_between(self.start_word, self.end_word)
+        if not courses:
+            return
+        certificate_totals = CertificateItem.verified_certificates_totals_by_course()
+
+        for course_id, university, course in courses:
+            purchased = certificate_totals[(course_id, 'purchased')]
+            refunded = certificate_totals[(course_id, 'refunded')]
+            num_refunds = refunded['count']
+            num_transactions = (num_refunds * 2) + purchased['count']
 
             yield [
                 university,
                 course,
                 num_transactions,
-                total_payments_collected,
-                service_fees,
+                purchased['unit_cost'],
+                purchased['service_fee'],
                 num_refunds,
-                amount_refunds
+                refunded['unit_cost']
             ]
 
     def header(self):
@@ -266,14 +283,17 @@ class UniversityRevenueShareReport(Report):
         ]
 
 
-def course_ids_between(start_word, end_word):
+def course_names_between(start_word, end_word):
     """
-    Returns a list of all valid course_ids that fall alphabetically between start_word and end_word.
+    Returns a list of (course_id, university, course name) for all valid courses whose course_id falls
+    alphabetically between start_word and end_word, in the order of the modulestore's course listing.
     These comparisons are unicode-safe.
-    """
 
-    valid_courses = []
-    for course in modulestore().get_courses():
-        if (start_word.lower() <= course.id.lower() <= end_word.lower()) and (get_course_by_id(course.id) is not None):
-            valid_courses.append(course.id)
-    return valid_courses
+    The names are read from a single listing of the courses, rather than by loading each course again.
+    """
+    start_word, end_word = start_word.lower(), end_word.lower()
+    return [
+        (course.id, course.org, course.number + " " + course.display_name_with_default)  # TODO add term (i.e. Fall 2013)?
+        for course in modulestore().get_courses()
+        if start_word <= course.id.lower() <= end_word
+    ]
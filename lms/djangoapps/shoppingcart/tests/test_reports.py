@@ -177,6 +177,22 @@ class ReportTypeTests(ModuleStoreTestCase):
         csv = csv_file.getvalue()
         self.assertEqual(csv.replace('\r\n', '\n').strip(), self.CORRECT_UNI_REVENUE_SHARE_CSV.strip())
 
+    def test_cert_status_csv_several_courses(self):
+        """
+        Tests that the totals computed for all courses at once are joined to the right courses,
+        and that courses outside of the range are left out
+        """
+        CourseFactory.create(org='MITx', number='888', display_name=u'Other Course')
+        CourseEnrollment.enroll(self.honor_user, "MITx/888/Other_Course", "honor")
+        CourseFactory.create(org='MITx', number='777', display_name=u'Excluded Course')
+
+        report = initialize_report("certificate_status", self.now - self.FIVE_MINS, self.now + self.FIVE_MINS, 'MITx/8', 'Z')
+        csv = ''.join(report.csv_lines())
+        self.assertEqual(
+            set(csv.replace('\r\n', '\n').strip().split('\n')),
+            set(self.CORRECT_CERT_STATUS_CSV.strip().split('\n') + ['MITx,888 Other Course,,,,,1,0,1,0,0,0,0,0,0'])
+        )
+
 
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
 class ItemizedPurchaseReportTest(ModuleStoreTestCase):
@@ -210,12 +210,11 @@ def csv_report(request):
             return _render_report_form(start_date, end_date, start_letter, end_letter, report_type, date_fmt_error=True)
 
         report = initialize_report(report_type, start_date, end_date, start_letter, end_letter)
-        items = report.rows()
 
-        response = HttpResponse(mimetype='text/csv')
+        # the rows are computed and sent as the response is written out
+        response = HttpResponse(report.csv_lines(), mimetype='text/csv')
         filename = "purchases_report_{}.csv".format(datetime.datetime.now(pytz.UTC).strftime("%Y-%m-%d-%H-%M-%S"))
         response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
-        report.write_csv(response)
         return response
 
     elif request.method == 'GET':
@@ -187,6 +187,9 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_CONNECTIONS_PER_TASK = ENV_TOKENS.get('BULK_EMAIL_CONNECTIONS_PER_TASK', BULK_EMAIL_CONNECTIONS_PER_TASK)
+BULK_EMAIL_SEND_BATCH_SIZE = ENV_TOKENS.get('BULK_EMAIL_SEND_BATCH_SIZE', BULK_EMAIL_SEND_BATCH_SIZE)
+BULK_EMAIL_MAX_SENDS_PER_SECOND = ENV_TOKENS.get('BULK_EMAIL_MAX_SENDS_PER_SECOND', BULK_EMAIL_MAX_SENDS_PER_SECOND)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it.  At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -351,6 +354,20 @@ GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
 
+# Certificate generation
+CERTIFICATES_PER_TASK = ENV_TOKENS.get('CERTIFICATES_PER_TASK', CERTIFICATES_PER_TASK)
+CERTIFICATES_PER_QUERY = ENV_TOKENS.get('CERTIFICATES_PER_QUERY', CERTIFICATES_PER_QUERY)
+
+# Mako templates
+MAKO_PRECOMPILE_TEMPLATES = ENV_TOKENS.get('MAKO_PRECOMPILE_TEMPLATES', MAKO_PRECOMPILE_TEMPLATES)
+
+# Startup
+DEFER_STARTUP_INITIALIZATION = ENV_TOKENS.get('DEFER_STARTUP_INITIALIZATION', DEFER_STARTUP_INITIALIZATION)
+
+# Deep heartbeat
+HEARTBEAT_CHECK_TIMEOUT = ENV_TOKENS.get('HEARTBEAT_CHECK_TIMEOUT', HEARTBEAT_CHECK_TIMEOUT)
+HEARTBEAT_DEEP_CACHE_SECONDS = ENV_TOKENS.get('HEARTBEAT_DEEP_CACHE_SECONDS', HEARTBEAT_DEEP_CACHE_SECONDS)
+
 ##### ACCOUNT LOCKOUT DEFAULT PARAMETERS #####
 MAX_FAILED_LOGIN_ATTEMPTS_ALLOWED = ENV_TOKENS.get("MAX_FAILED_LOGIN_ATTEMPTS_ALLOWED", 5)
 MAX_FAILED_LOGIN_ATTEMPTS_LOCKOUT_PERIOD_SECS = ENV_TOKENS.get("MAX_FAILED_LOGIN_ATTEMPTS_LOCKOUT_PERIOD_SECS", 15 * 60)
@@ -277,6 +277,12 @@ OPENID_PROVIDER_TRUSTED_ROOTS = ['cs50.net', '*.cs50.net']
 # templates
 from tempdir import mkdtemp_clean
 MAKO_MODULE_DIR = mkdtemp_clean('mako')
+# Compile all the mako templates at startup, rather than each on first use
+MAKO_PRECOMPILE_TEMPLATES = False
+
+# Leave the heaviest startup initializations (the modulestores, the mako
+# template lookups) to their first use, for a faster startup
+DEFER_STARTUP_INITIALIZATION = False
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [PROJECT_ROOT / 'templates',
                           COMMON_ROOT / 'templates',
@@ -399,6 +405,11 @@ if FEATURES.get('ENABLE_SQL_TRACKING_LOGS'):
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
 TRACKING_ENABLED = True
 
+# Seconds each service check of the deep heartbeat may take, and for which
+# the outcome of the checks is reused.
+HEARTBEAT_CHECK_TIMEOUT = 2
+HEARTBEAT_DEEP_CACHE_SECONDS = 10
+
 ######################## subdomain specific settings ###########################
 COURSE_LISTINGS = {}
 SUBDOMAIN_BRANDING = {}
@@ -1037,6 +1048,17 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of SMTP connections over which each bulk email task sends in parallel,
+# and the number of messages handed to a connection at a time.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 4
+BULK_EMAIL_SEND_BATCH_SIZE = 25
+
+# Maximum number of bulk email messages sent per second by all the workers
+# together, e.g. the SES sending rate.  Shared through the cache.  If this is
+# not set, sending is only slowed down after being throttled by the provider
+# (see BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS).
+BULK_EMAIL_MAX_SENDS_PER_SECOND = None
+
 
 ############################## Video ##########################################
 
@@ -1269,6 +1291,13 @@ REGISTRATION_EXTRA_FIELDS = {
 CERT_NAME_SHORT = "Certificate"
 CERT_NAME_LONG = "Certificate of Achievement"
 
+###################### Certificate Generation ######################
+# Number of students whose certificates are generated by each subtask of a
+# certificate generation task, and number of students read per query when
+# dividing them among the subtasks.
+CERTIFICATES_PER_TASK = 100
+CERTIFICATES_PER_QUERY = 1000
+
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
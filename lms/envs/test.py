@@ -173,6 +173,14 @@ CACHES = {
 
 }
 
+# Tests clear the configuration cache between tests to reset ConfigurationModels,
+# so don't let the in-process memo outlive it
+CONFIGURATION_MODEL_MEMO_TIMEOUT = 0
+
+# Send bulk email over a single connection, so that the failures of mocked
+# connections hit recipients in a predictable order
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
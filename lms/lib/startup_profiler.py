@@ -0,0 +1,147 @@
+"""
+Profiling of the startup of the LMS and Studio.
+
+When the STARTUP_PROFILE environment variable names a file, the startup
+modules of the LMS and Studio record how long each module took to import and
+each startup hook took to run, and write a JSON report of them to that file
+once startup is finished.  Otherwise, none of this costs anything.
+
+This module is imported before the settings are loaded, so it must only
+depend on the standard library.
+"""
+import __builtin__
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# The environment variable naming the file the report is written to
+STARTUP_PROFILE_ENV = 'STARTUP_PROFILE'
+
+# How many of the slowest imports the report lists
+REPORT_IMPORTS = 100
+
+
+class StartupProfiler(object):
+    """
+    Records the time spent importing each module, while it is installed as the
+    import function, and the time spent running each startup hook.
+    """
+    def __init__(self):
+        self._original_import = None
+        # module name -> [cumulative seconds, seconds excluding nested imports]
+        self.imports = {}
+        # (hook name, seconds), in the order the hooks ran
+        self.hooks = []
+        self._started = time.time()
+        # the seconds spent in the nested imports of each import in progress
+        self._nested = []
+
+    def start(self):
+        """
+        Installs the profiler as the import function.
+        """
+        self._original_import = __builtin__.__import__
+        __builtin__.__import__ = self._import
+
+    def stop(self):
+        """
+        Restores the import function the profiler replaced.
+        """
+        if self._original_import is not None:
+            __builtin__.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, *args, **kwargs):
+        """
+        Imports like __import__, recording the time spent in the first import of
+        each module.
+        """
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+
+        self._nested.append(0.0)
+        start = time.time()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            times = self.imports.setdefault(name, [0.0, 0.0])
+            times[0] += elapsed
+            times[1] += elapsed - nested
+
+    @contextmanager
+    def time_hook(self, name):
+        """
+        Context manager recording the time spent running the startup hook `name`.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.hooks.append((name, time.time() - start))
+
+    def report(self):
+        """
+        Returns the report of the startup: its total duration, the durations of
+        the startup hooks and the slowest imports, in seconds.
+        """
+        slowest = sorted(self.imports.iteritems(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'total': time.time() - self._started,
+            'hooks': [{'name': name, 'time': elapsed} for name, elapsed in self.hooks],
+            'imports': [
+                {'module': name, 'cumulative': cumulative, 'self': own}
+                for name, (cumulative, own) in slowest[:REPORT_IMPORTS]
+            ],
+        }
+
+
+_profiler = None
+
+
+def start_from_environ():
+    """
+    Starts profiling the startup if the STARTUP_PROFILE environment variable is
+    set, and it isn't already being profiled.
+    """
+    global _profiler  # pylint: disable=global-statement
+    if _profiler is None and os.environ.get(STARTUP_PROFILE_ENV):
+        _profiler = StartupProfiler()
+        _profiler.start()
+
+
+@contextmanager
+def time_hook(name):
+    """
+    Context manager recording the time spent running the startup hook `name`,
+    if the startup is being profiled.
+    """
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.time_hook(name):
+            yield
+
+
+def finish():
+    """
+    Stops profiling the startup, if it is being profiled, and writes the report
+    to the file named by the STARTUP_PROFILE environment variable.
+    """
+    global _profiler  # pylint: disable=global-statement
+    if _profiler is None:
+        return
+    profiler, _profiler = _profiler, None
+    profiler.stop()
+    report = profiler.report()
+    with open(os.environ[STARTUP_PROFILE_ENV], 'w') as report_file:
+        json.dump(report, report_file, indent=4)
+    log.info("Startup took %.2fs; profile written to %s", report['total'], os.environ[STARTUP_PROFILE_ENV])
@@ -2,12 +2,17 @@
 Module for code that should run during LMS startup
 """
 
+from lms.lib import startup_profiler
+startup_profiler.start_from_environ()
+
 from django.conf import settings
 
 # Force settings to run so that the python path is modified
-settings.INSTALLED_APPS  # pylint: disable=W0104
+with startup_profiler.time_hook('settings'):
+    settings.INSTALLED_APPS  # pylint: disable=W0104
 
 from django_startup import autostartup
+from xmodule.modulestore.django import warm_block_registry
 import edxmako
 
 
@@ -15,10 +20,15 @@ def run():
     """
     Executed during django startup
     """
-    autostartup()
+    autostartup(time_hook=startup_profiler.time_hook)
+
+    if not settings.DEFER_STARTUP_INITIALIZATION:
+        with startup_profiler.time_hook('block_registry'):
+            warm_block_registry()
 
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
-        enable_theme()
+        with startup_profiler.time_hook('enable_theme'):
+            enable_theme()
 
 
 def enable_theme():
@@ -56,7 +56,7 @@ urlpatterns = ('',  # nopep8
     url(r'^password_reset_done/$', django.contrib.auth.views.password_reset_done,
         name='auth_password_reset_done'),
 
-    url(r'^heartbeat$', include('heartbeat.urls')),
+    url(r'^heartbeat', include('heartbeat.urls')),
 
     url(r'^user_api/', include('user_api.urls')),
 
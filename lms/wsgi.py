@@ -6,12 +6,19 @@ import lms.startup as startup
 startup.run()
 
 from django.conf import settings
-from xmodule.modulestore.django import modulestore
+from lms.lib import startup_profiler
+from xmodule.modulestore.django import modulestore, load_course_snapshots
 
-# Trigger a forced initialization of our modulestores since this can take a
-# while to complete and we want this done before HTTP requests are accepted.
-for store_name in settings.MODULESTORE:
-    modulestore(store_name)
+# Trigger a forced initialization of our modulestores, and load their course
+# snapshots, since this can take a while to complete and we want this done
+# before HTTP requests are accepted, unless initializations are deferred to
+# their first use.
+if not settings.DEFER_STARTUP_INITIALIZATION:
+    with startup_profiler.time_hook('modulestore'):
+        for store_name in settings.MODULESTORE:
+            modulestore(store_name)
+    with startup_profiler.time_hook('course_snapshots'):
+        load_course_snapshots()
 
 
 # This application object is used by the development server
@@ -19,3 +26,5 @@ for store_name in settings.MODULESTORE:
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
+startup_profiler.finish()
+
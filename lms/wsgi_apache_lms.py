@@ -10,3 +10,6 @@ startup.run()
 # as well as any WSGI server configured to use this file.
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+from lms.lib import startup_profiler
+startup_profiler.finish()
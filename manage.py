@@ -90,6 +90,9 @@ if __name__ == "__main__":
     startup = importlib.import_module(edx_args.startup)
     startup.run()
 
+    from lms.lib import startup_profiler
+    startup_profiler.finish()
+
     from django.core.management import execute_from_command_line
 
     execute_from_command_line([sys.argv[0]] + django_args)